@@ -19,6 +19,7 @@
 
 from core.MObject import MObject
 import sys
+from core.helpers.AsyncRunCommand import AsyncRunCommand
 from core.helpers.RunCommand import RunCommand
 from core.Exceptions import MomError
 import re
@@ -49,9 +50,17 @@ class BuildScriptInterface( MObject ):
 		return self.__buildScript
 
 	def querySetting( self, setting ):
-		cmd = [ sys.executable, self.getBuildScript(), 'query', setting ] + self.getParameters()
-		runner = RunCommand( cmd, 1800 )
+		runner = self.createQuerySettingCommand( setting )
 		runner.run()
+		return self.parseQuerySettingResult( runner, setting )
+
+	def createQuerySettingCommand( self, setting ):
+		'''Return the (not yet executed) command that queries the setting.
+		It can be executed concurrently with other queries, the result is interpreted by parseQuerySettingResult().'''
+		cmd = [ sys.executable, self.getBuildScript(), 'query', setting ] + self.getParameters()
+		return AsyncRunCommand( cmd, 1800 )
+
+	def parseQuerySettingResult( self, runner, setting ):
 		if runner.getReturnCode() != 0:
 			raise MomError( 'Cannot query setting "{0}" for build script "{1}":\n {2}!'\
 				.format( setting, self.getBuildScript(), runner.getStdErrAsString() ) )
@@ -71,10 +80,15 @@ class BuildScriptInterface( MObject ):
 
 	def queryRevisionsSince( self, revision ):
 		'''Execute the build script, and return the lines it outputs for "query revisions-since"'''
+		runner = self.createRevisionsSinceCommand( revision )
+		runner.run()
+		return self.parseRevisionsSinceResult( runner )
 
+	def createRevisionsSinceCommand( self, revision ):
 		cmd = [ sys.executable, self.getBuildScript(), 'print', 'revisions-since', str( revision ) ] + self.getParameters()
-		runner = RunCommand( cmd, 1800 )
-		runner.run()
+		return AsyncRunCommand( cmd, 1800 )
+
+	def parseRevisionsSinceResult( self, runner ):
 		if runner.getReturnCode() != 0:
 			msg = 'Cannot get revision list for build script "{0}", continuing with next project.'\
 				.format( self.getBuildScript() )
@@ -88,9 +102,15 @@ class BuildScriptInterface( MObject ):
 		return lines
 
 	def queryCurrentRevision( self ):
-		cmd = [ sys.executable, self.getBuildScript(), 'print', 'current-revision' ] + self.getParameters()
-		runner = RunCommand( cmd, 1800 )
+		runner = self.createCurrentRevisionCommand()
 		runner.run()
+		return self.parseCurrentRevisionResult( runner )
+
+	def createCurrentRevisionCommand( self ):
+		cmd = [ sys.executable, self.getBuildScript(), 'print', 'current-revision' ] + self.getParameters()
+		return AsyncRunCommand( cmd, 1800 )
+
+	def parseCurrentRevisionResult( self, runner ):
 		if runner.getReturnCode() != 0:
 			raise MomError( 'Cannot get initial revision for build script "{0}".'.format( self.getBuildScript() ) )
 
@@ -17,9 +17,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 from core.MObject import MObject
-import sqlite3, os, sys
+import sqlite3, os, sys, time
 from buildcontrol.common.BuildInfo import BuildInfo
-from core.Exceptions import ConfigurationError
+from core.Exceptions import ConfigurationError, MomError
 from core.Settings import Settings
 from buildcontrol.common.BuildScriptInterface import BuildScriptInterface
 from core.helpers.FilesystemAccess import make_foldername_from_string
@@ -27,15 +27,19 @@ from core.helpers.GlobalMApp import mApp
 from buildcontrol.SubprocessHelpers import extend_debug_prefix
 from core.helpers.EnvironmentSaver import EnvironmentSaver
 from core.helpers.SafeDeleteTree import rmtree
+from core.helpers.AsyncRunCommand import run_concurrently
 
 class BuildStatus( MObject ):
 	'''Build status stores the status of each individual revision in a sqlite3 database.'''
 
 	TableName = 'build_status'
+	# the times a revision was discovered, and it's build started and finished, in seconds since the epoch:
+	TimesTableName = 'build_times'
 
 	def __init__( self, name = None ):
 		MObject.__init__( self, name )
 		self.setDatabaseFilename( None )
+		self.__discoveryTimes = {}
 
 	def setDatabaseFilename( self, filePath ):
 		self.__databaseFilename = filePath
@@ -57,6 +61,13 @@ branch text,
 tag text,
 script text
 )'''.format( BuildStatus.TableName ) )
+		conn.execute( '''CREATE TABLE IF NOT EXISTS {0} (
+id INTEGER PRIMARY KEY,
+discovered real,
+started real,
+finished real,
+success int
+)'''.format( BuildStatus.TimesTableName ) )
 		conn.commit()
 		return conn
 
@@ -79,6 +90,8 @@ script text
 values ( NULL, ?, ?, ?, ?, ?, ?, ?, ?, ? )'''.format( BuildStatus.TableName )
 				cursor.execute( query, values )
 				buildInfo.setBuildId( cursor.lastrowid )
+				cursor.execute( 'insert into {0} ( id, discovered ) values ( ?, ? )'.format( BuildStatus.TimesTableName ),
+					[ buildInfo.getBuildId(), time.time() ] )
 		finally:
 			cursor.close()
 
@@ -150,12 +163,96 @@ where id=?'''\
 		and adds those to the database.'''
 		iface = BuildScriptInterface( buildScript )
 		buildName = iface.querySetting( Settings.ScriptBuildName )
-		newestBuildInfo = self.getNewestBuildInfo( buildScript )
+		newestBuildInfo = self.getNewestBuildInfo( buildScript, buildName )
+		runner = self._createRevisionQueryCommand( iface, newestBuildInfo )
+		runner.run()
+		self._registerRevisionQueryResult( iface, buildName, newestBuildInfo, runner )
+
+	def registerNewRevisionsForBuildScripts( self, buildScripts ):
+		'''Register the new revisions for all build scripts, like registerNewRevisions().
+		The build scripts are queried concurrently, the number of queries executed at the same time is limited by the
+		simple_ci.query.jobs setting. The results are saved to the database one after the other.
+		\return a dictionary that maps the build scripts that failed to the MomError that occurred'''
+		errors = {}
+		buildNames = self.queryBuildNames( buildScripts )
+		queries = []
+		for buildScript in buildScripts:
+			buildName = buildNames[ buildScript ]
+			if isinstance( buildName, MomError ):
+				errors[ buildScript ] = buildName
+				continue
+			iface = BuildScriptInterface( buildScript )
+			newestBuildInfo = self.getNewestBuildInfo( buildScript, buildName )
+			queries.append( ( iface, buildName, newestBuildInfo, self._createRevisionQueryCommand( iface, newestBuildInfo ) ) )
+		run_concurrently( [ query[3] for query in queries ], self._getQueryJobs() )
+		self.__discoveryTimes = {}
+		for iface, buildName, newestBuildInfo, runner in queries:
+			self.__discoveryTimes[ iface.getBuildScript() ] = runner.getDuration()
+			try:
+				runner.wait()
+				self._registerRevisionQueryResult( iface, buildName, newestBuildInfo, runner )
+			except MomError, e:
+				errors[ iface.getBuildScript() ] = e
+		return errors
+
+	def getDiscoveryTimes( self ):
+		'''Return a dictionary that maps the build scripts to the time the revision query took in the last call of
+		registerNewRevisionsForBuildScripts(), in seconds.'''
+		return self.__discoveryTimes
+
+	def getQueueDepths( self ):
+		'''Return a dictionary that maps the BuildInfo status values to the number of revisions in that status.'''
+		with self.getConnection() as connection:
+			query = 'select status, count(*) from {0} group by status'.format( BuildStatus.TableName )
+			return dict( connection.execute( query ).fetchall() )
+
+	def loadBuildTimes( self ):
+		'''Return the finished builds as a list of ( build name, discovered, started, finished, success ) tuples.
+		The discovery time is not known for revisions registered before the times were recorded, it is None then.'''
+		with self.getConnection() as connection:
+			query = '''select s.build_name, t.discovered, t.started, t.finished, t.success from {0} s, {1} t
+where s.id = t.id and t.finished is not null order by t.finished'''.format( BuildStatus.TableName, BuildStatus.TimesTableName )
+			return connection.execute( query ).fetchall()
+
+	def _updateBuildTimes( self, connection, buildInfo, **times ):
+		connection.execute( 'insert or ignore into {0} ( id ) values ( ? )'.format( BuildStatus.TimesTableName ),
+			[ buildInfo.getBuildId() ] )
+		for column, value in times.items():
+			connection.execute( 'update {0} set {1}=? where id=?'.format( BuildStatus.TimesTableName, column ),
+				[ value, buildInfo.getBuildId() ] )
+
+	def _getQueryJobs( self ):
+		return mApp().getSettings().get( Settings.SimpleCIQueryJobs, True )
+
+	def queryBuildNames( self, buildScripts ):
+		'''Query the build names of the build scripts concurrently.
+		\return a dictionary that maps every build script to it's build name, or to the MomError that occurred'''
+		interfaces = [ BuildScriptInterface( buildScript ) for buildScript in buildScripts ]
+		runners = [ iface.createQuerySettingCommand( Settings.ScriptBuildName ) for iface in interfaces ]
+		run_concurrently( runners, self._getQueryJobs() )
+		buildNames = {}
+		for iface, runner in zip( interfaces, runners ):
+			try:
+				runner.wait()
+				buildNames[ iface.getBuildScript() ] = iface.parseQuerySettingResult( runner, Settings.ScriptBuildName )
+			except MomError, e:
+				buildNames[ iface.getBuildScript() ] = e
+		return buildNames
+
+	def _createRevisionQueryCommand( self, iface, newestBuildInfo ):
+		'''Return the command that lists the new revisions, or the current revision if no revision is known yet.'''
+		if newestBuildInfo:
+			return iface.createRevisionsSinceCommand( newestBuildInfo.getRevision() )
+		else:
+			return iface.createCurrentRevisionCommand()
+
+	def _registerRevisionQueryResult( self, iface, buildName, newestBuildInfo, runner ):
+		buildScript = iface.getBuildScript()
 		if newestBuildInfo:
 			revision = newestBuildInfo.getRevision()
 			mApp().debugN( self, 2, 'newest known revision for build script "{0}" ({1}) is "{2}"'
 				.format( buildScript, buildName, revision ) )
-			buildInfos = self.getBuildInfoForRevisionsSince( buildScript, buildName, revision )
+			buildInfos = self._makeBuildInfosFromRevisionLines( buildScript, iface.parseRevisionsSinceResult( runner ) )
 			if buildInfos:
 				mApp().message( self, 'build script "{0}" ({1}):'.format( buildScript, buildName ) )
 				for buildInfo in buildInfos:
@@ -166,7 +263,7 @@ where id=?'''\
 				mApp().debug( self, 'no new revisions found for build script "{0}" ({1})'
 					.format( buildScript, buildName ) )
 		else:
-			buildInfo = self.getBuildInfoForInitialRevision( buildScript, buildName )
+			buildInfo = self._makeInitialBuildInfo( buildScript, buildName, iface.parseCurrentRevisionResult( runner ) )
 			mApp().debug( self, 'saving initial revision "{0}" for build script "{1}" ({2})'
 				.format( buildInfo.getRevision(), buildScript, buildName ) )
 			self.saveBuildInfo( [ buildInfo ] )
@@ -262,9 +359,10 @@ where id=?'''\
 """ )
 				return True
 
-	def getNewestBuildInfo( self, buildScript ):
-		iface = BuildScriptInterface( buildScript )
-		buildName = iface.querySetting( Settings.ScriptBuildName )
+	def getNewestBuildInfo( self, buildScript, buildName = None ):
+		if not buildName:
+			iface = BuildScriptInterface( buildScript )
+			buildName = iface.querySetting( Settings.ScriptBuildName )
 		connection = self.getConnection()
 		try:
 			cursor = connection.cursor()
@@ -278,7 +376,9 @@ where id=?'''\
 
 	def getBuildInfoForInitialRevision( self, buildScript, projectName ):
 		iface = BuildScriptInterface( buildScript )
-		revision = iface.queryCurrentRevision()
+		return self._makeInitialBuildInfo( buildScript, projectName, iface.queryCurrentRevision() )
+
+	def _makeInitialBuildInfo( self, buildScript, projectName, revision ):
 		buildInfo = BuildInfo()
 		buildInfo.setProjectName( projectName )
 		buildInfo.setBuildStatus( BuildInfo.Status.InitialRevision )
@@ -292,8 +392,10 @@ where id=?'''\
 		@throws MomEception, if any of the operations fail
 		'''
 		iface = BuildScriptInterface( buildScript )
+		return self._makeBuildInfosFromRevisionLines( buildScript, iface.queryRevisionsSince( revision ) )
+
+	def _makeBuildInfosFromRevisionLines( self, buildScript, lines ):
 		buildInfos = []
-		lines = iface.queryRevisionsSince( revision )
 		for line in lines:
 			line = line.strip()
 			if not line:
@@ -313,10 +415,8 @@ where id=?'''\
 		buildInfo = None
 		# get the build names of the build scripts:
 		buildNames = {}
-		for buildScript in buildScripts:
-			iface = BuildScriptInterface( buildScript )
-			buildName = iface.querySetting( Settings.ScriptBuildName )
-			if buildName:
+		for buildScript, buildName in self.queryBuildNames( buildScripts ).items():
+			if buildName and not isinstance( buildName, MomError ):
 				buildNames[ buildName ] = buildScript
 			else:
 				# this should not happen, since it was checked before
@@ -328,14 +428,17 @@ where id=?'''\
 				if build.getProjectName() in buildNames:
 					build.setBuildStatus( BuildInfo.Status.Pending )
 					self._updateBuildInfo( conn, build )
+					self._updateBuildTimes( conn, build, started = time.time() )
 					buildInfo = build
 					break
 		if not buildInfo:
 			return False
+		success = False
 		try:
-			self.performBuild( buildInfo )
+			success = self.performBuild( buildInfo )
 		finally:
 			with self.getConnection() as conn:
 				buildInfo.setBuildStatus( BuildInfo.Status.Completed )
 				self._updateBuildInfo( conn, buildInfo )
+				self._updateBuildTimes( conn, buildInfo, finished = time.time(), success = 1 if success else 0 )
 		return True
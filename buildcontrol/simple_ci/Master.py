@@ -19,6 +19,8 @@
 
 from buildcontrol.SubprocessHelpers import extend_debug_prefix, restore_debug_prefix
 from buildcontrol.simple_ci.SimpleCiBase import SimpleCiBase
+from buildcontrol.simple_ci.SimpleCiMetrics import serve_metrics_file
+from core.Settings import Settings
 import os
 import sys
 import time
@@ -37,6 +39,24 @@ class Master( SimpleCiBase ):
 |i| |m|4|k|e|s| |u| |n|o|o|b|s| |k|n|o|w| |w|4|z|z| |f|0|0|b|4|r|3|d|
 +-+ +-+-+-+-+-+ +-+ +-+-+-+-+-+ +-+-+-+-+ +-+-+-+-+ +-+-+-+-+-+-+-+-+
 """ )
+		server = self._startMetricsServer()
+		try:
+			self._runSlaves()
+		finally:
+			if server:
+				server.shutdown()
+
+	def _startMetricsServer( self ):
+		'''Serve the metrics file written by the slaves over HTTP, if the simple_ci.metrics.port setting is set.'''
+		port = self.getSettings().get( Settings.SimpleCIMetricsPort, False )
+		if not port:
+			return None
+		address = self.getSettings().get( Settings.SimpleCIMetricsAddress )
+		server = serve_metrics_file( self.getMetricsFilename(), address, int( port ) )
+		self.message( self, 'serving metrics at http://{0}:{1}/metrics'.format( address, port ) )
+		return server
+
+	def _runSlaves( self ):
 		while True:
 			self.debug( self, 'running in master mode' )
 			SimpleCiBase._buildAndReturn( self )
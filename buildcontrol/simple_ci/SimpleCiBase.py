@@ -19,12 +19,16 @@
 
 from buildcontrol.common.BuildScriptInterface import BuildScriptInterface
 from buildcontrol.common.BuildStatus import BuildStatus
+from buildcontrol.simple_ci.SimpleCiMetrics import SimpleCiMetrics
 from buildcontrol.simple_ci.SimpleCiParameters import SimpleCiParameters
 from core.Exceptions import ConfigurationError, MomError
 from core.MApplication import MApplication
 from core.Settings import Settings
 from core.helpers.FilesystemAccess import make_foldername_from_string
+from core.helpers.EnvironmentSaver import EnvironmentSaver
 from core.helpers.GlobalMApp import mApp
+from core.helpers.JobServer import JobServer
+from core.helpers.JobsCount import get_jobs_count
 from core.loggers.ConsoleLogger import ConsoleLogger
 import os
 
@@ -33,12 +37,18 @@ class SimpleCiBase( MApplication ):
 	SimpleCIBase implements the common logic of the simple_ci master and slave processes.
 	"""
 
+	# the slave performs the builds and writes the metrics, the master only starts the slave:
+	SlaveToolName = 'simpleci_slave'
+	SlaveDefaultName = 'Slave'
+	MetricsFileName = 'metrics.prom'
+
 	def __init__( self, name = None, parent = None ):
 		MApplication.__init__( self, name, parent )
 
 		self.__params = SimpleCiParameters()
 		self.__params.parse()
 		self.__buildStatus = BuildStatus()
+		self.__metrics = SimpleCiMetrics()
 
 	def preFlightCheck( self ):
 		'''Perform the pre-flight check.'''
@@ -54,6 +64,10 @@ class SimpleCiBase( MApplication ):
 		The BuildStatus object is the interface to the database of revisions and the build results.'''
 		return self.__buildStatus
 
+	def getMetrics( self ):
+		'''Access the metrics object.'''
+		return self.__metrics
+
 	def getToolName( self ):
 		'''The tool name is used to select configuration files.'''
 		raise NotImplementedError()
@@ -64,9 +78,14 @@ class SimpleCiBase( MApplication ):
 		name = make_foldername_from_string( self.getName() )
 		return name
 
-	def getInstanceDir( self ):
+	def getSlaveInstanceName( self ):
+		'''The master starts the slave with it's own command line, so the slave has the instance name given on the command
+		line, or the default name of the Slave object otherwise.'''
+		return make_foldername_from_string( self.getParameters().getInstanceName() or self.SlaveDefaultName )
+
+	def getInstanceDir( self, toolName = None ):
 		'''The instance directory contains all instance specific data.'''
-		path = self.getSettings().getUserFolder( self.getToolName() )
+		path = self.getSettings().getUserFolder( toolName or self.getToolName() )
 		if not os.path.isdir( path ):
 			try:
 				os.makedirs( path )
@@ -75,9 +94,9 @@ class SimpleCiBase( MApplication ):
 				raise ConfigurationError( 'cannot create instance directory "{0}": {1}!'.format( path, e ) )
 		return path
 
-	def getDataDir( self ):
+	def getDataDir( self, toolName = None, instanceName = None ):
 		'''The data directory contains the build status database.'''
-		path = os.path.join( self.getInstanceDir(), '{0}-data'.format( self.getInstanceName() ) )
+		path = os.path.join( self.getInstanceDir( toolName ), '{0}-data'.format( instanceName or self.getInstanceName() ) )
 		if not os.path.isdir( path ):
 			try:
 				os.makedirs( path )
@@ -100,18 +119,41 @@ class SimpleCiBase( MApplication ):
 		self.getBuildStatus().setDatabaseFilename( database )
 		MApplication.build( self ) # call base class implementation
 
+	def getMetricsFilename( self ):
+		'''The metrics file is written after every slave run, in the data directory of the slave by default.
+		The master serves the same file, so the path does not depend on the name of the object.'''
+		filename = self.getSettings().get( Settings.SimpleCIMetricsFile, False )
+		return filename or os.path.join( self.getDataDir( self.SlaveToolName, self.getSlaveInstanceName() ),
+			self.MetricsFileName )
+
+	def writeMetrics( self ):
+		'''Update the metrics and write them to the metrics file. Errors are reported, but do not stop the CI process.'''
+		filename = self.getMetricsFilename()
+		try:
+			self.getMetrics().collect( self.getBuildStatus() )
+			self.getMetrics().write( filename )
+			self.debugN( self, 2, 'metrics written to "{0}"'.format( filename ) )
+		except Exception as e:
+			self.message( self, 'cannot write the metrics to "{0}", continuing: {1}'.format( filename, e ) )
+
 	def performBuilds( self, buildScripts ):
 		'''PerformBuilds is the central method of a SimpleCI run. 
-		It retrieves new revisions, and calls the build scripts.'''
+		It retrieves new revisions, and calls the build scripts. The metrics are written afterwards.'''
+		try:
+			return self._performBuilds( buildScripts )
+		finally:
+			self.writeMetrics()
+
+	def _performBuilds( self, buildScripts ):
 		error = []
 		x = 0
 		# register all revisions committed since the last run in the database:
 		if self.getParameters().getFindRevisions():
 			self.debug( self, 'build control: discovering new revisions' )
+			errors = self.getBuildStatus().registerNewRevisionsForBuildScripts( buildScripts )
 			for buildScript in buildScripts:
-				try:
-					self.getBuildStatus().registerNewRevisions( buildScript )
-				except MomError as e:
+				if buildScript in errors:
+					e = errors[ buildScript ]
 					error.append( 'error while processing build script "{0}": {1}'.format( buildScript, e ) )
 					msg = 'error while processing build script "{0}", continuing: {1}'.format( buildScript, e )
 					self.message( self, msg )
@@ -121,9 +163,18 @@ class SimpleCiBase( MApplication ):
 			cap = self.getSettings().get( Settings.SimpleCIBuildJobCap )
 			self.debug( self, 'build control: performing up to {0} builds for new revisions'.format( cap ) )
 			self.getBuildStatus().listNewBuildInfos()
-			for x in range( cap ):
-				if not self.getBuildStatus().takeBuildInfoAndBuild( buildScripts ):
-					break
+			with EnvironmentSaver():
+				# the build scripts join the job server of the slave, so that the make jobs of all builds share one pool:
+				jobServer = JobServer( get_jobs_count() ) if JobServer.isEnabled() else None
+				try:
+					if jobServer:
+						jobServer.apply()
+					for x in range( cap ):
+						if not self.getBuildStatus().takeBuildInfoAndBuild( buildScripts ):
+							break
+				finally:
+					if jobServer:
+						jobServer.close()
 			return x
 		else:
 			self.debugN( self, 2, 'build control: skipping build phase' )
@@ -138,19 +189,19 @@ class SimpleCiBase( MApplication ):
 		'''
 		buildNames = []
 		goodScripts = []
+		# the build names are queried concurrently:
+		names = self.getBuildStatus().queryBuildNames( buildScripts )
 		for buildScript in buildScripts:
-			iface = BuildScriptInterface( buildScript )
-			try:
-				name = iface.querySetting( Settings.ScriptBuildName )
-				if name and name not in buildNames:
-					buildNames.append( name )
-					goodScripts.append( buildScript )
-				else:
-					self.error( self, 'Error in build script "{0}": The build name "{1}" is already used by another '
-								'build script. Build script disregarded.'.format( buildScript, name ) )
-			except MomError, e:
+			name = names[ buildScript ]
+			if isinstance( name, MomError ):
 				self.error( self, 'Error in build script "{0}": Error querying the build name. Build script disregarded. Reason: {1}'
-					.format( buildScript, e ) )
+					.format( buildScript, name ) )
+			elif name and name not in buildNames:
+				buildNames.append( name )
+				goodScripts.append( buildScript )
+			else:
+				self.error( self, 'Error in build script "{0}": The build name "{1}" is already used by another '
+							'build script. Build script disregarded.'.format( buildScript, name ) )
 		return goodScripts
 
 	def runBuildScriptTestBuild( self, buildScripts ):
@@ -0,0 +1,131 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from buildcontrol.common.BuildInfo import BuildInfo
+from core.MObject import MObject
+from threading import Thread
+import os
+import time
+
+def escape_label_value( value ):
+	'''Escape a label value for the Prometheus text exposition format.'''
+	return unicode( value ).replace( '\\', '\\\\' ).replace( '"', '\\"' ).replace( '\n', '\\n' )
+
+class SimpleCiMetrics( MObject ):
+	'''SimpleCiMetrics collects the operational metrics of a SimpleCI instance, and writes them in the Prometheus text
+	exposition format. The numbers are calculated from the build status database (queue depth, build durations,
+	failures) and from the last discovery run (the time the revision query took for every build script).
+	The time from commit to build start is not known, since the build scripts do not report commit times. The queue wait
+	time is measured from the discovery of a revision to the start of it's build instead.'''
+
+	QueueStates = { BuildInfo.Status.NewRevision : 'new', BuildInfo.Status.Pending : 'pending' }
+
+	def __init__( self, name = None ):
+		MObject.__init__( self, name )
+		self.__metrics = []
+
+	def _add( self, name, kind, description, samples ):
+		'''Add a metric. samples is a list of ( suffix, labels, value ) tuples, where labels is a dictionary, and suffix is
+		appended to the name of the metric (for example, "_sum" and "_count" for summaries).'''
+		self.__metrics.append( ( name, kind, description, samples ) )
+
+	def collect( self, buildStatus ):
+		'''Calculate the metrics from the build status.'''
+		self.__metrics = []
+		depths = buildStatus.getQueueDepths()
+		self._add( 'simpleci_queue_depth', 'gauge', 'Number of revisions waiting to be built, or being built.',
+			[ ( '', { 'status' : state }, depths.get( status, 0 ) ) for status, state in sorted( self.QueueStates.items() ) ] )
+		discoveryTimes = buildStatus.getDiscoveryTimes()
+		self._add( 'simpleci_discovery_duration_seconds', 'gauge', 'Time the revision query took in the last discovery run.',
+			[ ( '', { 'script' : script }, seconds ) for script, seconds in sorted( discoveryTimes.items() ) if seconds is not None ] )
+		builds = {}
+		for buildName, discovered, started, finished, success in buildStatus.loadBuildTimes():
+			project = builds.setdefault( buildName, { 'success' : 0, 'failure' : 0, 'duration' : 0.0, 'wait' : 0.0, 'waits' : 0 } )
+			project[ 'success' if success else 'failure' ] += 1
+			if started is not None:
+				project[ 'duration' ] += finished - started
+				if discovered is not None:
+					project[ 'wait' ] += started - discovered
+					project[ 'waits' ] += 1
+			project[ 'last' ] = ( finished - started ) if started is not None else None
+		names = sorted( builds.keys() )
+		self._add( 'simpleci_builds_total', 'counter', 'Number of finished builds.',
+			[ ( '', { 'project' : name, 'result' : result }, builds[ name ][ result ] ) for name in names
+				for result in ( 'success', 'failure' ) ] )
+		self._add( 'simpleci_build_failure_ratio', 'gauge', 'Fraction of the finished builds that failed.',
+			[ ( '', { 'project' : name }, float( builds[ name ][ 'failure' ] ) / ( builds[ name ][ 'success' ] + builds[ name ][ 'failure' ] ) )
+				for name in names ] )
+		self._add( 'simpleci_build_duration_seconds', 'summary', 'Duration of the finished builds.',
+			[ ( '_sum', { 'project' : name }, builds[ name ][ 'duration' ] ) for name in names ]
+			+ [ ( '_count', { 'project' : name }, builds[ name ][ 'success' ] + builds[ name ][ 'failure' ] ) for name in names ] )
+		self._add( 'simpleci_build_queue_wait_seconds', 'summary', 'Time from the discovery of a revision to the start of it\'s build.',
+			[ ( '_sum', { 'project' : name }, builds[ name ][ 'wait' ] ) for name in names ]
+			+ [ ( '_count', { 'project' : name }, builds[ name ][ 'waits' ] ) for name in names ] )
+		self._add( 'simpleci_last_build_duration_seconds', 'gauge', 'Duration of the last finished build.',
+			[ ( '', { 'project' : name }, builds[ name ][ 'last' ] ) for name in names if builds[ name ][ 'last' ] is not None ] )
+		self._add( 'simpleci_last_cycle_timestamp_seconds', 'gauge', 'Time the metrics were collected, in seconds since the epoch.',
+			[ ( '', {}, time.time() ) ] )
+
+	def format( self ):
+		'''Return the metrics in the Prometheus text exposition format.'''
+		lines = []
+		for name, kind, description, samples in self.__metrics:
+			lines.append( '# HELP {0} {1}'.format( name, description ) )
+			lines.append( '# TYPE {0} {1}'.format( name, kind ) )
+			for suffix, labels, value in samples:
+				labelText = ','.join( [ u'{0}="{1}"'.format( key, escape_label_value( labels[ key ] ) ) for key in sorted( labels ) ] )
+				lines.append( u'{0}{1}{2} {3}'.format( name, suffix, '{' + labelText + '}' if labelText else '', repr( float( value ) ) ) )
+		return u'\n'.join( lines ) + u'\n'
+
+	def write( self, filename ):
+		'''Write the metrics to filename. The file is replaced atomically, so that it can be read at any time.'''
+		temporary = '{0}.tmp'.format( filename )
+		with open( temporary, 'w' ) as file:
+			file.write( self.format().encode( 'utf-8' ) )
+		os.rename( temporary, filename )
+
+class _MetricsRequestHandler( BaseHTTPRequestHandler ):
+	'''_MetricsRequestHandler serves the metrics file of the server on every GET request.'''
+
+	def do_GET( self ):
+		try:
+			with open( self.server.metricsFilename ) as file:
+				body = file.read()
+		except IOError:
+			self.send_error( 503, 'no metrics written yet' )
+			return
+		self.send_response( 200 )
+		self.send_header( 'Content-Type', 'text/plain; version=0.0.4; charset=utf-8' )
+		self.send_header( 'Content-Length', str( len( body ) ) )
+		self.end_headers()
+		self.wfile.write( body )
+
+	def log_message( self, format, *args ):
+		pass # the console output of SimpleCI is for the builds
+
+def serve_metrics_file( filename, address, port ):
+	'''Serve the metrics file over HTTP at address and port, in a background thread.
+	\return the HTTPServer object, call shutdown() on it to stop serving'''
+	server = HTTPServer( ( address, port ), _MetricsRequestHandler )
+	server.metricsFilename = filename
+	thread = Thread( target = server.serve_forever, name = 'SimpleCI metrics server' )
+	thread.setDaemon( True )
+	thread.start()
+	return server
@@ -23,8 +23,15 @@ from core.Exceptions import ConfigurationError, MomError
 from core.MApplication import MApplication
 from core.Project import Project
 from core.Settings import Settings
+from core.executomat.CriticalPath import CriticalPath
+from core.executomat.StepScheduler import StepScheduler
+from core.executomat.StepStateStore import StepStateStore
 from core.helpers.GlobalMApp import mApp
+from core.helpers.JobServer import JobServer
+from core.helpers.JobsCount import calculate_jobs_count
+from core.helpers.LogCompression import check_log_compression
 from core.helpers.MachineInfo import machine_info
+from core.helpers.Profiler import Profiler
 from core.helpers.SafeDeleteTree import rmtree
 from core.helpers.TimeUtils import formatted_time
 from datetime import datetime
@@ -42,6 +49,9 @@ class Build( MApplication ):
 		mApp().getSettings().set( Settings.ScriptBuildName, name )
 		self.__project = None
 		self.__parameters = BuildParameters()
+		self.__stepStateStore = None
+		self.__jobServer = None
+		self.__criticalPath = None
 		self.__startTime = datetime.utcnow()
 
 	def getParameters( self ):
@@ -79,6 +89,17 @@ class Build( MApplication ):
 			raise ConfigurationError( 'The project variable needs to be an instance of the Project class!' )
 		self.addChild( project )
 
+	def isIncrementalBuild( self ):
+		'''Return True if steps that are up-to-date are skipped in this build run.
+		Incremental builds keep the build base directory of the previous run instead of moving it away.'''
+		if self.getSettings().get( Settings.ScriptRunMode ) != Settings.RunMode_Build:
+			return False
+		buildType = self.getSettings().get( Settings.ProjectBuildType, True ).lower()
+		return buildType in self.getSettings().get( Settings.BuildIncrementalBuildTypes ).lower()
+
+	def _getStepStateStore( self ):
+		return self.__stepStateStore
+
 	def _printSettings( self ):
 		# program name, "print", argument, [options] 
 		if len( self.getParameters().getArgs() ) < 3:
@@ -119,7 +140,9 @@ class Build( MApplication ):
 		mode = mApp().getSettings().get( Settings.ScriptRunMode )
 		if mode == Settings.RunMode_Build:
 			baseDir = self.getBaseDir()
-			if os.path.isdir( baseDir ):
+			if os.path.isdir( baseDir ) and self.isIncrementalBuild():
+				mApp().debug( self, 'incremental build, re-using the existing base directory.' )
+			elif os.path.isdir( baseDir ):
 				moveOldDirectories = mApp().getSettings().get( Settings.BuildMoveOldDirectories )
 				if moveOldDirectories:
 					mApp().debug( self, 'stale base directory exists, moving it.' )
@@ -148,18 +171,21 @@ class Build( MApplication ):
 						raise ConfigurationError( 'Cannot remove existing build folder at "{0}": {1}'
 							.format( baseDir, str( o ) ) )
 			try:
-				os.makedirs( baseDir )
+				if not os.path.isdir( baseDir ):
+					os.makedirs( baseDir )
 			except ( OSError, IOError ) as e:
 				raise ConfigurationError( 'Cannot create required base directory "{0}" for {1}: {2}!'
 										.format( baseDir, self.getName(), e ) )
 			os.chdir( baseDir )
 			try:
-				os.makedirs( self.getLogDir() )
+				if not os.path.isdir( self.getLogDir() ):
+					os.makedirs( self.getLogDir() )
 			except ( OSError, IOError )as e:
 				raise ConfigurationError( 'Cannot create build log directory "{0}" for {1}: {2}!'
 					.format( self.getLogDir(), self.getName(), e ) )
 			try:
-				os.makedirs( self.getPackagesDir() )
+				if not os.path.isdir( self.getPackagesDir() ):
+					os.makedirs( self.getPackagesDir() )
 			except ( OSError, IOError )as e:
 				raise ConfigurationError( 'Cannot create build packages directory "{0}" for {1}: {2}!'
 					.format( self.getLogDir(), self.getName(), e ) )
@@ -185,14 +211,59 @@ class Build( MApplication ):
 			pass
 		return None
 
+	def getCriticalPath( self ):
+		'''Return the critical path of the executed steps, or None before the report phase (see CriticalPath).'''
+		return self.__criticalPath
+
 	def execute( self ):
 		with self.getTimeKeeper():
 			self.executeSteps()
 			super( Build, self ).execute()
 
 	def executeSteps( self ):
-		for step in self.getSteps():
-			self._executeStepRecursively( self, step.getName() )
+		'''Execute the build steps for all instructions objects, in the order defined by the step prerequisites.'''
+		jobs = mApp().getSettings().get( Settings.BuildParallelJobs )
+		check_log_compression( mApp().getSettings().get( Settings.BuildStepLogCompression ) )
+		if self.isIncrementalBuild():
+			self.__stepStateStore = StepStateStore( os.path.join( self.getBaseDir(), StepStateStore.FileName ) )
+			self.__stepStateStore.load()
+		self.__jobServer = self._createJobServer()
+		try:
+			StepScheduler( self.getSteps() ).execute( self, jobs )
+		finally:
+			if self.__jobServer:
+				self.__jobServer.close()
+				self.__jobServer = None
+			if self.__stepStateStore:
+				self.__stepStateStore.update( self )
+				self.__stepStateStore.save()
+
+	def _createJobServer( self ):
+		'''Join the job server of the parent process (for example, a SimpleCI slave), or create one for this build.
+		\return the job server, or None if it is disabled'''
+		if not JobServer.isEnabled():
+			return None
+		jobServer = JobServer.fromEnvironment()
+		if jobServer:
+			mApp().debugN( self, 2, 'joining the make job server of the parent process' )
+		else:
+			jobs, reasons = calculate_jobs_count( self.getName() )
+			jobServer = JobServer( jobs )
+			jobServer.setDescription( '{0} job slots shared through the make job server: {1}'.format( jobs, ', '.join( reasons ) ) )
+			mApp().debugN( self, 2, 'created make job server with {0}'.format( jobServer.getDescription() ) )
+		return jobServer
+
+	def getJobServer( self ):
+		'''Return the make job server shared by all configurations while the build steps are executed, or None.'''
+		return self.__jobServer
+
+	def getExecutionContext( self ):
+		context = super( Build, self ).getExecutionContext()
+		if self.__jobServer:
+			# only the make build actions join the job server (see MakeCommandAction), when it has been inherited from
+			# the parent process, the other actions must not see it:
+			context = JobServer.removeFrom( context )
+		return context
 
 	def runWrapups( self ):
 		mode = mApp().getSettings().get( Settings.ScriptRunMode )
@@ -206,6 +277,9 @@ class Build( MApplication ):
 		if mode != Settings.RunMode_Build:
 			return
 
+		# the critical path is part of the reports:
+		self.__criticalPath = CriticalPath( self )
+		self.__criticalPath.analyze()
 		MApplication.runReports( self )
 
 	def runNotifications( self ):
@@ -243,7 +317,27 @@ class Build( MApplication ):
 			raise MomError( 'Unknown run mode "{0}". Known run modes are: {1}'.format( 
 					self.getSettings().get( Settings.ScriptRunMode ),
 					', '.join( Settings.RunModes ) ) )
-		return MApplication._buildAndReturn( self )
+		if not self.getSettings().get( Settings.ScriptProfile ):
+			return MApplication._buildAndReturn( self )
+		profiler = Profiler( 'build script profiler' )
+		try:
+			return profiler.runcall( MApplication._buildAndReturn, self )
+		finally:
+			self._saveProfile( profiler )
+
+	def _saveProfile( self, profiler ):
+		'''Save the statistics and the summary of the profiler in the log directory.
+		If the log directory does not exist (for example, because the build failed before it was created), the current
+		directory is used.'''
+		directory = self.getLogDir() if self.getLogDir() and os.path.isdir( self.getLogDir() ) else os.getcwd()
+		statsPath = os.path.join( directory, Profiler.StatsFileName )
+		summaryPath = os.path.join( directory, Profiler.SummaryFileName )
+		try:
+			profiler.writeStats( statsPath )
+			profiler.writeSummary( summaryPath )
+			self.message( self, 'profile saved in "{0}", summary in "{1}"'.format( statsPath, summaryPath ) )
+		except IOError as e:
+			self.error( self, 'cannot save the profile in "{0}": {1}'.format( directory, str( e ) ) )
 
 	def createXmlNode( self, document, recursive = True ):
 		node = MApplication.createXmlNode( self, document, recursive )
@@ -255,5 +349,8 @@ class Build( MApplication ):
 		node.attributes["returncode"] = str( self.getReturnCode() )
 		node.attributes["startTime"] = str ( formatted_time( self.__startTime ) )
 		node.attributes["sys-shortname"] = self.getSystemShortName()
+		if self.getCriticalPath():
+			node.attributes["criticalPath"] = '{0:.3f}'.format( self.getCriticalPath().getDuration() )
+			node.attributes["stepsWallTime"] = '{0:.3f}'.format( self.getCriticalPath().getWallTime() )
 
 		return node
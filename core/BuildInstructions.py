@@ -70,12 +70,14 @@ class BuildInstructions( Instructions ):
 		mode = mApp().getSettings().get( Settings.ScriptRunMode )
 		if mode == Settings.RunMode_Build:
 			try:
-				os.makedirs( self.getLogDir() )
+				if not os.path.isdir( self.getLogDir() ): # it exists in incremental builds
+					os.makedirs( self.getLogDir() )
 			except ( OSError, IOError )as e:
 				raise ConfigurationError( 'Cannot create required log directory "{0}" for {1}: {2}!'
 										.format( self.getLogDir(), self.getName(), e ) )
 			try:
-				os.makedirs( self.getPackagesDir() )
+				if not os.path.isdir( self.getPackagesDir() ):
+					os.makedirs( self.getPackagesDir() )
 			except ( OSError, IOError )as e:
 				raise ConfigurationError( 'Cannot create required packages directory "{0}" for {1}: {2}!'
 					.format( self.getLogDir(), self.getName(), e ) )
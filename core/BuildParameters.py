@@ -29,6 +29,10 @@ class BuildParameters( Parameters ):
 e.g.: -s disable-cleanup,enable-create-packages""" )
 		group.add_option( '-d', '--disable-shutdown', action = 'store_true', dest = 'disableShutdown', default = False,
 			help = 'disable the shutdown phase (use this to keep packages, logs and other folders)' )
+		group.add_option( '-j', '--jobs', action = 'store', type = 'int', dest = 'parallelJobs',
+			help = 'number of worker processes used to build configurations and independent steps concurrently (default: 1)' )
+		group.add_option( '--profile', action = 'store_true', dest = 'profile', default = False,
+			help = 'profile the build script, and save the statistics and a summary of the most expensive functions in the log directory' )
 
 	def getDescription( self ):
 		return '''\
@@ -75,6 +79,15 @@ Build scripts can be executed in the following run modes:
 	def getDisableShutdown( self ):
 		return self._getOptions().disableShutdown
 
+	def getParallelJobs( self ):
+		jobs = self._getOptions().parallelJobs
+		if jobs is not None and jobs < 1:
+			raise ConfigurationError( 'The number of parallel jobs must be a positive integer, not "{0}"'.format( jobs ) )
+		return jobs
+
+	def getProfile( self ):
+		return self._getOptions().profile
+
 	def apply( self, settings ):
 		assert isinstance( settings, Settings )
 
@@ -92,6 +105,10 @@ Build scripts can be executed in the following run modes:
 			settings.set( Settings.ProjectBuildType, self.getBuildType() )
 		if self.getBuildSteps():
 			settings.set( Settings.ProjectBuildSequenceSwitches, self.getBuildSteps() )
+		if self.getParallelJobs():
+			settings.set( Settings.BuildParallelJobs, self.getParallelJobs() )
+		if self.getProfile():
+			settings.set( Settings.ScriptProfile, self.getProfile() )
 		if self.getIgnoreCommitMessage():
 			settings.set( Settings.ScriptIgnoreCommitMessageCommands, self.getIgnoreCommitMessage() )
 		if self.getDebugLevel():
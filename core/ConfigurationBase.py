@@ -32,6 +32,10 @@ class ConfigurationBase( BuildInstructions ):
 		assert isinstance( project, Project )
 		return project
 
+	def _canExecuteStepsInParallel( self ):
+		'''Configurations do not depend on each other, and can be built in parallel.'''
+		return True
+
 	def _stepsShouldExecute( self ):
 		'''Override the behavior that defines if Steps should be executed for Configurations.
 		Configurations should be built, even if another Configuration produced an error before. Configurations should only be 
@@ -54,6 +54,11 @@ class Defaults( MObject ):
 	ScriptRunMode = 'script.runmode'
 	ScriptBuildName = 'script.buildname'
 	ScriptEnableNotifications = 'script.enablenotifications'
+	ScriptProfile = 'script.profile'
+	ScriptLogFileMaxSize = 'script.logfile.maxsize'
+	ScriptLogFileBackupCount = 'script.logfile.backupcount'
+	ScriptLogFileCompress = 'script.logfile.compress'
+	ScriptLogFileQueueSize = 'script.logfile.queuesize'
 	# ----- internal settings
 	MomVersionNumber = 'mom.version.number'
 	MomDebugIndentVariable = 'mom.debug.indentvariable'
@@ -98,9 +103,24 @@ class Defaults( MObject ):
 	SCMSvnTrunkPrefix = 'scm.svn.prefix.trunk'
 	# ----- Build settings:
 	BuildMoveOldDirectories = 'build.moveolddirectories'
+	BuildParallelJobs = 'build.paralleljobs'
+	BuildIncrementalBuildTypes = 'build.incremental.buildtypes'
+	BuildActionCacheDir = 'build.actioncache.directory'
+	BuildActionCacheVariables = 'build.actioncache.variables'
+	BuildStreamActionOutput = 'build.streamactionoutput'
+	BuildActionOutputLimit = 'build.actionoutputlimit'
+	BuildStepLogCompression = 'build.steplogcompression'
+	# ----- TimingHistory settings:
+	TimingHistoryDatabase = 'timinghistory.database'
+	TimingHistoryBaselineRuns = 'timinghistory.baselineruns'
+	TimingHistoryRegressionFactor = 'timinghistory.regressionfactor'
+	TimingHistoryRegressionMinimumSeconds = 'timinghistory.regressionminimumseconds'
 	# ----- Builder settings
 	MakeBuilderInstallTarget = 'configuration.builder.make.installtarget'
 	MakeBuilderJobsCount = 'configuration.builder.make.jobscount'
+	MakeBuilderJobServer = 'configuration.builder.make.jobserver'
+	MakeBuilderJobMemoryHistory = 'configuration.builder.make.jobmemoryhistory'
+	MakeBuilderJobsCount_Adaptive = 'adaptive'
 	# ----- CMake Builder settings
 	CMakeBuilderTool = 'configuration.builder.cmake.toolname'
 	# ----- Publisher settings (should be set in .mom/config.py):
@@ -130,6 +150,10 @@ class Defaults( MObject ):
 	SimpleCIBuildJobCap = 'simple_ci.build.cap'
 	SimpleCIScriptDebugLevel = 'simple_ci.build.loglevel'
 	SimpleCIBuildDirectory = 'simple_ci.build.directory'
+	SimpleCIQueryJobs = 'simple_ci.query.jobs'
+	SimpleCIMetricsFile = 'simple_ci.metrics.file'
+	SimpleCIMetricsAddress = 'simple_ci.metrics.address'
+	SimpleCIMetricsPort = 'simple_ci.metrics.port'
 
 	def getDefaultSettings( self ):
 		home = os.path.expanduser( "~" )
@@ -144,24 +168,29 @@ class Defaults( MObject ):
 		defaultSettings[ Defaults.ScriptRunMode ] = Defaults.RunMode_Build
 		defaultSettings[ Defaults.ScriptIgnoreCommitMessageCommands ] = False
 		defaultSettings[ Defaults.ScriptEnableNotifications ] = True
+		defaultSettings[ Defaults.ScriptProfile ] = False # profile the build script, see Profiler
+		defaultSettings[ Defaults.ScriptLogFileMaxSize ] = None # in bytes, rotate the log file of the FileLogger when it grows larger
+		defaultSettings[ Defaults.ScriptLogFileBackupCount ] = 5 # the number of rotated log file segments that are kept
+		defaultSettings[ Defaults.ScriptLogFileCompress ] = False # compress rotated log file segments with gzip
+		defaultSettings[ Defaults.ScriptLogFileQueueSize ] = 10000 # messages queued for the log file writer thread before logging blocks
 		# ----- internal settings
 		defaultSettings[ Defaults.MomDebugIndentVariable ] = 'MOM_INTERNAL_DEBUG_INDENT'
 		# ----- project settings:
 		defaultSettings[ Defaults.ProjectExecutomatLogfileName ] = 'execution.log'
 		defaultSettings[ Defaults.ProjectBuildType ] = 'm'
-		defaultSettings[ Defaults.ProjectBuildSequence] = [ # name, modes, execute-on-failure
-			[ 'create-folders', 'mcgdhpsf', False ],
-			[ 'checkout', 'mcgdhpsf', False ],
-			[ 'export-sources', 'mcgdhpsf', False ],
-			[ 'configure', 'mcgdhpsf', False ],
-			[ 'build', 'mcgdhpsf', False ],
-			[ 'test', 'mcgdhpsf', False ],
-			[ 'install', 'mcgdhpsf', False ],
-			[ 'create-packages', 'dsfp', False ],
-			[ 'create-docs', 'mcgdhpsf', False ],
-			[ 'upload-packages', 'dsf', True ],
-			[ 'cleanup-packages', 'cdsf', True ],
-			[ 'cleanup', 'mcdsf', True ] ]
+		defaultSettings[ Defaults.ProjectBuildSequence] = [ # name, modes, execute-on-failure, prerequisites
+			[ 'create-folders', 'mcgdhpsf', False, [] ],
+			[ 'checkout', 'mcgdhpsf', False, [ 'create-folders' ] ],
+			[ 'export-sources', 'mcgdhpsf', False, [ 'checkout' ] ],
+			[ 'configure', 'mcgdhpsf', False, [ 'export-sources' ] ],
+			[ 'build', 'mcgdhpsf', False, [ 'configure' ] ],
+			[ 'test', 'mcgdhpsf', False, [ 'build' ] ],
+			[ 'install', 'mcgdhpsf', False, [ 'build' ] ],
+			[ 'create-packages', 'dsfp', False, [ 'install' ] ],
+			[ 'create-docs', 'mcgdhpsf', False, [ 'checkout' ] ],
+			[ 'upload-packages', 'dsf', True, [ 'create-packages', 'create-docs' ] ],
+			[ 'cleanup-packages', 'cdsf', True, [ 'upload-packages' ] ],
+			[ 'cleanup', 'mcdsf', True, [ 'test', 'create-docs', 'cleanup-packages' ] ] ]
 		defaultSettings[ Defaults.ProjectBuildTypeDescriptions ] = { # build type to descriptive text
 			'e' : 'Empty build. All build steps are disabled. Useful for debugging build scripts.',
 			'm' : 'Manual build. Does not modify environment variables. Deletes temporary folders.',
@@ -182,7 +211,9 @@ class Defaults( MObject ):
 		defaultSettings[ Defaults.ConfigurationBuildDir ] = 'build'
 		defaultSettings[ Defaults.ConfigurationTargetDir ] = 'install'
 		defaultSettings[ Defaults.MakeBuilderInstallTarget ] = 'install'
-		defaultSettings[ Defaults.MakeBuilderJobsCount ] = None
+		defaultSettings[ Defaults.MakeBuilderJobsCount ] = None # a number, None for the number of CPUs, or 'adaptive'
+		defaultSettings[ Defaults.MakeBuilderJobMemoryHistory ] = os.path.join( home, '.mom', 'make-job-memory.json' )
+		defaultSettings[ Defaults.MakeBuilderJobServer ] = True # share the make jobs of all configurations using a GNU make job server
 		# ----- environments settings:
 		defaultSettings[ Defaults.EnvironmentsBaseDir ] = os.path.join( home, 'MomEnvironments' )
 		defaultSettings[ Defaults.EnvironmentsExpansionModeMapping ] = {
@@ -199,6 +230,21 @@ class Defaults( MObject ):
 		defaultSettings[ Defaults.SystemShortName ] = None
 		# ----- Build settings:
 		defaultSettings[ Defaults.BuildMoveOldDirectories ] = True
+		defaultSettings[ Defaults.BuildParallelJobs ] = 1 # number of worker processes for configurations and steps
+		defaultSettings[ Defaults.BuildIncrementalBuildTypes ] = '' # build types that skip steps that are up-to-date, e.g. 'h'
+		defaultSettings[ Defaults.BuildActionCacheDir ] = None # directory of the action output cache, None to disable it
+		defaultSettings[ Defaults.BuildActionCacheVariables ] = [ # environment variables that are part of the action cache key
+			'PATH', 'LD_LIBRARY_PATH', 'DYLD_LIBRARY_PATH', 'LIBRARY_PATH', 'CPATH', 'C_INCLUDE_PATH', 'CPLUS_INCLUDE_PATH',
+			'PKG_CONFIG_PATH', 'CC', 'CXX', 'CFLAGS', 'CXXFLAGS', 'CPPFLAGS', 'LDFLAGS', 'QTDIR', 'QMAKESPEC',
+			'INCLUDE', 'LIB', 'LIBPATH', 'LANG', 'LC_ALL' ]
+		defaultSettings[ Defaults.BuildStreamActionOutput ] = True # write command output to the step log while it arrives
+		defaultSettings[ Defaults.BuildActionOutputLimit ] = 65536 # characters kept in memory at the start and end of streamed output
+		defaultSettings[ Defaults.BuildStepLogCompression ] = None # compression of the step log files, None, 'gzip' or 'zstd'
+		# ----- TimingHistory settings:
+		defaultSettings[ Defaults.TimingHistoryDatabase ] = os.path.join( home, '.mom', 'timing-history.sqlite' )
+		defaultSettings[ Defaults.TimingHistoryBaselineRuns ] = 10 # number of previous successful runs the baseline is calculated from
+		defaultSettings[ Defaults.TimingHistoryRegressionFactor ] = 1.5 # steps that take longer than factor times the baseline are flagged
+		defaultSettings[ Defaults.TimingHistoryRegressionMinimumSeconds ] = 30.0 # and at least this many seconds longer
 		# ----- Publisher settings:
 		defaultSettings[ Defaults.PublisherPackageBaseHttpURL ] = None
 		defaultSettings[ Defaults.PublisherReportsBaseHttpURL ] = None
@@ -222,6 +268,10 @@ class Defaults( MObject ):
 		defaultSettings[ Defaults.SimpleCIBuildJobCap ] = 8
 		defaultSettings[ Defaults.SimpleCIScriptDebugLevel ] = 0
 		defaultSettings[ Defaults.SimpleCIBuildDirectory ] = None
+		defaultSettings[ Defaults.SimpleCIQueryJobs ] = 8 # number of build script queries executed at the same time
+		defaultSettings[ Defaults.SimpleCIMetricsFile ] = None # Prometheus text file, None for metrics.prom in the slave data directory
+		defaultSettings[ Defaults.SimpleCIMetricsAddress ] = '127.0.0.1'
+		defaultSettings[ Defaults.SimpleCIMetricsPort ] = None # the master serves the metrics file over HTTP if set
 		# ----- SourceCodeProvider Settings:
 		# These settings are saved by the source code provider during the prepare phase:
 		defaultSettings[ Defaults.SourceCodeProviderVersionName ] = None
@@ -124,6 +124,20 @@ class InterruptedException( MomError ):
 	def getReturnCode():
 		return signal.SIGINT + 128
 
+class TerminatedException( MomException ):
+	"""A TerminatedException is raised if the build script is terminated by a signal (like SIGTERM), so that the build
+	is finished through the regular error handling. The return code is 128 plus the signal number, like in a shell."""
+
+	def __init__( self, value, details = None, signum = signal.SIGTERM ):
+		MomException.__init__( self, value, details )
+		self.__signum = signum
+
+	def getSignal( self ):
+		return self.__signum
+
+	def getReturnCode( self ):
+		return 128 + self.__signum
+
 def returncode_to_description( returnCode ):
 	"""Returns a string representing the description of the return code"""
 
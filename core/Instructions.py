@@ -22,14 +22,18 @@ from core.Exceptions import ConfigurationError, MomError, BuildError
 from core.InstructionsBase import InstructionsBase
 from core.MObject import MObject
 from core.Settings import Settings
+from core.executomat.ParallelStepRunner import ParallelStepRunner
 from core.executomat.Step import Step
 from core.helpers.Enum import Enum
 from core.helpers.EnvironmentSaver import EnvironmentSaver
+from core.helpers.ExecutionContext import ExecutionContext
 from core.helpers.FilesystemAccess import make_foldername_from_string
 from core.helpers.GlobalMApp import mApp
+from core.helpers.ResourceUsage import ResourceUsage
 from core.helpers.TimeKeeper import TimeKeeper
 from core.helpers.TypeCheckers import check_for_nonempty_string_or_none, check_for_nonempty_string, check_for_path_or_none
 import os
+import pickle
 import sys
 import traceback
 import types
@@ -74,6 +78,7 @@ class Instructions( InstructionsBase ):
 		self.__instructions = []
 		self.__steps = []
 		self.__timeKeeper = TimeKeeper()
+		self.__phaseTimeKeepers = {}
 
 		if parent: # the parent instructions object
 			parent.addChild( self )
@@ -88,6 +93,7 @@ class Instructions( InstructionsBase ):
 			plugin.setInstructions( clone )
 		clone.__instructions = deepcopy( self.__instructions, memo )
 		clone.__timeKeeper = deepcopy( self.__timeKeeper, memo )
+		clone.__phaseTimeKeepers = deepcopy( self.__phaseTimeKeepers, memo )
 		clone.__steps = deepcopy( self.__steps, memo )
 		return clone
 
@@ -176,6 +182,22 @@ class Instructions( InstructionsBase ):
 		'''\return TimeKeeper object to measure execution time.'''
 		return self.__timeKeeper
 
+	def getPhaseTimeKeeper( self, methodName ):
+		'''\return the TimeKeeper that measures the phase methodName (see Phase), including children and plug-ins.'''
+		if methodName not in self.__phaseTimeKeepers:
+			self.__phaseTimeKeepers[ methodName ] = TimeKeeper()
+		return self.__phaseTimeKeepers[ methodName ]
+
+	def getPhaseTimeKeepers( self ):
+		'''\return a dictionary of the method names and TimeKeepers of the phases that have been executed.'''
+		return self.__phaseTimeKeepers
+
+	def getResourceUsage( self ):
+		'''Return the total resource usage of the steps of this object and it's children, or None if it is not known.'''
+		usages = [ step.getResourceUsage() for step in self.getSteps() ]
+		usages += [ child.getResourceUsage() for child in self.getChildren() ]
+		return ResourceUsage.total( usages )
+
 	def getFailedSteps( self ):
 		'''\return List of steps that failed during execution'''
 
@@ -257,6 +279,9 @@ class Instructions( InstructionsBase ):
 		node.attributes["timing"] = str( self.getTimeKeeper().deltaString() )
 		# FIXME Kevin: better use Step.getStatus() and Step.getResult()
 		node.attributes["failed"] = str( self.hasFailedRecursively() )
+		usage = self.getResourceUsage()
+		if usage:
+			usage.setXmlAttributes( node )
 
 		if recursive:
 			# loop through plugins
@@ -286,15 +311,22 @@ class Instructions( InstructionsBase ):
 		buildType = mApp().getSettings().get( Settings.ProjectBuildType, True ).lower()
 		allBuildSteps = mApp().getSettings().get( buildStepsSetting, True )
 		buildSteps = []
+		previous = None
 		for buildStep in allBuildSteps:
 			# FIXME maybe this could be a unit test?
-			assert len( buildStep ) == 3
-			name, types, ignorePreviousFailure = buildStep
+			assert len( buildStep ) in ( 3, 4 )
+			name, types, ignorePreviousFailure = buildStep[:3]
 			assert types.lower() == types
 			stepName = Step( name )
 			stepName.setEnabled( buildType in types )
 			stepName.setIgnorePreviousFailure( ignorePreviousFailure )
+			if len( buildStep ) == 4:
+				stepName.setPrerequisites( buildStep[3] )
+			elif previous:
+				# without explicit prerequisites, a step depends on it's predecessor in the sequence
+				stepName.setPrerequisites( [ previous ] )
 			buildSteps.append( stepName )
+			previous = name
 		return buildSteps
 
 	def getIndex( self, instructions ):
@@ -330,15 +362,28 @@ class Instructions( InstructionsBase ):
 			methodName = self.Phase.getDescription( phase )
 
 			mApp().debugN( self, 1, 'Running phase: {0}'.format( methodName ) )
-			method = getattr( self, methodName )
-			method()
-
-			for child in self.getChildren():
-				child._runPhase( phase )
-
-			for plugin in self.getPlugins():
-				if plugin.isEnabled():
-					self._safeCall( plugin, methodName, catchExceptions = plugin.isOptional() )
+			mApp().event( self, 'phase-start', phase = methodName )
+			timeKeeper = self.getPhaseTimeKeeper( methodName )
+			try:
+				with timeKeeper:
+					method = getattr( self, methodName )
+					method()
+
+					for child in self.getChildren():
+						child._runPhase( phase )
+
+					for plugin in self.getPlugins():
+						if plugin.isEnabled():
+							hookTimeKeeper = plugin.getHookTimeKeeper( methodName )
+							try:
+								with hookTimeKeeper:
+									self._safeCall( plugin, methodName, catchExceptions = plugin.isOptional() )
+							finally:
+								# the hooks of the later phases (like slow report uploads) are only recorded as events:
+								mApp().event( plugin, 'plugin-hook', hook = methodName, instructions = self.getName(),
+									duration = hookTimeKeeper.getLastDuration() )
+			finally:
+				mApp().event( self, 'phase-end', phase = methodName, duration = timeKeeper.getLastDuration() )
 
 	def runPrepare( self ):
 		self._runPhase( self.Phase.Prepare )
@@ -352,17 +397,122 @@ class Instructions( InstructionsBase ):
 	def runExecute( self ):
 		self._runPhase( self.Phase.Execute )
 
+	def getExecutionContext( self ):
+		'''Return the execution context (working directory and environment variables) for the actions of this object.
+		By default, objects inherit the context of their parent.'''
+		if self.getParent():
+			return self.getParent().getExecutionContext()
+		return ExecutionContext()
+
+	def _getStepStateStore( self ):
+		'''Return the StepStateStore with the fingerprints of the previous run if this is an incremental build, or None.'''
+		if self.getParent():
+			return self.getParent()._getStepStateStore()
+		return None
+
+	def _hasStepBeenExecuted( self, stepName ):
+		'''Return True if the step, or one of the steps it depends on, has been executed in this run.
+		Empty steps do not do anything by themselves, but pass on the changes of their prerequisites.'''
+		step = self.getStep( stepName )
+		if step.getStatus() != Step.Status.Finished:
+			return False
+		if not step.isEmpty():
+			return True
+		for prerequisite in step.getPrerequisites():
+			if self._hasStepBeenExecuted( prerequisite ):
+				return True
+		return False
+
 	def _stepsShouldExecute( self ):
 		'''Return if the steps should be executed for this object. 
 		By default, steps should be executed if no error happened so far. Steps with the execute-on-failure property set to True
 		will execute even if this method returns False.'''
 		return mApp().getReturnCode() == 0
 
-	def _executeStepRecursively( self, instructions, name ):
-		'''Execute one step of the build sequence recursively, for this object, and all child objects.'''
-		self.executeStep( name )
-		for child in instructions.getChildren():
-			child._executeStepRecursively( child, name )
+	def _executeStepsRecursively( self, instructions, names ):
+		'''Execute a sequence of steps of the build sequence recursively, for this object, and all child objects.
+		Usually, every step is finished for this object and all children before the next one starts. If the children are
+		built in parallel (see _getParallelJobs()), every child executes all steps up to the next step that has actions for
+		this object in one worker process, without waiting for the other children after every step.'''
+		children = instructions.getChildren()
+		jobs = self._getParallelJobs( children )
+		if jobs == 1 and len( children ) > 1:
+			for name in names:
+				self.executeStep( name )
+				for child in children:
+					child._executeStepsRecursively( child, [ name ] )
+			return
+		for segment in self._splitStepSequence( names ):
+			self.executeStep( segment[0] )
+			if jobs > 1:
+				ParallelStepRunner( jobs ).run( children, segment )
+			else:
+				for child in children:
+					child._executeStepsRecursively( child, segment )
+			# the other steps of the segment are empty for this object, they are finished after the children
+			for name in segment[1:]:
+				self.executeStep( name )
+
+	def _splitStepSequence( self, names ):
+		'''Split the sequence of step names into segments that start with the steps that have actions for this object.
+		The children need to finish the steps before such a step before it can be executed.'''
+		segments = []
+		for name in names:
+			step = self.getStep( name )
+			if not segments or ( step.isEnabled() and not step.isEmpty() ):
+				segments.append( [] )
+			segments[-1].append( name )
+		return segments
+
+	def _canExecuteStepsInParallel( self ):
+		'''Return True if the steps of this object may be executed concurrently with those of it's siblings.
+		Only objects that do not influence each other (like Configurations) may be executed in parallel.'''
+		return False
+
+	def _getParallelJobs( self, children ):
+		'''Return the number of worker processes used to execute a step for the children.'''
+		if len( children ) < 2 or ParallelStepRunner.isWorker():
+			return 1
+		for child in children:
+			if not child._canExecuteStepsInParallel():
+				return 1
+		jobs = mApp().getSettings().get( Settings.BuildParallelJobs )
+		if jobs > 1 and not ParallelStepRunner.isSupported():
+			mApp().debugN( self, 2, 'parallel execution is not supported on this platform, building configurations sequentially' )
+			return 1
+		# steps that are executed concurrently by the StepScheduler use some of the jobs already:
+		jobs -= ParallelStepRunner.getWorkerCount()
+		return max( 1, min( jobs, len( children ) ) )
+
+	def _getPluginExecutionStates( self ):
+		'''Return the serialized state of the plug-ins of this object and all child objects.
+		It is used to find the plug-ins that changed while steps are executed (see _getStepExecutionState()).'''
+		return { 'plugins' : [ pickle.dumps( plugin._getExecutionState(), pickle.HIGHEST_PROTOCOL ) for plugin in self.getPlugins() ],
+			'children' : [ child._getPluginExecutionStates() for child in self.getChildren() ] }
+
+	def _getStepExecutionState( self, stepNames, pluginStates ):
+		'''Return the results of executing the steps for this object and all child objects (see ParallelStepRunner).
+		Only the state of the plug-ins that changed compared to pluginStates (retrieved using _getPluginExecutionStates() before
+		the steps were executed) is included. Other plug-ins do not belong to the executed steps, their state is None.'''
+		plugins = []
+		for plugin, previous in zip( self.getPlugins(), pluginStates[ 'plugins' ] ):
+			state = plugin._getExecutionState()
+			plugins.append( None if pickle.dumps( state, pickle.HIGHEST_PROTOCOL ) == previous else state )
+		return { 'steps' : [ self.getStep( stepName )._getExecutionState() for stepName in stepNames ],
+			'plugins' : plugins,
+			'children' : [ child._getStepExecutionState( stepNames, childStates )
+				for child, childStates in zip( self.getChildren(), pluginStates[ 'children' ] ) ] }
+
+	def _setStepExecutionState( self, stepNames, state ):
+		'''Apply results retrieved using _getStepExecutionState() to this object and all child objects.'''
+		for stepName, stepState in zip( stepNames, state[ 'steps' ] ):
+			self.getStep( stepName )._setExecutionState( stepState )
+		for plugin, pluginState in zip( self.getPlugins(), state[ 'plugins' ] ):
+			if pluginState is not None:
+				plugin._setExecutionState( pluginState )
+		assert len( self.getChildren() ) == len( state[ 'children' ] )
+		for child, childState in zip( self.getChildren(), state[ 'children' ] ):
+			child._setStepExecutionState( stepNames, childState )
 
 	def executeStep( self, stepName ):
 		'''Execute one individual step.
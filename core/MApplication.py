@@ -21,12 +21,17 @@ from __future__ import unicode_literals
 
 import sys
 from core.loggers.Logger import Logger
-from core.Exceptions import MomError, MomException, InterruptedException, AbortBuildException
+from core.Exceptions import MomError, MomException, InterruptedException, AbortBuildException, TerminatedException
 from core.Settings import Settings
 from core.helpers.TypeCheckers import check_for_nonnegative_int, check_for_nonempty_string
 from core.Instructions import Instructions
 import traceback
+import signal
 from core.helpers.MachineInfo import machine_info
+from core.helpers.XmlReport import XmlReportCache
+
+def _raise_on_signal( signum, frame ):
+	raise TerminatedException( 'terminated by signal {0}'.format( signum ), signum = signum )
 
 class MApplication( Instructions ):
 	'''MApplication represents the facilities provided by the currently running script.
@@ -43,7 +48,9 @@ class MApplication( Instructions ):
 		MApplication.instance = self
 
 		self.__loggers = []
+		self.__debugLevel = None
 		self.__settings = Settings()
+		self.__xmlReportCache = XmlReportCache()
 		self.__exception = None
 		self.__returnCode = None
 		self._checkMinimumMomVersion( minimumMomVersion )
@@ -89,19 +96,41 @@ class MApplication( Instructions ):
 		if not isinstance( logger, Logger ):
 			raise MomError( 'Loggers need to re-implement the Logger class!' )
 		self.__loggers.append( logger )
+		self.__debugLevel = None
 		self.addPlugin( logger )
 
 	def getLoggers( self ):
 		return self.__loggers
 
+	def getDebugLevel( self ):
+		'''\return the highest level of the debug messages any logger writes, or None if no logger writes debug messages.
+		The level is only calculated again when a logger is added or the script log level changes, so that debug messages
+		that are not written can be discarded cheaply.'''
+		verbosity = self.__settings.getSettings().get( Settings.ScriptLogLevel )
+		if self.__debugLevel is None or self.__debugLevel[0] != verbosity:
+			levels = [ logger.getDebugLevel( self ) for logger in self.__loggers ]
+			levels = [ level for level in levels if level is not None ]
+			self.__debugLevel = ( verbosity, max( levels ) if levels else None )
+		return self.__debugLevel[1]
+
+	def isDebugEnabled( self, level = 1 ):
+		'''\return True if debug messages of the given level are written by any logger.'''
+		maximum = self.getDebugLevel()
+		return maximum is not None and level <= maximum
+
 	def getSettings( self ):
 		return self.__settings
 
+	def getXmlReportCache( self ):
+		'''\return the cache of the XML reports that is shared by the reporters and converters, see XmlReportCache.'''
+		return self.__xmlReportCache
+
 	def registerReturnCode( self, code ):
 		check_for_nonnegative_int( code, "The return code of the build script has to be a non-negative integer number!" )
 		if self.__returnCode is None:
 			# only if there was no previous error:
 			self.__returnCode = code
+			self.__xmlReportCache.invalidate()
 			msg = 'return code {0} registered'.format( code )
 			if self.__returnCode == 0:
 				self.message( self, msg )
@@ -127,6 +156,7 @@ class MApplication( Instructions ):
 
 		self.__exception = exception
 		self.debugN( self, 2, "exception registered: {0}".format( exception[0] ) )
+		self.event( self, 'exception', type = exception[0].__class__.__name__, message = unicode( exception[0] ) )
 
 		tracebackToUnicode = u"".join( [x.decode( "utf-8" ) for x in exception[1] ] )
 		self.debugN( self, 5, "printing traceback:\n{0}".format( tracebackToUnicode ) )
@@ -141,10 +171,29 @@ class MApplication( Instructions ):
 		[ logger.message( self, mobject, text, compareTo ) for logger in self.getLoggers() ]
 
 	def debug( self, mobject, text, compareTo = None ):
-		[ logger.debug( self, mobject, text, compareTo ) for logger in self.getLoggers() ]
+		'''Write a debug message. text can be a function that returns the message, it is only called if the message is
+		written by a logger.'''
+		if not self.isDebugEnabled( 1 ):
+			return
+		if callable( text ):
+			text = text()
+		[ logger.debug( self, mobject, text, compareTo ) for logger in self.__loggers ]
 
 	def debugN( self, mobject, level, text, compareTo = None ):
-		[ logger.debugN( self, mobject, level, text, compareTo ) for logger in self.getLoggers() ]
+		'''Write a debug message of the given level, see debug().'''
+		if not self.isDebugEnabled( level ):
+			return
+		if callable( text ):
+			text = text()
+		[ logger.debugN( self, mobject, level, text, compareTo ) for logger in self.__loggers ]
+
+	def event( self, mobject, eventType, **details ):
+		'''Report a structured event of the build execution, for example the start of a phase, to the loggers.
+		details are the event specific values (numbers and strings).'''
+		if eventType not in ( 'phase-start', 'phase-end', 'plugin-hook' ):
+			# step status changes, executed actions and exceptions are part of the XML report:
+			self.__xmlReportCache.invalidate()
+		[ logger.event( self, mobject, eventType, details ) for logger in self.getLoggers() ]
 
 	def _queryAndPrintSettings( self, names = None ):
 		try:
@@ -182,16 +231,43 @@ class MApplication( Instructions ):
 			raise # re-throw exception
 		finally:
 			if self.getReturnCode() != AbortBuildException.getReturnCode():
-				self.runReports()
-				self.runNotifications()
+				# the reporters and notifiers share the XML report, it is only generated again if the build changes:
+				self.__xmlReportCache.setEnabled( True )
+				try:
+					self.runReports()
+					self.runNotifications()
+				finally:
+					self.__xmlReportCache.setEnabled( False )
 				self.runShutDowns()
 
+	def _installSignalHandlers( self ):
+		'''Raise a TerminatedException if the process receives SIGTERM or SIGHUP, so that the build is finished through the
+		regular error handling: the return code is registered, and the reports and the shutDown phase (which flushes the log
+		files) are executed. Handlers installed by the build script are kept.
+		\return a dictionary of the replaced handlers'''
+		handlers = {}
+		for name in ( 'SIGTERM', 'SIGHUP' ):
+			signum = getattr( signal, name, None )
+			if signum is None: # not available on Windows
+				continue
+			try:
+				if signal.getsignal( signum ) == signal.SIG_DFL:
+					handlers[ signum ] = signal.signal( signum, _raise_on_signal )
+			except ValueError:
+				break # signal handlers can only be installed by the main thread
+		return handlers
+
+	def _restoreSignalHandlers( self, handlers ):
+		for signum, handler in handlers.items():
+			signal.signal( signum, handler )
+
 	def buildAndReturn( self ):
 		'''buildAndReturn executes the build and returns the exit code of the script.
 		It is useful for scripts that need to perform other code after the build method.
 		build wraps this function and exits with the error code.
 		The method does always return, though, if a MomException is caught. Any exception
 		that does not inherit MomException will pass.'''
+		handlers = self._installSignalHandlers()
 		try:
 			self._buildAndReturn()
 			self.message( self, 'Returning, return code {0}'.format( self.getReturnCode() ) )
@@ -209,6 +285,8 @@ class MApplication( Instructions ):
 		except:
 			self.deleteLogDirOnShutdown( False )
 			raise
+		finally:
+			self._restoreSignalHandlers( handlers )
 
 	def build( self ):
 		'''build executes the program and exits the process with the correct return code.'''
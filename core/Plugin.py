@@ -22,6 +22,7 @@ from core.Exceptions import MomException, ConfigurationError
 from core.InstructionsBase import InstructionsBase
 from core.helpers.GlobalMApp import mApp
 from core.helpers.RunCommand import RunCommand
+from core.helpers.TimeKeeper import TimeKeeper
 from core.helpers.TypeCheckers import check_for_nonempty_string, check_for_list_of_paths
 import os.path
 
@@ -49,6 +50,10 @@ class Plugin( InstructionsBase ):
 	\see getXslTemplates"""
 
 	_PLUGIN_DATA_DIR = os.path.join( os.path.dirname( __file__ ), "plugins/data" )
+	HookTimeAttributePrefix = 'hook-'
+	# the hooks of the phases before the reports are generated, the later ones are still running or not called yet. The
+	# durations of all hooks are reported as plugin-hook events (see JsonEventLogger):
+	ReportedHooks = [ 'prepare', 'preFlightCheck', 'setup', 'execute', 'wrapup' ]
 
 	def __init__( self, name = None ):
 		super( Plugin, self ).__init__( name )
@@ -59,14 +64,26 @@ class Plugin( InstructionsBase ):
 		self.__command = None
 		self.__commandArguments = []
 		self.__commandSearchPaths = []
+		self.__hookTimeKeepers = {}
 
 	def __deepcopy__( self, memo ):
 		clone = copy( self )
+		clone.__hookTimeKeepers = deepcopy( self.__hookTimeKeepers, memo )
 		clone.__command = deepcopy( self.__command, memo )
 		clone.__commandArguments = deepcopy( self.__commandArguments, memo )
 		clone.__commandSearchPaths = deepcopy( self.__commandSearchPaths, memo )
 		return clone
 
+	def getHookTimeKeeper( self, methodName ):
+		'''Return the TimeKeeper that measures the calls of the plugin hook methodName (for example, "setup").'''
+		if methodName not in self.__hookTimeKeepers:
+			self.__hookTimeKeepers[ methodName ] = TimeKeeper()
+		return self.__hookTimeKeepers[ methodName ]
+
+	def getHookTimeKeepers( self ):
+		'''Return a dictionary of the method names and TimeKeepers of the plugin hooks that have been called.'''
+		return self.__hookTimeKeepers
+
 	def setEnabled( self, onOff ):
 		self.__enabled = onOff
 
@@ -171,12 +188,27 @@ class Plugin( InstructionsBase ):
 
 		return mApp().getSettings().get( "plugin.{0}.{1}".format( cls.__name__ , name ), required )
 
+	def _getExecutionState( self ):
+		'''Return state the plug-in collected while executing the build steps of it's instructions object.
+		Plugins that store results of step execution (scores, reports) need to implement this method, so that the results can
+		be transferred from worker processes when configurations are built in parallel (see ParallelStepRunner).'''
+		return None
+
+	def _setExecutionState( self, state ):
+		'''Apply state retrieved using _getExecutionState().'''
+		pass
+
 	def createXmlNode( self, document ):
 		node = super( Plugin, self ).createXmlNode( document )
 
 		node.attributes["isEnabled"] = str( self.isEnabled() )
 		node.attributes["isOptional"] = str( self.isOptional() )
 		node.attributes["pluginType"] = str( self.getPluginType() )
+		# the time spent in the plugin hooks, in seconds:
+		for methodName in self.ReportedHooks:
+			if methodName in self.getHookTimeKeepers():
+				seconds = self.getHookTimeKeeper( methodName ).deltaSeconds()
+				node.attributes[ self.HookTimeAttributePrefix + methodName ] = '{0:.3f}'.format( seconds )
 
 		return node
 
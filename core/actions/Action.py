@@ -20,12 +20,13 @@
 from core.Exceptions import MomError, MomException, BuildError
 from core.MObject import MObject
 from core.helpers.EnvironmentSaver import EnvironmentSaver
+from core.helpers.ExecutionContext import ExecutionContext
 from core.helpers.GlobalMApp import mApp
+from core.helpers.LogCompression import open_log_file
 from core.helpers.StringUtils import to_unicode_or_bust
 from core.helpers.TimeKeeper import TimeKeeper
 from core.helpers.TypeCheckers import check_for_path, check_for_int
 from core.helpers.XmlUtils import create_child_node
-import codecs
 import os
 import sys
 import traceback
@@ -58,6 +59,8 @@ class Action( MObject ):
 		self.__finished = False
 		self.__aborted = False
 		self.__result = None
+		self.__context = None
+		self.__logFile = None
 		self._setStdOut( None )
 		self._setStdErr( None )
 		self.setIgnorePreviousFailure( False )
@@ -121,38 +124,93 @@ class Action( MObject ):
 			raise MomError( 'getStdOut() queried before the action was finished' )
 		return self.__stdOut
 
-	def executeAction( self, logFile = None ):
+	def getTimeKeeper( self ):
+		return self.__timeKeeper
+
+	def getResourceUsage( self ):
+		'''Return the CPU time, peak memory and block I/O used by the action as a ResourceUsage object, or None if it is
+		not known (for example, because the action did not execute a command).'''
+		return None
+
+	def _getExecutionState( self ):
+		'''Return the results of executing the action, so that they can be transferred to a copy of the action
+		in another process (see ParallelStepRunner).'''
+		return { 'started' : self.__started, 'finished' : self.__finished, 'aborted' : self.__aborted,
+			'result' : self.__result, 'stdout' : self.__stdOut, 'stderr' : self.__stdErr, 'timekeeper' : self.__timeKeeper }
+
+	def _setExecutionState( self, state ):
+		'''Apply results of executing the action that have been retrieved using _getExecutionState().'''
+		self.__started = state[ 'started' ]
+		self.__finished = state[ 'finished' ]
+		self.__aborted = state[ 'aborted' ]
+		self.__result = state[ 'result' ]
+		self.__stdOut = state[ 'stdout' ]
+		self.__stdErr = state[ 'stderr' ]
+		self.__timeKeeper = state[ 'timekeeper' ]
+
+	def _usesExecutionContext( self ):
+		'''Return True if the action applies it's execution context itself, for example by passing it to RunCommand.
+		Otherwise, the working directory and the environment of the build script process are changed while the action is
+		executed, and restored afterwards.'''
+		return False
+
+	def getExecutionContext( self ):
+		'''Return the execution context (working directory and environment variables) of the action.'''
+		if self.__context is None:
+			return ExecutionContext( self.getWorkingDirectory() )
+		return self.__context
+
+	def getLogFile( self ):
+		'''Return the log file the results of the action are written to, if it is executed.'''
+		return self.__logFile
+
+	def executeAction( self, logFile = None, context = None ):
+		self.__logFile = logFile
+		mApp().event( self, 'action-start', action = self.getLogDescription() )
 		with self.__timeKeeper:
-			with EnvironmentSaver():
-				if self.getWorkingDirectory():
-					mApp().debugN( self, 3, 'changing directory to "{0}"'.format( self.getWorkingDirectory() ) )
+			context = context or ExecutionContext()
+			if self.getWorkingDirectory():
+				if not os.path.isdir( str( self.getWorkingDirectory() ) ):
+					raise BuildError( 'The working directory "{0}" does not exist'.format( self.getWorkingDirectory() ) )
+				context = context.withWorkingDirectory( self.getWorkingDirectory() )
+			self.__context = context
+			if self._usesExecutionContext():
+				self.__execute()
+			else:
+				with EnvironmentSaver():
+					if context.getWorkingDirectory():
+						mApp().debugN( self, 3, 'changing directory to "{0}"'.format( context.getWorkingDirectory() ) )
 					try:
-						os.chdir( str( self.getWorkingDirectory() ) )
+						context.apply()
 					except ( OSError, IOError ) as e:
 						raise BuildError( str( e ) )
-
-				self._aboutToStart()
-				mApp().debugN( self, 3, 'executing action {0}'.format( self.getLogDescription() ) )
-				try:
-					result = self.run()
-					if result == None or not isinstance( result, int ):
-						raise MomError( 'Action {0} ({1}) did not return a valid non-negative integer return value from run()!'
-									.format( self.getName(), self.getLogDescription() ) )
-					self._setResult( int( result ) )
-					self._finished()
-				except MomException as e:
-					innerTraceback = "".join( traceback.format_tb( sys.exc_info()[2] ) )
-					self._aborted()
-					mApp().debug( self, 'execution failed: "{0}"'.format( str( e ) ) )
-					mApp().debugN( self, 2, innerTraceback )
-
-					self._setStdErr( "{0}:\n\n{1}".format( e, innerTraceback ) )
-					self._setResult( e.getReturnCode() )
+					self.__execute()
 
 		self._writeLog( logFile )
-		mApp().debugN( self, 2, '{0} duration: {1}'.format( self.getLogDescription(), self.__timeKeeper.deltaString() ) )
+		mApp().debugN( self, 2, lambda: '{0} duration: {1}'.format( self.getLogDescription(), self.__timeKeeper.deltaString() ) )
+		mApp().event( self, 'action-end', action = self.getLogDescription(), returnCode = self.getResult(),
+			duration = self.__timeKeeper.getLastDuration() )
 		return self.getResult()
 
+	def __execute( self ):
+		self._aboutToStart()
+		mApp().debugN( self, 3, lambda: 'executing action {0}'.format( self.getLogDescription() ) )
+		try:
+			result = self.run()
+			if result == None or not isinstance( result, int ):
+				raise MomError( 'Action {0} ({1}) did not return a valid non-negative integer return value from run()!'
+							.format( self.getName(), self.getLogDescription() ) )
+			self._setResult( int( result ) )
+			self._finished()
+		except MomException as e:
+			innerTraceback = "".join( traceback.format_tb( sys.exc_info()[2] ) )
+			self._aborted()
+			mApp().debug( self, 'execution failed: "{0}"'.format( str( e ) ) )
+			mApp().debugN( self, 2, innerTraceback )
+
+			self._setStdErr( "{0}:\n\n{1}".format( e, innerTraceback ) )
+			self._setResult( e.getReturnCode() )
+
 	def _writeLog( self, filePath ):
 		"""Write the results of this action to the specified path """
 
@@ -161,9 +219,8 @@ class Action( MObject ):
 			return
 
 		try:
-			with codecs.open( filePath, 'a', 'utf-8' ) as f:
-				f.writelines( '*** Log from {0} ***\n'.format( self.getName() ) )
-				f.writelines( '{0}\n'.format( self.getLogDescription() ) )
+			with open_log_file( filePath ) as f:
+				f.writelines( self._getLogHeader() )
 				if self.getStdOut() or self.getStdErr():
 					if self.getStdOut():
 						f.writelines( '\n=== Standard output ===\n' + self.getStdOut().rstrip() + "\n" )
@@ -173,10 +230,16 @@ class Action( MObject ):
 					f.writelines( '(The action did not generate any output.)\n' )
 
 				# append some separator string
-				f.writelines( "\n*** End of log ***\n\n" )
+				f.writelines( self._getLogFooter() )
 		except Exception as e:
 			raise MomError( 'cannot write to log file "{0}": {1}'.format( filePath, str( e ) ) )
 
+	def _getLogHeader( self ):
+		return '*** Log from {0} ***\n{1}\n'.format( self.getName(), self.getLogDescription() )
+
+	def _getLogFooter( self ):
+		return '\n*** End of log ***\n\n'
+
 	def getTagName( self ):
 		return "action"
 
@@ -186,6 +249,7 @@ class Action( MObject ):
 		node.attributes["finished"] = str( self.didFinish() )
 		node.attributes["started"] = str( self.wasStarted() )
 		node.attributes["timing"] = str( self.__timeKeeper.deltaString() )
+		node.attributes["duration"] = '{0:.3f}'.format( self.__timeKeeper.deltaSeconds() )
 		node.attributes["returncode"] = str( self.getResult() )
 
 		stderr, stdout = self._getOutput()
@@ -17,20 +17,35 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from core.helpers.TypeCheckers import check_for_nonnegative_int, check_for_list_of_paths
-from core.Exceptions import MomError
+from core.helpers.TypeCheckers import check_for_nonnegative_int, check_for_list_of_paths, check_for_path
+from core.Exceptions import MomError, ConfigurationError
+from core.Settings import Settings
+from core.helpers.ActionCache import ActionCache
+from core.helpers.GlobalMApp import mApp
+from core.helpers.LogCompression import open_log_file
+from core.helpers.ResourceUsage import ResourceUsage
 from core.helpers.RunCommand import RunCommand
 from core.actions.Action import Action
+import os
 
 class ShellCommandAction( Action ):
 	"""ShellCommandAction encapsulates the execution of one command in the Step class. 
-	It is mostly used internally, but can be of general use as well."""
+	It is mostly used internally, but can be of general use as well.
+	If the action declares output directories, and an action cache directory is configured (see
+	Settings.BuildActionCacheDir), the results of successful runs are stored in an ActionCache, and restored instead of
+	executing the command again.
+	"""
 
 	def __init__( self, command = None, timeout = None, combineOutput = True, searchPaths = None ):
 		Action.__init__( self )
 		self.setCommand( command, timeout, searchPaths )
 		self.__combineOutput = combineOutput
 		self.__runner = None
+		self.__inputDirectories = []
+		self.__outputDirectories = []
+		self.__cacheStatus = None
+		self.__streamedOutput = False
+		self.__keepOutput = False
 
 	def getLogDescription( self ):
 		"""Provide a textual description for the Action that can be added to the execution log file."""
@@ -52,25 +67,142 @@ class ShellCommandAction( Action ):
 		"""Returns the command"""
 		return map( lambda x: str( x ) , self.__command )
 
+	def addInputDirectory( self, path ):
+		"""Declare a directory the command reads from. It's content is part of the key of the action cache."""
+		check_for_path( path, "The input directory must be a path name." )
+		self.__inputDirectories.append( path )
+
+	def getInputDirectories( self ):
+		return self.__inputDirectories
+
+	def addOutputDirectory( self, path ):
+		"""Declare a directory the command writes it's results to. Relative paths are interpreted relative to the
+		working directory. Only actions with output directories use the action cache."""
+		check_for_path( path, "The output directory must be a path name." )
+		self.__outputDirectories.append( path )
+
+	def getOutputDirectories( self ):
+		return self.__outputDirectories
+
+	def setKeepOutput( self, keep ):
+		"""Keep the complete output of the command in memory even if it is streamed to the log file (see
+		Settings.BuildStreamActionOutput). Actions whose output is parsed, for example by analyzers, need to set this,
+		otherwise only the beginning and the end of the output are available."""
+		self.__keepOutput = keep
+
+	def getKeepOutput( self ):
+		return self.__keepOutput
+
+	def getCacheStatus( self ):
+		'''Return 'hit' if the results have been restored from the action cache, 'miss' if the command was executed
+		because the action cache had no results for it, or None if the action cache was not used.'''
+		return self.__cacheStatus
+
+	def _getActionCache( self ):
+		if not self.getOutputDirectories():
+			return None
+		settings = mApp().getSettings()
+		path = settings.get( Settings.BuildActionCacheDir, False )
+		if not path:
+			return None
+		try:
+			baseDir = mApp().getBaseDir()
+		except ConfigurationError:
+			baseDir = None # the action is not executed as part of a build
+		return ActionCache( path, baseDir, settings.get( Settings.BuildActionCacheVariables ) )
+
+	def _getCacheCommand( self ):
+		'''Return the command line that is part of the action cache key.
+		Arguments that do not change the results of the command (like the number of parallel jobs) can be left out.'''
+		return self.getCommand()
+
 	def _getRunner( self ):
 		if self.__runner == None:
 			raise MomError( "The command runner was not initialized before being queried" )
 		return self.__runner
 
+	def _usesExecutionContext( self ):
+		return True
+
+	def getResourceUsage( self ):
+		if self.__runner and self.__runner.getResourceUsage():
+			return ResourceUsage.fromRusage( self.__runner.getResourceUsage() )
+		return None
+
+	def _getExecutionState( self ):
+		state = Action._getExecutionState( self )
+		state[ 'runner' ] = self.__runner
+		state[ 'cachestatus' ] = self.__cacheStatus
+		return state
+
+	def _setExecutionState( self, state ):
+		Action._setExecutionState( self, state )
+		self.__runner = state[ 'runner' ]
+		self.__cacheStatus = state[ 'cachestatus' ]
+
 	def run( self ):
 		"""Executes the shell command. Needs a command to be set."""
+		cache = self._getActionCache()
+		if cache:
+			context = self.getExecutionContext()
+			workingDir = context.getWorkingDirectory() or os.getcwd()
+			outputDirectories = [ os.path.join( workingDir, str( path ) ) for path in self.getOutputDirectories() ]
+			key = cache.makeKey( self._getCacheCommand(), context, self.getInputDirectories(), self.getOutputDirectories() )
+			result = cache.restore( key, outputDirectories )
 		self.__runner = RunCommand( self.__command, self.__timeOutPeriod, self.__combineOutput, self.__searchPaths )
-		if self.getWorkingDirectory() != None:
-			self.__runner.setWorkingDir( self.getWorkingDirectory() )
+		self.__runner.setExecutionContext( self.getExecutionContext() )
+		if cache and result:
+			self.__cacheStatus = 'hit'
+			# the runner represents the restored results, for example for analyzers that parse the output:
+			returnCode, stdOut, stdErr = result
+			self.__runner.setReturnCode( returnCode )
+			self.__runner.setStdOut( stdOut )
+			self.__runner.setStdErr( stdErr )
+			self._setStdOut( stdOut )
+			self._setStdErr( stdErr )
+			return returnCode
+		elif cache:
+			self.__cacheStatus = 'miss'
+		self.__streamedOutput = bool( self.getLogFile() ) and mApp().getSettings().get( Settings.BuildStreamActionOutput )
+		if self.__streamedOutput:
+			# write the header now, the output is appended to the log file while the command is running:
+			with open_log_file( self.getLogFile() ) as f:
+				f.write( self._getLogHeader() + '\n=== Output ===\n' )
+			self.__runner.setLogFile( self.getLogFile() )
+			# the cache stores the output of the runner, restoring only it's beginning and end would lose the rest:
+			self.__runner.setKeepOutput( self.getKeepOutput() or bool( cache ) )
 		self._getRunner().run()
 		self._setStdOut( self._getRunner().getStdOut() )
 		self._setStdErr( self._getRunner().getStdErr() )
-		return self._getRunner().getReturnCode()
+		returnCode = self._getRunner().getReturnCode()
+		if cache and returnCode == 0: # failed runs are not cached, they may be caused by temporary problems
+			cache.store( key, outputDirectories, returnCode, self._getRunner().getStdOut(), self._getRunner().getStdErr() )
+		return returnCode
+
+	def _writeLog( self, filePath ):
+		if not self.__streamedOutput:
+			return Action._writeLog( self, filePath )
+		try:
+			with open_log_file( filePath ) as f:
+				if self.getAborted() and self.getStdErr(): # the command could not be executed
+					f.write( '\n=== Error output ===\n' + self.getStdErr().rstrip() + '\n' )
+				f.write( self._getLogFooter() )
+		except Exception as e:
+			raise MomError( 'cannot write to log file "{0}": {1}'.format( filePath, str( e ) ) )
+
+	def createXmlNode( self, document ):
+		node = Action.createXmlNode( self, document )
+		if self.getCacheStatus():
+			node.attributes["cache"] = self.getCacheStatus()
+		usage = self.getResourceUsage()
+		if usage:
+			usage.setXmlAttributes( node )
+		return node
 
 	def hasTimedOut( self ):
 		"""Returns True if the shell command process timed out, e.g., was not completed within the timeout period.
 		Can only be called after execution."""
-		if not self.__started:
+		if not self.wasStarted():
 			raise MomError( 'timedOut() queried before the command was executed' )
 		return self._getRunner().getTimedOut()
 
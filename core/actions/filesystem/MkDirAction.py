@@ -24,13 +24,17 @@ from core.actions.filesystem.DirActionBase import DirActionBase
 
 class MkDirAction( DirActionBase ):
 	"""MkDirAction creates a directory.
-	The directory will be created local to the working directory of the action."""
+	The directory will be created local to the working directory of the action. It is not an error if the directory already
+	exists, for example in incremental builds."""
 
 	def __init__( self, path, name = None ):
 		DirActionBase.__init__( self, path, name )
 
 	def run( self ):
 		check_for_path( self.getPath(), "No directory specified!" )
+		if os.path.isdir( str( self.getPath() ) ):
+			mApp().debugN( self, 4, 'directory "{0}" exists'.format( self.getPath() ) )
+			return 0
 		mApp().debugN( self, 4, 'creating directory "{0}"'.format( self.getPath() ) )
 		try:
 			os.makedirs( str( self.getPath() ) )
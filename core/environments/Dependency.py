@@ -143,8 +143,11 @@ class Dependency( MObject ):
 	def applyCommand( self, line ):
 		pass
 
-	def apply( self ):
+	def _getEnvironmentChanges( self ):
+		'''Parse the commands of the control file.
+		\return a list of ( operation, variable, value ) tuples, where operation is export, append or prepend'''
 		assert self.getFolder()
+		changes = []
 		controlFile = self._getControlFileName( self.getFolder() )
 		for line in self.getCommands():
 			assert( not re.match( '^\s*#', line ) and not re.match( '^\s*$', line ) )
@@ -157,17 +160,17 @@ class Dependency( MObject ):
 					variable = str( export.group( 2 ) )
 					value = self._expandVariables( export.group( 3 ) )
 					mApp().debugN( self, 3, 'setBuildEnvironment: >export< ' + variable + '="' + value + '"' )
-					os.environ[variable] = value
+					changes.append( ( 'export', variable, value ) )
 				elif addTo:
 					variable = str( addTo.group( 2 ) )
 					mode = self._expandVariables( addTo.group( 3 ) )
 					value = self._expandVariables( addTo.group( 4 ) )
 					if mode == 'APPEND':
 						mApp().debugN( self, 3, 'setBuildEnvironment: >append< ' + variable + ': "' + value + '"' )
-						add_to_path_collection( variable, value, 'append' )
+						changes.append( ( 'append', variable, value ) )
 					elif mode == 'PREPEND':
 						mApp().debugN( self, 3, 'setBuildEnvironment: >prepend< ' + variable + ': "' + value + '"' )
-						add_to_path_collection( variable, value, 'prepend' )
+						changes.append( ( 'prepend', variable, value ) )
 					else:
 						raise ConfigurationError( 'mode missing' )
 				elif enabled:
@@ -187,6 +190,25 @@ class Dependency( MObject ):
 				mApp().message( self, 'error (' + str( value ) + ') in control file for ' + controlFile + '\n--> ' + str( line ).strip() )
 			except IndexError:
 				mApp().message( self, 'syntax error in control file for ' + controlFile + '\n--> ' + str( line ).strip() )
+		return changes
+
+	def apply( self ):
+		'''Apply the dependency to the environment of the build script process.'''
+		for operation, variable, value in self._getEnvironmentChanges():
+			if operation == 'export':
+				os.environ[variable] = value
+			else:
+				add_to_path_collection( variable, value, operation )
+
+	def applyTo( self, context ):
+		'''Return a copy of the execution context with the dependency applied to it.
+		The environment of the build script process is not modified.'''
+		for operation, variable, value in self._getEnvironmentChanges():
+			if operation == 'export':
+				context = context.withVariable( variable, value )
+			else:
+				context = context.withPathAdded( variable, value, operation )
+		return context
 
 	def verify( self ):
 		'''Verify that the folder contains a MOM package control file. If so, evaluate it.'''
@@ -54,12 +54,13 @@ class Environment( ConfigurationBase ):
 		for dep in self.getDependencies():
 			dep.apply()
 
-	def _executeStepRecursively( self, instructions, name ):
-		'''Apply the environment, call the base class method, restore the environment.'''
-		with EnvironmentSaver():
-			self.__applyDependencies()
-			# build configuration (error handling is done in the configuration)
-			ConfigurationBase._executeStepRecursively( self, instructions, name )
+	def getExecutionContext( self ):
+		'''Apply the dependencies to the execution context of the actions of this environment and it's configurations.
+		The environment of the build script process is not modified.'''
+		context = super( Environment, self ).getExecutionContext()
+		for dep in self.getDependencies():
+			context = dep.applyTo( context )
+		return context
 
 	def makeDescription( self ):
 		names = []
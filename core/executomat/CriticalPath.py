@@ -0,0 +1,195 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.MObject import MObject
+
+class _Item( object ):
+	'''The execution of one step of one instructions object, with the times recorded by the step's TimeKeeper.'''
+
+	def __init__( self, instructions, step ):
+		self.instructions = instructions
+		self.step = step
+		intervals = step.getTimeKeeper().getIntervals()
+		self.pid = intervals[0][0]
+		self.start = intervals[0][1]
+		self.stop = intervals[-1][2]
+		self.predecessors = []
+		self.successors = []
+		# the same step of the child instructions objects, the process waits for them before it continues:
+		self.descendants = []
+
+	def getDuration( self ):
+		return self.stop - self.start
+
+class CriticalPath( MObject ):
+	'''CriticalPath finds the chain of executed steps that determined the duration of the build.
+	When configurations and steps are executed in parallel, the build takes as long as it's critical path, not as long as
+	the sum of the step durations. The graph is rebuilt after execution from the TimeKeeper data of the steps. A step
+	depends on the same step of it's parent instructions object, on every instance of it's prerequisite steps, and on the
+	step executed before it in the same process (including the same step of the child instructions objects, since the process
+	waits for them). The actions of a step are executed one after the other, so they are on
+	the critical path if their step is, and share the slack of their step.
+
+	Every executed step is annotated with it's slack, the time it could have taken longer without delaying the build.
+	Steps on the critical path also get their position on the path (see Step.getCriticalPathPosition()).'''
+
+	# tolerance for the comparison of the start and stop times of consecutive steps, in seconds:
+	Epsilon = 0.001
+
+	def __init__( self, instructions, name = None ):
+		MObject.__init__( self, name )
+		self.__instructions = instructions
+		self.__items = []
+		self.__path = []
+
+	def getInstructions( self ):
+		return self.__instructions
+
+	def getPath( self ):
+		'''\return a list of ( instructions, step ) tuples of the critical path, in execution order.'''
+		return [ ( item.instructions, item.step ) for item in self.__path ]
+
+	def getDuration( self ):
+		'''\return the sum of the durations of the steps on the critical path, in seconds.'''
+		return sum( [ item.getDuration() for item in self.__path ] )
+
+	def getWallTime( self ):
+		'''\return the time from the start of the first to the end of the last executed step, in seconds.'''
+		if not self.__items:
+			return 0.0
+		return max( [ item.stop for item in self.__items ] ) - min( [ item.start for item in self.__items ] )
+
+	def _collectItems( self, instructions, parentItems ):
+		'''Create the items for the executed steps of instructions and it's children.
+		\return a list of the created items.'''
+		items = {}
+		created = []
+		for step in instructions.getSteps():
+			if step.getTimeKeeper().getIntervals():
+				item = _Item( instructions, step )
+				items[ step.getName() ] = item
+				created.append( item )
+				if step.getName() in parentItems:
+					item.predecessors.append( parentItems[ step.getName() ] )
+		self.__items += created
+		for child in instructions.getChildren():
+			for descendant in self._collectItems( child, items ):
+				created.append( descendant )
+				if descendant.step.getName() in items:
+					items[ descendant.step.getName() ].descendants.append( descendant )
+		return created
+
+	def _getPrerequisiteNames( self, name, prerequisites, byName ):
+		'''\return the names of the executed steps name depends on.
+		Steps that were not executed (for example, because they are disabled) count as finished once their own prerequisites
+		are finished, so they are replaced with their prerequisites.'''
+		names = []
+		for prerequisite in prerequisites.get( name, [] ):
+			if prerequisite in byName:
+				names.append( prerequisite )
+			elif prerequisite != name:
+				names += self._getPrerequisiteNames( prerequisite, prerequisites, byName )
+		return names
+
+	def _collectPrerequisites( self, instructions, prerequisites ):
+		for step in instructions.getSteps():
+			prerequisites.setdefault( step.getName(), step.getPrerequisites() )
+		for child in instructions.getChildren():
+			self._collectPrerequisites( child, prerequisites )
+
+	def _precedes( self, predecessor, item ):
+		return predecessor.start < item.start and predecessor.stop <= item.start + self.Epsilon
+
+	def _connectItems( self ):
+		byName = {}
+		byProcess = {}
+		prerequisites = {}
+		for item in self.__items:
+			byName.setdefault( item.step.getName(), [] ).append( item )
+			byProcess.setdefault( item.pid, [] ).append( item )
+		self._collectPrerequisites( self.getInstructions(), prerequisites )
+		for item in self.__items:
+			for prerequisite in self._getPrerequisiteNames( item.step.getName(), prerequisites, byName ):
+				item.predecessors += byName[ prerequisite ]
+		for items in byProcess.values():
+			items.sort( key = lambda item: item.start )
+			for previous, item in zip( items[:-1], items[1:] ):
+				# the process continues after the step is finished for all child instructions objects:
+				item.predecessors += [ previous ] + previous.descendants
+		for item in self.__items:
+			# only keep dependencies that are consistent with the recorded times, which also removes cycles:
+			item.predecessors = [ predecessor for predecessor in set( item.predecessors )
+				if self._precedes( predecessor, item ) ]
+			if not item.predecessors or max( [ predecessor.stop for predecessor in item.predecessors ] ) < item.start - self.Epsilon:
+				# the step waited for something else, usually for a free worker process. It waited for the step that finished last:
+				earlier = [ other for other in self.__items if self._precedes( other, item ) ]
+				if earlier:
+					item.predecessors.append( max( earlier, key = lambda other: other.stop ) )
+			for predecessor in item.predecessors:
+				predecessor.successors.append( item )
+
+	def _findPath( self ):
+		'''Walk back from the step that finished last, always to the predecessor that finished last.'''
+		path = []
+		item = max( self.__items, key = lambda item: item.stop )
+		while item and item not in path:
+			path.insert( 0, item )
+			item = max( item.predecessors, key = lambda predecessor: predecessor.stop ) if item.predecessors else None
+		return path
+
+	def _sortTopologically( self ):
+		order = []
+		remaining = dict( [ ( item, len( item.predecessors ) ) for item in self.__items ] )
+		ready = [ item for item, count in remaining.items() if count == 0 ]
+		while ready:
+			item = ready.pop()
+			order.append( item )
+			for successor in item.successors:
+				remaining[ successor ] -= 1
+				if remaining[ successor ] == 0:
+					ready.append( successor )
+		# steps with equal times could form a cycle, they are added in the order of their start times:
+		return order + sorted( [ item for item in self.__items if remaining[ item ] > 0 ], key = lambda item: item.start )
+
+	def _calculateLatestFinish( self ):
+		'''\return a dictionary of the latest time every item could have finished without delaying the end of the build.'''
+		end = max( [ item.stop for item in self.__items ] )
+		latestFinish = {}
+		for item in reversed( self._sortTopologically() ):
+			latestStarts = [ latestFinish[ successor ] - successor.getDuration() for successor in item.successors
+				if successor in latestFinish ]
+			latestFinish[ item ] = min( latestStarts + [ end ] )
+		return latestFinish
+
+	def analyze( self ):
+		'''Rebuild the graph of the executed steps, find the critical path, and annotate the steps with their slack.'''
+		self.__items = []
+		self._collectItems( self.getInstructions(), {} )
+		if not self.__items:
+			self.__path = []
+			return
+		self._connectItems()
+		self.__path = self._findPath()
+		latestFinish = self._calculateLatestFinish()
+		for item in self.__items:
+			item.step.setSlack( max( 0.0, latestFinish[ item ] - item.stop ) )
+			item.step.setCriticalPathPosition( None )
+		for position, item in enumerate( self.__path ):
+			item.step.setSlack( 0.0 )
+			item.step.setCriticalPathPosition( position )
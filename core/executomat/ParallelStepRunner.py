@@ -0,0 +1,183 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import MomError, MomException
+from core.MObject import MObject
+from core.helpers.GlobalMApp import mApp
+from core.helpers.TypeCheckers import check_for_positive_int
+import multiprocessing
+import os
+import select
+import signal
+import sys
+import traceback
+
+def _exit_worker_on_signal( signum, frame ):
+	# the parent stops listening before it terminates a worker, the worker must not report a TerminatedException:
+	raise SystemExit( 128 + signum )
+
+class ParallelStepRunner( MObject ):
+	'''ParallelStepRunner executes build steps concurrently in forked worker processes.
+	It is used to execute a sequence of steps for a number of sibling Instructions objects, and by the StepScheduler to execute
+	steps that do not depend on each other at the same time. Every sibling (usually a Configuration or an Environment, including
+	all of it's children) is executed in a forked worker process, which executes all steps of the sequence.
+	At most getJobs() workers run at the same time. When a worker finished, the status, result, timing and output of the steps,
+	and the state of the plug-ins that changed while the steps were executed (for example, the scores of analyzer plug-ins),
+	are transferred back to the sibling in the build script process. The runner returns after all siblings have been processed.
+	Side effects of callback actions on other objects in the worker processes are not transferred.'''
+
+	__isWorker = False
+	__workerCount = 0
+
+	def __init__( self, jobs, name = None ):
+		MObject.__init__( self, name )
+		check_for_positive_int( jobs, 'The number of parallel jobs must be a positive integer!' )
+		self.__jobs = jobs
+		self.__running = {}
+
+	def getJobs( self ):
+		return self.__jobs
+
+	@staticmethod
+	def isSupported():
+		'''Worker processes are forked, which is not available on all platforms (e.g., Windows).'''
+		return hasattr( os, 'fork' )
+
+	@staticmethod
+	def isWorker():
+		'''Return True in worker processes. Workers do not start workers of their own.'''
+		return ParallelStepRunner.__isWorker
+
+	@staticmethod
+	def getWorkerCount():
+		'''Return the number of workers started by all runners of this process that are still running.'''
+		return ParallelStepRunner.__workerCount
+
+	def run( self, siblings, stepNames ):
+		'''Execute the steps called stepNames recursively for all siblings.
+		Exceptions raised by a worker are re-raised after all workers have finished.'''
+		pending = list( siblings )
+		errors = []
+		try:
+			while pending or self.getRunningCount():
+				while pending and self.getRunningCount() < self.getJobs():
+					self.start( pending.pop( 0 ), stepNames )
+				instructions, names, error = self.waitForNext()
+				if error:
+					errors.append( error )
+		finally:
+			self.terminate()
+		if errors:
+			# all workers are finished, report the first error the same way sequential execution would:
+			raise errors[0]
+
+	def start( self, instructions, stepNames ):
+		'''Start a worker process that executes the steps called stepNames recursively for instructions.'''
+		process, connection = self.__startWorker( instructions, stepNames )
+		self.__running[ connection.fileno() ] = ( instructions, stepNames, process, connection )
+		ParallelStepRunner.__workerCount += 1
+
+	def getRunningCount( self ):
+		return len( self.__running )
+
+	def getRunningSteps( self ):
+		'''Return the names of the steps that are currently executed by the workers.'''
+		names = []
+		for instructions, stepNames, process, connection in self.__running.values():
+			names += stepNames
+		return names
+
+	def waitForNext( self ):
+		'''Wait until one of the running workers finished, and transfer it's results.
+		\return a tuple of the instructions object, the step names, and the exception raised in the worker or None.'''
+		assert self.__running
+		ready, _, _ = select.select( self.__running.keys(), [], [] )
+		instructions, stepNames, process, connection = self.__running.pop( ready[0] )
+		ParallelStepRunner.__workerCount -= 1
+		error = self.__collectWorker( instructions, stepNames, process, connection )
+		return instructions, stepNames, error
+
+	def terminate( self ):
+		'''Terminate all running workers, for example if the build is interrupted.'''
+		for instructions, stepNames, process, connection in self.__running.values():
+			process.terminate()
+			process.join()
+			ParallelStepRunner.__workerCount -= 1
+		self.__running = {}
+
+	def __describe( self, stepNames, sibling ):
+		return 'step{0} "{1}" of "{2}"'.format( 's' if len( stepNames ) > 1 else '', '", "'.join( stepNames ), sibling.getName() )
+
+	def __startWorker( self, sibling, stepNames ):
+		# flush the log buffers, otherwise their content would be written by the parent and the worker
+		self.__flushLoggers()
+		receiver, sender = multiprocessing.Pipe( False )
+		process = multiprocessing.Process( target = self.__work, args = ( sibling, stepNames, sender ) )
+		process.start()
+		sender.close()
+		mApp().debugN( self, 3, lambda: '{0} started in worker process {1}'.format( self.__describe( stepNames, sibling ), process.pid ) )
+		return process, receiver
+
+	def __collectWorker( self, sibling, stepNames, process, connection ):
+		try:
+			try:
+				state, returnCode, error = connection.recv()
+			except ( EOFError, IOError ):
+				state, returnCode, error = None, None, None
+		finally:
+			connection.close()
+			process.join()
+		if state is None:
+			return MomError( 'worker process {0} executing {1} terminated unexpectedly (exit code {2})'
+				.format( process.pid, self.__describe( stepNames, sibling ), process.exitcode ) )
+		sibling._setStepExecutionState( stepNames, state )
+		if returnCode:
+			mApp().registerReturnCode( returnCode )
+		mApp().debugN( self, 3, lambda: '{0} finished in worker process {1}'.format( self.__describe( stepNames, sibling ), process.pid ) )
+		if error:
+			errorClass, value, details = error
+			return errorClass( value, details )
+		return None
+
+	def __work( self, sibling, stepNames, connection ):
+		ParallelStepRunner.__isWorker = True
+		ParallelStepRunner.__workerCount = 0
+		# instead of the handler of the build script (see MApplication.buildAndReturn()):
+		signal.signal( signal.SIGTERM, _exit_worker_on_signal )
+		error = None
+		try:
+			pluginStates = sibling._getPluginExecutionStates()
+			try:
+				sibling._executeStepsRecursively( sibling, stepNames )
+			except MomException as e:
+				error = ( e.__class__, e.value, e.getDetails() )
+			except Exception as e:
+				error = ( MomError, 'unexpected error in worker process: {0}'.format( e ), traceback.format_exc() )
+			state = sibling._getStepExecutionState( stepNames, pluginStates )
+			connection.send( ( state, mApp().getReturnCode(), error ) )
+			connection.close()
+		finally:
+			# also if the worker is terminated by a signal (see terminate()), it exits without running the atexit handlers:
+			self.__flushLoggers()
+
+	def __flushLoggers( self ):
+		for logger in mApp().getLoggers():
+			logger.flush()
+		sys.stdout.flush()
+		sys.stderr.flush()
@@ -22,11 +22,15 @@ from core.MObject import MObject
 from core.Settings import Settings
 from core.actions.Action import Action
 from core.helpers.Enum import Enum
-from core.helpers.FilesystemAccess import make_foldername_from_string
+from core.helpers.EnvironmentVariables import hash_environment
+from core.helpers.FilesystemAccess import make_foldername_from_string, hash_directory_contents
 from core.helpers.GlobalMApp import mApp
+from core.helpers.LogCompression import get_log_compression, get_log_suffix
+from core.helpers.ResourceUsage import ResourceUsage
 from core.helpers.StringUtils import make_posixpath
 from core.helpers.TimeKeeper import TimeKeeper
-from core.helpers.TypeCheckers import check_for_string, check_for_nonempty_string
+from core.helpers.TypeCheckers import check_for_string, check_for_nonempty_string, check_for_list_of_strings, check_for_path
+import hashlib
 import os
 
 class Step( MObject ):
@@ -38,8 +42,8 @@ class Step( MObject ):
 
 	class Status( Enum ):
 		'''Enumerated values representing the status of a step.'''
-		New, Skipped_Disabled, Started, Finished, Skipped_PreviousError = range( 5 )
-		_Descriptions = [ 'new', 'skipped (disabled)', 'started', 'finished', 'skipped (previous error)' ]
+		New, Skipped_Disabled, Started, Finished, Skipped_PreviousError, Skipped_UpToDate = range( 6 )
+		_Descriptions = [ 'new', 'skipped (disabled)', 'started', 'finished', 'skipped (previous error)', 'skipped (up-to-date)' ]
 
 	"""An individual step of an Executomat run."""
 	def __init__( self, stepName = None ):
@@ -49,14 +53,20 @@ class Step( MObject ):
 		self.__timeKeeper = TimeKeeper()
 		self.__enabled = True
 		self.__ignorePreviousFailure = False
+		self.__prerequisites = []
+		self.__inputDirectories = []
+		self.__inputValues = []
+		self.__fingerprint = None
 		self.__preActions = [] # list of preparation actions
 		self.__mainActions = [] # list of main actions
 		self.__postActions = [] # list of post actions
 		self.__logfilePath = None
+		self.__slack = None
+		self.__criticalPathPosition = None
 
 	def setStatus( self, status ):
 		if status in ( Step.Status.New, Step.Status.Skipped_Disabled, Step.Status.Started,
-					Step.Status.Finished, Step.Status.Skipped_PreviousError ):
+					Step.Status.Finished, Step.Status.Skipped_PreviousError, Step.Status.Skipped_UpToDate ):
 			self.__status = status
 		else:
 			raise MomError( 'Unknown step status {0}'.format( status ) )
@@ -86,6 +96,68 @@ class Step( MObject ):
 	def getExecuteOnFailure( self ):
 		return self.__ignorePreviousFailure
 
+	def setPrerequisites( self, stepNames ):
+		"""Set the names of the steps that need to be finished before this step can be executed."""
+		check_for_list_of_strings( stepNames, "The prerequisites must be a list of step names." )
+		self.__prerequisites = stepNames
+
+	def getPrerequisites( self ):
+		return self.__prerequisites
+
+	def addInputDirectory( self, path ):
+		"""Declare a directory the actions of the step read from.
+		In incremental builds, the step is executed again if the content of one of it's input directories changed."""
+		check_for_path( path, "The input directory must be a path name." )
+		self.__inputDirectories.append( path )
+
+	def getInputDirectories( self ):
+		return self.__inputDirectories
+
+	def addInputValue( self, name, value ):
+		"""Declare a value the outcome of the step depends on that is not part of the command lines of it's actions, for
+		example the revision a branch refers to. In incremental builds, the step is executed again if the value changed."""
+		check_for_nonempty_string( name, "The input value needs a name." )
+		self.__inputValues.append( ( name, value ) )
+
+	def getInputValues( self ):
+		return self.__inputValues
+
+	def getFingerprint( self ):
+		'''Return the fingerprint calculated when the step was executed in an incremental build, or None.'''
+		return self.__fingerprint
+
+	def calculateFingerprint( self, context ):
+		"""Calculate a hash over everything that determines the outcome of the step:
+		the command lines and working directories of the actions, the environment they are executed in, and the content of
+		the input directories."""
+		hasher = hashlib.sha1()
+		hasher.update( self.getName() )
+		for actions in self.getAllActions():
+			for action in actions:
+				for part in ( action.__class__.__name__, action.getLogDescription(), str( action.getWorkingDirectory() ) ):
+					if isinstance( part, unicode ):
+						part = part.encode( 'utf-8' )
+					hasher.update( part + '\n' )
+		hash_environment( hasher, context.getEnvironment() or os.environ )
+		for name, value in self.getInputValues():
+			hasher.update( u'{0}={1}\n'.format( name, value ).encode( 'utf-8' ) )
+		for path in self.getInputDirectories():
+			hasher.update( str( path ) )
+			hash_directory_contents( hasher, path )
+		return hasher.hexdigest()
+
+	def _isUpToDate( self, instructions, store ):
+		'''Return True if the step was executed successfully in a previous run with the same fingerprint, and the results
+		of that run have not been modified since.'''
+		if store.getFingerprint( instructions, self.getName() ) != self.getFingerprint():
+			return False
+		if not os.path.isdir( instructions.getBaseDir() ):
+			return False # the build tree has been deleted, for example by the cleanup step
+		for prerequisite in self.getPrerequisites():
+			if instructions._hasStepBeenExecuted( prerequisite ):
+				return False
+		return True
+
 	def isEmpty( self ):
 		for actions in self.getAllActions():
 			if len( actions ) > 0:
@@ -155,6 +227,25 @@ class Step( MObject ):
 	def getTimeKeeper( self ):
 		return self.__timeKeeper
 
+	def setSlack( self, seconds ):
+		self.__slack = seconds
+
+	def getSlack( self ):
+		'''\return the time the step could have taken longer without delaying the build, or None if it is not known.
+		The slack is calculated after the step execution (see CriticalPath).'''
+		return self.__slack
+
+	def setCriticalPathPosition( self, position ):
+		self.__criticalPathPosition = position
+
+	def getCriticalPathPosition( self ):
+		'''\return the position of the step on the critical path of the build, or None if it is not on the critical path.'''
+		return self.__criticalPathPosition
+
+	def getResourceUsage( self ):
+		'''Return the total resource usage of the actions of the step, or None if it is not known.'''
+		return ResourceUsage.total( [ action.getResourceUsage() for actions in self.getAllActions() for action in actions ] )
+
 	def _getPhases( self ):
 		"""\return List of three (str, [Action]) tuples
 
@@ -180,26 +271,50 @@ class Step( MObject ):
 		if not mApp().getSettings().get( Settings.ScriptEnableLogEnvironment ):
 			return
 
-		mApp().debugN( self, 5, 'environment before executing step "{0}": {1}'.format( self.getName(), os.environ ) )
+		environment = executomat.getExecutionContext().getEnvironment() or os.environ
+		mApp().debugN( self, 5, lambda: 'environment before executing step "{0}": {1}'.format( self.getName(), environment ) )
+
+	def _changeStatus( self, instructions, status ):
+		'''Set the status while executing the step for instructions, and report the change as an event.'''
+		self.setStatus( status )
+		mApp().event( instructions, 'step-status', step = self.getName(), status = Step.Status.getDescription( status ),
+			result = Step.Result.getDescription( self.getResult() ) )
 
 	def execute( self, instructions ):
 		"""Execute the step"""
 		check_for_nonempty_string( self.getName(), "Cannot execute a step with no name!" )
-		self.setStatus( Step.Status.Started )
+		self._changeStatus( instructions, Step.Status.Started )
 		if not self.isEnabled():
-			self.setStatus( Step.Status.Skipped_Disabled )
+			self._changeStatus( instructions, Step.Status.Skipped_Disabled )
 			return True
 
 		# (usually) abort if another step has failed for this Instructions object:
 		if not instructions._stepsShouldExecute() and not self.getExecuteOnFailure():
-			self.setStatus( Step.Status.Skipped_PreviousError )
+			self._changeStatus( instructions, Step.Status.Skipped_PreviousError )
 			return True
 
+		compression = mApp().getSettings().get( Settings.BuildStepLogCompression )
+		logfileName = '{0}.log{1}'.format( make_foldername_from_string( self.getName() ), get_log_suffix( compression ) )
+		logfilePath = os.path.join( instructions.getLogDir(), logfileName )
+		context = instructions.getExecutionContext()
+
+		# in incremental builds, skip the step if it is up-to-date:
+		store = instructions._getStepStateStore()
+		if store and not self.isEmpty():
+			self.__fingerprint = self.calculateFingerprint( context )
+			if self._isUpToDate( instructions, store ):
+				mApp().debugN( self, 2, 'step "{0}" is up-to-date, skipping it'.format( self.getName() ) )
+				if os.path.isfile( logfilePath ): # the log file of the previous run
+					self.setLogfilePath( logfilePath )
+				self._changeStatus( instructions, Step.Status.Skipped_UpToDate )
+				self.setResult( Step.Result.Success )
+				return True
+
 		with self.getTimeKeeper():
 			self._logEnvironment( instructions )
 
-			logfileName = '{0}.log'.format( make_foldername_from_string( self.getName() ) )
-			logfilePath = os.path.join( instructions.getLogDir(), logfileName )
+			if os.path.isfile( logfilePath ): # left over from a previous incremental build
+				os.remove( logfilePath )
 			self.setLogfilePath( logfilePath )
 			self.setResult( Step.Result.Success )
 
@@ -213,16 +328,34 @@ class Step( MObject ):
 				for action in actions:
 					resultText = 'skipped'
 					if self.getResult() != Step.Result.Failure or action.getIgnorePreviousFailure():
-						result = action.executeAction( self.getLogfilePath() )
+						result = action.executeAction( self.getLogfilePath(), context )
 						resultText = 'successful' if result == 0 else 'failed'
 						if result != 0:
 							self.setResult( Step.Result.Failure )
 					else:
-						self.setStatus( Step.Status.Skipped_PreviousError )
-					mApp().debugN( self, 3, '{0}: "{1}" {2}'.format( phase, action.getLogDescription(), resultText ) )
-			self.setStatus( Step.Status.Finished )
+						self._changeStatus( instructions, Step.Status.Skipped_PreviousError )
+					mApp().debugN( self, 3, lambda: '{0}: "{1}" {2}'.format( phase, action.getLogDescription(), resultText ) )
+			self._changeStatus( instructions, Step.Status.Finished )
 			return self.getResult() != Step.Result.Failure
 
+	def _getExecutionState( self ):
+		'''Return the results of executing the step and it's actions (see ParallelStepRunner).'''
+		actions = [ [ action._getExecutionState() for action in phase ] for phase in self.getAllActions() ]
+		return { 'status' : self.__status, 'result' : self.__result, 'timekeeper' : self.__timeKeeper,
+			'logfilepath' : self.__logfilePath, 'fingerprint' : self.__fingerprint, 'actions' : actions }
+
+	def _setExecutionState( self, state ):
+		'''Apply results of executing the step that have been retrieved using _getExecutionState().'''
+		self.setStatus( state[ 'status' ] )
+		self.setResult( state[ 'result' ] )
+		self.__timeKeeper = state[ 'timekeeper' ]
+		self.__logfilePath = state[ 'logfilepath' ]
+		self.__fingerprint = state[ 'fingerprint' ]
+		for phase, phaseState in zip( self.getAllActions(), state[ 'actions' ] ):
+			assert len( phase ) == len( phaseState )
+			for action, actionState in zip( phase, phaseState ):
+				action._setExecutionState( actionState )
+
 	def describe( self, prefix, details = None, replacePatterns = True ):
 		if self.isEmpty():
 			return
@@ -237,8 +370,18 @@ class Step( MObject ):
 		node.attributes["isEmpty"] = str ( self.isEmpty() )
 		node.attributes["isEnabled"] = str( self.isEnabled() )
 		node.attributes["timing"] = str( self.__timeKeeper.deltaString() )
+		node.attributes["duration"] = '{0:.3f}'.format( self.__timeKeeper.deltaSeconds() )
 		node.attributes["result"] = str( self.Result.getKey( self.getResult() ) )
 		node.attributes["status"] = str( self.Status.getKey( self.getStatus() ) )
+		if self.getSlack() is not None:
+			node.attributes["slack"] = '{0:.3f}'.format( self.getSlack() )
+		if self.getCriticalPathPosition() is not None:
+			node.attributes["criticalPathPosition"] = str( self.getCriticalPathPosition() )
+		if self.getLogfilePath() and get_log_compression( self.getLogfilePath() ):
+			node.attributes["logCompression"] = get_log_compression( self.getLogfilePath() )
+		usage = self.getResourceUsage()
+		if usage:
+			usage.setXmlAttributes( node )
 
 		for actions in self.getAllActions():
 			if not actions:
@@ -0,0 +1,179 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+from core.MObject import MObject
+from core.executomat.ParallelStepRunner import ParallelStepRunner
+from core.helpers.GlobalMApp import mApp
+
+class StepScheduler( MObject ):
+	'''StepScheduler executes the build steps of an Instructions object in the order defined by their prerequisites.
+	A step is ready to be executed when all of it's prerequisites are finished. The ready step that comes first in the build
+	sequence is executed next, so that without parallel jobs the steps are executed in the order of the build sequence setting.
+	If more than one job is allowed, the other ready steps are executed at the same time in worker processes
+	(see ParallelStepRunner). Two steps that have actions for the same configuration are never executed at the same time,
+	because they would work in the same build directory. Disabled steps, and steps skipped because of a previous error, count
+	as finished.
+	The steps that follow the executed step, and that cannot be executed at the same time as it anyway, are executed together
+	with it, so that configurations built in parallel can execute all of them in one worker process (see
+	Instructions._executeStepsRecursively()).'''
+
+	def __init__( self, steps, name = None ):
+		MObject.__init__( self, name )
+		self.__steps = steps
+		self.__finished = []
+		self.__started = []
+		self.__configurations = {}
+		self._checkPrerequisites()
+
+	def getSteps( self ):
+		return self.__steps
+
+	def _checkPrerequisites( self ):
+		'''Verify that all prerequisites are known steps, and that there are no circular dependencies.'''
+		names = [ step.getName() for step in self.getSteps() ]
+		for step in self.getSteps():
+			for prerequisite in step.getPrerequisites():
+				if prerequisite not in names:
+					raise ConfigurationError( 'Step "{0}" depends on undefined step "{1}"!'.format( step.getName(), prerequisite ) )
+		ordered = []
+		remaining = list( self.getSteps() )
+		while remaining:
+			ready = [ step for step in remaining if set( step.getPrerequisites() ).issubset( ordered ) ]
+			if not ready:
+				raise ConfigurationError( 'Circular dependency between the steps {0}!'
+					.format( ', '.join( [ step.getName() for step in remaining ] ) ) )
+			for step in ready:
+				ordered.append( step.getName() )
+				remaining.remove( step )
+
+	def isFinished( self ):
+		return len( self.__finished ) == len( self.getSteps() )
+
+	def getReadySteps( self ):
+		'''Return the steps that have not been started yet, and whose prerequisites are finished, in build sequence order.'''
+		return self._getReadySteps( self.__finished )
+
+	def _getReadySteps( self, finished ):
+		return [ step for step in self.getSteps() if step.getName() not in self.__started
+			and set( step.getPrerequisites() ).issubset( finished ) ]
+
+	def _setStarted( self, step ):
+		self.__started.append( step.getName() )
+
+	def _setFinished( self, stepName ):
+		self.__finished.append( stepName )
+
+	def _findConfigurations( self, instructions ):
+		'''Find the objects that have enabled actions in every step. Only objects that can be built in parallel (like
+		Configurations) are recorded, None is recorded for other objects. The steps of those are ordered by their
+		prerequisites alone.'''
+		for step in instructions.getSteps():
+			if step.isEnabled() and not step.isEmpty():
+				owner = instructions if instructions._canExecuteStepsInParallel() else None
+				self.__configurations.setdefault( step.getName(), set() ).add( owner )
+		for child in instructions.getChildren():
+			self._findConfigurations( child )
+
+	def _hasActions( self, stepName ):
+		'''Return True if any object has enabled actions in the step.'''
+		return stepName in self.__configurations
+
+	def _conflicts( self, stepName, others ):
+		'''Return True if the step has actions for a configuration that also has actions in one of the other steps.'''
+		configurations = self.__configurations.get( stepName, set() ) - set( [ None ] )
+		for other in others:
+			if configurations.intersection( self.__configurations.get( other, set() ) ):
+				return True
+		return False
+
+	def _getSequence( self, step, running, concurrent ):
+		'''Return the steps that are executed together with step.
+		The next step that becomes ready is added as long as no other step becomes ready at the same time that could be executed
+		concurrently instead. Steps that conflict with the running steps are not added.'''
+		sequence = [ step ]
+		while True:
+			names = [ member.getName() for member in sequence ]
+			candidates = [ candidate for candidate in self._getReadySteps( self.__finished + names )
+				if candidate not in sequence and not self._conflicts( candidate.getName(), running ) ]
+			if not candidates:
+				break
+			if concurrent:
+				independent = [ candidate for candidate in candidates[1:]
+					if self._hasActions( candidate.getName() ) and not self._conflicts( candidate.getName(), names ) ]
+				if independent:
+					break
+			sequence.append( candidates[0] )
+		return sequence
+
+	def execute( self, instructions, jobs = 1 ):
+		'''Execute all steps recursively for instructions and it's children.
+		If jobs is larger than one, up to jobs independent steps are executed at the same time.'''
+		runner = None
+		if jobs > 1 and ParallelStepRunner.isSupported() and not ParallelStepRunner.isWorker():
+			runner = ParallelStepRunner( jobs )
+		self._findConfigurations( instructions )
+		errors = []
+		try:
+			while not self.isFinished() and not errors:
+				running = runner.getRunningSteps() if runner else []
+				ready = [ step for step in self.getReadySteps() if not self._conflicts( step.getName(), running ) ]
+				if not ready:
+					# all remaining steps wait for steps that are executed in worker processes:
+					assert runner and runner.getRunningCount()
+					_, stepNames, error = runner.waitForNext()
+					for stepName in stepNames:
+						self._setFinished( stepName )
+					if error:
+						errors.append( error )
+					continue
+				# the first ready step is executed in this process, so that configurations can still be built in parallel.
+				# Other ready steps do not depend on it, they are started in worker processes:
+				step = ready.pop( 0 )
+				for other in ready:
+					if not runner or runner.getRunningCount() >= runner.getJobs() - 1:
+						break
+					# disabled and empty steps do not do anything, no need to start a worker for them
+					if self._hasActions( other.getName() ) and not self._conflicts( other.getName(), [ step.getName() ] + running ):
+						self._setStarted( other )
+						running.append( other.getName() )
+						mApp().debugN( self, 2, 'executing step "{0}" concurrently with "{1}"'.format( other.getName(), step.getName() ) )
+						runner.start( instructions, [ other.getName() ] )
+				sequence = self._getSequence( step, running, runner is not None )
+				for member in sequence:
+					self._setStarted( member )
+				names = [ member.getName() for member in sequence ]
+				instructions._executeStepsRecursively( instructions, names )
+				for name in names:
+					self._setFinished( name )
+			# an error occurred in a worker, wait for the steps that are already running, but do not start new ones:
+			while runner and runner.getRunningCount():
+				_, stepNames, error = runner.waitForNext()
+				for stepName in stepNames:
+					self._setFinished( stepName )
+				if error:
+					errors.append( error )
+		finally:
+			if runner:
+				runner.terminate()
+		if errors:
+			# only the first error is raised, the others occurred in steps that were executed at the same time:
+			for error in errors[1:]:
+				mApp().message( self, 'error in a concurrently executed step: {0}'.format( error ) )
+			raise errors[0]
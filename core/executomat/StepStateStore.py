@@ -0,0 +1,85 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+from core.MObject import MObject
+from core.executomat.Step import Step
+from core.helpers.GlobalMApp import mApp
+import json
+import os
+
+class StepStateStore( MObject ):
+	'''StepStateStore remembers the fingerprints of the steps that have been executed successfully in previous build runs.
+	It is used by incremental builds to skip steps that are up-to-date (see Step.isUpToDate()). The fingerprints are stored
+	in a file in the build base directory, identified by the base directory of the instructions object and the step name.'''
+
+	FileName = 'step-fingerprints.json'
+
+	def __init__( self, path, name = None ):
+		MObject.__init__( self, name )
+		self.__path = path
+		self.__fingerprints = {}
+
+	def getPath( self ):
+		return self.__path
+
+	def _makeKey( self, instructions, stepName ):
+		return '{0}:{1}'.format( instructions.getRelativeBaseDir(), stepName )
+
+	def getFingerprint( self, instructions, stepName ):
+		'''Return the fingerprint of the last successful execution of the step, or None.'''
+		return self.__fingerprints.get( self._makeKey( instructions, stepName ) )
+
+	def setFingerprint( self, instructions, stepName, fingerprint ):
+		key = self._makeKey( instructions, stepName )
+		if fingerprint:
+			self.__fingerprints[ key ] = fingerprint
+		elif key in self.__fingerprints:
+			del self.__fingerprints[ key ]
+
+	def load( self ):
+		self.__fingerprints = {}
+		if not os.path.isfile( self.getPath() ):
+			return
+		try:
+			with open( self.getPath() ) as f:
+				fingerprints = json.load( f )
+		except ( IOError, ValueError ) as e:
+			# a damaged state file only means that all steps are executed again:
+			mApp().message( self, 'ignoring step fingerprints at "{0}": {1}'.format( self.getPath(), e ) )
+			return
+		if isinstance( fingerprints, dict ):
+			self.__fingerprints = fingerprints
+
+	def save( self ):
+		try:
+			with open( self.getPath(), 'w' ) as f:
+				json.dump( self.__fingerprints, f, indent = 1, sort_keys = True )
+		except IOError as e:
+			raise ConfigurationError( 'Cannot save step fingerprints to "{0}": {1}'.format( self.getPath(), e ) )
+
+	def update( self, instructions ):
+		'''Record the fingerprints of the steps of instructions and it's children that have been executed in this run.
+		Steps that failed lose their fingerprint, steps that are up-to-date keep the previous one.'''
+		for step in instructions.getSteps():
+			if step.getStatus() == Step.Status.Finished:
+				fingerprint = step.getFingerprint() if step.getResult() == Step.Result.Success else None
+				self.setFingerprint( instructions, step.getName(), fingerprint )
+		for child in instructions.getChildren():
+			self.update( child )
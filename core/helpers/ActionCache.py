@@ -0,0 +1,186 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.MObject import MObject
+from core.helpers.FilesystemAccess import hash_directory_contents
+from core.helpers.GlobalMApp import mApp
+from core.helpers.SafeDeleteTree import rmtree
+from core.helpers.StringUtils import to_unicode_or_bust
+import hashlib
+import json
+import os
+import tarfile
+import tempfile
+
+class ActionCache( MObject ):
+	'''ActionCache stores the results of shell commands in a content-addressed directory.
+	An entry is identified by a hash of the command line, the working directory, the environment variables that influence
+	the result (see Settings.BuildActionCacheVariables), the content of the input directories and the names of the output
+	directories. The build base directory is replaced with a placeholder in all of them, so that builds in different
+	directories, and on different machines, share the entries. An entry contains the return code, the captured output, and an
+	archive of every output directory. Entries are created in a temporary folder and renamed into place, so that the cache directory can
+	be shared by builds running at the same time, also on other machines (using a shared file system). Errors accessing the
+	cache are never fatal, the command is simply executed.'''
+
+	ResultFileName = 'result.json'
+
+	BaseDirPlaceholder = '<basedir>'
+
+	def __init__( self, path, baseDir = None, variables = None, name = None ):
+		MObject.__init__( self, name )
+		self.__path = str( path )
+		self.__baseDir = str( baseDir ) if baseDir else None
+		self.__variables = variables or []
+
+	def getPath( self ):
+		return self.__path
+
+	def getBaseDir( self ):
+		return self.__baseDir
+
+	def getVariables( self ):
+		return self.__variables
+
+	def _makeRelative( self, text ):
+		'''Replace the build base directory in text with a placeholder.'''
+		text = str( text )
+		if self.getBaseDir():
+			text = text.replace( self.getBaseDir(), self.BaseDirPlaceholder )
+		return text
+
+	def makeKey( self, command, context, inputDirectories, outputDirectories ):
+		'''Return the key for the results of executing command (a list of strings) in the execution context.'''
+		hasher = hashlib.sha1()
+		hasher.update( self._makeRelative( '\0'.join( command ) ) + '\n' )
+		hasher.update( self._makeRelative( context.getWorkingDirectory() or os.getcwd() ) + '\n' )
+		environment = context.getEnvironment() or os.environ
+		for name in sorted( self.getVariables() ):
+			if name in environment:
+				hasher.update( self._makeRelative( '{0}={1}'.format( name, environment[ name ] ) ) + '\n' )
+		for path in inputDirectories:
+			hasher.update( self._makeRelative( path ) + '\n' )
+			hash_directory_contents( hasher, path )
+		for path in outputDirectories:
+			hasher.update( 'output: {0}\n'.format( self._makeRelative( path ) ) )
+		return hasher.hexdigest()
+
+	def _getEntryPath( self, key ):
+		return os.path.join( self.getPath(), key[:2], key )
+
+	def _getOutputArchiveName( self, index ):
+		return 'output-{0}.tar.gz'.format( index )
+
+	def _checkArchiveMembers( self, archive ):
+		'''Raise a TarError if a member of the archive would be extracted outside of the target directory.
+		The cache directory may be shared, it's content is not trusted.'''
+		for member in archive.getmembers():
+			if not ( member.isfile() or member.isdir() or member.issym() or member.islnk() ):
+				raise tarfile.TarError( 'unsupported member type: {0}'.format( member.name ) )
+			names = [ member.name ]
+			if member.issym():
+				names.append( os.path.join( os.path.dirname( member.name ), member.linkname ) )
+			elif member.islnk():
+				names.append( member.linkname )
+			for name in names:
+				path = os.path.normpath( name )
+				if os.path.isabs( name ) or path == os.pardir or path.startswith( os.pardir + os.sep ):
+					raise tarfile.TarError( 'member outside of the output directory: {0}'.format( member.name ) )
+
+	def _extract( self, archivePath, path ):
+		'''Replace the content of the directory at path with the content of the archive.
+		The archive is extracted next to path first, so that path is not modified if extracting it fails.'''
+		parent = os.path.dirname( os.path.abspath( path ) )
+		if not os.path.isdir( parent ):
+			os.makedirs( parent )
+		temporary = tempfile.mkdtemp( prefix = '.actioncache-', dir = parent )
+		try:
+			with tarfile.open( archivePath, 'r:gz' ) as archive:
+				self._checkArchiveMembers( archive )
+				archive.extractall( temporary )
+			if os.path.isdir( path ):
+				rmtree( path )
+			os.rename( temporary, path )
+			temporary = None
+		finally:
+			if temporary:
+				rmtree( temporary )
+
+	def restore( self, key, outputDirectories ):
+		'''Restore the output directories of the entry for key.
+		\return a tuple of return code, standard output and error output, or None if there is no such entry.'''
+		entry = self._getEntryPath( key )
+		if not os.path.isdir( entry ):
+			return None
+		try:
+			with open( os.path.join( entry, self.ResultFileName ) ) as f:
+				result = json.load( f )
+			output = []
+			for stream in ( 'stdout', 'stderr' ):
+				data = None
+				if result[ stream ]:
+					with open( os.path.join( entry, stream ), 'rb' ) as f:
+						data = to_unicode_or_bust( f.read() )
+				output.append( data )
+			for index, path in enumerate( outputDirectories ):
+				self._extract( os.path.join( entry, self._getOutputArchiveName( index ) ), path )
+		except ( OSError, IOError, ValueError, KeyError, tarfile.TarError ) as e:
+			mApp().message( self, 'cannot restore action cache entry {0}, ignoring it: {1}'.format( key, e ) )
+			return None
+		mApp().debugN( self, 2, 'restored outputs from action cache entry {0}'.format( key ) )
+		return int( result[ 'returncode' ] ), output[0], output[1]
+
+	def store( self, key, outputDirectories, returnCode, stdOut, stdErr ):
+		'''Add an entry for key with the current content of the output directories.
+		\return True if the entry has been stored.'''
+		for path in outputDirectories:
+			if not os.path.isdir( path ):
+				mApp().debugN( self, 2, 'output directory "{0}" does not exist, not caching the results'.format( path ) )
+				return False
+		entry = self._getEntryPath( key )
+		temporary = None
+		try:
+			if not os.path.isdir( os.path.dirname( entry ) ):
+				try:
+					os.makedirs( os.path.dirname( entry ) )
+				except OSError:
+					if not os.path.isdir( os.path.dirname( entry ) ): # it may have been created by another build
+						raise
+			temporary = tempfile.mkdtemp( prefix = 'tmp-', dir = self.getPath() )
+			result = { 'returncode' : returnCode, 'stdout' : stdOut is not None, 'stderr' : stdErr is not None }
+			with open( os.path.join( temporary, self.ResultFileName ), 'w' ) as f:
+				json.dump( result, f )
+			for stream, data in ( ( 'stdout', stdOut ), ( 'stderr', stdErr ) ):
+				if data is not None:
+					with open( os.path.join( temporary, stream ), 'wb' ) as f:
+						f.write( data.encode( 'utf-8' ) if isinstance( data, unicode ) else data )
+			for index, path in enumerate( outputDirectories ):
+				with tarfile.open( os.path.join( temporary, self._getOutputArchiveName( index ) ), 'w:gz' ) as archive:
+					archive.add( path, arcname = '.' )
+			os.rename( temporary, entry )
+			temporary = None
+		except ( OSError, IOError, tarfile.TarError ) as e:
+			if os.path.isdir( entry ):
+				return True # another build stored the same results first
+			mApp().message( self, 'cannot store action cache entry {0}: {1}'.format( key, e ) )
+			return False
+		finally:
+			if temporary:
+				rmtree( temporary )
+		mApp().debugN( self, 2, 'stored outputs in action cache entry {0}'.format( key ) )
+		return True
@@ -0,0 +1,94 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import MomError
+from core.helpers.RunCommand import RunCommand
+from core.helpers.TimeUtils import monotonic_time
+from core.helpers.TypeCheckers import check_for_positive_int
+from threading import Thread, BoundedSemaphore
+import sys
+
+class AsyncRunCommand( RunCommand ):
+	'''AsyncRunCommand executes a command in a background thread, so that many commands can run at the same time.
+	It has the same timeout, output capture and search path semantics as RunCommand. start() returns immediately,
+	wait() blocks until the command has finished and returns the return code, or raises the exception that occurred.
+	A limiter (a semaphore shared by multiple commands) caps the number of commands that are executed at the same time,
+	see run_concurrently().'''
+
+	def __init__( self, cmd, timeoutSeconds = None, combineOutput = False, searchPaths = None, captureOutput = True ):
+		RunCommand.__init__( self, cmd, timeoutSeconds, combineOutput, searchPaths, captureOutput )
+		self.__thread = None
+		self.__error = None
+		self.__duration = None
+
+	def start( self, limiter = None ):
+		'''Start executing the command in a background thread.'''
+		if self.__thread:
+			raise MomError( 'The command "{0}" has already been started!'.format( ' '.join( self.getCommand() ) ) )
+		self.__thread = Thread( target = self.__execute, args = ( limiter, ) )
+		self.__thread.start()
+		return self
+
+	def __execute( self, limiter ):
+		try:
+			if limiter:
+				with limiter:
+					self.__run()
+			else:
+				self.__run()
+		except Exception:
+			self.__error = sys.exc_info()
+
+	def __run( self ):
+		start = monotonic_time()
+		try:
+			RunCommand.run( self )
+		finally:
+			self.__duration = monotonic_time() - start
+
+	def getDuration( self ):
+		'''Return the time it took to execute the command in seconds (not including the time it waited for the limiter),
+		or None if it has not finished yet.'''
+		return self.__duration
+
+	def isFinished( self ):
+		return self.__thread is not None and not self.__thread.isAlive()
+
+	def join( self ):
+		'''Wait until the command has finished, without raising exceptions that occurred while executing it.'''
+		if not self.__thread:
+			raise MomError( 'The command "{0}" has not been started!'.format( ' '.join( self.getCommand() ) ) )
+		self.__thread.join()
+
+	def wait( self ):
+		'''Wait until the command has finished, and return it's return code.'''
+		self.join()
+		if self.__error:
+			raise self.__error[0], self.__error[1], self.__error[2]
+		return self.getReturnCode()
+
+def run_concurrently( runners, jobs ):
+	'''Execute the AsyncRunCommand objects in runners, with up to jobs commands at the same time, and wait until all of them
+	have finished. Call wait() on the runners to retrieve the return codes (and the exceptions).'''
+	check_for_positive_int( jobs, 'The number of concurrent commands must be a positive integer number!' )
+	limiter = BoundedSemaphore( jobs )
+	for runner in runners:
+		runner.start( limiter )
+	for runner in runners:
+		runner.join()
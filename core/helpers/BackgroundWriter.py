@@ -0,0 +1,113 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from Queue import Queue, Empty
+from core.helpers.RotatingFile import RotatingFile
+from threading import Thread, Lock
+import atexit
+import os
+
+class BackgroundWriter( object ):
+	'''BackgroundWriter writes text to a file in a background thread, so that the caller does not wait for the disk.
+	write() only adds the text to a queue. The writer thread takes everything that is queued and writes it with one call.
+	Worker processes are forked (see ParallelStepRunner) without the writer thread. The first write() in a new process
+	starts a new thread, the file is shared with the parent process. flush() needs to be called before forking, and before
+	a worker exits, so that queued text is neither written twice nor lost.
+	If maxQueueSize is set, write() blocks while that many texts are queued, so that a slow disk limits the memory used.'''
+
+	# the maximum number of queued texts that are written with one call:
+	BatchSize = 1024
+
+	def __init__( self, file, maxQueueSize = None ):
+		self.__file = file
+		self.__maxQueueSize = maxQueueSize or 0
+		self.__queue = Queue( self.__maxQueueSize )
+		self.__lock = Lock()
+		self.__pid = None
+		self.__thread = None
+		self.__closed = False
+
+	def getFile( self ):
+		return self.__file
+
+	def __startThread( self ):
+		with self.__lock:
+			if self.__pid == os.getpid():
+				return
+			# a forked process does not inherit the thread, and must not write the parent's queue:
+			self.__queue = Queue( self.__maxQueueSize )
+			self.__pid = os.getpid()
+			self.__thread = Thread( target = self.__run, name = 'BackgroundWriter' )
+			self.__thread.setDaemon( True )
+			self.__thread.start()
+
+	def write( self, text ):
+		if self.__closed:
+			return
+		if self.__pid != os.getpid():
+			self.__startThread()
+		self.__queue.put( text )
+
+	def __run( self ):
+		queue = self.__queue
+		while True:
+			batch = [ queue.get() ]
+			try:
+				while len( batch ) < self.BatchSize:
+					batch.append( queue.get_nowait() )
+			except Empty:
+				pass
+			stop = None in batch
+			texts = [ text for text in batch if text is not None ]
+			try:
+				if texts:
+					self.__file.write( ''.join( texts ) )
+				self.__file.flush()
+			except ( EnvironmentError, ValueError ):
+				pass # the file has been closed, or the disk is full, nothing can be reported from here
+			for _ in batch:
+				queue.task_done()
+			if stop:
+				return
+
+	def flush( self ):
+		'''Wait until all queued text has been written.'''
+		if self.__pid == os.getpid():
+			self.__queue.join()
+
+	def close( self ):
+		'''Write the queued text, stop the writer thread and close the file.'''
+		if self.__closed:
+			return
+		self.__closed = True
+		if self.__pid == os.getpid():
+			self.__queue.put( None )
+			self.__thread.join()
+		self.__file.close()
+
+def open_background_writer( filePath, mode = 'a', maxQueueSize = None, maxBytes = None, backupCount = 5, compress = False ):
+	'''Open filePath for a BackgroundWriter. If maxBytes is set, the file is rotated when it grows larger (see RotatingFile).
+	The writer is closed when the program exits.'''
+	if maxBytes:
+		file = RotatingFile( filePath, mode, maxBytes, backupCount, compress )
+	else:
+		file = open( filePath, mode )
+	writer = BackgroundWriter( file, maxQueueSize )
+	atexit.register( writer.close )
+	return writer
@@ -17,19 +17,17 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from core.Settings import Settings
+from core.helpers.GlobalMApp import mApp
 import os
 
-def add_to_path_collection( pathVariable, element, order = 'append' ):
-	# pathVariable is the name of the environment variable
-	# safely get the existing setting:
-	# try if the given path exists
-	#if 'packages' or 'Qt' in element and os.path.exists(element) == False:
-	#raise EnvironmentError('FatalError : ' + element + ' : does not exist')
-	variable = ''
-	try:
-		variable = os.environ[pathVariable]
-	except KeyError:
-		pass
+# environment variables that change with every run, and do not influence the result of a command
+# (MAKEFLAGS contains the file descriptors of the make job server):
+VOLATILE_VARIABLES = ( 'PWD', 'OLDPWD', '_', 'SHLVL', 'MAKEFLAGS' )
+
+def add_to_path_value( value, element, order = 'append' ):
+	'''Return the path collection value (like the value of PATH) with element added to it, if it is not already part of it.'''
+	variable = value or ''
 	# prune it and split it up (not too aggressively): 
 	if variable[-1:] == os.pathsep:
 		variable = variable[:-1]
@@ -45,5 +43,24 @@ def add_to_path_collection( pathVariable, element, order = 'append' ):
 
 	elements = filter( white_space_filter, elements )
 
-	result = os.pathsep.join( elements )
-	os.environ[pathVariable] = result
+	return os.pathsep.join( elements )
+
+def add_to_path_collection( pathVariable, element, order = 'append' ):
+	# pathVariable is the name of the environment variable
+	# safely get the existing setting:
+	# try if the given path exists
+	#if 'packages' or 'Qt' in element and os.path.exists(element) == False:
+	#raise EnvironmentError('FatalError : ' + element + ' : does not exist')
+	variable = ''
+	try:
+		variable = os.environ[pathVariable]
+	except KeyError:
+		pass
+	os.environ[pathVariable] = add_to_path_value( variable, element, order )
+
+def hash_environment( hasher, environment ):
+	'''Update the hash object hasher (see hashlib) with the variables in environment, except the volatile ones.'''
+	volatile = VOLATILE_VARIABLES + ( mApp().getSettings().get( Settings.MomDebugIndentVariable ), )
+	for name in sorted( environment ):
+		if name not in volatile:
+			hasher.update( '{0}={1}\n'.format( name, environment[ name ] ) )
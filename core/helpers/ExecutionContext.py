@@ -0,0 +1,72 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.helpers.EnvironmentVariables import add_to_path_value
+import os
+
+class ExecutionContext( object ):
+	'''ExecutionContext holds the working directory and the environment variables an action is executed with.
+	The environment is stored as an overlay over the environment of the build script process, which is not modified.
+	Execution contexts are immutable, the with...() methods return a modified copy. Since they do not depend on global
+	process state, actions that use them (and pass them on to RunCommand) can be executed from multiple threads.'''
+
+	def __init__( self, workingDir = None, overlay = None ):
+		self.__workingDir = str( workingDir ) if workingDir else None
+		self.__overlay = dict( overlay or {} )
+
+	def getWorkingDirectory( self ):
+		'''Return the working directory, or None to use the working directory of the build script process.'''
+		return self.__workingDir
+
+	def getOverlay( self ):
+		'''Return a copy of the variables that differ from the environment of the build script process.'''
+		return dict( self.__overlay )
+
+	def getVariable( self, name, defaultValue = None ):
+		if name in self.__overlay:
+			return self.__overlay[ name ]
+		return os.environ.get( name, defaultValue )
+
+	def getEnvironment( self ):
+		'''Return the complete environment for a child process.
+		Returns None if the context does not modify the environment, so that the child process inherits it.'''
+		if not self.__overlay:
+			return None
+		environment = os.environ.copy()
+		environment.update( self.__overlay )
+		return environment
+
+	def withWorkingDirectory( self, workingDir ):
+		return ExecutionContext( workingDir, self.__overlay )
+
+	def withVariable( self, name, value ):
+		overlay = dict( self.__overlay )
+		overlay[ str( name ) ] = str( value )
+		return ExecutionContext( self.__workingDir, overlay )
+
+	def withPathAdded( self, name, element, order = 'append' ):
+		'''Add element to a path collection variable like PATH, see add_to_path_collection().'''
+		return self.withVariable( name, add_to_path_value( self.getVariable( name, '' ), element, order ) )
+
+	def apply( self ):
+		'''Apply the context to the build script process, for code that does not support execution contexts.
+		Only call this within an EnvironmentSaver block.'''
+		os.environ.update( self.__overlay )
+		if self.__workingDir:
+			os.chdir( self.__workingDir )
@@ -16,6 +16,7 @@
 # 
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
 import re
 
 def make_foldername_from_string( text ):
@@ -25,3 +26,24 @@ def make_foldername_from_string( text ):
 	name = re.sub( '\s+', '_', name )
 	name = name.lower()
 	return name
+
+def hash_directory_contents( hasher, path, ignoredNames = ( '.git', '.svn' ) ):
+	"""Update the hash object hasher (see hashlib) with the relative file names and contents of the directory tree at path.
+	Names in ignoredNames (like revision control meta data) are skipped. A missing directory does not change the hash."""
+	path = str( path )
+	for folder, folders, files in os.walk( path ):
+		folders[:] = sorted( name for name in folders if name not in ignoredNames )
+		for name in sorted( files ):
+			if name in ignoredNames:
+				continue
+			filePath = os.path.join( folder, name )
+			hasher.update( os.path.relpath( filePath, path ) )
+			if os.path.islink( filePath ):
+				hasher.update( os.readlink( filePath ) )
+				continue
+			with open( filePath, 'rb' ) as f:
+				while True:
+					data = f.read( 65536 )
+					if not data:
+						break
+					hasher.update( data )
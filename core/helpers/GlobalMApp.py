@@ -17,11 +17,18 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+# the MApplication class, imported on the first call (it imports this module), since mApp() is called for every message:
+_MApplicationClass = None
+
 def mApp():
-	from core.MApplication import MApplication
-	from core.Exceptions import MomError
+	global _MApplicationClass
+	if _MApplicationClass is None:
+		from core.MApplication import MApplication
+		_MApplicationClass = MApplication
 
-	if not MApplication.instance:
+	instance = _MApplicationClass.instance
+	if not instance:
+		from core.Exceptions import MomError
 		raise MomError( 'mApp may only be called after the MApplication object has been created!' )
-	return MApplication.instance
+	return instance
 
@@ -0,0 +1,154 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+from core.MObject import MObject
+from core.Settings import Settings
+from core.helpers.GlobalMApp import mApp
+from contextlib import contextmanager
+import os
+import re
+import select
+import sys
+
+class JobServer( MObject ):
+	'''JobServer implements the GNU make jobserver protocol to share a pool of job slots between all make processes of a build.
+	The job tokens are bytes in a pipe. The file descriptors of the pipe are passed to make through the MAKEFLAGS variable,
+	and inherited by all child processes, including the worker processes that build configurations in parallel. A make
+	process needs to read a token before it starts a job, and writes it back when the job has finished.
+	Following the protocol, every make process started by the build has one implicit job slot, the pipe holds the remaining
+	jobs - 1 tokens.
+	A job server is owned by the process that created it (the build script, or the SimpleCI slave that executes the build
+	scripts). Build scripts started by a SimpleCI slave join the job server of the slave, see fromEnvironment().'''
+
+	_FlagsPattern = re.compile( r'--jobserver-(?:fds|auth)=(\d+),(\d+)' )
+	_JobOptionPattern = re.compile( r'^(-j\d*|--jobs(=\d+)?|--jobserver-\S+)$' )
+
+	def __init__( self, jobs, readFd = None, writeFd = None, name = None ):
+		MObject.__init__( self, name )
+		self.__jobs = jobs
+		self.__description = None
+		self.__owner = readFd is None
+		if self.__owner:
+			try:
+				readFd, writeFd = os.pipe()
+				os.write( writeFd, '+' * ( jobs - 1 ) )
+			except OSError as e:
+				raise ConfigurationError( 'Cannot create the make job server pipe: {0}'.format( e ) )
+		self.__readFd = readFd
+		self.__writeFd = writeFd
+
+	@staticmethod
+	def isEnabled():
+		'''The job server requires pipes that are inherited by child processes, which is not supported on Windows.'''
+		return mApp().getSettings().get( Settings.MakeBuilderJobServer, False ) and sys.platform != 'win32'
+
+	@staticmethod
+	def fromEnvironment( environment = None ):
+		'''Return the job server announced in the MAKEFLAGS variable of the environment, or None if there is none.'''
+		flags = ( environment if environment is not None else os.environ ).get( 'MAKEFLAGS', '' )
+		match = JobServer._FlagsPattern.search( flags )
+		if not match:
+			return None
+		readFd, writeFd = int( match.group( 1 ) ), int( match.group( 2 ) )
+		try:
+			os.fstat( readFd )
+			os.fstat( writeFd )
+		except OSError:
+			mApp().debugN( mApp(), 2, 'job server file descriptors announced in MAKEFLAGS are not open, ignoring it' )
+			return None
+		return JobServer( None, readFd, writeFd )
+
+	def getJobs( self ):
+		'''Return the number of job slots, or None if the job server was inherited from the parent process.'''
+		return self.__jobs
+
+	def isOwner( self ):
+		return self.__owner
+
+	def setDescription( self, description ):
+		self.__description = description
+
+	def getDescription( self ):
+		if self.__description:
+			return self.__description
+		if self.isOwner():
+			return '{0} job slots shared through the make job server'.format( self.getJobs() )
+		return 'job slots shared through the make job server of the parent process'
+
+	def getFileDescriptors( self ):
+		return self.__readFd, self.__writeFd
+
+	def getMakeFlags( self, flags = '' ):
+		'''Return flags with the job server options added. Job count options in flags would disable the job server, and are
+		removed.'''
+		options = JobServer._removeJobOptions( flags )
+		# make 3.x only knows --jobserver-fds, later versions accept it as an alias of --jobserver-auth:
+		options.extend( [ '-j', '--jobserver-fds={0},{1}'.format( self.__readFd, self.__writeFd ) ] )
+		return ' '.join( options )
+
+	@staticmethod
+	def _removeJobOptions( flags ):
+		return [ option for option in flags.split() if not JobServer._JobOptionPattern.match( option ) ]
+
+	@staticmethod
+	def removeFrom( context ):
+		'''Return a copy of the execution context in which make tools do not join a job server announced in MAKEFLAGS.
+		GNU make runs parallel jobs if MAKEFLAGS contains -j, even if it is called without it, so all make calls except
+		the ones that are supposed to use the job server need to be executed in such a context.'''
+		flags = context.getVariable( 'MAKEFLAGS' )
+		if flags is None:
+			return context
+		return context.withVariable( 'MAKEFLAGS', ' '.join( JobServer._removeJobOptions( flags ) ) )
+
+	@contextmanager
+	def limitTo( self, jobs ):
+		'''Withhold job tokens while the block is executed, so that no more than jobs jobs are executed through the job
+		server. Only tokens that are available are withheld, tokens used by running jobs are not waited for. If jobs is
+		None, or the job server was inherited from the parent process (and the number of tokens is unknown), nothing is
+		withheld.'''
+		tokens = ''
+		if jobs is not None and self.getJobs() is not None:
+			while len( tokens ) < self.getJobs() - jobs:
+				# the pipe is shared with the running make processes, it cannot be made non-blocking:
+				readable, _, _ = select.select( [ self.__readFd ], [], [], 0 )
+				if not readable:
+					break
+				tokens += os.read( self.__readFd, 1 )
+		try:
+			yield
+		finally:
+			if tokens:
+				os.write( self.__writeFd, tokens )
+
+	def applyTo( self, context ):
+		'''Return a copy of the execution context that makes the make tools join the job server.'''
+		return context.withVariable( 'MAKEFLAGS', self.getMakeFlags( context.getVariable( 'MAKEFLAGS', '' ) ) )
+
+	def apply( self ):
+		'''Announce the job server to all child processes of the current process.
+		Only call this within an EnvironmentSaver block.'''
+		os.environ[ 'MAKEFLAGS' ] = self.getMakeFlags( os.environ.get( 'MAKEFLAGS', '' ) )
+
+	def close( self ):
+		'''Close the pipe, if this process owns the job server.'''
+		if self.__owner and self.__readFd is not None:
+			os.close( self.__readFd )
+			os.close( self.__writeFd )
+			self.__readFd = self.__writeFd = None
@@ -0,0 +1,151 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.MObject import MObject
+from core.Settings import Settings
+from core.helpers.GlobalMApp import mApp
+import json
+import multiprocessing
+import os
+import sys
+
+def read_load_average():
+	'''Return the load average of the last minute, or None if it is not available on this platform.'''
+	try:
+		return os.getloadavg()[0]
+	except ( AttributeError, OSError ):
+		return None
+
+def read_available_memory( path = '/proc/meminfo' ):
+	'''Return the memory in bytes that is available for new processes without swapping, or None if it is unknown.'''
+	try:
+		with open( path ) as meminfo:
+			values = {}
+			for line in meminfo:
+				name, _, value = line.partition( ':' )
+				values[ name.strip() ] = int( value.split()[0] ) * 1024
+	except ( IOError, ValueError, IndexError ):
+		return None
+	if 'MemAvailable' in values:
+		return values[ 'MemAvailable' ]
+	# older kernels do not report MemAvailable, estimate it:
+	if 'MemFree' in values:
+		return values[ 'MemFree' ] + values.get( 'Buffers', 0 ) + values.get( 'Cached', 0 )
+	return None
+
+def peak_memory_of( resourceUsage ):
+	'''Return the maximum resident set size in bytes from a resource usage structure (see os.wait4()).'''
+	if sys.platform == 'darwin':
+		return resourceUsage.ru_maxrss
+	return resourceUsage.ru_maxrss * 1024
+
+def calculate_adaptive_jobs_count( cpus, loadAverage, availableMemory, peakMemoryPerJob ):
+	'''Calculate how many make jobs can be started without overloading the machine.
+	The number of CPUs is reduced by the load average, so that cores used by other processes are not used twice. If the
+	peak memory of a job is known from earlier runs, the number of jobs is limited so that they fit into the available memory.
+	\return a tuple of the number of jobs and a list of the reasons for it'''
+	jobs = cpus
+	reasons = [ '{0} CPUs'.format( cpus ) ]
+	if loadAverage is None:
+		reasons.append( 'load average unknown' )
+	else:
+		idle = max( 1, int( round( cpus - loadAverage ) ) )
+		reasons.append( 'load average {0:.2f} leaves {1} CPUs idle'.format( loadAverage, idle ) )
+		jobs = min( jobs, idle )
+	if availableMemory is None:
+		reasons.append( 'available memory unknown' )
+	elif not peakMemoryPerJob:
+		reasons.append( 'no peak memory per job measured in earlier runs' )
+	else:
+		memoryJobs = max( 1, int( availableMemory // peakMemoryPerJob ) )
+		reasons.append( '{0} MB available memory and {1} MB peak memory per job allow {2} jobs'.format(
+			availableMemory // 2 ** 20, peakMemoryPerJob // 2 ** 20, memoryJobs ) )
+		jobs = min( jobs, memoryJobs )
+	return max( 1, jobs ), reasons
+
+def calculate_jobs_count( historyKey = None ):
+	'''Return the number of make jobs according to the configuration.builder.make.jobscount setting, and the reasons for it.
+	In adaptive mode, the peak memory per job is taken from the JobMemoryHistory entries that match historyKey.'''
+	setting = mApp().getSettings().get( Settings.MakeBuilderJobsCount, False )
+	if setting == Settings.MakeBuilderJobsCount_Adaptive:
+		history = JobMemoryHistory( mApp().getSettings().get( Settings.MakeBuilderJobMemoryHistory ) )
+		history.load()
+		return calculate_adaptive_jobs_count( multiprocessing.cpu_count(), read_load_average(), read_available_memory(),
+			history.getPeakMemory( historyKey ) )
+	elif setting:
+		return setting, [ 'configured job count' ]
+	else:
+		cpus = multiprocessing.cpu_count()
+		return cpus, [ '{0} CPUs'.format( cpus ) ]
+
+def get_jobs_count():
+	'''Return the number of make jobs that are executed at the same time, for all configurations together.'''
+	return calculate_jobs_count()[0]
+
+class JobMemoryHistory( MObject ):
+	'''JobMemoryHistory stores the peak memory per make job measured in earlier runs, in a JSON file.
+	The keys are of the form "build name:configuration name". The latest measurement is kept for every key.'''
+
+	def __init__( self, path, name = None ):
+		MObject.__init__( self, name )
+		self.__path = path
+		self.__peaks = {}
+
+	def getPath( self ):
+		return self.__path
+
+	def load( self ):
+		self.__peaks = {}
+		if not os.path.isfile( self.getPath() ):
+			return
+		try:
+			with open( self.getPath() ) as f:
+				self.__peaks = json.load( f )
+		except ( IOError, ValueError ) as e:
+			mApp().debug( self, 'cannot read the job memory history "{0}", ignoring it: {1}'.format( self.getPath(), e ) )
+
+	def save( self ):
+		directory = os.path.dirname( self.getPath() )
+		try:
+			if directory and not os.path.isdir( directory ):
+				os.makedirs( directory )
+			# write to a temporary file first, build scripts may save concurrently:
+			temporaryPath = '{0}.{1}'.format( self.getPath(), os.getpid() )
+			with open( temporaryPath, 'w' ) as f:
+				json.dump( self.__peaks, f, indent = 1, sort_keys = True )
+			os.rename( temporaryPath, self.getPath() )
+		except ( IOError, OSError ) as e:
+			mApp().debug( self, 'cannot save the job memory history "{0}": {1}'.format( self.getPath(), e ) )
+
+	def getPeakMemory( self, key = None ):
+		'''Return the largest peak memory in bytes of the entries that match key, or None if there are none.
+		A key matches entries with the same key, and entries that start with it followed by a colon. If key is None, all
+		entries match.'''
+		values = [ value for entry, value in self.__peaks.items()
+			if key is None or entry == key or entry.startswith( key + ':' ) ]
+		return max( values ) if values else None
+
+	def setPeakMemory( self, key, peakMemory ):
+		self.__peaks[ key ] = peakMemory
+
+	def record( self, key, peakMemory ):
+		'''Store a new measurement, and merge it with the measurements saved by other processes.'''
+		self.load()
+		self.setPeakMemory( key, peakMemory )
+		self.save()
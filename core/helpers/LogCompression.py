@@ -0,0 +1,100 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+import codecs
+import gzip
+import os.path
+
+try:
+	import zstandard
+except ImportError:
+	zstandard = None # zstd compression is optional
+
+class LogCompression:
+	"""Enum-like structure for the compression of log files, see the BuildStepLogCompression setting
+	(build.steplogcompression).
+	The compression of a log file is determined by it's suffix, so that writers and readers of the file do not need to
+	know the setting. Every write appends a gzip member or zstd frame, the decompressors (including those of web browsers
+	for the Content-Encoding header) read them as one stream."""
+
+	NoCompression = None
+	Gzip = 'gzip'
+	Zstd = 'zstd'
+
+	Suffixes = { Gzip : '.gz', Zstd : '.zst' }
+
+	# Apache configuration for a directory of compressed logs, so that browsers receive them with the Content-Encoding header:
+	ServerConfigurationFileName = '.htaccess'
+	ServerConfiguration = 'AddEncoding gzip .gz\nAddEncoding zstd .zst\nAddType "text/plain; charset=utf-8" .log\n'
+
+def check_log_compression( compression ):
+	'''Raise a ConfigurationError if compression is not a supported log compression.'''
+	if compression not in [ LogCompression.NoCompression ] + LogCompression.Suffixes.keys():
+		raise ConfigurationError( 'Unknown log compression "{0}", use one of {1}'.format( compression,
+			', '.join( sorted( LogCompression.Suffixes.keys() ) ) ) )
+	if compression == LogCompression.Zstd and not zstandard:
+		raise ConfigurationError( 'zstd log compression requires the zstandard Python module' )
+
+def get_log_suffix( compression ):
+	'''\return the suffix that is appended to the names of log files with the given compression.'''
+	return LogCompression.Suffixes.get( compression, '' )
+
+def get_log_compression( filePath ):
+	'''\return the compression of the log file, determined by it's suffix.'''
+	for compression, suffix in LogCompression.Suffixes.items():
+		if filePath.endswith( suffix ):
+			return compression
+	return LogCompression.NoCompression
+
+def open_log_file( filePath, mode = 'a' ):
+	'''Open a log file for writing (mode "a" or "w") or reading (mode "r") of unicode text, compressed according to it's suffix.'''
+	compression = get_log_compression( filePath )
+	if compression == LogCompression.NoCompression:
+		return codecs.open( filePath, mode, 'utf-8' )
+	if compression == LogCompression.Gzip:
+		file = gzip.open( filePath, mode + 'b' )
+	else:
+		check_log_compression( compression )
+		if mode == 'r':
+			file = zstandard.ZstdDecompressor().stream_reader( open( filePath, 'rb' ), read_across_frames = True )
+		else:
+			file = zstandard.ZstdCompressor().stream_writer( open( filePath, mode + 'b' ) )
+	if mode == 'r':
+		return codecs.getreader( 'utf-8' )( file )
+	return codecs.getwriter( 'utf-8' )( file )
+
+def write_server_configuration( directory ):
+	'''Write the web server configuration for the compressed log files in directory, see LogCompression.ServerConfiguration.'''
+	with open( os.path.join( directory, LogCompression.ServerConfigurationFileName ), 'w' ) as file:
+		file.write( LogCompression.ServerConfiguration )
+
+def read_log_file( filePath, limit = None ):
+	'''\return the decompressed content of a log file as unicode text.
+	If limit is not None, only the last limit characters are returned. The file is then read in chunks, so that big logs
+	are not loaded into memory.'''
+	with open_log_file( filePath, 'r' ) as file:
+		if limit is None:
+			return file.read()
+		tail = u''
+		while True:
+			chunk = file.read( max( limit, 65536 ) )
+			if not chunk:
+				return tail
+			tail = ( tail + chunk )[-limit:] if limit else u''
@@ -0,0 +1,167 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.MObject import MObject
+import cProfile
+import os
+import pstats
+
+class Profiler( MObject ):
+	'''Profiler measures where the build script process spends it's time, using cProfile.
+	The statistics can be saved in a pstats file (see writeStats()), and summarized as a list of the most expensive
+	functions (see writeSummary()). The summary does not count the time spent waiting for child processes, since
+	this is the time the build itself takes, not the overhead of Make-O-Matic.'''
+
+	StatsFileName = 'profile.pstats'
+	SummaryFileName = 'profile.txt'
+
+	# built-in functions that block while child processes, threads or worker processes do the actual work:
+	WaitFunctions = [
+		'<posix.wait>', '<posix.waitpid>', '<posix.wait3>', '<posix.wait4>', '<posix.read>', '<time.sleep>',
+		'<select.select>', "<method 'poll' of 'select.poll' objects>", "<method 'poll' of 'select.epoll' objects>",
+		"<method 'read' of 'file' objects>", "<method 'readline' of 'file' objects>",
+		"<method 'acquire' of 'thread.lock' objects>", "<method 'recv' of '_multiprocessing.Connection' objects>",
+		"<method 'poll' of '_multiprocessing.Connection' objects>" ]
+
+	def __init__( self, name = None ):
+		MObject.__init__( self, name )
+		self.__profile = cProfile.Profile()
+		self.__stats = None
+		self.__waitTimes = {}
+		self.__callees = None
+
+	def runcall( self, function, *args, **kwargs ):
+		'''Call function with the given arguments while the profiler is enabled, and return it's result.'''
+		self.__stats = None
+		try:
+			return self.__profile.runcall( function, *args, **kwargs )
+		finally:
+			self.__stats = pstats.Stats( self.__profile )
+			self.__waitTimes = {}
+			self.__callees = None
+
+	def getStats( self ):
+		assert self.__stats, 'runcall() needs to be called before the statistics are available'
+		return self.__stats
+
+	@staticmethod
+	def getFrameworkDirectory():
+		'''Return the root directory of the Make-O-Matic source code.'''
+		return os.path.dirname( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+	@classmethod
+	def isWaitFunction( cls, function ):
+		fileName, _, functionName = function
+		return fileName == '~' and functionName in cls.WaitFunctions
+
+	@classmethod
+	def isFrameworkFunction( cls, function ):
+		fileName = function[0]
+		if fileName == '~':
+			return False
+		return os.path.abspath( fileName ).startswith( cls.getFrameworkDirectory() + os.sep )
+
+	def _getWaitTime( self, function, visited = None ):
+		'''Return the part of the cumulative time of function that was spent in wait functions.
+		The time of every callee is attributed to it's callers in proportion to the time spent in calls from each caller.'''
+		if function in self.__waitTimes:
+			return self.__waitTimes[ function ]
+		stats = self.getStats().stats
+		if self.isWaitFunction( function ):
+			waitTime = stats[ function ][2]
+		else:
+			visited = visited or set()
+			if function in visited: # recursion, the time is already counted in the outer call
+				return 0.0
+			visited.add( function )
+			waitTime = 0.0
+			for calleeFunction, timeFromCaller in self._getCallees().get( function, {} ).items():
+				calleeTime = stats[ calleeFunction ][3]
+				if calleeTime > 0:
+					waitTime += self._getWaitTime( calleeFunction, visited ) * min( 1.0, timeFromCaller / calleeTime )
+			visited.remove( function )
+		self.__waitTimes[ function ] = waitTime
+		return waitTime
+
+	def _getCallees( self ):
+		if self.__callees is None:
+			self.__callees = {}
+			for function, ( _, _, _, _, callers ) in self.getStats().stats.items():
+				for caller, timing in callers.items():
+					# cProfile records ( calls, primitive calls, own time, cumulative time ) per caller:
+					self.__callees.setdefault( caller, {} )[ function ] = timing[3]
+		return self.__callees
+
+	def getTotalTime( self ):
+		return self.getStats().total_tt
+
+	def getTotalWaitTime( self ):
+		'''Return the time spent waiting for child processes, threads and worker processes.'''
+		return sum( [ timing[2] for function, timing in self.getStats().stats.items() if self.isWaitFunction( function ) ] )
+
+	def getMostExpensiveFrameworkFunctions( self, count ):
+		'''Return ( time, calls, function ) for the count Make-O-Matic functions with the highest cumulative time,
+		not counting the time spent waiting for child processes.'''
+		costs = []
+		for function, ( _, calls, _, cumulativeTime, _ ) in self.getStats().stats.items():
+			if self.isFrameworkFunction( function ):
+				costs.append( ( max( 0.0, cumulativeTime - self._getWaitTime( function ) ), calls, function ) )
+		return sorted( costs, reverse = True )[:count]
+
+	def getMostExpensiveFunctions( self, count ):
+		'''Return ( time, calls, function ) for the count functions with the highest own time (without the time spent
+		in the functions they call), not counting wait functions. This includes the standard library, e.g. copy.deepcopy().'''
+		costs = [ ( ownTime, calls, function ) for function, ( _, calls, ownTime, _, _ ) in self.getStats().stats.items()
+			if not self.isWaitFunction( function ) ]
+		return sorted( costs, reverse = True )[:count]
+
+	def _formatFunction( self, function ):
+		fileName, line, functionName = function
+		if fileName == '~':
+			return functionName
+		if self.isFrameworkFunction( function ):
+			fileName = os.path.relpath( os.path.abspath( fileName ), self.getFrameworkDirectory() )
+		return '{0}:{1}({2})'.format( fileName, line, functionName )
+
+	def _formatTable( self, title, costs ):
+		lines = [ title, '{0:>10} {1:>9}  {2}'.format( 'seconds', 'calls', 'function' ) ]
+		for seconds, calls, function in costs:
+			lines.append( '{0:>10.3f} {1:>9}  {2}'.format( seconds, calls, self._formatFunction( function ) ) )
+		return lines
+
+	def createSummary( self, count = 30 ):
+		'''Return a text summary of the count most expensive functions.'''
+		totalTime = self.getTotalTime()
+		waitTime = self.getTotalWaitTime()
+		lines = [ 'Total profiled time: {0:.3f}s'.format( totalTime ),
+			'Waiting for child processes: {0:.3f}s'.format( waitTime ),
+			'Make-O-Matic overhead: {0:.3f}s'.format( totalTime - waitTime ), '' ]
+		lines += self._formatTable( 'Most expensive Make-O-Matic functions (cumulative time without waiting):',
+			self.getMostExpensiveFrameworkFunctions( count ) )
+		lines.append( '' )
+		lines += self._formatTable( 'Most expensive functions (own time):', self.getMostExpensiveFunctions( count ) )
+		return '\n'.join( lines ) + '\n'
+
+	def writeStats( self, path ):
+		'''Save the statistics in a pstats file, to be inspected with the pstats module, or tools like snakeviz.'''
+		self.getStats().dump_stats( path )
+
+	def writeSummary( self, path, count = 30 ):
+		with open( path, 'w' ) as summary:
+			summary.write( self.createSummary( count ) )
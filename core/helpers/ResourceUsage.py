@@ -0,0 +1,79 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+
+class ResourceUsage( object ):
+	'''ResourceUsage holds the CPU time, peak memory and block I/O of a command, or the totals for a number of commands.
+	When usages are added, the times and the I/O operations are summed up, while the peak memory is the largest peak of
+	the added usages, since the commands may not run at the same time.
+	The peak memory (maximum resident set size) is stored in kilobytes, the block I/O in numbers of operations.'''
+
+	# the names of the XML attributes
+	Attributes = ( 'userTime', 'systemTime', 'maxRss', 'inBlocks', 'outBlocks' )
+
+	def __init__( self, userTime = 0.0, systemTime = 0.0, maxRss = 0, inBlocks = 0, outBlocks = 0 ):
+		self.userTime = userTime
+		self.systemTime = systemTime
+		self.maxRss = maxRss
+		self.inBlocks = inBlocks
+		self.outBlocks = outBlocks
+
+	@staticmethod
+	def fromRusage( rusage ):
+		'''Create a ResourceUsage object from the structure returned by os.wait4() or resource.getrusage().'''
+		maxRss = rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss # bytes on Mac OS X
+		return ResourceUsage( rusage.ru_utime, rusage.ru_stime, maxRss, rusage.ru_inblock, rusage.ru_oublock )
+
+	@staticmethod
+	def fromXmlAttributes( attributes ):
+		'''Create a ResourceUsage object from the attributes of a report element, or return None if it has none.'''
+		if not 'userTime' in attributes:
+			return None
+		return ResourceUsage( float( attributes[ 'userTime' ] ), float( attributes[ 'systemTime' ] ),
+			int( attributes[ 'maxRss' ] ), int( attributes[ 'inBlocks' ] ), int( attributes[ 'outBlocks' ] ) )
+
+	@staticmethod
+	def total( usages ):
+		'''Return the total of the usages that are not None, or None if there are none.'''
+		usages = [ usage for usage in usages if usage is not None ]
+		if not usages:
+			return None
+		result = ResourceUsage()
+		for usage in usages:
+			result.add( usage )
+		return result
+
+	def add( self, other ):
+		self.userTime += other.userTime
+		self.systemTime += other.systemTime
+		self.maxRss = max( self.maxRss, other.maxRss )
+		self.inBlocks += other.inBlocks
+		self.outBlocks += other.outBlocks
+
+	def setXmlAttributes( self, node ):
+		node.attributes[ 'userTime' ] = '{0:.3f}'.format( self.userTime )
+		node.attributes[ 'systemTime' ] = '{0:.3f}'.format( self.systemTime )
+		node.attributes[ 'maxRss' ] = str( self.maxRss )
+		node.attributes[ 'inBlocks' ] = str( self.inBlocks )
+		node.attributes[ 'outBlocks' ] = str( self.outBlocks )
+
+	def getDescription( self ):
+		return 'CPU {0:.1f}s user, {1:.1f}s system, peak RSS {2} MB, block I/O {3} in, {4} out'.format(
+			self.userTime, self.systemTime, self.maxRss // 1024, self.inBlocks, self.outBlocks )
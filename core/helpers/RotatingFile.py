@@ -0,0 +1,132 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from contextlib import contextmanager
+import gzip
+import os
+import shutil
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None # not available on Windows, where there are no forked worker processes
+
+@contextmanager
+def _locked( file ):
+	'''Hold an exclusive lock on file, so that the writes of forked worker processes do not overlap the rotation.'''
+	if not fcntl:
+		yield
+		return
+	fcntl.flock( file.fileno(), fcntl.LOCK_EX )
+	try:
+		yield
+	finally:
+		fcntl.flock( file.fileno(), fcntl.LOCK_UN )
+
+class RotatingFile( object ):
+	'''RotatingFile is a file that is moved to a numbered segment when it would grow larger than maxBytes, after which a new file
+	is started. The segments are named filePath.1 (the most recent) to filePath.<backupCount>, older segments are deleted.
+	If compress is True, the segments are compressed with gzip and get the .gz suffix. A single write is not split, so a
+	segment can be larger than maxBytes if it was written in one piece (like a batch of a BackgroundWriter).
+	Only the process that opened the file rotates it. Forked worker processes that write to it (see BackgroundWriter) open
+	the file by it's path for every write, so that they append to the current file after a rotation. The writes and the
+	compression of a segment hold a lock on the file, so that nothing is written to a segment while it is compressed.'''
+
+	def __init__( self, filePath, mode = 'a', maxBytes = None, backupCount = 5, compress = False ):
+		self.__filePath = filePath
+		self.__maxBytes = maxBytes
+		self.__backupCount = backupCount
+		self.__compress = compress
+		self.__pid = os.getpid()
+		open( filePath, mode ).close() # truncates the file for mode "w"
+		# worker processes write to the file as well, so it is always appended to:
+		self.__file = open( filePath, 'a' )
+
+	def getFilePath( self ):
+		return self.__filePath
+
+	def getSegmentPath( self, index ):
+		path = '{0}.{1}'.format( self.__filePath, index )
+		if self.__compress:
+			path += '.gz'
+		return path
+
+	def write( self, text ):
+		if self.__pid != os.getpid():
+			self.__writeFromWorker( text )
+			return
+		if self.__maxBytes:
+			# the size includes what worker processes wrote:
+			size = os.fstat( self.__file.fileno() ).st_size
+			if size > 0 and size + len( text ) > self.__maxBytes:
+				self.rotate()
+		with _locked( self.__file ):
+			self.__file.write( text )
+			self.__file.flush()
+
+	def __writeFromWorker( self, text ):
+		while True:
+			with open( self.__filePath, 'a' ) as file:
+				with _locked( file ):
+					# the file may have been rotated between opening and locking it, then the new file is opened:
+					try:
+						current = os.fstat( file.fileno() ).st_ino == os.stat( self.__filePath ).st_ino
+					except OSError:
+						current = False
+					if current:
+						file.write( text )
+						file.flush()
+						return
+
+	def rotate( self ):
+		'''Move the current file to the first segment, and start a new file.'''
+		self.__file.close()
+		for index in range( self.__backupCount, 0, -1 ):
+			segment = self.getSegmentPath( index )
+			if not os.path.exists( segment ):
+				continue
+			if index == self.__backupCount:
+				os.remove( segment )
+			else:
+				os.rename( segment, self.getSegmentPath( index + 1 ) )
+		if self.__backupCount > 0:
+			self.__moveToSegment( self.getSegmentPath( 1 ) )
+		else:
+			os.remove( self.__filePath )
+		self.__file = open( self.__filePath, 'a' )
+
+	def __moveToSegment( self, segment ):
+		if not self.__compress:
+			os.rename( self.__filePath, segment )
+			return
+		# after the rename, worker processes open a new file:
+		uncompressed = segment[:-len( '.gz' )]
+		os.rename( self.__filePath, uncompressed )
+		with open( uncompressed, 'rb' ) as input:
+			# wait for workers that are still writing to the moved file:
+			with _locked( input ):
+				with gzip.open( segment, 'wb' ) as output:
+					shutil.copyfileobj( input, output )
+				os.remove( uncompressed )
+
+	def flush( self ):
+		self.__file.flush()
+
+	def close( self ):
+		self.__file.close()
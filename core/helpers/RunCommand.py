@@ -18,28 +18,195 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import subprocess, time
-from threading import Thread
+from collections import deque
+from contextlib import contextmanager
+from threading import Thread, Lock, Condition, Event
 from core.MObject import MObject
 from core.helpers.GlobalMApp import mApp
+from core.helpers.LogCompression import open_log_file
 from core.helpers.TypeCheckers import check_for_positive_int, check_for_path, check_for_list_of_paths
 import os.path
 import sys
+import codecs
 import copy
+import errno
+import heapq
+import itertools
 from core.Exceptions import ConfigurationError
 from core.Settings import Settings
 from core.helpers.StringUtils import to_unicode_or_bust
 
-class _CommandRunner( Thread ):
+class _BoundedOutput( object ):
+	'''Keeps the beginning and the end of a stream of text, up to limit characters each.
+	The characters in between are only counted. If limit is None, all of the text is kept.'''
+
+	def __init__( self, limit ):
+		self.__limit = limit
+		self.__head = []
+		self.__headLength = 0
+		self.__tail = deque()
+		self.__tailLength = 0
+		self.__omitted = 0
+
+	def append( self, text ):
+		if self.__limit is None:
+			self.__head.append( text )
+			return
+		if self.__headLength < self.__limit:
+			part = text[:self.__limit - self.__headLength]
+			self.__head.append( part )
+			self.__headLength += len( part )
+			text = text[len( part ):]
+		if not text:
+			return
+		self.__tail.append( text )
+		self.__tailLength += len( text )
+		while self.__tailLength - len( self.__tail[0] ) >= self.__limit:
+			dropped = self.__tail.popleft()
+			self.__tailLength -= len( dropped )
+			self.__omitted += len( dropped )
+
+	def getText( self ):
+		text = u''.join( self.__head )
+		if self.__limit is None:
+			return text
+		tail = u''.join( self.__tail )
+		# the first tail chunk may start before the last limit characters:
+		excess = max( 0, len( tail ) - self.__limit )
+		omitted = self.__omitted + excess
+		if omitted:
+			text += u'\n[... {0} characters omitted, see the log file ...]\n'.format( omitted )
+		return text + tail[excess:]
+
+class _Process( subprocess.Popen ):
+	'''_Process collects the resource usage of the process when it is waited for.
+	The usage includes the children of the process that have been waited for, so the maximum resident set size is the
+	peak memory of the largest process in the tree (for example, the biggest compiler or linker job started by make).'''
+
+	resourceUsage = None
+
+	def __init__( self, *args, **kwargs ):
+		self.__lock = Lock()
+		subprocess.Popen.__init__( self, *args, **kwargs )
+
+	def wait( self ):
+		if self.returncode is None and hasattr( os, 'wait4' ):
+			while True:
+				try:
+					_, status, resourceUsage = os.wait4( self.pid, 0 )
+				except OSError as e:
+					if e.errno == errno.EINTR:
+						continue
+					if e.errno != errno.ECHILD:
+						raise
+					break # the process has been waited for elsewhere, Popen.wait() handles this
+				with self.__lock:
+					self.resourceUsage = resourceUsage
+					self._handle_exitstatus( status )
+				break
+		return subprocess.Popen.wait( self )
+
+	def terminateIfRunning( self ):
+		'''Terminate the process, unless it has been waited for already.
+		Other threads must use this instead of poll() and terminate(): the process is only reaped by wait(), otherwise the
+		resource usage is lost, and the signal could be sent to a new process that reuses the process id.'''
+		with self.__lock:
+			if self.returncode is None:
+				self.terminate()
+
+	def killIfRunning( self ):
+		'''Kill the process, unless it has been waited for already, see terminateIfRunning().'''
+		with self.__lock:
+			if self.returncode is None:
+				self.kill()
+
+class _TimeoutMonitor( object ):
+	'''_TimeoutMonitor terminates commands that exceed their timeout.
+	One monitor thread serves all commands of the process. It keeps the deadlines in a priority queue, and sleeps until the
+	earliest one expires. A command that does not exit after being terminated is killed KillDelay seconds later.
+	The thread exits when no commands are watched, and is started again when needed.'''
+
+	KillDelay = 5
+	_instance = None
+	_instanceLock = Lock()
+
+	@classmethod
+	def instance( cls ):
+		with cls._instanceLock:
+			# the monitor thread does not survive a fork (see ParallelStepRunner), the child process needs it's own monitor:
+			if cls._instance is None or cls._instance.__pid != os.getpid():
+				cls._instance = _TimeoutMonitor()
+			return cls._instance
+
+	def __init__( self ):
+		self.__pid = os.getpid()
+		self.__condition = Condition()
+		self.__deadlines = [] # heap of ( deadline, sequence number, watch ) tuples
+		self.__sequence = itertools.count()
+		self.__thread = None
+
+	def watch( self, process, timeoutSeconds ):
+		'''Terminate process if it is still running after timeoutSeconds.
+		\return a watch object that needs to be passed to cancel() once the process has finished.'''
+		watch = _TimeoutWatch( process )
+		with self.__condition:
+			self.__schedule( time.time() + timeoutSeconds, watch )
+			if not self.__thread:
+				# not a daemon thread, so that it can exit cleanly before the interpreter shuts down:
+				self.__thread = Thread( target = self.__run, name = 'RunCommand timeout monitor' )
+				self.__thread.start()
+			self.__condition.notify()
+		return watch
+
+	def cancel( self, watch ):
+		with self.__condition:
+			self.__deadlines = [ entry for entry in self.__deadlines if entry[2] is not watch ]
+			heapq.heapify( self.__deadlines )
+			self.__condition.notify()
+
+	def __schedule( self, deadline, watch ):
+		heapq.heappush( self.__deadlines, ( deadline, next( self.__sequence ), watch ) )
+
+	def __run( self ):
+		with self.__condition:
+			while True:
+				if not self.__deadlines:
+					self.__thread = None
+					return
+				remaining = self.__deadlines[0][0] - time.time()
+				if remaining > 0:
+					self.__condition.wait( remaining )
+					continue
+				_, _, watch = heapq.heappop( self.__deadlines )
+				try:
+					if not watch.timedOut:
+						watch.timedOut = True
+						watch.process.terminateIfRunning()
+						self.__schedule( time.time() + self.KillDelay, watch )
+					else:
+						watch.process.killIfRunning()
+				except OSError:
+					pass # process finished in the meantime (the error is "[Errno 3] No such process")
+
+class _TimeoutWatch( object ):
+	'''The state of a process watched by the _TimeoutMonitor.'''
+
+	def __init__( self, process ):
+		self.process = process
+		self.timedOut = False
+
+class _CommandRunner( object ):
+	'''_CommandRunner executes the command of a RunCommand object in the calling thread.
+	The started event is set as soon as the process has been created.'''
 
 	def __init__ ( self, runner ):
-		Thread.__init__( self )
-		self.__started = None
-		self.__finished = None
+		self.__started = Event()
+		self.__finished = False
+		self.__timedOut = False
 		assert runner
 		self._runner = runner
 		self._process = None
 		self.__combineOutput = False
-		self.__workingDir = None
 
 	def setCombineOutput( self, combine ):
 		if combine: # make sure combine is usable as a boolean
@@ -54,54 +221,104 @@ class _CommandRunner( Thread ):
 		return self._runner
 
 	def run( self ):
-		self.__started = True
 		stderrValue = subprocess.PIPE
 		if self.__combineOutput:
 			stderrValue = subprocess.STDOUT
+		# override encoding for windows
+		if sys.platform == 'win32':
+			encoding = 'cp850'
+		else:
+			encoding = 'utf-8'
 		if self._getRunner().getCaptureOutput():
-			self._process = subprocess.Popen ( self._getRunner().getCommand(), shell = False,
-				cwd = self._getRunner().getWorkingDir(), stdout = subprocess.PIPE, stderr = stderrValue )
-			output, error = self._process.communicate()
-
-			# override encoding for windows
-			if sys.platform == 'win32':
-				encoding = 'cp850'
-			else:
-				encoding = 'utf-8'
-			self._getRunner().setStdOut( to_unicode_or_bust( output, encoding ) )
-			self._getRunner().setStdErr( to_unicode_or_bust( error, encoding ) )
+			self._process = _Process( self._getRunner().getCommand(), shell = False,
+				cwd = self._getRunner().getWorkingDir(), env = self._getRunner().getEnvironment(),
+				stdout = subprocess.PIPE, stderr = stderrValue )
+			with self.__watchTimeout():
+				if self._getRunner().getLogFile():
+					self._streamOutput( encoding )
+				else:
+					output, error = self._process.communicate()
+					self._getRunner().setStdOut( to_unicode_or_bust( output, encoding ) )
+					self._getRunner().setStdErr( to_unicode_or_bust( error, encoding ) )
 
 			mApp().debugN( self._getRunner(), 5, u"STDOUT:\n{0}".format( self._getRunner().getStdOut() ) )
 			if not self.__combineOutput:
 				mApp().debugN( self._getRunner(), 5, u"STDERR:\n{0}".format( self._getRunner().getStdErr() ) )
 			self._getRunner().setReturnCode( self._process.returncode )
 		else:
-			self._process = subprocess.Popen ( self._getRunner().getCommand(), shell = False,
-				cwd = self._getRunner().getWorkingDir() )
-			self._process.wait()
+			self._process = _Process( self._getRunner().getCommand(), shell = False,
+				cwd = self._getRunner().getWorkingDir(), env = self._getRunner().getEnvironment() )
+			with self.__watchTimeout():
+				self._process.wait()
 			returnCode = self._process.returncode
 			self._getRunner().setReturnCode( returnCode )
 			self._getRunner().setStdOut( None )
 			self._getRunner().setStdErr( None )
+		self._getRunner().setResourceUsage( self._process.resourceUsage )
 		self.__finished = True
 
+	@contextmanager
+	def __watchTimeout( self ):
+		'''Signal that the process has been started, and terminate it if it exceeds the timeout of the runner.'''
+		self.__started.set()
+		watch = None
+		if self._getRunner().getTimeoutSeconds():
+			watch = _TimeoutMonitor.instance().watch( self._process, self._getRunner().getTimeoutSeconds() )
+		try:
+			yield
+		finally:
+			if watch:
+				_TimeoutMonitor.instance().cancel( watch )
+				self.__timedOut = watch.timedOut
+
+	def _streamOutput( self, encoding ):
+		'''Append the output of the process to the log file while it arrives.
+		Only the beginning and the end of the output are kept in memory, up to the output limit of the runner.'''
+		pipes = [ self._process.stdout ]
+		if not self.__combineOutput:
+			pipes.append( self._process.stderr )
+		limit = None if self._getRunner().getKeepOutput() else self._getRunner().getOutputLimit()
+		outputs = [ _BoundedOutput( limit ) for pipe in pipes ]
+		lock = Lock()
+		with open_log_file( self._getRunner().getLogFile() ) as logFile:
+			# every additional pipe needs it's own reader, otherwise the process may block writing to the other one:
+			readers = [ Thread( target = self._readPipe, args = ( pipe, output, logFile, lock, encoding ) )
+				for pipe, output in zip( pipes[1:], outputs[1:] ) ]
+			for reader in readers:
+				reader.start()
+			self._readPipe( pipes[0], outputs[0], logFile, lock, encoding )
+			for reader in readers:
+				reader.join()
+		self._process.wait()
+		self._getRunner().setStdOut( outputs[0].getText() )
+		self._getRunner().setStdErr( outputs[1].getText() if len( outputs ) > 1 else None )
+
+	def _readPipe( self, pipe, output, logFile, lock, encoding ):
+		decoder = codecs.getincrementaldecoder( encoding )( 'replace' )
+		while True:
+			data = os.read( pipe.fileno(), 65536 ) # returns what is available, instead of waiting for the full size
+			text = decoder.decode( data, final = not data )
+			if text:
+				output.append( text )
+				with lock:
+					logFile.write( text )
+					logFile.flush()
+			if not data:
+				break
+		pipe.close()
+
 	def wasStarted( self ):
-		return self.__started
+		return self.__started.is_set()
+
+	def waitForStart( self, timeout = None ):
+		'''Wait until the process has been created, for code that executes the runner in another thread.'''
+		return self.__started.wait( timeout )
 
 	def hasFinished( self ):
 		return self.__finished
 
-	def terminate( self ):
-		# FIXME logic?
-		if self._process:
-			self._process.terminate()
-		if not self.hasFinished():
-			self.join( 5 )
-			try:
-				self._process.kill()
-			except OSError:
-				pass # process finished in the meantime (the error is "[Errno 3] No such process")
-			self.join( 5 )
+	def hasTimedOut( self ):
+		return self.__timedOut
 
 class RunCommand( MObject ):
 
@@ -113,11 +330,16 @@ class RunCommand( MObject ):
 			check_for_positive_int( timeoutSeconds, "The timeout period must be a positive integer number! " )
 		self.__timeoutSeconds = timeoutSeconds
 		self.__workingDir = None
+		self.__environment = None
 		self.__captureOutput = captureOutput
 		self.__combineOutput = combineOutput
+		self.__logFile = None
+		self.__outputLimit = None
+		self.__keepOutput = False
 		self.__stdOut = None
 		self.__stdErr = None
 		self.__returnCode = None
+		self.__resourceUsage = None
 		self.__timedOut = False
 		if searchPaths is None:
 			self.__searchPaths = []
@@ -138,18 +360,69 @@ class RunCommand( MObject ):
 	def getWorkingDir( self ):
 		return self.__workingDir
 
+	def setEnvironment( self, environment ):
+		'''Set the complete environment of the command. If it is None, the environment of the build script is used.'''
+		self.__environment = environment
+
+	def getEnvironment( self ):
+		return self.__environment
+
+	def setExecutionContext( self, context ):
+		'''Run the command with the working directory and environment of the execution context.'''
+		if context.getWorkingDirectory():
+			self.setWorkingDir( context.getWorkingDirectory() )
+		self.setEnvironment( context.getEnvironment() )
+
+	def __getVariable( self, name ):
+		environment = self.getEnvironment() or os.environ
+		return environment.get( name, '' )
+
 	def getCombineOutput( self ):
 		return self.__combineOutput
 
 	def getCaptureOutput( self ):
 		return self.__captureOutput
 
+	def setLogFile( self, path ):
+		'''Stream the captured output to the log file at path while the command is running.
+		Only the beginning and the end of the output are kept in memory then (see setOutputLimit()).'''
+		check_for_path( path, 'The log file must be a non-empty string!' )
+		self.__logFile = str( path )
+
+	def getLogFile( self ):
+		return self.__logFile
+
+	def setOutputLimit( self, limit ):
+		'''Set the number of characters kept at the beginning and at the end of streamed output.'''
+		check_for_positive_int( limit, 'The output limit must be a positive integer number!' )
+		self.__outputLimit = limit
+
+	def getOutputLimit( self ):
+		if self.__outputLimit is None:
+			return mApp().getSettings().get( Settings.BuildActionOutputLimit )
+		return self.__outputLimit
+
+	def setKeepOutput( self, keep ):
+		'''Keep all of the streamed output in memory, for commands whose output is parsed after they finished.'''
+		self.__keepOutput = keep
+
+	def getKeepOutput( self ):
+		return self.__keepOutput
+
 	def setReturnCode( self, code ):
 		self.__returnCode = code
 
 	def getReturnCode( self ):
 		return self.__returnCode
 
+	def setResourceUsage( self, usage ):
+		self.__resourceUsage = usage
+
+	def getResourceUsage( self ):
+		'''Return the resource usage of the command and it's child processes (see os.wait4()), or None if it is not
+		available on this platform.'''
+		return self.__resourceUsage
+
 	def setStdOut( self, stdout ):
 		self.__stdOut = stdout
 
@@ -188,7 +461,7 @@ class RunCommand( MObject ):
 
 		paths = copy.deepcopy( self.__searchPaths )
 
-		paths += os.environ["PATH"].split( os.pathsep )
+		paths += self.__getVariable( "PATH" ).split( os.pathsep )
 
 		# These paths have been added by the local configuration so complain when we can't find them
 		extraPaths = mApp().getSettings().get( Settings.SystemExtraPaths )
@@ -207,7 +480,7 @@ class RunCommand( MObject ):
 				self.__cmd[0] = executableFile
 				return
 			if sys.platform == "win32":
-				commandExtensions = os.environ["PATHEXT"].split( os.pathsep )
+				commandExtensions = self.__getVariable( "PATHEXT" ).split( os.pathsep )
 				for extension in commandExtensions:
 					executableFileAndExtension = executableFile + extension
 					if isExecutableFullPath( executableFileAndExtension ):
@@ -250,18 +523,8 @@ class RunCommand( MObject ):
 			timeoutString, combinedOutputString ) )
 		runner = _CommandRunner ( self )
 		runner.setCombineOutput( self.getCombineOutput() )
-		runner.start()
-		# this sucks, but seems to be needed on Windows at least
-		while not runner.wasStarted():
-			time.sleep( 0.1 )
-		if not self.getTimeoutSeconds():
-			runner.join()
-		else:
-			runner.join( self.getTimeoutSeconds() )
-		if runner.isAlive():
-			runner.terminate()
-			runner.join( 5 )
-			self.__timedOut = True
+		runner.run()
+		self.__timedOut = runner.hasTimedOut()
 		timeoutString = "timed out" if self.getTimedOut() else "completed"
 		mApp().debugN( self, 3, '"{0}" {1}, return code is {2}'.format( ' '.join( self.getCommand() ),
 			timeoutString, str( self.getReturnCode() ) ) )
@@ -18,14 +18,18 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from datetime import datetime, timedelta
-from core.helpers.TimeUtils import formatted_time_delta
+from core.helpers.TimeUtils import formatted_time_delta, monotonic_time
+import os
 
 class TimeKeeper( object ):
-	'''TimeKeeper records the time an operation took.'''
+	'''TimeKeeper records the time an operation took.
+	It also records when the operation was executed, and in which process, using a monotonic clock (see getIntervals()).'''
 
 	def __init__( self ):
 		self.__duration = timedelta( 0 )
 		self.__startTime = None
+		self.__monotonicStartTime = None
+		self.__intervals = []
 
 	def __enter__( self ):
 		self.start()
@@ -35,16 +39,34 @@ class TimeKeeper( object ):
 
 	def start( self ):
 		self.__startTime = datetime.utcnow()
+		self.__monotonicStartTime = monotonic_time()
 
 	def stop( self ):
 		assert self.__startTime
 		delta = datetime.utcnow() - self.__startTime
+		self.__intervals.append( ( os.getpid(), self.__monotonicStartTime, monotonic_time() ) )
 		self.__startTime = None
 		self.__duration += delta
 
+	def getIntervals( self ):
+		'''\return a list of ( process id, start, stop ) tuples for every time the operation was executed.
+		Start and stop are in seconds of the monotonic clock (see monotonic_time()).'''
+		return self.__intervals
+
+	def getLastDuration( self ):
+		'''\return the duration of the last execution of the operation in seconds, or None if it was not executed yet.'''
+		if not self.__intervals:
+			return None
+		_, start, stop = self.__intervals[-1]
+		return stop - start
+
 	def delta( self ):
 		return self.__duration
 
+	def deltaSeconds( self ):
+		delta = self.delta()
+		return delta.days * 86400 + delta.seconds + delta.microseconds / 1000000.0
+
 	def deltaString( self ):
 		if self.__duration == None:
 			return '---'
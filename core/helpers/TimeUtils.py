@@ -18,6 +18,45 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from datetime import datetime
+import sys
+import time
+
+def _monotonic_clock_id( platform = sys.platform ):
+	'''Return the id of CLOCK_MONOTONIC for clock_gettime() on platform, or None if it is not known.
+	The ids differ between the platforms, for example 1 is CLOCK_VIRTUAL (the CPU time of the process) on FreeBSD.'''
+	for prefix, clockId in ( ( 'linux', 1 ), ( 'freebsd', 4 ), ( 'darwin', 6 ) ):
+		if platform.startswith( prefix ):
+			return clockId
+	return None
+
+def _make_monotonic_clock():
+	'''Return a function that returns the seconds of a monotonic clock, or time.time if the platform does not provide one.
+	The monotonic clock is not affected by changes to the system time, and is shared by all processes of the machine.'''
+	CLOCK_MONOTONIC = _monotonic_clock_id()
+	if CLOCK_MONOTONIC is None:
+		return time.time
+	try:
+		import ctypes, ctypes.util
+
+		class timespec( ctypes.Structure ):
+			_fields_ = [ ( 'tv_sec', ctypes.c_long ), ( 'tv_nsec', ctypes.c_long ) ]
+
+		library = ctypes.CDLL( ctypes.util.find_library( 'rt' ) or ctypes.util.find_library( 'c' ), use_errno = True )
+		clock_gettime = library.clock_gettime
+		clock_gettime.argtypes = [ ctypes.c_int, ctypes.POINTER( timespec ) ]
+
+		def monotonic():
+			spec = timespec()
+			if clock_gettime( CLOCK_MONOTONIC, ctypes.byref( spec ) ) != 0:
+				raise OSError( ctypes.get_errno(), 'clock_gettime failed' )
+			return spec.tv_sec + spec.tv_nsec * 1e-9
+
+		monotonic() # verify it works
+		return monotonic
+	except ( ImportError, AttributeError, OSError, TypeError ):
+		return time.time
+
+monotonic_time = _make_monotonic_clock()
 
 def time_format():
 	return "%a, %d %b %Y %H:%M:%S +0000"
@@ -21,8 +21,9 @@ from __future__ import unicode_literals
 
 from core.Instructions import Instructions
 import traceback
-from core.helpers.XmlUtils import create_exception_xml_node
+from core.helpers.XmlUtils import create_exception_xml_node, get_node_attributes, write_xml_node
 from core.helpers.GlobalMApp import mApp
+from xml.sax.saxutils import XMLGenerator
 import xml.dom.minidom
 
 class XmlReportInterface( object ):
@@ -34,6 +35,47 @@ class XmlReportInterface( object ):
 
 		raise NotImplementedError()
 
+	def getParsedReport( self, parse ):
+		"""\return the report parsed by the function parse, for example lxml.etree.XML"""
+
+		return parse( self.getReport() )
+
+class XmlReportCache( object ):
+	"""XmlReportCache keeps the XML reports of instructions objects, and their parsed trees, so that the reporters and
+	converters that run after the wrapup phase share them instead of generating and parsing the report again.
+
+	The cache is only used while it is enabled, MApplication enables it for the report and notify phases. It is
+	invalidated whenever the build changes in a way that is visible in the report (see MApplication.event())."""
+
+	def __init__( self ):
+		self.__enabled = False
+		self.__entries = {}
+
+	def setEnabled( self, enabled ):
+		self.__enabled = enabled
+		self.invalidate()
+
+	def isEnabled( self ):
+		return self.__enabled
+
+	def invalidate( self ):
+		self.__entries = {}
+
+	def peek( self, key ):
+		"""\return the cached value for key, or None"""
+
+		return self.__entries.get( key )
+
+	def get( self, key, create ):
+		"""\return the cached value for key. If there is none, it is created by calling create(), and cached if the
+		cache is enabled."""
+
+		if not self.__enabled:
+			return create()
+		if key not in self.__entries:
+			self.__entries[ key ] = create()
+		return self.__entries[ key ]
+
 class StringBasedXmlReport( XmlReportInterface ):
 
 	def __init__( self, xmlString ):
@@ -54,6 +96,12 @@ class InstructionsXmlReport( XmlReportInterface ):
 		self.__instructions = instructions
 
 	def getReport( self ):
+		return mApp().getXmlReportCache().get( ( self.__instructions, None ), self._createReport )
+
+	def getParsedReport( self, parse ):
+		return mApp().getXmlReportCache().get( ( self.__instructions, parse ), lambda: parse( self.getReport() ) )
+
+	def _createReport( self ):
 		doc = xml.dom.minidom.Document()
 		rootNode = self._createRootNode( doc )
 
@@ -79,6 +127,55 @@ class InstructionsXmlReport( XmlReportInterface ):
 		doc.appendChild( rootNode )
 		return doc.toxml()
 
+	def writeReport( self, file ):
+		"""Write the report to file, encoded as UTF-8, without building the complete document in memory.
+
+		The nodes of every instructions object (including it's plugins, steps and actions) are created and written one
+		after the other, so only the nodes of one instructions object are kept in memory at a time. The document is
+		equivalent to the one returned by getReport(). If an exception occurs during report generation, the open elements
+		are closed, and the exception is added to the top level instructions element. If the report is already in the
+		report cache (see XmlReportCache), the cached report is written instead."""
+
+		report = mApp().getXmlReportCache().peek( ( self.__instructions, None ) )
+		if report:
+			file.write( report.encode( "utf-8" ) )
+			return
+
+		doc = xml.dom.minidom.Document()
+		generator = XMLGenerator( file, "utf-8" )
+		generator.startDocument()
+		rootNode = self._createRootNode( doc )
+		generator.startElement( rootNode.tagName, get_node_attributes( rootNode ) )
+
+		exception = mApp().getException()
+		if exception:
+			instructionsNode = mApp().createXmlNode( doc, recursive = False )
+			tracebackToUnicode = u"".join( [x.decode( "utf-8" ) for x in exception[1] ] )
+			instructionsNode.appendChild( create_exception_xml_node( doc, exception[0], tracebackToUnicode ) )
+			write_xml_node( generator, instructionsNode )
+		else:
+			openElements = []
+			try:
+				self._writeNodesRecursively( self.__instructions, doc, generator, openElements )
+			except Exception as e:
+				exceptionNode = create_exception_xml_node( 
+						doc,
+						"Caught exception during report generation: {0}".format( e ),
+						traceback.format_exc()
+				)
+				if openElements:
+					for tagName in reversed( openElements[1:] ):
+						generator.endElement( tagName )
+					write_xml_node( generator, exceptionNode )
+					generator.endElement( openElements[0] )
+				else:
+					instructionsNode = mApp().createXmlNode( doc, recursive = False )
+					instructionsNode.appendChild( exceptionNode )
+					write_xml_node( generator, instructionsNode )
+
+		generator.endElement( rootNode.tagName )
+		generator.endDocument()
+
 	def _createRootNode( self, document ):
 		rootNode = document.createElement( "mom-report" )
 		rootNode.attributes["name"] = "Make-O-Matic report"
@@ -97,3 +194,20 @@ class InstructionsXmlReport( XmlReportInterface ):
 			node.appendChild( childNode )
 
 		return node
+
+	def _writeNodesRecursively( self, instructions, document, generator, openElements ):
+		"""Write the XML node of the Instructions object, and the nodes of it's children recursively.
+		The tag names of the elements that have been started, but not ended, are kept in openElements."""
+
+		node = instructions.createXmlNode( document )
+		generator.startElement( node.tagName, get_node_attributes( node ) )
+		openElements.append( node.tagName )
+		for child in node.childNodes:
+			write_xml_node( generator, child )
+		node.unlink() # release the nodes of the steps and actions before the children are written
+
+		for child in instructions.getChildren():
+			self._writeNodesRecursively( child, document, generator, openElements ) # enter recursion
+
+		generator.endElement( node.tagName )
+		openElements.pop()
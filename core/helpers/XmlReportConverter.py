@@ -19,10 +19,14 @@
 
 from __future__ import unicode_literals
 
-from core.Exceptions import ConfigurationError, MomError, returncode_to_description, BuildError
+from core.Exceptions import ConfigurationError, MomError, MomException, returncode_to_description, BuildError
 from core.MObject import MObject
+from core.Plugin import Plugin
+from core.Settings import Settings
 from core.executomat.Step import Step
 from core.helpers.GlobalMApp import mApp
+from core.helpers.LogCompression import read_log_file
+from core.helpers.ResourceUsage import ResourceUsage
 from core.helpers.TimeKeeper import formatted_time_delta
 from core.helpers.XmlUtils import string_from_node_attribute, string_from_node, float_from_node_attribute, \
 	find_nodes_with_attribute_and_value
@@ -57,6 +61,10 @@ except ImportError:
 				except ImportError, e:
 					raise MomError( "Could not find a suitable XML module: {0}".format( e ) )
 
+def _parse_element_tree( report ):
+	# ElementTree.fromstring requires encoded data, fails otherwise
+	return xml.etree.ElementTree.fromstring( report.encode( "utf-8" ) )
+
 class ReportFormat:
 	"""Enum-like structure for output format"""
 
@@ -118,6 +126,11 @@ class XmlReportConverter( MObject ):
 		ReportFormat.HTML : "xmlreport2html.xsl",
 	}
 
+	# number of plugin hooks shown in the "slowest plugin hooks" section:
+	SlowestPluginHooksCount = 10
+	# number of steps with the least slack shown in the summary:
+	SlackStepsCount = 10
+
 	def __init__( self, xmlReport ):
 		MObject.__init__( self )
 
@@ -127,9 +140,8 @@ class XmlReportConverter( MObject ):
 
 		self.__xmlReport = xmlReport
 
-		# ElementTree.fromstring requires encoded data, fails otherwise
-		encodedData = xmlReport.getReport().encode( "utf-8" )
-		self.__elementTree = xml.etree.ElementTree.fromstring( encodedData ) # cache ElementTree object
+		# the parsed report is shared with other converters (see XmlReportCache):
+		self.__elementTree = xmlReport.getParsedReport( _parse_element_tree )
 
 		self.__xslTemplateSnippets = {}
 		self.__xmlTemplateFunctions = {}
@@ -267,9 +279,10 @@ class XmlReportConverter( MObject ):
 			cssFilePath = os.path.join( os.path.dirname( __file__ ), "xslt", "xmlreport2html.css" )
 
 			transform = etree.XSLT( self.__xslTemplateSnippets[ ReportFormat.HTML ] )
-			result = unicode( transform( etree.XML( self.__xmlReport.getReport() ),
+			result = unicode( transform( self.__xmlReport.getParsedReport( etree.XML ),
 					summaryOnly = etree.XSLT.strparam( summaryOnly ),
 					enableCrossLinking = etree.XSLT.strparam( enableCrossLinkingParam ),
+					slowestPluginHooksCount = etree.XSLT.strparam( str( self.SlowestPluginHooksCount ) ),
 					javaScriptContent = etree.XSLT.strparam( readFile( javaScriptFilePath ) ),
 					cssContent = etree.XSLT.strparam( readFile( cssFilePath ) ) )
 			)
@@ -295,7 +308,9 @@ Could not create HTML report. Caught exception:\n {0}\nTraceback:\n{1}
 			ignoredTags = []
 
 		try:
-			result = "\n".join( self._toText( self.__elementTree, wrapper, ignoredTags ) )
+			out = self._toText( self.__elementTree, wrapper, ignoredTags )
+			out += self._slowestPluginHooksToText( self.__elementTree, wrapper )
+			result = "\n".join( out )
 		except Exception, e:
 			innerTraceback = "".join( traceback.format_tb( sys.exc_info()[2] ) )
 			result = "Could not create report. Caught exception:\n {0}\nTraceback:\n{1}".format( e, innerTraceback )
@@ -359,6 +374,18 @@ Could not create HTML report. Caught exception:\n {0}\nTraceback:\n{1}
 		# show client information
 		out += wrapper.wrap( "Client:       {0}, {1}".format( buildNode.attrib["sys-platform"], buildNode.attrib["sys-platform-details"] ) )
 
+		actionCache = self._actionCacheSummary( buildNode )
+		if actionCache:
+			out += wrapper.wrap( "Action cache: {0}".format( actionCache ) )
+		resources = self._resourceUsageSummary( buildNode )
+		if resources:
+			out += wrapper.wrap( "Resources:    {0}".format( resources ) )
+		regressions = buildNode.findall( ".//timingregression" )
+		if regressions:
+			out += wrapper.wrap( "Slower steps: {0}".format( "; ".join( [ self._timingRegressionSummary( regression )
+				for regression in regressions ] ) ) )
+		out += self._criticalPathToText( buildNode, wrapper )
+
 		# only show detailed summary on success or build error
 		returnCode = int ( buildNode.attrib["returncode"] )
 		if returnCode in ( 0, BuildError.getReturnCode() ):
@@ -402,6 +429,7 @@ Could not create HTML report. Caught exception:\n {0}\nTraceback:\n{1}
 		out = []
 		element = self.__elementTree
 
+		limit = mApp().getSettings().get( Settings.BuildActionOutputLimit )
 		failedSteps = find_nodes_with_attribute_and_value( element, "step", "result", "Failure" )
 		for step in failedSteps:
 			out += ["*** Step failed: {0} ***".format( step.attrib["name"] )]
@@ -413,14 +441,138 @@ Could not create HTML report. Caught exception:\n {0}\nTraceback:\n{1}
 
 				out += ["* Action: {0} *".format( action.find( "logdescription" ).text )]
 				out += ["STDOUT:"]
-				out += [action.find( "stdout" ).text or ""]
+				out += [self._truncatedOutput( action.find( "stdout" ).text or "", limit )]
 				out += ["STDERR:"]
-				out += [action.find( "stderr" ).text or ""]
+				out += [self._truncatedOutput( action.find( "stderr" ).text or "", limit )]
 				out += " "
+
+			# the log file may be huge, only include it's end, where the step failed:
+			log = self.readStepLog( step, limit )
+			if log:
+				out += ["* End of the step log {0}: *".format( step.attrib["relativeLinkTarget"] )]
+				out += [log]
 			out += " "
 
 		return "\n".join( out )
 
+	def readStepLog( self, stepElement, limit = None ):
+		'''\return the content of the log file of the step element, decompressed (see LogCompression), or None if the step
+		has no log file or it cannot be read. If limit is not None, only the last limit characters are returned.'''
+		target = stepElement.attrib.get( "relativeLinkTarget" )
+		if not target or target == "None":
+			return None
+		try:
+			return read_log_file( os.path.join( mApp().getBaseDir(), target ), limit )
+		except ( EnvironmentError, MomException ), e:
+			mApp().debugN( self, 3, 'cannot read log file "{0}": {1}'.format( target, e ) )
+			return None
+
+	@classmethod
+	def _truncatedOutput( self, text, limit ):
+		'''Return the beginning and the end of text, up to limit characters each.'''
+		if limit is None or len( text ) <= 2 * limit:
+			return text
+		omitted = len( text ) - 2 * limit
+		return text[:limit] + "\n[... {0} characters omitted, see the log file ...]\n".format( omitted ) + text[-limit:]
+
+	@classmethod
+	def _actionCacheSummary( self, element ):
+		'''Return a description of the hits and misses of the action cache, or None if the action cache was not used.'''
+		hits = len( find_nodes_with_attribute_and_value( element, "action", "cache", "hit" ) )
+		misses = len( find_nodes_with_attribute_and_value( element, "action", "cache", "miss" ) )
+		if hits + misses == 0:
+			return None
+		return "{0} hits, {1} misses ({2}% hit ratio)".format( hits, misses, 100 * hits // ( hits + misses ) )
+
+	@classmethod
+	def _resourceUsageSummary( self, element ):
+		'''Return a description of the total resource usage of the element, or None if it is not known.'''
+		usage = ResourceUsage.fromXmlAttributes( element.attrib )
+		return usage.getDescription() if usage else None
+
+	@classmethod
+	def _criticalPathSteps( self, element, names = None ):
+		'''Return the executed, non-empty steps of element and it's children that are on the critical path, as a list of
+		( position, step element, instructions name ) sorted by position, and the other steps as a list of
+		( slack, step element, instructions name ) sorted by slack. The instructions names are the names of the
+		objects below the build, separated by slashes.'''
+		names = names or []
+		name = "/".join( names ) or element.attrib["name"]
+		critical, others = [], []
+		for child in element:
+			if child.tag == "steps":
+				for step in child.findall( "step" ):
+					if step.attrib["isEmpty"] == "True" or "slack" not in step.attrib:
+						continue
+					if "criticalPathPosition" in step.attrib:
+						critical.append( ( int( step.attrib["criticalPathPosition"] ), step, name ) )
+					else:
+						others.append( ( float( step.attrib["slack"] ), step, name ) )
+			elif child.tag not in ( "plugins", "exception" ) and "name" in child.attrib:
+				childCritical, childOthers = self._criticalPathSteps( child, names + [ child.attrib["name"] ] )
+				critical += childCritical
+				others += childOthers
+		return sorted( critical, key = lambda entry: entry[0] ), sorted( others, key = lambda entry: entry[0] )
+
+	def _criticalPathToText( self, buildNode, wrapper ):
+		out = []
+		if "criticalPath" not in buildNode.attrib:
+			return out
+		critical, others = self._criticalPathSteps( buildNode )
+		out += wrapper.wrap( "Critical path: {0:.1f}s (steps took {1:.1f}s wall time)".format(
+			float( buildNode.attrib["criticalPath"] ), float( buildNode.attrib["stepsWallTime"] ) ) )
+		wrapper.indent()
+		for _, step, name in critical:
+			actions = [ action for action in step.findall( "action" ) if "duration" in action.attrib ]
+			longest = ""
+			if actions:
+				action = max( actions, key = lambda action: float( action.attrib["duration"] ) )
+				longest = ', longest action "{0}" {1:.1f}s'.format( action.find( "logdescription" ).text,
+					float( action.attrib["duration"] ) )
+			out += wrapper.wrap( '"{0}" of {1}: {2:.1f}s{3}'.format( step.attrib["name"], name,
+				float( step.attrib["duration"] ), longest ) )
+		wrapper.dedent()
+		if others:
+			out += wrapper.wrap( "Slack of the other steps:" )
+			wrapper.indent()
+			for slack, step, name in others[:self.SlackStepsCount]:
+				out += wrapper.wrap( '"{0}" of {1}: {2:.1f}s'.format( step.attrib["name"], name, slack ) )
+			if len( others ) > self.SlackStepsCount:
+				out += wrapper.wrap( "({0} more)".format( len( others ) - self.SlackStepsCount ) )
+			wrapper.dedent()
+		return out
+
+	@classmethod
+	def _timingRegressionSummary( self, element ):
+		'''Return a description of a step that took longer than it's baseline (see TimingHistory).'''
+		return '"{0}" of {1} took {2:.1f}s, baseline {3:.1f}s'.format( element.attrib["step"], element.attrib["instructions"],
+			float( element.attrib["duration"] ), float( element.attrib["baseline"] ) )
+
+	@classmethod
+	def _slowestPluginHooks( self, element, count = SlowestPluginHooksCount ):
+		'''Return ( seconds, plugin name, hook name, instructions tag, instructions name ) for the count slowest plugin hook
+		calls of element and it's children, slowest first.'''
+		hooks = []
+		for instructions in element.iter():
+			for plugin in instructions.findall( "plugins/plugin" ):
+				for attribute, value in plugin.attrib.items():
+					if attribute.startswith( Plugin.HookTimeAttributePrefix ):
+						hook = attribute[ len( Plugin.HookTimeAttributePrefix ): ]
+						hooks.append( ( float( value ), plugin.attrib["name"], hook, instructions.tag, instructions.attrib["name"] ) )
+		return sorted( hooks, reverse = True )[:count]
+
+	def _slowestPluginHooksToText( self, element, wrapper ):
+		out = []
+		hooks = [ hook for hook in self._slowestPluginHooks( element ) if hook[0] > 0 ]
+		if hooks:
+			out += " "
+			out += wrapper.wrap( "Slowest plugin hooks:" )
+			wrapper.indent()
+			for seconds, pluginName, hook, tag, name in hooks:
+				out += wrapper.wrap( "{0:.3f}s: {1}.{2} ({3} {4})".format( seconds, pluginName, hook, tag, name ) )
+			wrapper.dedent()
+		return out
+
 	@classmethod
 	def _statesToStringList( self, element ):
 		states = []
@@ -458,6 +610,12 @@ Could not create HTML report. Caught exception:\n {0}\nTraceback:\n{1}
 			out += wrapper.wrap( "Build status: {0}".format( returncode_to_description( int( element.attrib["returncode"] ) ) ) )
 			out += " "
 			out += wrapper.wrap( "Build time: {0}".format( element.attrib["timing"] ) )
+			actionCache = self._actionCacheSummary( element )
+			if actionCache:
+				out += wrapper.wrap( "Action cache: {0}".format( actionCache ) )
+			resources = self._resourceUsageSummary( element )
+			if resources:
+				out += wrapper.wrap( "Resources: {0}".format( resources ) )
 			wrapper.dedent()
 
 		elif element.tag == "project":
@@ -506,6 +664,11 @@ Could not create HTML report. Caught exception:\n {0}\nTraceback:\n{1}
 					element.attrib["name"],
 					"success" if element.attrib["failed"] == "False" else "FAILED"
 			) )
+			resources = self._resourceUsageSummary( element )
+			if resources:
+				wrapper.indent()
+				out += wrapper.wrap( "Resources: {0}".format( resources ) )
+				wrapper.dedent()
 
 		elif element.tag == "environments":
 			out += " "
@@ -541,11 +704,20 @@ Could not create HTML report. Caught exception:\n {0}\nTraceback:\n{1}
 			if element.attrib["isEmpty"] == "True":
 				return out # do not show empty step
 
-			out += wrapper.wrap( '{0} [{1}]: Step "{2}" (took {3})'.format( 
+			details = []
+			if "criticalPathPosition" in element.attrib:
+				details.append( "on the critical path" )
+			elif "slack" in element.attrib:
+				details.append( "slack {0:.1f}s".format( float( element.attrib["slack"] ) ) )
+			resources = self._resourceUsageSummary( element )
+			if resources:
+				details.append( resources )
+			out += wrapper.wrap( '{0} [{1}]: Step "{2}" (took {3}{4})'.format( 
 				Step.Status.getDescriptionFromKey( element.attrib["status"] ),
 				Step.Result.getDescriptionFromKey( element.attrib["result"] ),
 				element.attrib["name"] ,
-				element.attrib["timing"]
+				element.attrib["timing"],
+				"".join( [ ", {0}".format( detail ) for detail in details ] )
 			) )
 
 			if element.attrib["result"] == "Success":
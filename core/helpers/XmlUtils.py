@@ -19,6 +19,7 @@
 
 from core.Exceptions import MomException, returncode_to_description
 from core.helpers.StringUtils import to_unicode_or_bust
+from xml.sax.xmlreader import AttributesImpl
 
 # *** Note ***
 # This module should only use stuff from Python's xml.* package, do not depend on external packages for now 
@@ -46,6 +47,20 @@ def create_exception_xml_node( document, exception, traceback ):
 
 	return node
 
+def get_node_attributes( node ):
+	'''\return the attributes of a DOM element node for a SAX content handler.'''
+	return AttributesImpl( dict( node.attributes.items() ) )
+
+def write_xml_node( generator, node ):
+	'''Write a DOM node and it's children to a SAX content handler, like xml.sax.saxutils.XMLGenerator.'''
+	if node.nodeType == node.TEXT_NODE:
+		generator.characters( node.data )
+	elif node.nodeType == node.ELEMENT_NODE:
+		generator.startElement( node.tagName, get_node_attributes( node ) )
+		for child in node.childNodes:
+			write_xml_node( generator, child )
+		generator.endElement( node.tagName )
+
 def string_from_node_attribute( element, node, attribute ):
 	for el in element.getiterator( node ):
 		if attribute in el.attrib:
@@ -41,20 +41,56 @@ function toggle(obj, style)
 	}
 }
 
-function load_file(file, viewElement)
+/**
+ * Decode the content of a compressed log file (see LogCompression)
+ *
+ * A web server that sends the Content-Encoding header for the file suffix lets the browser decompress the log.
+ * Otherwise (for example, for local files), gzip compressed logs are decompressed here if the browser supports it.
+ */
+function decode_log(bytes, onText)
+{
+	if (bytes.length > 1 && bytes[0] == 0x1f && bytes[1] == 0x8b) {
+		if (typeof DecompressionStream == "undefined") {
+			onText("(The log file is compressed, please download it.)");
+			return;
+		}
+		var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+		new Response(stream).text().then(onText);
+		return;
+	}
+	if (bytes.length > 3 && bytes[0] == 0x28 && bytes[1] == 0xb5 && bytes[2] == 0x2f && bytes[3] == 0xfd) {
+		onText("(The log file is compressed with zstd, please download it.)");
+		return;
+	}
+	onText(new TextDecoder("utf-8").decode(bytes));
+}
+
+function load_file(file, viewElement, compression)
 {
 	// load only once
 	if (viewElement.getAttribute("loaded") == "true")
 		return;
 
+	var showText = function(text)
+	{
+		viewElement.innerHTML = html_escape(text);
+		viewElement.setAttribute("loaded", "true");
+	}
+
 	// try to fetch file contents when element content is still empty
 	var httpRequest = new XMLHttpRequest();
 	httpRequest.open("GET", file, true);
+	if (compression)
+		httpRequest.responseType = "arraybuffer";
 	httpRequest.send(null);
 	httpRequest.onreadystatechange = function()
 	{
-		viewElement.innerHTML = html_escape(this.responseText);
-		viewElement.setAttribute("loaded", "true");
+		if (!compression) {
+			showText(this.responseText);
+		}
+		else if (this.readyState == 4) {
+			decode_log(new Uint8Array(this.response || []), showText);
+		}
 	}
 }
 
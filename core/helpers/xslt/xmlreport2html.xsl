@@ -7,6 +7,7 @@
 	
 	<xsl:param name="summaryOnly"/>
 	<xsl:param name="enableCrossLinking"/>
+	<xsl:param name="slowestPluginHooksCount" select="10"/>
 
 	<xsl:param name="javaScriptContent"/>
 	<xsl:param name="cssContent"/>
@@ -148,6 +149,37 @@
 				<br/>
 			</xsl:if>
 
+			<xsl:if test=".//build/@criticalPath">
+				<h5>Critical path: <xsl:value-of select="format-number(.//build/@criticalPath, '0.0')" />s
+					(steps took <xsl:value-of select="format-number(.//build/@stepsWallTime, '0.0')" />s wall time)</h5>
+				<table><tbody>
+					<xsl:for-each select=".//step[@criticalPathPosition and @isEmpty = 'False']">
+						<xsl:sort select="@criticalPathPosition" data-type="number"/>
+						<tr>
+							<td width="200px"><xsl:value-of select="@name" /></td>
+							<td><xsl:value-of select="../../@name" />: <xsl:value-of select="format-number(@duration, '0.0')" />s</td>
+						</tr>
+					</xsl:for-each>
+				</tbody></table>
+				<br/>
+			</xsl:if>
+
+			<xsl:if test="count(.//timingregression) > 0">
+				<h5>Steps slower than the baseline:</h5>
+				<table><tbody>
+					<xsl:for-each select=".//timingregression">
+						<tr>
+							<td width="200px"><xsl:value-of select="@step" /></td>
+							<td>
+								<xsl:value-of select="@instructions" />:
+								<xsl:value-of select="format-number(@duration, '0.0')" />s, baseline <xsl:value-of select="format-number(@baseline, '0.0')" />s
+							</td>
+						</tr>
+					</xsl:for-each>
+				</tbody></table>
+				<br/>
+			</xsl:if>
+
 			<xsl:if test="count(.//exception) > 0">
 				<h5>Caught exception:</h5>
 				<xsl:apply-templates select=".//exception"/>
@@ -160,6 +192,24 @@
 					<xsl:apply-templates select=".//plugin[@pluginType = 'publisher']"/>
 				</tbody></table>
 			</xsl:if>
+
+			<xsl:if test="count(.//plugin/@*[starts-with(name(), 'hook-') and number(.) > 0]) > 0">
+				<h5>Slowest plugin hooks:</h5>
+				<table><tbody>
+					<xsl:for-each select=".//plugin/@*[starts-with(name(), 'hook-') and number(.) > 0]">
+						<xsl:sort select="." data-type="number" order="descending"/>
+						<xsl:if test="position() &lt;= number($slowestPluginHooksCount)">
+							<tr>
+								<td width="200px"><xsl:value-of select="format-number(., '0.000')" />s</td>
+								<td>
+									<xsl:value-of select="../@name" />.<xsl:value-of select="substring-after(name(), 'hook-')" />
+									(<xsl:value-of select="name(../../..)" /><xsl:text> </xsl:text><xsl:value-of select="../../../@name" />)
+								</td>
+							</tr>
+						</xsl:if>
+					</xsl:for-each>
+				</tbody></table>
+			</xsl:if>
 		</div>
 		
 		<div class="xfooter">
@@ -167,6 +217,12 @@
 		</div>
 	</xsl:template>
 
+	<xsl:template name="showResourceUsage">
+		CPU <xsl:value-of select="format-number(@userTime, '0.0')" />s user, <xsl:value-of select="format-number(@systemTime, '0.0')" />s system,
+		peak RSS <xsl:value-of select="floor(@maxRss div 1024)" /> MB,
+		block I/O <xsl:value-of select="@inBlocks" /> in, <xsl:value-of select="@outBlocks" /> out
+	</xsl:template>
+
 	<xsl:template match="exception">
 		<div class="tag-exception">
 			Description: <xsl:value-of select="description"/><br/>
@@ -197,6 +253,19 @@
 			<p>
 				Build time: <xsl:value-of select="@timing" />
 			</p>
+			<xsl:variable name="cacheHits" select="count(.//action[@cache = 'hit'])" />
+			<xsl:variable name="cacheMisses" select="count(.//action[@cache = 'miss'])" />
+			<xsl:if test="$cacheHits + $cacheMisses > 0">
+				<p class="action-cache">
+					Action cache: <xsl:value-of select="$cacheHits" /> hits, <xsl:value-of select="$cacheMisses" /> misses
+					(<xsl:value-of select="floor(100 * $cacheHits div ($cacheHits + $cacheMisses))" />% hit ratio)
+				</p>
+			</xsl:if>
+			<xsl:if test="@userTime">
+				<p class="resource-usage">
+					Resources: <xsl:call-template name="showResourceUsage" />
+				</p>
+			</xsl:if>
 			<xsl:apply-templates />
 		</div>
 	</xsl:template>
@@ -233,6 +302,11 @@
 	<xsl:template match="configuration">
 		<h3>Configuration: <xsl:value-of select="@name" /> (<xsl:call-template name="showBuildInstructionsStatus"/>)</h3>
 		<div class="tag-configuration">
+			<xsl:if test="@userTime">
+				<p class="resource-usage">
+					Resources: <xsl:call-template name="showResourceUsage" />
+				</p>
+			</xsl:if>
 			<xsl:apply-templates />
 		</div>
 	</xsl:template>
@@ -311,7 +385,7 @@
 						<a title="Show/hide log" href="javascript:void(0);">
 							<xsl:attribute name="onClick">
 var logView = getNextSibling(getParentByTagName(this, 'tr'));
-load_file('<xsl:value-of select="@relativeLinkTarget"/>', logView.getElementsByTagName('pre')[0]);
+load_file('<xsl:value-of select="@relativeLinkTarget"/>', logView.getElementsByTagName('pre')[0], '<xsl:value-of select="@logCompression"/>');
 toggle(logView, 'table-row');
 							</xsl:attribute>
 							(+/-)
@@ -328,6 +402,17 @@ toggle(logView, 'table-row');
 				</td>
 				<td>
 					<xsl:value-of select="@timing" />
+					<xsl:choose>
+						<xsl:when test="@criticalPathPosition">
+							<br /><span class="critical-path">on the critical path</span>
+						</xsl:when>
+						<xsl:when test="@slack">
+							<br /><span class="critical-path">slack <xsl:value-of select="format-number(@slack, '0.0')" />s</span>
+						</xsl:when>
+					</xsl:choose>
+					<xsl:if test="@userTime">
+						<br /><span class="resource-usage"><xsl:call-template name="showResourceUsage" /></span>
+					</xsl:if>
 				</td>
 				<td class="step-status">
 					<xsl:call-template name="showStepStatus" />
@@ -355,6 +440,9 @@ toggle(logView, 'table-row');
 			</td>
 			<td>
 				<xsl:value-of select="@timing" />
+				<xsl:if test="@userTime">
+					<br /><span class="resource-usage"><xsl:call-template name="showResourceUsage" /></span>
+				</xsl:if>
 			</td>
 
 			<td>
@@ -19,7 +19,7 @@
 
 from __future__ import unicode_literals
 
-import string, sys, os
+import sys, os
 from core.loggers.Logger import Logger
 from core.helpers.TypeCheckers import check_for_nonnegative_int
 from core.Settings import Settings
@@ -31,6 +31,7 @@ class ConsoleLogger( Logger ):
 
 	def __init__( self, name = None ):
 		super( ConsoleLogger, self ).__init__( name )
+		self.__baseDir = None
 
 	@staticmethod
 	def __getLevel( mapp ):
@@ -38,6 +39,18 @@ class ConsoleLogger( Logger ):
 		check_for_nonnegative_int( verbosity, "The debug level needs to be an integer of zero or more" )
 		return verbosity
 
+	def getDebugLevel( self, mapp ):
+		return self.__getLevel( mapp )
+
+	def __getBaseDir( self ):
+		# the base directory does not change once it is set:
+		if self.__baseDir is None:
+			try:
+				self.__baseDir = mApp().getBaseDir()
+			except MomException:
+				pass # no base directory set yet
+		return self.__baseDir
+
 	def _logError( self, mapp, mobject, msg ):
 		self._log( mapp, mobject, '*** ERROR: {0}'.format( msg ) )
 
@@ -47,11 +60,9 @@ class ConsoleLogger( Logger ):
 	def _log( self, mapp, mobject, msg ):
 		text = msg
 		# FIXME this should be configurable somewhere, and preferably not only for the ConsoleLogger
-		try:
-			basedir = mApp().getBaseDir()
-			text = string.replace( text, basedir, '$BASE' )
-		except MomException:
-			pass # no base directory set yet		
+		basedir = self.__getBaseDir()
+		if basedir and basedir in text:
+			text = text.replace( basedir, '$BASE' )
 		if not text.endswith( os.linesep ):
 			text = text + os.linesep
 
@@ -70,6 +81,9 @@ class ConsoleLogger( Logger ):
 	def _write( self, str ):
 		sys.stderr.write( str )
 
+	def flush( self ):
+		sys.stderr.flush()
+
 	def _logDebug( self, mapp, mobject, msg ):
 		if self.__getLevel( mapp ) > 0:
 			self._log( mapp, mobject, 'DEBUG: {0}'.format( msg ) )
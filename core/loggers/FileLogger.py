@@ -18,19 +18,23 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from core.Settings import Settings
+from core.helpers.BackgroundWriter import open_background_writer
 from core.helpers.GlobalMApp import mApp
 from core.loggers.ConsoleLogger import ConsoleLogger
-import codecs
 import os.path
 
 class FileLogger( ConsoleLogger ):
+	'''FileLogger writes the messages of the build script to console.out in the base directory of the build.
+	The file is written by a background thread (see BackgroundWriter), so that the build does not wait for the disk.
+	The log file can be rotated when it grows larger than the ScriptLogFileMaxSize setting. The log is flushed in the
+	shutDown phase, which is also executed if the build is terminated by SIGTERM or SIGHUP (see MApplication.buildAndReturn()).'''
 
 	FILENAME = "console.out"
 
 	def __init__( self, name = None ):
 		super( FileLogger, self ).__init__( name )
 
-		self.f = None
+		self.__writer = None
 		self.cachedMessages = []
 
 	def preFlightCheck( self ):
@@ -39,33 +43,42 @@ class FileLogger( ConsoleLogger ):
 		if mode != Settings.RunMode_Build:
 			self.setEnabled( False )
 
-	def __del__( self ):
-		if self.f:
-			self.f.close()
+	def getFilePath( self ):
+		return os.path.join( self.getInstructions().getBaseDir(), self.FILENAME )
 
 	def isReady( self ):
-		return ( self.f != None )
+		return ( self.__writer != None )
 
 	def setup( self ):
-		dir = self.getInstructions().getBaseDir()
-		filePath = os.path.join( dir, self.FILENAME )
-		self.f = codecs.open( filePath, 'w', encoding = "utf-8" )
-
+		settings = mApp().getSettings()
+		self.__writer = open_background_writer( self.getFilePath(), 'wb',
+			maxQueueSize = settings.get( Settings.ScriptLogFileQueueSize ),
+			maxBytes = settings.get( Settings.ScriptLogFileMaxSize ),
+			backupCount = settings.get( Settings.ScriptLogFileBackupCount ),
+			compress = settings.get( Settings.ScriptLogFileCompress ) )
 		self._writeCachedMessages()
 
 	def _writeCachedMessages( self ):
 		# write initially saved buffer
 		for line in self.cachedMessages:
-			self.f.write( line )
+			self.__writer.write( line )
 
 		# reset
 		self.cachedMessages = []
 
 	def _write( self, str ):
 		if self.isReady():
-			self.f.write( str )
+			self.__writer.write( str )
 		else:
 			self.cachedMessages.append( str )
 
+	def flush( self ):
+		if self.isReady():
+			self.__writer.flush()
+
+	def shutDown( self ):
+		# the writer is closed when the script exits, the log file still receives the final messages:
+		self.flush()
+
 	def getObjectStatus( self ):
 		return "Log file: {0}".format( self.FILENAME )
@@ -0,0 +1,106 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Kevin Funk <kevin.funk@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Settings import Settings
+from core.helpers.BackgroundWriter import open_background_writer
+from core.helpers.GlobalMApp import mApp
+from core.helpers.TimeUtils import monotonic_time
+from core.loggers.Logger import Logger
+import json
+import os
+import time
+
+class JsonEventLogger( Logger ):
+	'''JsonEventLogger writes the events of the build execution as a JSON-lines stream, one JSON object per line.
+	Events are the start and end of phases, the calls of plugin hooks (with the duration, including the report, notify
+	and shutDown hooks that are not part of the reports), step status changes, the start and end of actions (with the
+	return code and duration), registered exceptions, and the messages and errors of the build script (debug messages are not recorded).
+	Every event has the type ("event"), the time in seconds of the monotonic clock ("time"), the process id ("pid"), and
+	the class and name of the object that reported it. The first event ("log-start") contains the wall clock time.
+	The stream is written by a background thread (see BackgroundWriter), so that the build does not wait for the disk.'''
+
+	FILENAME = "events.jsonl"
+
+	def __init__( self, name = None ):
+		super( JsonEventLogger, self ).__init__( name )
+		self.__writer = None
+		self.__cachedEvents = [ self.__makeEvent( None, 'log-start', { 'wallTime' : time.time() } ) ]
+
+	def preFlightCheck( self ):
+		# only write the event stream if we are in build mode
+		mode = mApp().getSettings().get( Settings.ScriptRunMode )
+		if mode != Settings.RunMode_Build:
+			self.setEnabled( False )
+
+	def getFilePath( self ):
+		return os.path.join( self.getInstructions().getBaseDir(), self.FILENAME )
+
+	def isReady( self ):
+		return self.__writer is not None
+
+	def setup( self ):
+		self.__writer = open_background_writer( self.getFilePath(), 'w' )
+		for event in self.__cachedEvents:
+			self.__writer.write( event )
+		self.__cachedEvents = []
+
+	def __makeEvent( self, mobject, eventType, details ):
+		event = dict( details )
+		event[ 'event' ] = eventType
+		event[ 'time' ] = monotonic_time()
+		event[ 'pid' ] = os.getpid()
+		if mobject is not None:
+			event[ 'objectType' ] = mobject.__class__.__name__
+			event[ 'object' ] = mobject.getName()
+		return json.dumps( event, sort_keys = True ) + '\n'
+
+	def event( self, mapp, mobject, eventType, details ):
+		if not self.isEnabled():
+			return
+		event = self.__makeEvent( mobject, eventType, details )
+		if self.isReady():
+			self.__writer.write( event )
+		else:
+			self.__cachedEvents.append( event )
+
+	def _logError( self, mapp, mobject, msg ):
+		self.event( mapp, mobject, 'error', { 'message' : msg } )
+
+	def _logMessage( self, mapp, mobject, msg ):
+		self.event( mapp, mobject, 'message', { 'message' : msg } )
+
+	def getDebugLevel( self, mapp ):
+		return None
+
+	def _logDebug( self, mapp, mobject, msg ):
+		pass
+
+	def _logDebugN( self, mapp, mobject, level , msg ):
+		pass
+
+	def flush( self ):
+		if self.isReady():
+			self.__writer.flush()
+
+	def shutDown( self ):
+		# the writer is closed when the script exits, the remaining phases still report events:
+		self.flush()
+
+	def getObjectStatus( self ):
+		return "Event stream: {0}".format( self.FILENAME )
@@ -16,16 +16,27 @@
 # 
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from collections import OrderedDict
 from datetime import datetime
 from core.Plugin import Plugin
+from core.Settings import Settings
 from buildcontrol.SubprocessHelpers import get_debug_prefix
 
 class Logger( Plugin ):
 	"""Logger is the base class for Logger objects."""
 
+	# the number of messages remembered to suppress duplicates (see the compareTo parameter), the least recently used are dropped:
+	DuplicateMessageCacheSize = 1024
+
 	def __init__( self, name ):
 		Plugin.__init__( self, name )
-		self.__cachedMessages = {}
+		self.__cachedMessages = OrderedDict()
+
+	def getDebugLevel( self, mapp ):
+		'''\return the highest level of the debug messages the logger writes, or None if it does not write debug messages.
+		MApplication does not format and dispatch debug messages of a higher level than that of all loggers.
+		The default implementation returns the script log level setting.'''
+		return mapp.getSettings().get( Settings.ScriptLogLevel, False )
 
 	def error( self, mapp, mobject, msg, compareTo = None ):
 		if not self._checkForDuplicateMessage( msg, compareTo ):
@@ -55,6 +66,14 @@ class Logger( Plugin ):
 	def _logDebugN( self, mapp, mobject, level , msg ):
 		raise NotImplementedError()
 
+	def event( self, mapp, mobject, eventType, details ):
+		'''Record a structured event of the build execution (see MApplication.event()). Text loggers ignore events.'''
+		pass
+
+	def flush( self ):
+		'''Write buffered output. Called before worker processes are started, and before they exit.'''
+		pass
+
 	def _timeStampPrefix( self ):
 		return datetime.now().strftime( '%y%m%d-%H:%M:%S' )
 
@@ -64,11 +83,9 @@ class Logger( Plugin ):
 	def _checkForDuplicateMessage( self, msg, compareTo ):
 		if not compareTo:
 			return False
-		try:
-			if self.__cachedMessages.has_key( msg ):
-				if self.__cachedMessages[ msg ] == compareTo:
-					return True
-				else:
-					return False
-		finally:
-			self.__cachedMessages[msg] = compareTo
+		duplicate = self.__cachedMessages.pop( msg, None ) == compareTo
+		# re-inserting the message marks it as the most recently used:
+		self.__cachedMessages[ msg ] = compareTo
+		if len( self.__cachedMessages ) > self.DuplicateMessageCacheSize:
+			self.__cachedMessages.popitem( last = False )
+		return duplicate
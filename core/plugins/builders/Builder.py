@@ -42,20 +42,28 @@ class Builder( Plugin ):
 	def _setOutOfSourceBuildSupported( self, outOfSourceBuildSupported ):
 		self.__outOfSourceBuildSupported = outOfSourceBuildSupported
 
+	def _getSourceDir( self ):
+		'''Return the directory in the project sources the configuration is built from.'''
+		configuration = self.getInstructions()
+		return os.path.join( configuration.getProject().getSourceDir(), configuration.getSourcePrefix() )
+
 	def createPrepareSourceDirActions( self ):
 		if self.getInSourceBuild():
 			if not self.__inSourceBuildSupported:
 				raise NotImplementedError( 'In-source builds are not supported by this Builder.' )
 			# If we're doing an in-source build, copy the tree to the build directory
 			configuration = self.getInstructions()
-			source = os.path.join( configuration.getProject().getSourceDir(), configuration.getSourcePrefix() )
+			source = self._getSourceDir()
 			build = configuration.getBuildDir()
 			ignore = ['.svn/', '.git/']
 			step = self.getInstructions().getStep( 'export-sources' )
-			step.addMainAction( DirectoryTreeCopyAction( source, build, ignore ) )
+			# overwrite files in the build directory, which exists already in incremental builds:
+			step.addMainAction( DirectoryTreeCopyAction( source, build, ignore, overwrite = True ) )
+			step.addInputDirectory( source )
 		else:
 			if not self.__outOfSourceBuildSupported:
 				raise NotImplementedError( 'Out-of-source builds are not supported by this Builder.' )
+			self.getInstructions().getStep( 'configure' ).addInputDirectory( self._getSourceDir() )
 
 	def createConfigureActions( self ):
 		raise NotImplementedError()
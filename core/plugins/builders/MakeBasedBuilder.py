@@ -18,9 +18,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 from core.plugins.builders.Builder import Builder
 from core.actions.ShellCommandAction import ShellCommandAction
+from core.plugins.builders.MakeCommandAction import MakeCommandAction
 from core.Settings import Settings
 from core.helpers.GlobalMApp import mApp
-import multiprocessing
+from core.helpers.JobServer import JobServer
+from core.helpers.JobsCount import get_jobs_count
 from core.plugins.builders import maketools
 from core.plugins.builders.maketools import getMakeTool
 
@@ -47,18 +49,25 @@ class MakeBasedBuilder( Builder ):
 
 	@staticmethod
 	def getJobsCount():
-		jobsCountOverride = mApp().getSettings().get( Settings.MakeBuilderJobsCount, False )
-		return jobsCountOverride if jobsCountOverride else multiprocessing.cpu_count()
+		return get_jobs_count()
+
+	def _getJobMemoryHistoryKey( self ):
+		return '{0}:{1}'.format( mApp().getName(), self.getInstructions().getName() )
 
 	def createConfMakeActions( self ):
 		tool = self.getMakeTool()
 		# The make tool is discovered during pre-flight check. It is not set in query and describe mode, so don't assume it is. 
 		if tool:
 			tool.setJobs( self.getJobsCount() )
-			command = [ tool.getCommand() ]
-			command.extend( tool.getArguments() )
-			action = ShellCommandAction( command, searchPaths = getMakeTool().getCommandSearchPaths() )
+			tool.setUseJobServer( JobServer.isEnabled() )
+			action = MakeCommandAction( tool, historyKey = self._getJobMemoryHistoryKey() )
 			action.setWorkingDirectory( self._getBuildDir() )
+			# with an action cache, the build directory is restored if the sources and the configured build directory
+			# did not change:
+			if not self.getInSourceBuild():
+				action.addInputDirectory( self._getSourceDir() )
+			action.addInputDirectory( self._getBuildDir() )
+			action.addOutputDirectory( '.' )
 			step = self.getInstructions().getStep( 'build' )
 			step.addMainAction( action )
 
@@ -68,7 +77,8 @@ class MakeBasedBuilder( Builder ):
 		if tool:
 			# There's often problems with more than one make install job and it's I/O bound anyway
 			tool.setJobs( 1 )
-			command = [ tool.getCommand() ]
+			tool.setUseJobServer( False )
+			command = [ tool.getCommand() ] + tool.getArguments()
 			command.append( mApp().getSettings().get( Settings.MakeBuilderInstallTarget ) )
 			action = ShellCommandAction( command, searchPaths = getMakeTool().getCommandSearchPaths() )
 			action.setWorkingDirectory( self._getBuildDir() )
@@ -0,0 +1,97 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mike McQuaid <mike.mcquaid@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from core.Settings import Settings
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.helpers.GlobalMApp import mApp
+from core.helpers.JobsCount import JobMemoryHistory, calculate_jobs_count, peak_memory_of
+import copy
+
+class MakeCommandAction( ShellCommandAction ):
+	'''MakeCommandAction executes a make tool with the number of jobs determined when the action is executed.
+	The number of jobs and the reasons for it are part of the log description. If the make tool uses the job server of the
+	build, the job server decides. Otherwise, the job count is calculated according to the
+	configuration.builder.make.jobscount setting. In adaptive mode, the job count is calculated in both cases, and job
+	slots of the job server are withheld if it is lower. The peak memory of the command is recorded for historyKey, and
+	used to calculate the job count in later runs.'''
+
+	def __init__( self, tool, historyKey = None ):
+		self.__tool = copy.copy( tool ) # the builder changes the settings of the tool for other actions
+		self.__historyKey = historyKey
+		self.__jobsDescription = None
+		ShellCommandAction.__init__( self, self.__makeCommand(), searchPaths = tool.getCommandSearchPaths() )
+
+	def __makeCommand( self ):
+		return [ self.__tool.getCommand() ] + self.__tool.getArguments()
+
+	def getTool( self ):
+		return self.__tool
+
+	def getLogDescription( self ):
+		description = ShellCommandAction.getLogDescription( self )
+		if self.__jobsDescription:
+			description += ' ({0})'.format( self.__jobsDescription )
+		return description
+
+	def _getCacheCommand( self ):
+		# the number of jobs does not change the results:
+		return [ self.__tool.getCommand() ]
+
+	def getExecutionContext( self ):
+		context = ShellCommandAction.getExecutionContext( self )
+		jobServer = mApp().getJobServer() if self.__tool.getUseJobServer() else None
+		if jobServer:
+			context = jobServer.applyTo( context )
+		return context
+
+	def __isAdaptive( self ):
+		return mApp().getSettings().get( Settings.MakeBuilderJobsCount, False ) == Settings.MakeBuilderJobsCount_Adaptive
+
+	def _getExecutionState( self ):
+		state = ShellCommandAction._getExecutionState( self )
+		state[ 'jobsdescription' ] = self.__jobsDescription
+		return state
+
+	def _setExecutionState( self, state ):
+		ShellCommandAction._setExecutionState( self, state )
+		self.__jobsDescription = state[ 'jobsdescription' ]
+
+	def run( self ):
+		jobServer = mApp().getJobServer() if self.__tool.getUseJobServer() else None
+		if jobServer:
+			limit = None
+			self.__jobsDescription = jobServer.getDescription()
+			if self.__isAdaptive():
+				# the load and the available memory may have changed since the job server has been created:
+				limit, reasons = calculate_jobs_count( self.__historyKey )
+				self.__jobsDescription += ', limited to {0} jobs: {1}'.format( limit, ', '.join( reasons ) )
+			with jobServer.limitTo( limit ):
+				returnCode = ShellCommandAction.run( self )
+		else:
+			jobs, reasons = calculate_jobs_count( self.__historyKey )
+			self.__tool.setUseJobServer( False ) # without a job server, make needs the job count
+			self.__tool.setJobs( jobs )
+			self.setCommand( self.__makeCommand(), searchPaths = self.__tool.getCommandSearchPaths() )
+			self.__jobsDescription = '{0} jobs: {1}'.format( jobs, ', '.join( reasons ) )
+			returnCode = ShellCommandAction.run( self )
+		usage = self._getRunner().getResourceUsage() if self.getCacheStatus() != 'hit' else None
+		if self.__isAdaptive() and self.__historyKey and usage:
+			peakMemory = peak_memory_of( usage )
+			mApp().debugN( self, 3, 'peak memory per job: {0} MB'.format( peakMemory // 2 ** 20 ) )
+			JobMemoryHistory( mApp().getSettings().get( Settings.MakeBuilderJobMemoryHistory ) ).record( self.__historyKey, peakMemory )
+		return returnCode
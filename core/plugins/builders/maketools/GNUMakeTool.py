@@ -33,5 +33,11 @@ class GNUMakeTool( MakeTool ):
 		self._setCommand( 'make' )
 #		self._setCommandSearchPaths( searchPaths )
 
+	def supportsJobServer( self ):
+		return True
+
 	def getArguments( self ):
+		if self.getUseJobServer():
+			# the number of jobs is controlled by the job server, -jN would disable it:
+			return []
 		return [ '-j{0}'.format( self._getJobs() )  ]
@@ -30,6 +30,7 @@ class MakeTool():
 		self.__versionOutputLine = 0
 		self.__versionReturnCode = 0
 		self.__jobs = 1
+		self.__useJobServer = False
 
 	def checkVersion( self ):
 		RunCommand( [ self.getCommand() ], searchPaths = self.getCommandSearchPaths() ).checkVersion(
@@ -85,5 +86,15 @@ class MakeTool():
 	def _getJobs( self ):
 		return self.__jobs
 
+	def supportsJobServer( self ):
+		'''Return True if the tool can join a GNU make job server announced in MAKEFLAGS, see JobServer.'''
+		return False
+
+	def setUseJobServer( self, onOff ):
+		self.__useJobServer = onOff
+
+	def getUseJobServer( self ):
+		return self.__useJobServer and self.supportsJobServer()
+
 	def getArguments( self ):
 		raise NotImplementedError()
@@ -0,0 +1,108 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Kevin Funk <kevin.funk@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+from core.Plugin import Plugin
+from core.helpers.GlobalMApp import mApp
+import json
+import os.path
+
+class BuildTraceGenerator( Plugin ):
+	"""
+	This plugin saves a timeline of the build run in Chrome trace event format (build-trace.json).
+	Attach it to the Build object, and load the file into a trace viewer (like chrome://tracing) to see where the wall
+	clock time of the build is spent, and which steps of different configurations overlap.
+
+	Every instructions object is a track. The phases, the plugin hooks, the steps and the actions of the object are
+	recorded as duration events on it's track. Steps that are executed in worker processes (see ParallelStepRunner) are
+	shown in a separate process group. The report is written during the report phase, so the phases that have not finished
+	at that time are not part of it.
+	"""
+
+	FileName = 'build-trace.json'
+
+	def __init__( self, name = None ):
+		Plugin.__init__( self, name )
+		self.__traceFile = None
+		self.__failed = False
+
+	def getTraceFile( self ):
+		return self.__traceFile
+
+	def getObjectStatus( self ):
+		if self.__failed:
+			return "Could not save {0}".format( self.FileName )
+		return "Trace saved to: {0}".format( self.FileName )
+
+	def report( self ):
+		baseDirectory = self.getInstructions().getBaseDir()
+		if not os.path.isdir( baseDirectory ):
+			raise ConfigurationError( 'Log directory at "{0}" does not exist.'.format( str( baseDirectory ) ) )
+		self.__traceFile = os.path.join( baseDirectory, self.FileName )
+		try:
+			with open( self.__traceFile, 'w' ) as f:
+				json.dump( self.createTrace(), f )
+		except IOError as e:
+			self.__failed = True
+			mApp().message( self, 'Cannot write the build trace to "{0}": {1}'.format( self.__traceFile, e ) )
+
+	def createTrace( self ):
+		'''\return the trace of the instructions object and it's children, as a dictionary in Chrome trace event format.'''
+		events = []
+		self.__addEventsRecursively( self.getInstructions(), events, [ 0 ] )
+		startTime = min( [ event[ 'ts' ] for event in events ] or [ 0 ] )
+		tracks = set()
+		for event in events:
+			event[ 'ts' ] = int( ( event[ 'ts' ] - startTime ) * 1e6 )
+			tracks.add( ( event[ 'pid' ], event[ 'tid' ], event.pop( 'track' ) ) )
+		metadata = []
+		for pid in set( [ pid for pid, _, _ in tracks ] ):
+			name = 'build script' if pid == os.getpid() else 'worker process {0}'.format( pid )
+			metadata.append( { 'ph' : 'M', 'name' : 'process_name', 'pid' : pid, 'tid' : 0, 'args' : { 'name' : name } } )
+		for pid, tid, track in tracks:
+			metadata.append( { 'ph' : 'M', 'name' : 'thread_name', 'pid' : pid, 'tid' : tid, 'args' : { 'name' : track } } )
+			metadata.append( { 'ph' : 'M', 'name' : 'thread_sort_index', 'pid' : pid, 'tid' : tid, 'args' : { 'sort_index' : tid } } )
+		return { 'traceEvents' : metadata + events, 'displayTimeUnit' : 'ms' }
+
+	def __addEvents( self, events, timeKeeper, name, category, track, tid, args = None ):
+		for pid, start, stop in timeKeeper.getIntervals():
+			event = { 'name' : name, 'cat' : category, 'ph' : 'X', 'ts' : start, 'dur' : int( ( stop - start ) * 1e6 ),
+				'pid' : pid, 'tid' : tid, 'track' : track }
+			if args:
+				event[ 'args' ] = args
+			events.append( event )
+
+	def __addEventsRecursively( self, instructions, events, counter ):
+		counter[0] += 1
+		tid = counter[0]
+		track = '{0}: {1}'.format( instructions.getTagName(), instructions.getName() )
+		for methodName, timeKeeper in instructions.getPhaseTimeKeepers().items():
+			self.__addEvents( events, timeKeeper, methodName, 'phase', track, tid )
+		for plugin in instructions.getPlugins():
+			for methodName, timeKeeper in plugin.getHookTimeKeepers().items():
+				self.__addEvents( events, timeKeeper, '{0}.{1}'.format( plugin.getName(), methodName ), 'plugin', track, tid )
+		for step in instructions.getSteps():
+			self.__addEvents( events, step.getTimeKeeper(), step.getName(), 'step', track, tid,
+				{ 'status' : step.Status.getKey( step.getStatus() ), 'result' : step.Result.getKey( step.getResult() ) } )
+			for actions in step.getAllActions():
+				for action in actions:
+					self.__addEvents( events, action.getTimeKeeper(), action.getLogDescription(), 'action', track, tid,
+						{ 'returncode' : action.getResult() } )
+		for child in instructions.getChildren():
+			self.__addEventsRecursively( child, events, counter )
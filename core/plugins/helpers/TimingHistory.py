@@ -0,0 +1,232 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Kevin Funk <kevin.funk@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Configuration import Configuration
+from core.Exceptions import MomError
+from core.Plugin import Plugin
+from core.Settings import Settings
+from core.executomat.Step import Step
+from core.helpers.GlobalMApp import mApp
+from core.helpers.XmlReportConverter import ReportFormat
+from datetime import datetime
+import os
+import sqlite3
+
+class TimingHistory( Plugin ):
+	"""
+	This plugin keeps the durations of the build, the configurations, the steps and the actions of every build run in a
+	SQLite database (see the TimingHistoryDatabase setting), keyed by build name, build type, configuration and revision.
+	Attach it to the Build object.
+
+	After the build steps are executed, the step durations are compared to a rolling baseline, the median duration of the
+	step in the last successful runs of the same build name and build type. Steps that took much longer are reported as
+	timing regressions in the XML report, and in the summary of the text and HTML reports (for example, in the emails of
+	the EmailReporter). The database is updated in the wrapup phase, so that the results are available to all reporters.
+	"""
+
+	def __init__( self, name = None ):
+		Plugin.__init__( self, name )
+		self.__regressions = []
+		self.__baselineRuns = 0
+		self.__error = None
+
+	def getRegressions( self ):
+		'''\return a list of ( instructions, step name, duration, baseline ) tuples of the steps that got slower.'''
+		return self.__regressions
+
+	def getBaselineRuns( self ):
+		'''\return the number of previous runs the baseline was calculated from.'''
+		return self.__baselineRuns
+
+	def getDatabaseFilename( self ):
+		return mApp().getSettings().get( Settings.TimingHistoryDatabase )
+
+	def getConnection( self ):
+		path = self.getDatabaseFilename()
+		directory = os.path.dirname( path )
+		if directory and not os.path.isdir( directory ):
+			os.makedirs( directory )
+		connection = sqlite3.connect( path )
+		connection.execute( '''CREATE TABLE IF NOT EXISTS runs (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			build TEXT NOT NULL,
+			buildtype TEXT NOT NULL,
+			revision TEXT,
+			starttime TEXT,
+			success INTEGER NOT NULL )''' )
+		connection.execute( '''CREATE TABLE IF NOT EXISTS timings (
+			run INTEGER NOT NULL REFERENCES runs( id ),
+			kind TEXT NOT NULL,
+			instructions TEXT NOT NULL,
+			step TEXT NOT NULL,
+			name TEXT NOT NULL,
+			duration REAL NOT NULL )''' )
+		connection.execute( 'CREATE INDEX IF NOT EXISTS timings_run ON timings ( run, kind )' )
+		return connection
+
+	@staticmethod
+	def _getInstructionsKey( instructions ):
+		'''\return the names of instructions and it's parents, excluding the build, separated by slashes.'''
+		names = []
+		while instructions.getParent():
+			names.insert( 0, instructions.getName() )
+			instructions = instructions.getParent()
+		return '/'.join( names )
+
+	def collectTimings( self ):
+		'''\return a list of ( kind, instructions, step name, name, duration ) for the build, the configurations,
+		the finished steps and the finished actions. Durations are in seconds.'''
+		build = self.getInstructions()
+		timings = [ ( 'build', '', '', build.getName(), build.getTimeKeeper().deltaSeconds() ) ]
+		self._collectTimingsRecursively( build, timings )
+		return timings
+
+	def _collectTimingsRecursively( self, instructions, timings ):
+		key = self._getInstructionsKey( instructions )
+		total = 0.0
+		for step in instructions.getSteps():
+			if step.getStatus() != Step.Status.Finished:
+				continue
+			duration = step.getTimeKeeper().deltaSeconds()
+			total += duration
+			timings.append( ( 'step', key, step.getName(), step.getName(), duration ) )
+			actions = step.getPreActions() + step.getMainActions() + step.getPostActions()
+			for index, action in enumerate( actions ):
+				if action.didFinish():
+					name = '{0}: {1}'.format( index, action.getLogDescription() )
+					timings.append( ( 'action', key, step.getName(), name, action.getTimeKeeper().deltaSeconds() ) )
+		if isinstance( instructions, Configuration ):
+			timings.append( ( 'configuration', key, '', instructions.getName(), total ) )
+		for child in instructions.getChildren():
+			self._collectTimingsRecursively( child, timings )
+
+	@staticmethod
+	def _median( values ):
+		values = sorted( values )
+		middle = len( values ) // 2
+		if len( values ) % 2:
+			return values[ middle ]
+		return ( values[ middle - 1 ] + values[ middle ] ) / 2.0
+
+	def findRegressions( self, connection, buildType, timings ):
+		'''Compare the step durations in timings with the baseline of the previous successful runs.
+		\return the number of runs in the baseline, and a list of ( instructions, step name, duration, baseline ) tuples.'''
+		settings = mApp().getSettings()
+		cursor = connection.cursor()
+		cursor.execute( 'SELECT id FROM runs WHERE build = ? AND buildtype = ? AND success = 1 ORDER BY id DESC LIMIT ?',
+			[ self.getInstructions().getName(), buildType, settings.get( Settings.TimingHistoryBaselineRuns ) ] )
+		runs = [ row[0] for row in cursor.fetchall() ]
+		if not runs:
+			return 0, []
+		history = {}
+		cursor.execute( 'SELECT instructions, step, duration FROM timings WHERE kind = ? AND run IN ( {0} )'
+			.format( ', '.join( [ '?' ] * len( runs ) ) ), [ 'step' ] + runs )
+		for instructions, stepName, duration in cursor.fetchall():
+			history.setdefault( ( instructions, stepName ), [] ).append( duration )
+		factor = settings.get( Settings.TimingHistoryRegressionFactor )
+		minimum = settings.get( Settings.TimingHistoryRegressionMinimumSeconds )
+		regressions = []
+		for kind, instructions, stepName, _, duration in timings:
+			if kind != 'step' or ( instructions, stepName ) not in history:
+				continue
+			baseline = self._median( history[ ( instructions, stepName ) ] )
+			if duration > baseline * factor and duration - baseline >= minimum:
+				regressions.append( ( instructions, stepName, duration, baseline ) )
+		return len( runs ), regressions
+
+	def saveTimings( self, connection, buildType, revision, success, timings ):
+		cursor = connection.cursor()
+		cursor.execute( 'INSERT INTO runs ( build, buildtype, revision, starttime, success ) VALUES ( ?, ?, ?, ?, ? )',
+			[ self.getInstructions().getName(), buildType, revision, datetime.utcnow().isoformat(), 1 if success else 0 ] )
+		run = cursor.lastrowid
+		cursor.executemany( 'INSERT INTO timings ( run, kind, instructions, step, name, duration ) VALUES ( ?, ?, ?, ?, ?, ? )',
+			[ [ run ] + list( timing ) for timing in timings ] )
+
+	def _getRevision( self ):
+		project = self.getInstructions().getProject()
+		if not project or not project.getScm():
+			return None
+		try:
+			return project.getScm().getRevisionInfo().revision
+		except MomError:
+			return None
+
+	def wrapup( self ):
+		if mApp().getSettings().get( Settings.ScriptRunMode ) != Settings.RunMode_Build:
+			return
+		buildType = mApp().getSettings().get( Settings.ProjectBuildType, True ).lower()
+		timings = self.collectTimings()
+		success = mApp().getReturnCode() == 0 and not self.getInstructions().hasFailedRecursively()
+		try:
+			connection = self.getConnection()
+			try:
+				with connection:
+					self.__baselineRuns, self.__regressions = self.findRegressions( connection, buildType, timings )
+					self.saveTimings( connection, buildType, self._getRevision(), success, timings )
+			finally:
+				connection.close()
+		except ( sqlite3.Error, OSError ) as e:
+			# the timing history is informational, it does not break the build:
+			self.__error = str( e )
+			mApp().message( self, 'Cannot update the timing history in "{0}": {1}'.format( self.getDatabaseFilename(), e ) )
+			return
+		for instructions, stepName, duration, baseline in self.__regressions:
+			mApp().message( self, 'step "{0}" of "{1}" took {2:.1f}s, the baseline is {3:.1f}s'
+				.format( stepName, instructions, duration, baseline ) )
+
+	def getObjectStatus( self ):
+		if self.__error:
+			return "Timing history not available: {0}".format( self.__error )
+		if not self.__baselineRuns:
+			return "No timing baseline yet"
+		if self.__regressions:
+			return "{0} step(s) slower than the baseline of {1} run(s)".format( len( self.__regressions ), self.__baselineRuns )
+		return "No timing regressions (baseline of {0} run(s))".format( self.__baselineRuns )
+
+	def createXmlNode( self, document ):
+		node = super( TimingHistory, self ).createXmlNode( document )
+
+		pluginInfo = document.createElement( "pluginInfo" )
+		pluginInfo.attributes["baselineRuns"] = str( self.__baselineRuns )
+		for instructions, stepName, duration, baseline in self.__regressions:
+			regression = document.createElement( "timingregression" )
+			regression.attributes["instructions"] = instructions
+			regression.attributes["step"] = stepName
+			regression.attributes["duration"] = '{0:.3f}'.format( duration )
+			regression.attributes["baseline"] = '{0:.3f}'.format( baseline )
+			pluginInfo.appendChild( regression )
+		node.appendChild( pluginInfo )
+
+		return node
+
+	def getXslTemplates( self ):
+		return { ReportFormat.HTML:
+			"""
+			<xsl:for-each select="pluginInfo/timingregression">
+				Step "<xsl:value-of select="@step"/>" of <xsl:value-of select="@instructions"/>:
+				<xsl:value-of select="format-number(@duration, '0.0')"/>s, baseline <xsl:value-of select="format-number(@baseline, '0.0')"/>s<br/>
+			</xsl:for-each>
+			""" }
+
+	def getXmlTemplate( self, element, wrapper ):
+		out = []
+		for regression in element.findall( "timingregression" ):
+			out += wrapper.wrap( 'Step "{0}" of {1}: {2:.1f}s, baseline {3:.1f}s'.format( regression.attrib["step"],
+				regression.attrib["instructions"], float( regression.attrib["duration"] ), float( regression.attrib["baseline"] ) ) )
+		return out
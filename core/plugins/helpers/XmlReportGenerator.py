@@ -76,12 +76,20 @@ class XmlReportGenerator( Plugin ):
 
 		try:
 			self.__reportFile = baseDirectory + os.sep + reportFileName
-			self.__fileHandle = codecs.open( self.__reportFile, 'w', encoding = "utf-8" )
+			if self.__reportFormat == ReportFormat.XML:
+				self.__fileHandle = open( self.__reportFile, 'wb' ) # InstructionsXmlReport.writeReport() encodes the text
+			else:
+				self.__fileHandle = codecs.open( self.__reportFile, 'w', encoding = "utf-8" )
 		except IOError:
 			raise ConfigurationError( 'Cannot open log file at "{0}"'.format( reportFileName ) )
 
 	def _writeReport( self, report ):
 		if self.__fileHandle and report:
+			if self.__reportFormat == ReportFormat.XML and isinstance( report, InstructionsXmlReport ):
+				# write the report while it is generated, instead of creating the complete document first:
+				report.writeReport( self.__fileHandle )
+				return
+
 			convertedText = self.convert( report )
 
 			if convertedText:
@@ -233,6 +233,7 @@ class CPack( PackageProvider ):
 		generateConfig.setWorkingDirectory( configuration.getBuildDir() )
 		step.addMainAction( generateConfig )
 		makePackage = PackageProvider.makePackageStep( self )
+		makePackage.setKeepOutput( True ) # the package names are parsed from the output
 		movePackageDestination = self.getInstructions().getPackagesDir()
 		movePackage = _CPackMovePackageAction( makePackage, movePackageDestination )
 		step.addMainAction( movePackage )
@@ -17,8 +17,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from core.Settings import Settings
 from core.actions.filesystem.CopyActionBase import CopyActionBase
 from core.helpers.GlobalMApp import mApp
+from core.helpers.LogCompression import write_server_configuration
 from core.helpers.PathResolver import PathResolver
 from core.helpers.XmlReport import InstructionsXmlReport
 from core.helpers.XmlReportConverter import XmlReportConverter
@@ -52,6 +54,8 @@ class HtmlReportPublisher( Publisher ):
 
 	def _cloneDirectories( self ):
 		self._copyDirectory( mApp().getLogDir(), "log" )
+		if mApp().getSettings().get( Settings.BuildStepLogCompression ):
+			write_server_configuration( os.path.join( self.getTemporaryLocation(), "log" ) )
 		self._copyDirectory( mApp().getPackagesDir(), "packages" )
 
 	def _deleteClonedDirectories( self ):
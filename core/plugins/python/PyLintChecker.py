@@ -39,6 +39,9 @@ class _PyLintCheckerAction( Action ):
 	def getLogDescription( self ):
 		return '{0}'.format( self.getName() )
 
+	def _usesExecutionContext( self ):
+		return True
+
 	def _getPyLintChecker( self ):
 		return self.__pyLintChecker
 
@@ -64,6 +67,7 @@ class _PyLintCheckerAction( Action ):
 		# First, run PyLint with parseable output, and retrieve the score and comment:
 		parseableCommand = cmd + [ '--output-format=parseable' ] + args + self._getPyLintChecker().getModules()
 		runner1 = RunCommand( parseableCommand, 1800, searchPaths = paths )
+		runner1.setExecutionContext( self.getExecutionContext() )
 		runner1.run()
 		if runner1.getReturnCode() >= 32:
 			mApp().debugN( self, 2, 'error running pylint to produce the parseable report' )
@@ -76,11 +80,12 @@ class _PyLintCheckerAction( Action ):
 		if self._getPyLintChecker().getHtmlOutputPath():
 			htmlCommand = cmd + [ '--output-format=html' ] + args + self._getPyLintChecker().getModules()
 			runner2 = RunCommand( htmlCommand )
+			runner2.setExecutionContext( self.getExecutionContext() )
 			runner2.run()
 			if runner2.getReturnCode() >= 32:
 				mApp().debugN( self, 2, 'error running pylint to generate the HTML report' )
 				return 1
-			path = str( self._getPyLintChecker().getHtmlOutputPath() )
+			path = os.path.join( str( self.getWorkingDirectory() ), str( self._getPyLintChecker().getHtmlOutputPath() ) )
 			try:
 				with open( path, 'w' ) as file:
 					file.write( runner2.getStdOut() )
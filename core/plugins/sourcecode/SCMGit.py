@@ -184,6 +184,18 @@ class SCMGit( SourceCodeProvider ):
 		updateHiddenCloneAction = _UpdateHiddenCloneAction( self )
 		step.addMainAction( updateHiddenCloneAction )
 
+		if os.path.isdir( os.path.join( str( self.getSrcDir() ), '.git' ) ):
+			# incremental builds re-use the checkout of the previous run, update it instead of cloning into it:
+			fetchCommand = [ self.getCommand(), 'fetch', '--depth', '1', self._getHiddenClonePath(), self.getTreeish() ]
+			fetch = ShellCommandAction( fetchCommand, searchPaths = self.getCommandSearchPaths() )
+			fetch.setWorkingDirectory( self.getSrcDir() )
+			step.addMainAction( fetch )
+			resetCommand = [ self.getCommand(), 'reset', '--hard', 'FETCH_HEAD' ]
+			reset = ShellCommandAction( resetCommand, searchPaths = self.getCommandSearchPaths() )
+			reset.setWorkingDirectory( self.getSrcDir() )
+			step.addMainAction( reset )
+			return
+
 		updateCommand = [ self.getCommand(), 'clone', '--local', '--depth', '1', self._getHiddenClonePath(), "." ]
 		# fix 'failed to create link' errors on windows, seems like windows does not like cross-device (hard) links 
 		if sys.platform == 'win32':
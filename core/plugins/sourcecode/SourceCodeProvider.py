@@ -219,6 +219,9 @@ class SourceCodeProvider( Plugin ):
 		options have been applied to them. It can be used to insert actions into the build
 		steps, for example."""
 		self.makeCheckoutStep()
+		if self.__revisionInfo:
+			# a branch or tag may refer to a new revision, incremental builds need to check it out again:
+			self.getInstructions().getStep( 'checkout' ).addInputValue( 'revision', self.__revisionInfo.revision )
 
 	def getXslTemplates( self ):
 		return { ReportFormat.HTML:
@@ -49,6 +49,13 @@ class Analyzer( Plugin ):
 
 		return self.__report
 
+	def _getExecutionState( self ):
+		return { 'score' : self.__score, 'report' : self.__report }
+
+	def _setExecutionState( self, state ):
+		self.__score = state[ 'score' ]
+		self.__report = state[ 'report' ]
+
 	def _setRequiredMinimumSuccessRate( self, percentage ):
 		if percentage < 0.0 or percentage > 1.0:
 			raise MomError( "Success rate must be an integer in the range of [0.0, 1,0]" )
@@ -0,0 +1,289 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import MomError
+from core.actions.Action import Action
+from core.actions.CallbackAction import CallbackAction
+from core.helpers.GlobalMApp import mApp
+from core.helpers.PathResolver import PathResolver
+from core.helpers.TypeCheckers import check_for_path_or_none, check_for_positive_int
+from core.helpers.XmlReportConverter import ReportFormat
+from core.plugins.builders.MakeBasedBuilder import MakeBasedBuilder
+from core.plugins.builders.generators.CMakeBuilder import CMakeBuilder, CMakeVariable
+from core.plugins.testers.Analyzer import Analyzer
+import os
+import sys
+
+CompileTargetExtensions = [ '.o', '.obj', '.gch', '.pch', '.pcm' ]
+LinkTargetExtensions = [ '', '.a', '.so', '.dylib', '.lib', '.dll', '.exe' ]
+
+def target_kind( target ):
+	'''Return "compile" for object files, "link" for libraries and executables, and "other" for everything else (generated
+	sources, stamp files).'''
+	base, extension = os.path.splitext( target )
+	if extension in CompileTargetExtensions:
+		return 'compile'
+	# versioned shared libraries like libfoo.so.1.2:
+	while extension[1:].isdigit():
+		base, extension = os.path.splitext( base )
+	if extension in LinkTargetExtensions and not os.path.basename( target ).startswith( '.' ):
+		return 'link'
+	return 'other'
+
+# the directory of the build time launcher used for CMake projects, see tools/build_time_launcher.py:
+LauncherDirectory = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, os.pardir, os.pardir, 'tools' )
+LauncherLogHeader = '# mom build time log'
+
+def parse_ninja_log( text ):
+	'''Parse a ninja log file (.ninja_log, version 5 and later), or a log in the same format written by the build time
+	launcher.
+	A ninja log contains the targets of previous builds as well, a new build starts where the end times decrease. The
+	launcher log only contains the last build, but the jobs finish, and are logged, in any order. Targets produced by the
+	same command are reported once.
+	\return a list of ( target, start, end ) tuples of the last build, times in seconds since the start of the build'''
+	targets = []
+	commands = set()
+	lastEnd = None
+	launcherLog = text.startswith( LauncherLogHeader )
+	for line in text.splitlines():
+		if line.startswith( '#' ):
+			continue
+		fields = line.split( '\t' )
+		if len( fields ) < 5:
+			continue
+		try:
+			start, end = int( fields[0] ) / 1000.0, int( fields[1] ) / 1000.0
+		except ValueError:
+			continue
+		if lastEnd is not None and end < lastEnd and not launcherLog:
+			targets = []
+			commands = set()
+		lastEnd = end
+		command = ( start, end, fields[4] )
+		if command not in commands:
+			commands.add( command )
+			targets.append( ( fields[3], start, end ) )
+	if launcherLog and targets:
+		# the launcher records the time since the epoch, and every command that builds a target (like ar and ranlib):
+		buildStart = min( [ start for _, start, _ in targets ] )
+		spans = {}
+		for target, start, end in targets:
+			if target in spans:
+				start, end = min( start, spans[ target ][0] ), max( end, spans[ target ][1] )
+			spans[ target ] = ( start, end )
+		targets = sorted( [ ( target, start - buildStart, end - buildStart ) for target, ( start, end ) in spans.items() ],
+			key = lambda target: target[2] )
+	return targets
+
+class _BuildProfileAction( Action ):
+	'''_BuildProfileAction reads the build log of the make tool after the build step.'''
+
+	def __init__( self, analyzer ):
+		Action.__init__( self )
+		self.__analyzer = analyzer
+		# a profile of a failed build still shows where the time went:
+		self.setIgnorePreviousFailure( True )
+
+	def getLogDescription( self ):
+		return '{0}'.format( self.getName() )
+
+	def run( self ):
+		self.__analyzer.readProfile()
+		return 0
+
+class BuildProfileAnalyzer( Analyzer ):
+	'''BuildProfileAnalyzer reports the time spent building every target of a configuration that uses a make based builder.
+	After the build step, it reads the log of the make tool, and records the slowest targets, the total time spent compiling
+	and linking, and the achieved parallelism (the sum of the target build times divided by the wall time of the build).
+	The log needs to be in the format of the .ninja_log file written by ninja in the build directory. For configurations
+	with a CMakeBuilder, and no log file set with setLogFile(), the build time launcher (tools/build_time_launcher.py)
+	writes the log instead. It is set as the RULE_LAUNCH_COMPILE and RULE_LAUNCH_LINK launcher of the project, which
+	requires CMake 3.15 or later.'''
+
+	DefaultLogFile = '.ninja_log'
+	LauncherLogFile = '.mom_build_times'
+
+	def __init__( self, name = None, logFile = None, slowestTargetsCount = 10 ):
+		Analyzer.__init__( self, name )
+		self.setLogFile( logFile )
+		self.setSlowestTargetsCount( slowestTargetsCount )
+		self.__useLauncher = False
+		self.__targets = None
+		self.__error = None
+
+	def setLogFile( self, logFile ):
+		'''Set the build time log file, relative to the build directory of the configuration.'''
+		check_for_path_or_none( logFile, 'The build time log file must be a path!' )
+		self.__logFile = logFile
+
+	def getLogFile( self ):
+		if self.__logFile:
+			return self.__logFile
+		return self.LauncherLogFile if self.getUseLauncher() else self.DefaultLogFile
+
+	def getUseLauncher( self ):
+		'''Return True if the build time log is written by the build time launcher.'''
+		return self.__useLauncher
+
+	def setSlowestTargetsCount( self, count ):
+		check_for_positive_int( count, 'The number of slowest targets must be a positive integer!' )
+		self.__slowestTargetsCount = count
+
+	def getSlowestTargetsCount( self ):
+		return self.__slowestTargetsCount
+
+	def getLogFilePath( self ):
+		return os.path.join( self.getInstructions().getBuildDir(), self.getLogFile() )
+
+	def readProfile( self ):
+		path = self.getLogFilePath()
+		try:
+			with open( path ) as file:
+				self.setTargets( parse_ninja_log( file.read() ) )
+		except IOError as e:
+			self.__error = 'cannot read build time log "{0}": {1}'.format( path, e.strerror )
+			mApp().debugN( self, 2, self.__error )
+
+	def setTargets( self, targets ):
+		'''Set the targets of the build, as a list of ( target, start, end ) tuples.'''
+		self.__targets = targets
+		self.__error = None
+
+	def getTargets( self ):
+		return self.__targets or []
+
+	def getSlowestTargets( self ):
+		'''\return a list of ( target, duration ) tuples of the slowest targets, slowest first.'''
+		durations = [ ( target, end - start ) for target, start, end in self.getTargets() ]
+		durations.sort( key = lambda duration: duration[1], reverse = True )
+		return durations[ : self.getSlowestTargetsCount() ]
+
+	def getTotalTimes( self ):
+		'''\return a dictionary of the total time spent for the compile, link and other targets, in seconds.'''
+		totals = { 'compile' : 0.0, 'link' : 0.0, 'other' : 0.0 }
+		for target, start, end in self.getTargets():
+			totals[ target_kind( target ) ] += end - start
+		return totals
+
+	def getWallTime( self ):
+		if not self.getTargets():
+			return 0.0
+		return max( [ end for _, _, end in self.getTargets() ] ) - min( [ start for _, start, _ in self.getTargets() ] )
+
+	def getParallelism( self ):
+		'''\return the average number of targets that were built at the same time.'''
+		if not self.getWallTime():
+			return None
+		return sum( self.getTotalTimes().values() ) / self.getWallTime()
+
+	def preFlightCheck( self ):
+		builders = [ plugin for plugin in self.getInstructions().getPlugins() if isinstance( plugin, MakeBasedBuilder ) ]
+		if not builders:
+			raise MomError( 'A BuildProfileAnalyzer can only be assigned to a configuration with a make based builder!' )
+		cmakeBuilders = [ builder for builder in builders if isinstance( builder, CMakeBuilder ) ]
+		if cmakeBuilders and not self.__logFile:
+			# the configure actions are created in the setup phase of the builder:
+			self.__useLauncher = True
+			for variable in self._getLauncherVariables():
+				cmakeBuilders[0].addCMakeVariable( variable )
+		return Analyzer.preFlightCheck( self )
+
+	def _getLauncherVariables( self ):
+		'''Return the CMake variables that set up the build time launcher, see tools/build_time_launcher.cmake.'''
+		directory = os.path.normpath( LauncherDirectory )
+		return [ CMakeVariable( 'CMAKE_PROJECT_INCLUDE', os.path.join( directory, 'build_time_launcher.cmake' ), 'FILEPATH' ),
+			CMakeVariable( 'MOM_PYTHON', sys.executable, 'FILEPATH' ),
+			CMakeVariable( 'MOM_BUILD_TIME_LAUNCHER', os.path.join( directory, 'build_time_launcher.py' ), 'FILEPATH' ),
+			CMakeVariable( 'MOM_BUILD_TIME_LOG', PathResolver( self.getLogFilePath ), 'FILEPATH' ) ]
+
+	def _removeLogFile( self ):
+		'''The launcher appends to the log, the targets of earlier builds are removed before the build step.'''
+		if os.path.exists( self.getLogFilePath() ):
+			os.remove( self.getLogFilePath() )
+
+	def setup( self ):
+		step = self.getInstructions().getStep( 'build' )
+		if self.getUseLauncher():
+			step.addPreAction( CallbackAction( self, BuildProfileAnalyzer._removeLogFile ) )
+		step.addPostAction( _BuildProfileAction( self ) )
+		return Analyzer.setup( self )
+
+	def _getExecutionState( self ):
+		state = Analyzer._getExecutionState( self )
+		state[ 'targets' ] = self.__targets
+		state[ 'error' ] = self.__error
+		return state
+
+	def _setExecutionState( self, state ):
+		Analyzer._setExecutionState( self, state )
+		self.__targets = state[ 'targets' ]
+		self.__error = state[ 'error' ]
+
+	def getObjectStatus( self ):
+		if self.__error:
+			return "Build profile not available: {0}".format( self.__error )
+		if self.__targets is None:
+			return "Build profile not available"
+		totals = self.getTotalTimes()
+		return "{0} targets, compile {1:.1f}s, link {2:.1f}s, parallelism {3:.1f}".format( len( self.getTargets() ),
+			totals[ 'compile' ], totals[ 'link' ], self.getParallelism() or 0.0 )
+
+	def createXmlNode( self, document ):
+		node = super( BuildProfileAnalyzer, self ).createXmlNode( document )
+
+		pluginInfo = document.createElement( "pluginInfo" )
+		if self.__targets is not None:
+			totals = self.getTotalTimes()
+			pluginInfo.attributes["targets"] = str( len( self.getTargets() ) )
+			pluginInfo.attributes["compileTime"] = '{0:.3f}'.format( totals[ 'compile' ] )
+			pluginInfo.attributes["linkTime"] = '{0:.3f}'.format( totals[ 'link' ] )
+			pluginInfo.attributes["otherTime"] = '{0:.3f}'.format( totals[ 'other' ] )
+			pluginInfo.attributes["wallTime"] = '{0:.3f}'.format( self.getWallTime() )
+			pluginInfo.attributes["parallelism"] = '{0:.2f}'.format( self.getParallelism() or 0.0 )
+			for target, duration in self.getSlowestTargets():
+				element = document.createElement( "buildtarget" )
+				element.attributes["name"] = target
+				element.attributes["kind"] = target_kind( target )
+				element.attributes["duration"] = '{0:.3f}'.format( duration )
+				pluginInfo.appendChild( element )
+		node.appendChild( pluginInfo )
+
+		return node
+
+	def getXslTemplates( self ):
+		return { ReportFormat.HTML:
+			"""
+			<xsl:if test="pluginInfo/@targets">
+				<xsl:value-of select="pluginInfo/@targets"/> targets,
+				compile <xsl:value-of select="format-number(pluginInfo/@compileTime, '0.0')"/>s,
+				link <xsl:value-of select="format-number(pluginInfo/@linkTime, '0.0')"/>s,
+				parallelism <xsl:value-of select="pluginInfo/@parallelism"/><br/>
+			</xsl:if>
+			<xsl:for-each select="pluginInfo/buildtarget">
+				<xsl:value-of select="@name"/> (<xsl:value-of select="@kind"/>):
+				<xsl:value-of select="format-number(@duration, '0.0')"/>s<br/>
+			</xsl:for-each>
+			""" }
+
+	def getXmlTemplate( self, element, wrapper ):
+		out = []
+		for target in element.findall( "buildtarget" ):
+			out += wrapper.wrap( '{0} ({1}): {2:.1f}s'.format( target.attrib["name"], target.attrib["kind"],
+				float( target.attrib["duration"] ) ) )
+		return out
@@ -28,6 +28,7 @@ class CallbackShellCommandAction( ShellCommandAction ):
 	def __init__( self, command = None, timeout = None, combineOutput = True, callback = None ):
 		ShellCommandAction.__init__( self, command, timeout, combineOutput = combineOutput )
 		self.__callback = callback
+		self.setKeepOutput( True ) # the callback may parse the output
 
 	def run( self ):
 		try:
@@ -24,6 +24,7 @@ class TestProviderAction( ShellCommandAction ):
 	def __init__( self, tester, command = None, timeout = None ):
 		ShellCommandAction.__init__( self, command, timeout )
 		self.__tester = tester
+		self.setKeepOutput( True ) # the tester parses the output
 
 	def run( self ):
 		try:
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of Make-O-Matic.
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''Benchmark for the overhead of the Make-O-Matic engine.
+It builds a synthetic build tree of N configurations with M steps, each with K trivial actions, and measures the wall time
+of every phase, the time per action, report generation and conversion, and the peak memory of the build script process.
+The results are written to a JSON file, so that they can be compared between versions.
+Usage: BuildTreeBenchmark.py [options], see --help.'''
+
+from __future__ import print_function
+from core.Build import Build
+from core.Configuration import Configuration
+from core.MApplication import MApplication
+from core.Plugin import Plugin
+from core.Project import Project
+from core.Settings import Settings
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.helpers.GlobalMApp import mApp
+from core.helpers.JobsCount import peak_memory_of
+from core.helpers.SafeDeleteTree import rmtree
+from core.helpers.XmlReport import InstructionsXmlReport, StringBasedXmlReport
+from core.helpers.XmlReportConverter import XmlReportConverter
+from mom.tests.benchmarks.RunCommandBenchmark import make_command
+import json
+import optparse
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+class _TrivialActionsPlugin( Plugin ):
+	'''Adds actionsCount trivial actions to each of the benchmark steps.'''
+
+	def __init__( self, stepNames, actionsCount ):
+		Plugin.__init__( self )
+		self.__stepNames = stepNames
+		self.__actionsCount = actionsCount
+
+	def setup( self ):
+		for stepName in self.__stepNames:
+			step = self.getInstructions().getStep( stepName )
+			for _ in range( self.__actionsCount ):
+				step.addMainAction( ShellCommandAction( make_command() ) )
+
+def make_build_sequence( buildSequence, stepNames ):
+	'''Insert the benchmark steps after the build step of buildSequence. They are executed one after the other.'''
+	sequence = []
+	previous = 'build'
+	for description in buildSequence:
+		name, modes, executeOnFailure, prerequisites = description
+		if name == 'cleanup':
+			prerequisites = prerequisites + stepNames[-1:]
+		sequence.append( [ name, modes, executeOnFailure, prerequisites ] )
+		if name == 'build':
+			for stepName in stepNames:
+				sequence.append( [ stepName, 'mcgdhpsf', False, [ previous ] ] )
+				previous = stepName
+	return sequence
+
+def create_build( configurationsCount, stepsCount, actionsCount, jobs ):
+	MApplication.instance = None
+	sys.argv = sys.argv[:1] # the build parameters must not see the benchmark options
+	build = Build( name = 'BuildTreeBenchmark' )
+	settings = mApp().getSettings()
+	stepNames = [ 'benchmark-{0}'.format( index ) for index in range( stepsCount ) ]
+	settings.set( Settings.ProjectBuildSequence, make_build_sequence( settings.get( Settings.ProjectBuildSequence ), stepNames ) )
+	settings.set( Settings.BuildParallelJobs, jobs )
+	project = Project( 'BuildTreeBenchmarkProject' )
+	build.setProject( project )
+	for index in range( configurationsCount ):
+		configuration = Configuration( 'configuration-{0}'.format( index ), project )
+		configuration.addPlugin( _TrivialActionsPlugin( stepNames, actionsCount ) )
+	return build
+
+def measure( function ):
+	'''Call function, and return it's result and the wall time it took in seconds.'''
+	startTime = time.time()
+	result = function()
+	return result, time.time() - startTime
+
+def run_benchmark( configurationsCount, stepsCount, actionsCount, jobs = 1 ):
+	'''Build a synthetic build tree, and return a dictionary of the measurements.'''
+	build = create_build( configurationsCount, stepsCount, actionsCount, jobs )
+	returnCode, buildTime = measure( build.buildAndReturn )
+	if returnCode != 0:
+		raise RuntimeError( 'the benchmark build failed with return code {0}'.format( returnCode ) )
+	actions = []
+	for configuration in build.getProject().getChildren():
+		for step in configuration.getSteps():
+			if step.getName().startswith( 'benchmark-' ):
+				actions += step.getMainActions()
+	phases = dict( [ ( name, timeKeeper.deltaSeconds() ) for name, timeKeeper in build.getPhaseTimeKeepers().items() ] )
+	report, reportTime = measure( InstructionsXmlReport( build ).getReport )
+	converter, parseTime = measure( lambda: XmlReportConverter( StringBasedXmlReport( report ) ) )
+	_, textTime = measure( converter.convertToText )
+	_, summaryTime = measure( converter.convertToTextSummary )
+	htmlTime = None
+	if converter.hasXsltSupport():
+		_, htmlTime = measure( converter.convertToHtml )
+	actionTimes = [ action.getTimeKeeper().deltaSeconds() for action in actions ]
+	return {
+		'build_time' : buildTime,
+		'phases' : phases,
+		'actions' : len( actions ),
+		'execute_time_per_action' : phases[ 'execute' ] / len( actions ) if actions else None,
+		'average_action_time' : sum( actionTimes ) / len( actionTimes ) if actionTimes else None,
+		'report_size' : len( report ),
+		'report_generation_time' : reportTime,
+		'report_parse_time' : parseTime,
+		'text_conversion_time' : textTime,
+		'text_summary_conversion_time' : summaryTime,
+		'html_conversion_time' : htmlTime,
+		'peak_memory' : peak_memory_of( resource.getrusage( resource.RUSAGE_SELF ) ) }
+
+def main():
+	parser = optparse.OptionParser( usage = '%prog [options]' )
+	parser.add_option( '-n', '--configurations', type = 'int', default = 10, help = 'number of configurations (default: 10)' )
+	parser.add_option( '-m', '--steps', type = 'int', default = 5, help = 'number of benchmark steps per configuration (default: 5)' )
+	parser.add_option( '-k', '--actions', type = 'int', default = 5, help = 'number of actions per step (default: 5)' )
+	parser.add_option( '-j', '--jobs', type = 'int', default = 1, help = 'number of parallel jobs (default: 1)' )
+	parser.add_option( '-o', '--output', default = 'build-tree-benchmark.json', help = 'the JSON results file' )
+	options, _ = parser.parse_args()
+	output = os.path.abspath( options.output )
+	oldCwd = os.getcwd()
+	directory = tempfile.mkdtemp( prefix = 'mom-benchmark-' )
+	try:
+		# the build creates it's folders in the current directory:
+		os.chdir( directory )
+		results = run_benchmark( options.configurations, options.steps, options.actions, options.jobs )
+	finally:
+		os.chdir( oldCwd )
+		rmtree( directory )
+	document = {
+		'mom_version' : mApp().getMomVersion(),
+		'python' : platform.python_version(),
+		'platform' : platform.platform(),
+		'time' : time.strftime( '%Y-%m-%dT%H:%M:%SZ', time.gmtime() ),
+		'parameters' : {
+			'configurations' : options.configurations,
+			'steps' : options.steps,
+			'actions' : options.actions,
+			'jobs' : options.jobs },
+		'results' : results }
+	with open( output, 'w' ) as f:
+		json.dump( document, f, indent = 4, sort_keys = True )
+	print( json.dumps( results, indent = 4, sort_keys = True ) )
+	print( 'results written to "{0}"'.format( output ) )
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of Make-O-Matic.
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+
+'''Micro-benchmark for the cost of debug messages that are not written.
+It measures a million debug calls at verbosity 0 when the message is formatted and passed to every logger (as before),
+when it is discarded by MApplication after checking the debug level, and when it is passed as a function and never
+formatted. Usage: LoggingBenchmark.py [calls]'''
+
+from __future__ import print_function
+from core.Build import Build
+from core.Settings import Settings
+from core.helpers.GlobalMApp import mApp
+from core.loggers.ConsoleLogger import ConsoleLogger
+import sys
+import time
+
+def debug_every_logger( index ):
+	app = mApp()
+	text = 'message number {0} of the benchmark'.format( index )
+	[ logger.debugN( app, app, 3, text ) for logger in app.getLoggers() ]
+
+def debug_formatted( index ):
+	mApp().debugN( mApp(), 3, 'message number {0} of the benchmark'.format( index ) )
+
+def debug_lazy( index ):
+	mApp().debugN( mApp(), 3, lambda: 'message number {0} of the benchmark'.format( index ) )
+
+def measure( function, calls ):
+	'''Return the duration of all calls of function, in seconds.'''
+	startTime = time.time()
+	for index in xrange( calls ):
+		function( index )
+	return time.time() - startTime
+
+def main( calls ):
+	build = Build( name = 'LoggingBenchmark' )
+	build.addLogger( ConsoleLogger() )
+	build.getSettings().set( Settings.ScriptLogLevel, 0 )
+	print( '{0} debug calls at verbosity 0'.format( calls ) )
+	for name, function in ( ( 'every logger (before):', debug_every_logger ),
+						( 'formatted (after):', debug_formatted ),
+						( 'lazy (after):', debug_lazy ) ):
+		duration = measure( function, calls )
+		print( '{0:<25} {1:8.3f} s, {2:8.3f} us per call'.format( name, duration, duration * 1000000.0 / calls ) )
+
+if __name__ == "__main__":
+	main( int( sys.argv[1] ) if len( sys.argv ) > 1 else 1000000 )
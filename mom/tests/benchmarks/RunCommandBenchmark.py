@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of Make-O-Matic.
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''Micro-benchmark for the per-command overhead of RunCommand.
+It compares the time to execute a trivial command directly with subprocess, with the former launcher (a thread per command,
+and a polling start handshake), and with RunCommand. Usage: RunCommandBenchmark.py [iterations]'''
+
+from __future__ import print_function
+from core.Build import Build
+from core.helpers.RunCommand import RunCommand
+from threading import Thread
+import os
+import subprocess
+import sys
+import time
+
+def make_command():
+	for command in ( '/bin/true', '/usr/bin/true' ):
+		if os.access( command, os.X_OK ):
+			return [ command ]
+	return [ sys.executable, '-c', 'pass' ]
+
+def run_subprocess( command ):
+	process = subprocess.Popen( command, stdout = subprocess.PIPE, stderr = subprocess.STDOUT )
+	process.communicate()
+
+class _PollingLauncher( Thread ):
+	'''The launcher used by RunCommand before: the command is executed in a thread, the caller polls for it's start.'''
+
+	def __init__( self, command ):
+		Thread.__init__( self )
+		self.__command = command
+		self.__started = False
+
+	def run( self ):
+		self.__started = True
+		run_subprocess( self.__command )
+
+	def wasStarted( self ):
+		return self.__started
+
+def run_polling_launcher( command, timeout = 60 ):
+	launcher = _PollingLauncher( command )
+	launcher.start()
+	while not launcher.wasStarted():
+		time.sleep( 0.1 )
+	launcher.join( timeout )
+
+def run_runcommand( command, timeout = 60 ):
+	RunCommand( command, timeoutSeconds = timeout, combineOutput = True ).run()
+
+def measure( function, command, iterations ):
+	'''Return the average duration of one call of function, in milliseconds.'''
+	function( command ) # warm up
+	startTime = time.time()
+	for _ in range( iterations ):
+		function( command )
+	return ( time.time() - startTime ) * 1000.0 / iterations
+
+def main( iterations ):
+	Build( name = 'RunCommandBenchmark' ) # RunCommand uses the settings of the application object
+	command = make_command()
+	print( 'executing "{0}" {1} times per launcher'.format( ' '.join( command ), iterations ) )
+	reference = measure( run_subprocess, command, iterations )
+	print( '{0:<30} {1:8.2f} ms per command'.format( 'subprocess (reference):', reference ) )
+	for name, function in ( ( 'thread and polling (before):', run_polling_launcher ),
+						( 'RunCommand (after):', run_runcommand ) ):
+		duration = measure( function, command, iterations )
+		print( '{0:<30} {1:8.2f} ms per command, overhead {2:8.2f} ms'.format( name, duration, duration - reference ) )
+
+if __name__ == "__main__":
+	main( int( sys.argv[1] ) if len( sys.argv ) > 1 else 100 )
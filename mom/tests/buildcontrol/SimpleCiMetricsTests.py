@@ -0,0 +1,124 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from buildcontrol.common.BuildInfo import BuildInfo
+from buildcontrol.common.BuildStatus import BuildStatus
+from buildcontrol.simple_ci.Master import Master
+from buildcontrol.simple_ci.SimpleCiMetrics import SimpleCiMetrics, serve_metrics_file
+from buildcontrol.simple_ci.Slave import Slave
+from core.MApplication import MApplication
+from core.helpers.EnvironmentSaver import EnvironmentSaver
+from core.helpers.SafeDeleteTree import rmtree
+from mom.tests.helpers.MomTestCase import MomTestCase
+import os
+import sys
+import tempfile
+import unittest
+import urllib2
+
+class SimpleCiMetricsTests( MomTestCase ):
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.directory = tempfile.mkdtemp( prefix = 'mom-simpleci-metrics-' )
+		self.status = BuildStatus()
+		self.status.setDatabaseFilename( os.path.join( self.directory, 'buildstatus.sqlite' ) )
+
+	def tearDown( self ):
+		MomTestCase.tearDown( self )
+		rmtree( self.directory )
+
+	def _addBuild( self, name, status, times = None ):
+		info = BuildInfo()
+		info.setProjectName( name )
+		info.setBuildStatus( status )
+		info.setBuildType( 'c' )
+		info.setRevision( 'abcdef' )
+		info.setBuildScript( 'dummy.py' )
+		self.status.saveBuildInfo( [ info ] )
+		if times:
+			with self.status.getConnection() as connection:
+				self.status._updateBuildTimes( connection, info, **times )
+
+	def testMetrics( self ):
+		self._addBuild( 'Foo', BuildInfo.Status.NewRevision )
+		self._addBuild( 'Foo', BuildInfo.Status.NewRevision )
+		self._addBuild( 'Foo', BuildInfo.Status.Completed, { 'discovered' : 10.0, 'started' : 15.0, 'finished' : 75.0, 'success' : 1 } )
+		self._addBuild( 'Foo', BuildInfo.Status.Completed, { 'discovered' : 20.0, 'started' : 80.0, 'finished' : 100.0, 'success' : 0 } )
+		self._addBuild( 'Bar "2"', BuildInfo.Status.Pending, { 'started' : 90.0 } )
+		metrics = SimpleCiMetrics()
+		metrics.collect( self.status )
+		text = metrics.format()
+		self.assertTrue( 'simpleci_queue_depth{status="new"} 2.0\n' in text )
+		self.assertTrue( 'simpleci_queue_depth{status="pending"} 1.0\n' in text )
+		self.assertTrue( '# TYPE simpleci_builds_total counter\n' in text )
+		self.assertTrue( 'simpleci_builds_total{project="Foo",result="failure"} 1.0\n' in text )
+		self.assertTrue( 'simpleci_build_failure_ratio{project="Foo"} 0.5\n' in text )
+		self.assertTrue( 'simpleci_build_duration_seconds_sum{project="Foo"} 80.0\n' in text )
+		self.assertTrue( 'simpleci_build_duration_seconds_count{project="Foo"} 2.0\n' in text )
+		self.assertTrue( 'simpleci_build_queue_wait_seconds_sum{project="Foo"} 65.0\n' in text )
+		self.assertTrue( 'simpleci_last_build_duration_seconds{project="Foo"} 20.0\n' in text )
+		# unfinished builds are not counted:
+		self.assertFalse( 'Bar' in text )
+
+	def testServeMetricsFile( self ):
+		filename = os.path.join( self.directory, 'metrics.prom' )
+		self._addBuild( 'Foo', BuildInfo.Status.NewRevision )
+		metrics = SimpleCiMetrics()
+		metrics.collect( self.status )
+		metrics.write( filename )
+		server = serve_metrics_file( filename, '127.0.0.1', 0 )
+		try:
+			url = 'http://127.0.0.1:{0}/metrics'.format( server.server_address[1] )
+			self.assertEquals( urllib2.urlopen( url ).read(), open( filename ).read() )
+		finally:
+			server.shutdown()
+
+	def _createCiObject( self, ciClass, arguments ):
+		MApplication.instance = None
+		argv = sys.argv
+		sys.argv = [ 'simple_ci.py' ] + arguments
+		try:
+			ci = ciClass()
+		finally:
+			sys.argv = argv
+		# see tools/simple_ci.py:
+		if ci.getParameters().getInstanceName():
+			ci.setName( ci.getParameters().getInstanceName() )
+		return ci
+
+	def testMasterServesSlaveMetrics( self ):
+		with EnvironmentSaver():
+			os.environ[ 'HOME' ] = self.directory # the data directories are in the user folder
+			for arguments in [ [], [ '--instance-name', 'Foo' ] ]:
+				slave = self._createCiObject( Slave, arguments + [ '--slave' ] )
+				slave.getBuildStatus().setDatabaseFilename( self.status.getDatabaseFilename() )
+				self._addBuild( 'Foo', BuildInfo.Status.NewRevision )
+				slave.writeMetrics()
+				master = self._createCiObject( Master, arguments )
+				self.assertEquals( master.getMetricsFilename(), slave.getMetricsFilename() )
+				server = serve_metrics_file( master.getMetricsFilename(), '127.0.0.1', 0 )
+				try:
+					url = 'http://127.0.0.1:{0}/metrics'.format( server.server_address[1] )
+					self.assertTrue( 'simpleci_queue_depth{status="new"}' in urllib2.urlopen( url ).read() )
+				finally:
+					server.shutdown()
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,105 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Plugin import Plugin
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.executomat.CriticalPath import CriticalPath
+from core.executomat.Step import Step
+from core.helpers.XmlReport import InstructionsXmlReport
+from core.helpers.XmlReportConverter import XmlReportConverter
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+import sys
+import unittest
+
+class _Instructions( object ):
+	'''Provides the steps and children of an instructions object to the critical path analysis.'''
+
+	def __init__( self, steps, children = None ):
+		self.steps = steps
+		self.children = children or []
+
+	def getSteps( self ):
+		return self.steps
+
+	def getChildren( self ):
+		return self.children
+
+class _SleepPlugin( Plugin ):
+	'''Adds an action to the build step that takes some time.'''
+
+	def setup( self ):
+		command = [ sys.executable, '-c', 'import time; time.sleep( 0.2 )' ]
+		self.getInstructions().getStep( 'build' ).addMainAction( ShellCommandAction( command ) )
+
+class CriticalPathTests( MomBuildMockupTestCase ):
+
+	def setUp( self ):
+		MomBuildMockupTestCase.setUp( self, useEnvironments = True )
+
+	def _makeStep( self, name, prerequisites, pid, start, stop ):
+		step = Step( name )
+		step.setPrerequisites( prerequisites )
+		step.getTimeKeeper().getIntervals().append( ( pid, start, stop ) )
+		return step
+
+	def testCriticalPath( self ):
+		a = self._makeStep( 'a', [], 1, 0.0, 1.0 )
+		b = self._makeStep( 'b', [ 'a' ], 1, 1.0, 4.0 )
+		# c is executed in a worker process at the same time as b:
+		c = self._makeStep( 'c', [ 'a' ], 2, 1.0, 2.0 )
+		d = self._makeStep( 'd', [ 'b', 'c' ], 1, 4.0, 5.0 )
+		# e is not executed:
+		e = Step( 'e' )
+		instructions = _Instructions( [ a, b, c, d, e ] )
+		path = CriticalPath( instructions )
+		path.analyze()
+		self.assertEquals( [ step for _, step in path.getPath() ], [ a, b, d ] )
+		self.assertEquals( [ step.getCriticalPathPosition() for step in [ a, b, c, d, e ] ], [ 0, 1, None, 2, None ] )
+		self.assertEquals( path.getDuration(), 5.0 )
+		self.assertEquals( path.getWallTime(), 5.0 )
+		self.assertEquals( c.getSlack(), 2.0 )
+		self.assertEquals( e.getSlack(), None )
+
+	def testChildSteps( self ):
+		# the build step of the children is executed in two worker processes after the build step of the parent:
+		parentBuild = self._makeStep( 'build', [], 1, 0.0, 1.0 )
+		slowBuild = self._makeStep( 'build', [], 2, 1.0, 4.0 )
+		fastBuild = self._makeStep( 'build', [], 3, 1.0, 1.5 )
+		cleanup = self._makeStep( 'cleanup', [ 'build' ], 1, 4.0, 4.5 )
+		instructions = _Instructions( [ parentBuild, cleanup ], [ _Instructions( [ slowBuild ] ), _Instructions( [ fastBuild ] ) ] )
+		path = CriticalPath( instructions )
+		path.analyze()
+		self.assertEquals( [ step for _, step in path.getPath() ], [ parentBuild, slowBuild, cleanup ] )
+		self.assertEquals( fastBuild.getSlack(), 2.5 )
+
+	def testReport( self ):
+		configuration = self.project.getChildren()[0].getChildren()[0]
+		configuration.addPlugin( _SleepPlugin() )
+		self.assertEquals( self.build.buildAndReturn(), 0 )
+		self.assertTrue( self.build.getCriticalPath().getDuration() >= 0.2 )
+		converter = XmlReportConverter( InstructionsXmlReport( self.build ) )
+		summary = converter.convertToTextSummary()
+		self.assertTrue( 'Critical path: ' in summary )
+		self.assertTrue( '"build" of ' in summary )
+		self.assertTrue( 'on the critical path' in converter.convertToText() )
+		if converter.hasXsltSupport():
+			self.assertTrue( 'Critical path: ' in converter.convertToHtml( summaryOnly = True ) )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,144 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.MApplication import MApplication
+from core.Plugin import Plugin
+from core.Settings import Settings
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.executomat.Step import Step
+from core.helpers.GlobalMApp import mApp
+from core.helpers.SafeDeleteTree import rmtree
+from core.helpers.XmlReport import InstructionsXmlReport
+from core.plugins.sourcecode.SCMGit import SCMGit
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+import os
+import sys
+import tempfile
+import unittest
+
+class _CountingPlugin( Plugin ):
+	'''Adds an action to the build step that appends a line to a file, and declares an input directory.'''
+
+	def __init__( self, counterFile, inputDir, revision ):
+		Plugin.__init__( self )
+		self.__counterFile = counterFile
+		self.__inputDir = inputDir
+		self.__revision = revision
+
+	def setup( self ):
+		command = 'open( "{0}", "a" ).write( "built\\n" )'.format( self.__counterFile )
+		step = self.getInstructions().getStep( 'build' )
+		step.addMainAction( ShellCommandAction( [ sys.executable, '-c', command ] ) )
+		step.addInputDirectory( self.__inputDir )
+		step.addInputValue( 'revision', self.__revision )
+
+class IncrementalBuildTests( MomBuildMockupTestCase ):
+
+	def setUp( self ):
+		MomBuildMockupTestCase.setUp( self )
+		self.tempDir = tempfile.mkdtemp()
+		self.counterFile = os.path.join( self.tempDir, 'counter.txt' )
+		self.inputDir = os.path.join( self.tempDir, 'input' )
+		os.makedirs( self.inputDir )
+		self._writeInput( 'int main() {}' )
+
+	def tearDown( self ):
+		MomBuildMockupTestCase.tearDown( self )
+		rmtree( self.tempDir )
+
+	def _writeInput( self, text ):
+		with open( os.path.join( self.inputDir, 'main.cpp' ), 'w' ) as f:
+			f.write( text )
+
+	def _getBuildCount( self ):
+		if not os.path.isfile( self.counterFile ):
+			return 0
+		with open( self.counterFile ) as f:
+			return len( f.readlines() )
+
+	def _executeBuild( self, buildType, incrementalBuildTypes = 'h', revision = '1' ):
+		'''Run a new build in the same base directory.'''
+		os.chdir( self.cwd )
+		if MApplication.instance:
+			MomBuildMockupTestCase.setUp( self )
+		mApp().getSettings().set( Settings.ProjectBuildType, buildType )
+		mApp().getSettings().set( Settings.BuildMoveOldDirectories, False )
+		if incrementalBuildTypes is not None:
+			mApp().getSettings().set( Settings.BuildIncrementalBuildTypes, incrementalBuildTypes )
+		self.project.addPlugin( _CountingPlugin( self.counterFile, self.inputDir, revision ) )
+		rc = self.build.buildAndReturn()
+		self.assertEquals( rc, 0 )
+		return self.project.getStep( 'build' )
+
+	def testUpToDateStepIsSkipped( self ):
+		step = self._executeBuild( 'h' )
+		self.assertEquals( step.getStatus(), Step.Status.Finished )
+		self.assertEquals( self._getBuildCount(), 1 )
+		step = self._executeBuild( 'h' )
+		self.assertEquals( step.getStatus(), Step.Status.Skipped_UpToDate )
+		self.assertEquals( step.getResult(), Step.Result.Success )
+		self.assertFalse( step.getMainActions()[0].wasStarted() )
+		self.assertEquals( self._getBuildCount(), 1 )
+		report = InstructionsXmlReport( self.build )
+		self.assertTrue( 'status="Skipped_UpToDate"' in report.getReport() )
+
+	def testChangedInputIsExecuted( self ):
+		self._executeBuild( 'h' )
+		self._writeInput( 'int main() { return 0; }' )
+		step = self._executeBuild( 'h' )
+		self.assertEquals( step.getStatus(), Step.Status.Finished )
+		self.assertEquals( self._getBuildCount(), 2 )
+		# the fingerprint of the second run is stored:
+		step = self._executeBuild( 'h' )
+		self.assertEquals( step.getStatus(), Step.Status.Skipped_UpToDate )
+
+	def testChangedInputValueIsExecuted( self ):
+		self._executeBuild( 'h' )
+		step = self._executeBuild( 'h', revision = '2' )
+		self.assertEquals( step.getStatus(), Step.Status.Finished )
+		self.assertEquals( self._getBuildCount(), 2 )
+
+	def testIncrementalBuildsAreDisabledByDefault( self ):
+		self._executeBuild( 'h', incrementalBuildTypes = None )
+		step = self._executeBuild( 'h', incrementalBuildTypes = None )
+		self.assertEquals( step.getStatus(), Step.Status.Finished )
+		self.assertEquals( self._getBuildCount(), 2 )
+
+	def testReusedCheckoutIsUpdated( self ):
+		srcDir = os.path.join( self.tempDir, 'src' )
+		os.makedirs( os.path.join( srcDir, '.git' ) )
+		scm = SCMGit()
+		scm.setUrl( 'git://example.com/project.git' )
+		scm.setBranch( 'stable' )
+		scm.setSrcDir( srcDir )
+		self.project.addStep( Step( 'checkout' ) )
+		self.project.addPlugin( scm )
+		scm.makeCheckoutStep()
+		commands = [ action.getCommand() for action in self.project.getStep( 'checkout' ).getMainActions()[1:] ]
+		self.assertEquals( [ command[1:] for command in commands ], [
+			[ 'fetch', '--depth', '1', scm._getHiddenClonePath(), 'stable' ], [ 'reset', '--hard', 'FETCH_HEAD' ] ] )
+
+	def testNonIncrementalBuildType( self ):
+		self._executeBuild( 'm' )
+		step = self._executeBuild( 'm' )
+		self.assertEquals( step.getStatus(), Step.Status.Finished )
+		self.assertEquals( self._getBuildCount(), 2 )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,193 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import BuildError, MomError
+from core.Plugin import Plugin
+from core.Settings import Settings
+from core.actions.CallbackAction import CallbackAction
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.executomat.ParallelStepRunner import ParallelStepRunner
+from core.executomat.Step import Step
+from core.helpers.GlobalMApp import mApp
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+import os
+import sys
+import time
+import unittest
+
+class _ReportPidPlugin( Plugin ):
+	'''Adds an action to the build step that prints the process id of the build script process.'''
+
+	def __init__( self, command, stepName = 'build' ):
+		Plugin.__init__( self )
+		self.__command = command
+		self.__stepName = stepName
+
+	def setup( self ):
+		action = ShellCommandAction( [ sys.executable, '-c', self.__command ] )
+		self.getInstructions().getStep( self.__stepName ).addMainAction( action )
+
+class _FailPlugin( Plugin ):
+	'''Adds an action to the step that raises an unexpected error after a delay.'''
+
+	def __init__( self, stepName, delay ):
+		Plugin.__init__( self )
+		self.__stepName = stepName
+		self.__delay = delay
+
+	def setup( self ):
+		self.getInstructions().getStep( self.__stepName ).addMainAction( CallbackAction( self, _FailPlugin.fail ) )
+
+	def fail( self ):
+		time.sleep( self.__delay )
+		raise RuntimeError( '{0} failed'.format( self.__stepName ) )
+
+class _StatePlugin( Plugin ):
+	'''A plug-in with execution state, like the scores of an analyzer.'''
+
+	def __init__( self, state ):
+		Plugin.__init__( self )
+		self.state = state
+
+	def _getExecutionState( self ):
+		return self.state
+
+	def _setExecutionState( self, state ):
+		self.state = state
+
+class ParallelBuildTests( MomBuildMockupTestCase ):
+
+	PRINT_PID = 'import os; print( os.getppid() )'
+
+	def setUp( self ):
+		MomBuildMockupTestCase.setUp( self, useEnvironments = True )
+		self.configurations = self.project.getChildren()[0].getChildren()[:]
+
+	def _getConfigurations( self ):
+		return self.configurations
+
+	def _executeBuild( self, jobs, commands ):
+		mApp().getSettings().set( Settings.BuildParallelJobs, jobs )
+		for configuration, command in zip( self._getConfigurations(), commands ):
+			configuration.addPlugin( _ReportPidPlugin( command ) )
+		return self.build.buildAndReturn()
+
+	def _getBuildAction( self, configuration ):
+		return configuration.getStep( 'build' ).getMainActions()[0]
+
+	def testParallelBuild( self ):
+		if not ParallelStepRunner.isSupported():
+			return
+		rc = self._executeBuild( 2, [ self.PRINT_PID, self.PRINT_PID ] )
+		self.assertEquals( rc, 0 )
+		pids = []
+		for configuration in self._getConfigurations():
+			step = configuration.getStep( 'build' )
+			self.assertEquals( step.getStatus(), Step.Status.Finished )
+			self.assertEquals( step.getResult(), Step.Result.Success )
+			action = self._getBuildAction( configuration )
+			self.assertTrue( action.didFinish() )
+			self.assertEquals( action.getResult(), 0 )
+			self.assertTrue( step.getLogfilePath() and os.path.isfile( step.getLogfilePath() ) )
+			pids.append( int( action.getStdOut().strip() ) )
+		# every configuration is built in it's own worker process:
+		self.assertFalse( os.getpid() in pids )
+		self.assertNotEquals( pids[0], pids[1] )
+
+	def testSequentialBuild( self ):
+		rc = self._executeBuild( 1, [ self.PRINT_PID, self.PRINT_PID ] )
+		self.assertEquals( rc, 0 )
+		for configuration in self._getConfigurations():
+			action = self._getBuildAction( configuration )
+			self.assertEquals( int( action.getStdOut().strip() ), os.getpid() )
+
+	def testParallelBuildFailure( self ):
+		if not ParallelStepRunner.isSupported():
+			return
+		rc = self._executeBuild( 2, [ 'import sys; sys.exit( 1 )', self.PRINT_PID ] )
+		self.assertEquals( rc, BuildError( 'dummy' ).getReturnCode() )
+		debug, release = self._getConfigurations()
+		self.assertEquals( debug.getStep( 'build' ).getResult(), Step.Result.Failure )
+		self.assertEquals( self._getBuildAction( debug ).getResult(), 1 )
+		self.assertTrue( debug.hasFailed() )
+		# the other configuration is still built:
+		self.assertEquals( release.getStep( 'build' ).getResult(), Step.Result.Success )
+
+	def testConcurrentFailures( self ):
+		if not ParallelStepRunner.isSupported():
+			return
+		# create-docs is executed in a worker while the configurations are built, and still running when install fails
+		# in another worker:
+		self.project.addPlugin( _FailPlugin( 'create-docs', 2 ) )
+		self.project.addPlugin( _FailPlugin( 'install', 0 ) )
+		messages = []
+		self.build.message = lambda mobject, text, compareTo = None: messages.append( text )
+		rc = self._executeBuild( 3, [ self.PRINT_PID, self.PRINT_PID ] )
+		self.assertEquals( rc, MomError( 'dummy' ).getReturnCode() )
+		# the first error is raised, the error of the other step is not lost:
+		errors = [ text for text in messages if 'concurrently executed step' in text ]
+		self.assertEquals( len( errors ), 1 )
+		self.assertTrue( 'create-docs failed' in errors[0] )
+
+	def testConcurrentSteps( self ):
+		if not ParallelStepRunner.isSupported():
+			return
+		# create-docs only depends on checkout, and is executed while the configurations are built:
+		self.project.addPlugin( _ReportPidPlugin( self.PRINT_PID, 'create-docs' ) )
+		rc = self._executeBuild( 2, [ self.PRINT_PID, self.PRINT_PID ] )
+		self.assertEquals( rc, 0 )
+		step = self.project.getStep( 'create-docs' )
+		self.assertEquals( step.getResult(), Step.Result.Success )
+		action = step.getMainActions()[0]
+		self.assertEquals( action.getResult(), 0 )
+		self.assertNotEquals( int( action.getStdOut().strip() ), os.getpid() )
+
+	def testConfigurationStepsInOneWorker( self ):
+		if not ParallelStepRunner.isSupported():
+			return
+		for configuration in self._getConfigurations():
+			configuration.addPlugin( _ReportPidPlugin( self.PRINT_PID, 'test' ) )
+		rc = self._executeBuild( 2, [ self.PRINT_PID, self.PRINT_PID ] )
+		self.assertEquals( rc, 0 )
+		for configuration in self._getConfigurations():
+			testAction = configuration.getStep( 'test' ).getMainActions()[0]
+			# the configuration executed the build and the test step in the same worker process:
+			self.assertEquals( testAction.getStdOut(), self._getBuildAction( configuration ).getStdOut() )
+			self.assertNotEquals( int( testAction.getStdOut().strip() ), os.getpid() )
+
+	def testOnlyChangedPluginStateIsTransferred( self ):
+		configuration = self._getConfigurations()[0]
+		configuration.addStep( Step( 'install' ) )
+		installer = _StatePlugin( 'not installed' )
+		tester = _StatePlugin( 'not tested' )
+		configuration.addPlugin( installer )
+		configuration.addPlugin( tester )
+		# a worker executes the install step:
+		pluginStates = configuration._getPluginExecutionStates()
+		installer.state = 'installed'
+		state = configuration._getStepExecutionState( [ 'install' ], pluginStates )
+		# meanwhile, the build script process executed the test step:
+		installer.state = 'not installed'
+		tester.state = 'tested'
+		configuration._setStepExecutionState( [ 'install' ], state )
+		self.assertEquals( installer.state, 'installed' )
+		self.assertEquals( tester.state, 'tested' )
+
+if __name__ == "__main__":
+	unittest.main()
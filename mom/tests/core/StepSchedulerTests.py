@@ -0,0 +1,141 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+from core.Settings import Settings
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.executomat.Step import Step
+from core.executomat.StepScheduler import StepScheduler
+from core.helpers.GlobalMApp import mApp
+from mom.tests.helpers.MomTestCase import MomTestCase
+import unittest
+
+class _RecordingInstructions( object ):
+	'''Records the order in which the scheduler executes the steps.'''
+
+	def __init__( self ):
+		self.executed = []
+
+	def getSteps( self ):
+		return []
+
+	def getChildren( self ):
+		return []
+
+	def _executeStepsRecursively( self, instructions, names ):
+		self.executed += names
+
+class _Instructions( object ):
+	'''An instructions object with an action in every step.'''
+
+	def __init__( self, stepNames, children = [], parallel = False ):
+		self.__steps = []
+		for name in stepNames:
+			step = Step( name )
+			step.addMainAction( ShellCommandAction( [ 'true' ] ) )
+			self.__steps.append( step )
+		self.__children = children
+		self.__parallel = parallel
+
+	def getSteps( self ):
+		return self.__steps
+
+	def getChildren( self ):
+		return self.__children
+
+	def _canExecuteStepsInParallel( self ):
+		return self.__parallel
+
+class StepSchedulerTests( MomTestCase ):
+
+	def _makeSteps( self, description ):
+		steps = []
+		for name, prerequisites in description:
+			step = Step( name )
+			step.setPrerequisites( prerequisites )
+			steps.append( step )
+		return steps
+
+	def testDefaultSequenceOrder( self ):
+		steps = self.build._setupBuildSteps( Settings.ProjectBuildSequence )
+		instructions = _RecordingInstructions()
+		StepScheduler( steps ).execute( instructions )
+		self.assertEquals( instructions.executed, [ step.getName() for step in steps ] )
+
+	def testDefaultPrerequisites( self ):
+		mApp().getSettings().set( Settings.ProjectBuildSequence, [
+			[ 'first', 'm', False ],
+			[ 'second', 'm', False ],
+			[ 'third', 'm', True, [ 'first' ] ] ] )
+		steps = self.build._setupBuildSteps( Settings.ProjectBuildSequence )
+		self.assertEquals( steps[0].getPrerequisites(), [] )
+		self.assertEquals( steps[1].getPrerequisites(), [ 'first' ] )
+		self.assertEquals( steps[2].getPrerequisites(), [ 'first' ] )
+
+	def testReadySteps( self ):
+		steps = self._makeSteps( [ ( 'a', [] ), ( 'b', [ 'a' ] ), ( 'c', [ 'a' ] ), ( 'd', [ 'b', 'c' ] ) ] )
+		scheduler = StepScheduler( steps )
+		self.assertEquals( [ step.getName() for step in scheduler.getReadySteps() ], [ 'a' ] )
+		scheduler._setStarted( steps[0] )
+		scheduler._setFinished( 'a' )
+		self.assertEquals( [ step.getName() for step in scheduler.getReadySteps() ], [ 'b', 'c' ] )
+
+	def testConflictingSteps( self ):
+		steps = self._makeSteps( [ ( 'build', [] ), ( 'test', [ 'build' ] ), ( 'install', [ 'build' ] ), ( 'docs', [ 'build' ] ) ] )
+		debug = _Instructions( [ 'build', 'test', 'install' ], parallel = True )
+		release = _Instructions( [ 'build', 'test' ], parallel = True )
+		project = _Instructions( [ 'docs', 'install' ], [ debug, release ] )
+		scheduler = StepScheduler( steps )
+		scheduler._findConfigurations( project )
+		# test and install would both use the build directory of the debug configuration:
+		self.assertTrue( scheduler._conflicts( 'test', [ 'install' ] ) )
+		self.assertTrue( scheduler._conflicts( 'install', [ 'docs', 'test' ] ) )
+		# steps of the project are ordered by their prerequisites alone:
+		self.assertFalse( scheduler._conflicts( 'docs', [ 'test', 'install' ] ) )
+		self.assertFalse( scheduler._conflicts( 'test', [ 'docs' ] ) )
+
+	def testStepSequences( self ):
+		steps = self._makeSteps( [ ( 'configure', [] ), ( 'build', [ 'configure' ] ), ( 'test', [ 'build' ] ),
+			( 'install', [ 'build' ] ), ( 'docs', [ 'configure' ] ) ] )
+		configure, build, test, install, docs = steps
+		debug = _Instructions( [ 'configure', 'build', 'test', 'install' ], parallel = True )
+		release = _Instructions( [ 'configure', 'build', 'test', 'install' ], parallel = True )
+		project = _Instructions( [ 'docs' ], [ debug, release ] )
+		scheduler = StepScheduler( steps )
+		scheduler._findConfigurations( project )
+		# without concurrent steps, all steps are executed together:
+		self.assertEquals( scheduler._getSequence( configure, [], False ), steps )
+		# docs can be executed concurrently with build:
+		self.assertEquals( scheduler._getSequence( configure, [], True ), [ configure ] )
+		scheduler._setStarted( configure )
+		scheduler._setFinished( 'configure' )
+		scheduler._setStarted( docs )
+		# test and install cannot be executed concurrently, they are executed together with build:
+		self.assertEquals( scheduler._getSequence( build, [ 'docs' ], True ), [ build, test, install ] )
+
+	def testUndefinedPrerequisite( self ):
+		steps = self._makeSteps( [ ( 'a', [] ), ( 'b', [ 'undefined' ] ) ] )
+		self.assertRaises( ConfigurationError, StepScheduler, steps )
+
+	def testCircularDependency( self ):
+		steps = self._makeSteps( [ ( 'a', [] ), ( 'b', [ 'c' ] ), ( 'c', [ 'b' ] ) ] )
+		self.assertRaises( ConfigurationError, StepScheduler, steps )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,196 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Settings import Settings
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.helpers.ActionCache import ActionCache
+from core.helpers.ExecutionContext import ExecutionContext
+from core.helpers.GlobalMApp import mApp
+from core.helpers.SafeDeleteTree import rmtree
+from core.helpers.XmlReportConverter import XmlReportConverter
+from core.plugins.builders.MakeCommandAction import MakeCommandAction
+from core.plugins.builders.maketools.GNUMakeTool import GNUMakeTool
+from mom.tests.helpers.MomTestCase import MomTestCase
+import os
+import sys
+import tarfile
+import tempfile
+import unittest
+import xml.etree.ElementTree
+
+class ActionCacheTests( MomTestCase ):
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.tempDir = tempfile.mkdtemp()
+		self.workingDir = os.path.join( self.tempDir, 'work' )
+		self.inputDir = os.path.join( self.tempDir, 'input' )
+		self.counterFile = os.path.join( self.tempDir, 'counter.txt' )
+		for folder in ( self.workingDir, self.inputDir ):
+			os.makedirs( folder )
+		self._writeInput( 'first' )
+		mApp().getSettings().set( Settings.BuildActionCacheDir, os.path.join( self.tempDir, 'cache' ) )
+
+	def tearDown( self ):
+		MomTestCase.tearDown( self )
+		rmtree( self.tempDir )
+
+	def _writeInput( self, text ):
+		with open( os.path.join( self.inputDir, 'input.txt' ), 'w' ) as f:
+			f.write( text )
+
+	def _getRunCount( self ):
+		if not os.path.isfile( self.counterFile ):
+			return 0
+		with open( self.counterFile ) as f:
+			return len( f.readlines() )
+
+	def _executeAction( self, exitCode = 0 ):
+		'''Execute an action that copies the input file to the output directory.'''
+		command = '''
+import os, shutil, sys
+open( r"{0}", "a" ).write( "run\\n" )
+if not os.path.isdir( "out" ):
+	os.makedirs( "out" )
+shutil.copy( os.path.join( r"{1}", "input.txt" ), "out" )
+print( "copied" )
+sys.exit( {2} )'''.format( self.counterFile, self.inputDir, exitCode )
+		action = ShellCommandAction( [ sys.executable, '-c', command ] )
+		action.setWorkingDirectory( self.workingDir )
+		action.addInputDirectory( self.inputDir )
+		action.addOutputDirectory( 'out' )
+		action.executeAction()
+		return action
+
+	def _readOutput( self ):
+		with open( os.path.join( self.workingDir, 'out', 'input.txt' ) ) as f:
+			return f.read()
+
+	def testCacheHit( self ):
+		action = self._executeAction()
+		self.assertEquals( action.getResult(), 0 )
+		self.assertEquals( action.getCacheStatus(), 'miss' )
+		rmtree( os.path.join( self.workingDir, 'out' ) )
+		action = self._executeAction()
+		self.assertEquals( action.getResult(), 0 )
+		self.assertEquals( action.getCacheStatus(), 'hit' )
+		self.assertEquals( action.getStdOut().strip(), 'copied' )
+		self.assertEquals( self._readOutput(), 'first' )
+		self.assertEquals( self._getRunCount(), 1 )
+
+	def testCacheHitRunnerResult( self ):
+		self._executeAction()
+		action = self._executeAction()
+		self.assertEquals( action.getCacheStatus(), 'hit' )
+		# analyzers parse the output of the runner, and check for timeouts:
+		self.assertEquals( action._getRunner().getStdOut().strip(), 'copied' )
+		self.assertEquals( action._getRunner().getReturnCode(), 0 )
+		self.assertFalse( action.hasTimedOut() )
+
+	def testCacheHitReplacesOutput( self ):
+		self._executeAction()
+		stale = os.path.join( self.workingDir, 'out', 'stale.txt' )
+		open( stale, 'w' ).close()
+		action = self._executeAction()
+		self.assertEquals( action.getCacheStatus(), 'hit' )
+		self.assertFalse( os.path.exists( stale ) )
+		self.assertEquals( self._readOutput(), 'first' )
+
+	def testCacheHitStreamedOutput( self ):
+		# streamed output is only kept up to the output limit, unless the action is cached:
+		mApp().getSettings().set( Settings.BuildStreamActionOutput, True )
+		mApp().getSettings().set( Settings.BuildActionOutputLimit, 10 )
+		output = ''.join( str( index ) for index in range( 100 ) )
+		logFile = os.path.join( self.tempDir, 'step.log' )
+		os.makedirs( os.path.join( self.workingDir, 'out' ) )
+		actions = []
+		for _ in range( 2 ):
+			action = ShellCommandAction( [ sys.executable, '-c', 'print( "{0}" )'.format( output ) ] )
+			action.setWorkingDirectory( self.workingDir )
+			action.addInputDirectory( self.inputDir )
+			action.addOutputDirectory( 'out' )
+			action.executeAction( logFile )
+			actions.append( action )
+		self.assertEquals( [ action.getCacheStatus() for action in actions ], [ 'miss', 'hit' ] )
+		self.assertEquals( actions[1].getStdOut().strip(), output )
+		self.assertEquals( actions[1]._getRunner().getStdOut().strip(), output )
+
+	def testKeyIsIndependentOfBaseDir( self ):
+		keys = []
+		for baseDir, home in ( ( '/builds/a', '/home/a' ), ( '/other/b', '/home/b' ) ):
+			cache = ActionCache( self.tempDir, baseDir, [ 'CC' ] )
+			context = ExecutionContext( os.path.join( baseDir, 'build' ), { 'CC' : 'gcc', 'HOME' : home } )
+			keys.append( cache.makeKey( [ 'make', '-C', os.path.join( baseDir, 'build' ) ], context, [], [ 'out' ] ) )
+		self.assertEquals( keys[0], keys[1] )
+		context = ExecutionContext( '/builds/a/build', { 'CC' : 'clang' } )
+		self.assertNotEquals( ActionCache( self.tempDir, '/builds/a', [ 'CC' ] ).makeKey(
+			[ 'make', '-C', '/builds/a/build' ], context, [], [ 'out' ] ), keys[0] )
+
+	def testUnsafeArchiveIsIgnored( self ):
+		cache = ActionCache( os.path.join( self.tempDir, 'cache' ) )
+		outputDir = os.path.join( self.workingDir, 'out' )
+		os.makedirs( outputDir )
+		self.assertTrue( cache.store( 'abcdef', [ outputDir ], 0, 'output', None ) )
+		# replace the archive with one that writes outside of the output directory:
+		evil = os.path.join( self.tempDir, 'evil.txt' )
+		open( evil, 'w' ).close()
+		archivePath = os.path.join( cache._getEntryPath( 'abcdef' ), cache._getOutputArchiveName( 0 ) )
+		with tarfile.open( archivePath, 'w:gz' ) as archive:
+			archive.add( evil, arcname = '../evil-copy.txt' )
+		self.assertEquals( cache.restore( 'abcdef', [ outputDir ] ), None )
+		self.assertFalse( os.path.exists( os.path.join( self.workingDir, 'evil-copy.txt' ) ) )
+		self.assertTrue( os.path.isdir( outputDir ) )
+
+	def testChangedInputMisses( self ):
+		self._executeAction()
+		self._writeInput( 'second' )
+		action = self._executeAction()
+		self.assertEquals( action.getCacheStatus(), 'miss' )
+		self.assertEquals( self._readOutput(), 'second' )
+		self.assertEquals( self._getRunCount(), 2 )
+
+	def testFailuresAreNotCached( self ):
+		self._executeAction( 1 )
+		action = self._executeAction( 1 )
+		self.assertEquals( action.getResult(), 1 )
+		self.assertEquals( action.getCacheStatus(), 'miss' )
+		self.assertEquals( self._getRunCount(), 2 )
+
+	def testCacheDisabled( self ):
+		mApp().getSettings().set( Settings.BuildActionCacheDir, None )
+		self._executeAction()
+		action = self._executeAction()
+		self.assertEquals( action.getCacheStatus(), None )
+		self.assertEquals( self._getRunCount(), 2 )
+
+	def testMakeCacheCommand( self ):
+		tool = GNUMakeTool()
+		tool.setJobs( 8 )
+		action = MakeCommandAction( tool )
+		# the number of jobs does not change the results of the build, it is not part of the key:
+		self.assertEquals( action._getCacheCommand(), [ tool.getCommand() ] )
+
+	def testHitRatio( self ):
+		report = xml.etree.ElementTree.fromstring( '<build><step><action cache="hit"/><action cache="miss"/>'
+			+ '<action cache="hit"/><action/></step></build>' )
+		self.assertEquals( XmlReportConverter._actionCacheSummary( report ), '2 hits, 1 misses (66% hit ratio)' )
+		self.assertEquals( XmlReportConverter._actionCacheSummary( xml.etree.ElementTree.fromstring( '<build/>' ) ), None )
+
+if __name__ == "__main__":
+	unittest.main()
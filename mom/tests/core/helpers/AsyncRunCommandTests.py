@@ -0,0 +1,59 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Kevin Funk <kevin.funk@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+from core.helpers.AsyncRunCommand import AsyncRunCommand, run_concurrently
+from mom.tests.helpers.MomTestCase import MomTestCase
+import sys
+import time
+import unittest
+
+class AsyncRunCommandTests( MomTestCase ):
+
+	SLEEP = 'import time; time.sleep( 1 ); print( "done" )'
+
+	def _makeRunners( self, count ):
+		return [ AsyncRunCommand( [ sys.executable, '-c', self.SLEEP ] ) for _ in range( count ) ]
+
+	def testConcurrentExecution( self ):
+		runners = self._makeRunners( 4 )
+		start = time.time()
+		run_concurrently( runners, 4 )
+		duration = time.time() - start
+		for runner in runners:
+			self.assertTrue( runner.isFinished() )
+			self.assertEquals( runner.wait(), 0 )
+			self.assertEquals( runner.getStdOutAsString().strip(), 'done' )
+		# four commands that sleep for one second each:
+		self.assertTrue( duration < 3, 'the commands were not executed concurrently ({0}s)'.format( duration ) )
+
+	def testConcurrencyLimit( self ):
+		runners = self._makeRunners( 2 )
+		start = time.time()
+		run_concurrently( runners, 1 )
+		self.assertTrue( time.time() - start >= 2 )
+		self.assertEquals( [ runner.wait() for runner in runners ], [ 0, 0 ] )
+
+	def testErrorIsRaisedByWait( self ):
+		runner = AsyncRunCommand( [ 'nonexistantcommand_mom_test' ] )
+		runner.start()
+		self.assertRaises( ConfigurationError, runner.wait )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,73 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.environments.Dependency import Dependency
+from core.helpers.ExecutionContext import ExecutionContext
+from mom.tests.helpers.MomTestCase import MomTestCase
+import os
+import sys
+import unittest
+
+class ExecutionContextTests( MomTestCase ):
+
+	TEST_VARIABLE = 'MOM_TEST_EXECUTION_CONTEXT_VARIABLE'
+
+	def testImmutable( self ):
+		context = ExecutionContext()
+		modified = context.withVariable( self.TEST_VARIABLE, 'value' ).withWorkingDirectory( self.TEST_DIRECTORY )
+		self.assertEquals( context.getOverlay(), {} )
+		self.assertEquals( context.getEnvironment(), None )
+		self.assertEquals( context.getWorkingDirectory(), None )
+		self.assertEquals( modified.getVariable( self.TEST_VARIABLE ), 'value' )
+		self.assertEquals( modified.getEnvironment()[ self.TEST_VARIABLE ], 'value' )
+		self.assertEquals( modified.getWorkingDirectory(), self.TEST_DIRECTORY )
+		self.assertFalse( self.TEST_VARIABLE in os.environ )
+
+	def testPathAdded( self ):
+		context = ExecutionContext().withVariable( self.TEST_VARIABLE, 'b' )
+		context = context.withPathAdded( self.TEST_VARIABLE, 'a', 'prepend' ).withPathAdded( self.TEST_VARIABLE, 'c' )
+		self.assertEquals( context.getVariable( self.TEST_VARIABLE ), os.pathsep.join( [ 'a', 'b', 'c' ] ) )
+		# elements are only added once:
+		context = context.withPathAdded( self.TEST_VARIABLE, 'b' )
+		self.assertEquals( context.getVariable( self.TEST_VARIABLE ), os.pathsep.join( [ 'a', 'b', 'c' ] ) )
+
+	def testDependencyApplyTo( self ):
+		folder = os.path.join( self.TEST_MOM_ENVIRONMENTS, 'dep-b-2.2.0' )
+		dependency = Dependency( folder )
+		self.assertTrue( dependency.verify() )
+		context = dependency.applyTo( ExecutionContext() )
+		self.assertEquals( context.getVariable( 'EXAMPLE_VARIABLE' ), 'example_variable' )
+		self.assertTrue( context.getVariable( 'PATH' ).startswith( 'example_path' + os.pathsep ) )
+		self.assertFalse( 'EXAMPLE_VARIABLE' in os.environ )
+
+	def testShellCommandActionUsesContext( self ):
+		oldCwd = os.getcwd()
+		command = 'import os; print( os.getcwd() + " " + os.environ[ "{0}" ] )'.format( self.TEST_VARIABLE )
+		action = ShellCommandAction( [ sys.executable, '-c', command ] )
+		action.setWorkingDirectory( self.TEST_DATA_DIRECTORY )
+		context = ExecutionContext().withVariable( self.TEST_VARIABLE, 'value' )
+		self.assertEquals( action.executeAction( context = context ), 0 )
+		self.assertEquals( action.getStdOut().strip(), '{0} value'.format( self.TEST_DATA_DIRECTORY ) )
+		# the build script process has not been modified:
+		self.assertEquals( os.getcwd(), oldCwd )
+		self.assertFalse( self.TEST_VARIABLE in os.environ )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,128 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+from core.helpers.ExecutionContext import ExecutionContext
+from core.helpers.JobServer import JobServer
+from core.helpers.RunCommand import RunCommand
+from core.helpers.SafeDeleteTree import rmtree
+from core.plugins.builders.MakeCommandAction import MakeCommandAction
+from core.plugins.builders.maketools.GNUMakeTool import GNUMakeTool
+from mom.tests.helpers.MomTestCase import MomTestCase
+import fcntl
+import os
+import tempfile
+import time
+import unittest
+
+class JobServerTests( MomTestCase ):
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.jobServer = JobServer( 3 )
+
+	def tearDown( self ):
+		self.jobServer.close()
+		MomTestCase.tearDown( self )
+
+	def _readTokens( self ):
+		readFd, _ = self.jobServer.getFileDescriptors()
+		flags = fcntl.fcntl( readFd, fcntl.F_GETFL )
+		fcntl.fcntl( readFd, fcntl.F_SETFL, flags | os.O_NONBLOCK )
+		try:
+			return os.read( readFd, 100 )
+		finally:
+			fcntl.fcntl( readFd, fcntl.F_SETFL, flags )
+
+	def testTokens( self ):
+		# one job slot is implicit for every make process:
+		self.assertEquals( self._readTokens(), '++' )
+
+	def testMakeFlags( self ):
+		context = ExecutionContext().withVariable( 'MAKEFLAGS', '-k -j4' )
+		flags = self.jobServer.applyTo( context ).getVariable( 'MAKEFLAGS' ).split()
+		self.assertTrue( '-k' in flags )
+		self.assertFalse( '-j4' in flags )
+		self.assertTrue( '--jobserver-fds={0},{1}'.format( *self.jobServer.getFileDescriptors() ) in flags )
+
+	def testLimitTo( self ):
+		with self.jobServer.limitTo( 2 ):
+			self.assertEquals( self._readTokens(), '+' ) # one of the two tokens is withheld
+		self.assertEquals( self._readTokens(), '+' ) # the withheld token has been returned
+		os.write( self.jobServer.getFileDescriptors()[1], '++' )
+		with self.jobServer.limitTo( None ):
+			self.assertEquals( self._readTokens(), '++' )
+
+	def testRemoveFrom( self ):
+		context = self.jobServer.applyTo( ExecutionContext().withVariable( 'MAKEFLAGS', '-k' ) )
+		self.assertEquals( JobServer.removeFrom( context ).getVariable( 'MAKEFLAGS' ), '-k' )
+		context = ExecutionContext()
+		if 'MAKEFLAGS' not in os.environ:
+			self.assertTrue( JobServer.removeFrom( context ) is context )
+
+	def testOnlyBuildActionsJoin( self ):
+		self.build.getJobServer = lambda: self.jobServer
+		tool = GNUMakeTool()
+		tool.setUseJobServer( True )
+		build = MakeCommandAction( tool )
+		self.assertTrue( '--jobserver-fds' in build.getExecutionContext().getVariable( 'MAKEFLAGS' ) )
+		# for example, the install action:
+		tool.setJobs( 1 )
+		tool.setUseJobServer( False )
+		install = MakeCommandAction( tool )
+		self.assertFalse( '--jobserver-fds' in install.getExecutionContext().getVariable( 'MAKEFLAGS', '' ) )
+		self.assertEquals( tool.getArguments(), [ '-j1' ] )
+
+	def testFromEnvironment( self ):
+		environment = { 'MAKEFLAGS' : self.jobServer.getMakeFlags() }
+		inherited = JobServer.fromEnvironment( environment )
+		self.assertEquals( inherited.getFileDescriptors(), self.jobServer.getFileDescriptors() )
+		self.assertFalse( inherited.isOwner() )
+		inherited.close() # does not close the pipe
+		self.assertEquals( self._readTokens(), '++' )
+		self.assertEquals( JobServer.fromEnvironment( { 'MAKEFLAGS' : '-k' } ), None )
+
+	def testGNUMakeUsesJobServer( self ):
+		tool = GNUMakeTool()
+		try:
+			tool.resolveCommand()
+		except ConfigurationError:
+			return # make is not installed
+		tool.setUseJobServer( True )
+		self.assertEquals( tool.getArguments(), [] )
+		directory = tempfile.mkdtemp()
+		try:
+			with open( os.path.join( directory, 'Makefile' ), 'w' ) as makefile:
+				makefile.write( 'all: a b c d\na b c d:\n\tsleep 1\n' )
+			context = self.jobServer.applyTo( ExecutionContext( directory ) )
+			runner = RunCommand( [ tool.getCommand() ] + tool.getArguments() )
+			runner.setExecutionContext( context )
+			start = time.time()
+			runner.run()
+			duration = time.time() - start
+			self.assertEquals( runner.getReturnCode(), 0 )
+		finally:
+			rmtree( directory )
+		# four jobs of one second, with three job slots:
+		self.assertTrue( 2 <= duration < 3.5, 'unexpected duration {0}s'.format( duration ) )
+		# all tokens have been returned:
+		self.assertEquals( self._readTokens(), '++' )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,129 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+from core.Settings import Settings
+from core.helpers.GlobalMApp import mApp
+from core.helpers.JobServer import JobServer
+from core.helpers.JobsCount import JobMemoryHistory, calculate_adaptive_jobs_count, read_available_memory
+from core.helpers.SafeDeleteTree import rmtree
+from core.plugins.builders.MakeCommandAction import MakeCommandAction
+from core.plugins.builders.maketools.GNUMakeTool import GNUMakeTool
+from mom.tests.helpers.MomTestCase import MomTestCase
+import os
+import tempfile
+import unittest
+
+class JobsCountTests( MomTestCase ):
+
+	GB = 2 ** 30
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.directory = tempfile.mkdtemp()
+		self.historyPath = os.path.join( self.directory, 'history', 'make-job-memory.json' )
+
+	def tearDown( self ):
+		rmtree( self.directory )
+		MomTestCase.tearDown( self )
+
+	def testLoadLimitsJobs( self ):
+		jobs, reasons = calculate_adaptive_jobs_count( 8, 6.1, 16 * self.GB, self.GB )
+		self.assertEquals( jobs, 2 )
+		self.assertEquals( len( reasons ), 3 )
+		# at least one job is always started:
+		self.assertEquals( calculate_adaptive_jobs_count( 2, 12.0, None, None )[0], 1 )
+
+	def testMemoryLimitsJobs( self ):
+		jobs, reasons = calculate_adaptive_jobs_count( 8, 0.0, 3 * self.GB + 100, self.GB )
+		self.assertEquals( jobs, 3 )
+		self.assertTrue( '3072 MB available memory and 1024 MB peak memory per job allow 3 jobs' in reasons )
+
+	def testUnknownValues( self ):
+		jobs, reasons = calculate_adaptive_jobs_count( 4, None, None, None )
+		self.assertEquals( jobs, 4 )
+		self.assertEquals( reasons, [ '4 CPUs', 'load average unknown', 'available memory unknown' ] )
+
+	def testReadAvailableMemory( self ):
+		path = os.path.join( self.directory, 'meminfo' )
+		with open( path, 'w' ) as f:
+			f.write( 'MemTotal:       16000000 kB\nMemFree:          100000 kB\nMemAvailable:    2000000 kB\n' )
+		self.assertEquals( read_available_memory( path ), 2000000 * 1024 )
+		with open( path, 'w' ) as f:
+			f.write( 'MemTotal: 16000000 kB\nMemFree: 100000 kB\nBuffers: 1000 kB\nCached: 200000 kB\n' )
+		self.assertEquals( read_available_memory( path ), 301000 * 1024 )
+		self.assertEquals( read_available_memory( os.path.join( self.directory, 'nonexistant' ) ), None )
+
+	def testJobMemoryHistory( self ):
+		history = JobMemoryHistory( self.historyPath )
+		history.record( 'build:debug', 100 )
+		history.record( 'build:release', 200 )
+		history.record( 'other:debug', 300 )
+		history = JobMemoryHistory( self.historyPath )
+		history.load()
+		self.assertEquals( history.getPeakMemory( 'build:debug' ), 100 )
+		self.assertEquals( history.getPeakMemory( 'build' ), 200 )
+		self.assertEquals( history.getPeakMemory(), 300 )
+		self.assertEquals( history.getPeakMemory( 'unknown' ), None )
+
+	def testAdaptiveMakeCommandAction( self ):
+		tool = GNUMakeTool()
+		try:
+			tool.resolveCommand()
+		except ConfigurationError:
+			return # make is not installed
+		mApp().getSettings().set( Settings.MakeBuilderJobsCount, Settings.MakeBuilderJobsCount_Adaptive )
+		mApp().getSettings().set( Settings.MakeBuilderJobMemoryHistory, self.historyPath )
+		with open( os.path.join( self.directory, 'Makefile' ), 'w' ) as makefile:
+			makefile.write( 'all:\n\t@echo done\n' )
+		action = MakeCommandAction( tool, historyKey = 'TestBuild:debug' )
+		action.setWorkingDirectory( self.directory )
+		self.assertEquals( action.executeAction(), 0 )
+		self.assertTrue( ' jobs: ' in action.getLogDescription() )
+		self.assertTrue( 'CPUs' in action.getLogDescription() )
+		# the peak memory of the command has been recorded for the next run:
+		history = JobMemoryHistory( self.historyPath )
+		history.load()
+		self.assertTrue( history.getPeakMemory( 'TestBuild' ) > 0 )
+
+	def testAdaptiveMakeCommandActionWithJobServer( self ):
+		tool = GNUMakeTool()
+		try:
+			tool.resolveCommand()
+		except ConfigurationError:
+			return # make is not installed
+		mApp().getSettings().set( Settings.MakeBuilderJobsCount, Settings.MakeBuilderJobsCount_Adaptive )
+		mApp().getSettings().set( Settings.MakeBuilderJobMemoryHistory, self.historyPath )
+		jobServer = JobServer( 2 )
+		self.build.getJobServer = lambda: jobServer
+		try:
+			with open( os.path.join( self.directory, 'Makefile' ), 'w' ) as makefile:
+				makefile.write( 'all:\n\t@echo done\n' )
+			tool.setUseJobServer( True )
+			action = MakeCommandAction( tool, historyKey = 'TestBuild:debug' )
+			action.setWorkingDirectory( self.directory )
+			self.assertEquals( action.executeAction(), 0 )
+			# the job count is calculated for every action, also if the job server is used:
+			self.assertTrue( ', limited to ' in action.getLogDescription() )
+			self.assertTrue( 'CPUs' in action.getLogDescription() )
+		finally:
+			jobServer.close()
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,113 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko.boehm@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+from core.Plugin import Plugin
+from core.Settings import Settings
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.helpers.GlobalMApp import mApp
+from core.helpers.LogCompression import LogCompression, check_log_compression, open_log_file, read_log_file, zstandard
+from core.helpers.XmlReportConverter import XmlReportConverter
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+
+class _PrintPlugin( Plugin ):
+	'''Adds an action to the build step that prints a text and exits with the given return code.'''
+
+	def __init__( self, text, returnCode = 0 ):
+		Plugin.__init__( self )
+		self.__text = text
+		self.__returnCode = returnCode
+
+	def setup( self ):
+		command = 'import sys; print( "{0}" ); sys.exit( {1} )'.format( self.__text, self.__returnCode )
+		self.getInstructions().getStep( 'build' ).addMainAction( ShellCommandAction( [ sys.executable, '-c', command ] ) )
+
+class LogCompressionTests( MomBuildMockupTestCase ):
+
+	def _executeBuild( self, returnCode = 0 ):
+		mApp().getSettings().set( Settings.BuildStepLogCompression, LogCompression.Gzip )
+		self.project.addPlugin( _PrintPlugin( 'first action output' ) )
+		self.project.addPlugin( _PrintPlugin( 'second action output', returnCode ) )
+		return self.build.buildAndReturn()
+
+	def _checkCompressedStepLog( self, streamed ):
+		mApp().getSettings().set( Settings.BuildStreamActionOutput, streamed )
+		self.assertEquals( self._executeBuild(), 0 )
+		logFile = self.project.getStep( 'build' ).getLogfilePath()
+		self.assertTrue( logFile.endswith( '.log.gz' ) )
+		# every action appends a gzip member, gzip reads them as one stream:
+		content = gzip.open( logFile ).read()
+		self.assertTrue( content.index( 'first action output' ) < content.index( 'second action output' ) )
+		self.assertEquals( read_log_file( logFile ), content.decode( 'utf-8' ) )
+		self.assertTrue( 'logCompression="gzip"' in self._getReport().getReport() )
+
+	def testCompressedStepLogStreamed( self ):
+		self._checkCompressedStepLog( True )
+
+	def testCompressedStepLogNotStreamed( self ):
+		self._checkCompressedStepLog( False )
+
+	def testFailedStepsLog( self ):
+		self.assertNotEquals( self._executeBuild( 1 ), 0 )
+		log = XmlReportConverter( self._getReport() ).convertToFailedStepsLog()
+		self.assertTrue( '* Action: ' in log )
+		self.assertTrue( 'second action output' in log )
+		self.assertTrue( 'End of the step log' in log )
+		self.assertTrue( 'build.log.gz' in log )
+
+	def testFailedStepsLogTruncated( self ):
+		self.assertNotEquals( self._executeBuild( 1 ), 0 )
+		mApp().getSettings().set( Settings.BuildActionOutputLimit, 5 )
+		log = XmlReportConverter( self._getReport() ).convertToFailedStepsLog()
+		# the log description contains the command, check the output only:
+		self.assertTrue( 'STDOUT:\nsecon\n[... ' in log )
+		self.assertTrue( 'characters omitted' in log )
+		# only the end of the step log is included:
+		self.assertFalse( 'first action output' in log )
+		self.assertTrue( 'build.log.gz: *\n***\n\n' in log )
+
+	def testReadWrite( self ):
+		handle, filePath = tempfile.mkstemp( suffix = '.log.gz' )
+		os.close( handle )
+		try:
+			for text in ( u'first line\n', u'second line ä\n' ):
+				with open_log_file( filePath ) as file:
+					file.write( text )
+			self.assertEquals( read_log_file( filePath ), u'first line\nsecond line ä\n' )
+			self.assertEquals( read_log_file( filePath, 7 ), u'line ä\n' )
+			self.assertEquals( read_log_file( filePath, 1000 ), u'first line\nsecond line ä\n' )
+		finally:
+			os.remove( filePath )
+
+	def testInvalidCompression( self ):
+		check_log_compression( None )
+		check_log_compression( LogCompression.Gzip )
+		self.assertRaises( ConfigurationError, check_log_compression, 'rar' )
+		if not zstandard:
+			self.assertRaises( ConfigurationError, check_log_compression, LogCompression.Zstd )
+		mApp().getSettings().set( Settings.BuildStepLogCompression, 'rar' )
+		self.assertEquals( self.build.buildAndReturn(), ConfigurationError( 'dummy' ).getReturnCode() )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,72 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Settings import Settings
+from core.helpers.Profiler import Profiler
+from core.helpers.GlobalMApp import mApp
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+import copy
+import os
+import pstats
+import subprocess
+import sys
+import unittest
+
+def _runChildAndCopy():
+	subprocess.Popen( [ sys.executable, '-c', 'import time; time.sleep( 0.5 )' ] ).wait()
+	for _ in range( 200 ):
+		copy.deepcopy( mApp().getSettings().getSettings() )
+	return 42
+
+class ProfilerTests( MomBuildMockupTestCase ):
+
+	def testWaitTimeIsExcluded( self ):
+		profiler = Profiler()
+		self.assertEquals( profiler.runcall( _runChildAndCopy ), 42 )
+		self.assertTrue( profiler.getTotalWaitTime() >= 0.4 )
+		self.assertTrue( profiler.getTotalTime() - profiler.getTotalWaitTime() < profiler.getTotalWaitTime() )
+		names = [ function[2] for _, _, function in profiler.getMostExpensiveFunctions( 10 ) ]
+		self.assertFalse( '<posix.waitpid>' in names )
+		self.assertTrue( 'deepcopy' in names )
+		summary = profiler.createSummary()
+		self.assertTrue( 'Make-O-Matic overhead' in summary )
+		self.assertTrue( 'deepcopy' in summary )
+
+	def testFrameworkFunctions( self ):
+		profiler = Profiler()
+		profiler.runcall( _runChildAndCopy )
+		costs = profiler.getMostExpensiveFrameworkFunctions( 10 )
+		self.assertTrue( costs )
+		for seconds, _, function in costs:
+			self.assertTrue( profiler.isFrameworkFunction( function ) )
+			# the time waiting for the child process is not attributed to the caller:
+			if function[2] == '_runChildAndCopy':
+				self.assertTrue( seconds < 0.4 )
+
+	def testProfileBuild( self ):
+		mApp().getSettings().set( Settings.ScriptProfile, True )
+		self.assertEquals( self.build.buildAndReturn(), 0 )
+		statsPath = os.path.join( self.build.getLogDir(), Profiler.StatsFileName )
+		summaryPath = os.path.join( self.build.getLogDir(), Profiler.SummaryFileName )
+		self.assertTrue( os.path.isfile( summaryPath ) )
+		stats = pstats.Stats( statsPath )
+		self.assertTrue( [ function for function in stats.stats if function[2] == '_runPhase' ] )
+
+if __name__ == "__main__":
+	unittest.main()
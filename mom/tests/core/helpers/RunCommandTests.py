@@ -18,10 +18,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from core.Exceptions import ConfigurationError
-from core.helpers.RunCommand import RunCommand
+from core.helpers.JobsCount import peak_memory_of
+from core.helpers.RunCommand import RunCommand, _TimeoutMonitor
 from mom.tests.helpers.MomTestCase import MomTestCase
+import codecs
 import os
 import sys
+import tempfile
+import time
 import unittest
 
 class RunCommandTests( MomTestCase ):
@@ -54,5 +58,88 @@ class RunCommandTests( MomTestCase ):
 					runner.run()
 					self.assertEquals( runner.getReturnCode(), code )
 
+	def testTimeout( self ):
+		for captureOutput in [ False, True ]:
+			startTime = time.time()
+			runner = RunCommand( [ sys.executable, '-c', 'import time; time.sleep( 30 )' ], timeoutSeconds = 1,
+				captureOutput = captureOutput )
+			runner.run()
+			self.assertTrue( runner.getTimedOut() )
+			self.assertNotEquals( runner.getReturnCode(), 0 )
+			self.assertTrue( time.time() - startTime < 10 )
+		runner = RunCommand( [ sys.executable, '-c', 'pass' ], timeoutSeconds = 10 )
+		runner.run()
+		self.assertFalse( runner.getTimedOut() )
+
+	def testKillAfterTimeout( self ):
+		# the process ignores SIGTERM, and is killed after the kill delay. It is only reaped by the runner, which
+		# collects the resource usage:
+		code = 'import signal, time; signal.signal( signal.SIGTERM, signal.SIG_IGN ); print( "ready" ); time.sleep( 30 )'
+		killDelay = _TimeoutMonitor.KillDelay
+		_TimeoutMonitor.KillDelay = 1
+		try:
+			runner = RunCommand( [ sys.executable, '-u', '-c', code ], timeoutSeconds = 1 )
+			startTime = time.time()
+			runner.run()
+		finally:
+			_TimeoutMonitor.KillDelay = killDelay
+		self.assertTrue( runner.getTimedOut() )
+		self.assertNotEquals( runner.getReturnCode(), 0 )
+		self.assertTrue( time.time() - startTime < 10 )
+		if hasattr( os, 'wait4' ):
+			self.assertTrue( runner.getResourceUsage() is not None )
+
+	def testResourceUsage( self ):
+		if not hasattr( os, 'wait4' ):
+			return
+		# the child process allocates 64 MB in a grandchild process, which is included in the usage:
+		code = 'import subprocess, sys; subprocess.check_call( [ sys.executable, "-c", "x = \' \' * 2 ** 26" ] )'
+		for captureOutput in [ False, True ]:
+			runner = RunCommand( [ sys.executable, '-c', code ], captureOutput = captureOutput )
+			runner.run()
+			self.assertEquals( runner.getReturnCode(), 0 )
+			self.assertTrue( peak_memory_of( runner.getResourceUsage() ) >= 2 ** 26 )
+
+	def _runStreamed( self, code, combineOutput = True, limit = None, keepOutput = False ):
+		handle, logFile = tempfile.mkstemp( suffix = '.log' )
+		os.close( handle )
+		try:
+			runner = RunCommand( [ sys.executable, '-c', code ], combineOutput = combineOutput )
+			runner.setLogFile( logFile )
+			if limit:
+				runner.setOutputLimit( limit )
+			runner.setKeepOutput( keepOutput )
+			self.assertEquals( runner.run(), 0 )
+			with codecs.open( logFile, 'r', 'utf-8' ) as f:
+				return runner, f.read()
+		finally:
+			os.remove( logFile )
+
+	def testStreamOutputToLogFile( self ):
+		runner, log = self._runStreamed( 'import sys; sys.stdout.write( "out\\n" ); sys.stdout.flush(); sys.stderr.write( "err\\n" )',
+			combineOutput = False )
+		self.assertEquals( runner.getStdOut(), 'out\n' )
+		self.assertEquals( runner.getStdErr(), 'err\n' )
+		self.assertTrue( 'out\n' in log and 'err\n' in log )
+
+	def testStreamOutputDecoding( self ):
+		# a multi-byte UTF-8 character split between two writes is decoded correctly:
+		code = 'import sys, os; os.write( 1, b"\\xc3" ); os.write( 1, b"\\xa4\\n" )'
+		runner, log = self._runStreamed( code )
+		self.assertEquals( runner.getStdOut(), u'\u00e4\n' )
+		self.assertEquals( log, u'\u00e4\n' )
+
+	def testStreamOutputLimit( self ):
+		runner, log = self._runStreamed( 'print( "".join( str( i % 10 ) for i in range( 1000 ) ) )', limit = 10 )
+		self.assertEquals( len( log ), 1001 )
+		self.assertTrue( runner.getStdOut().startswith( '0123456789\n[... 981 characters omitted' ) )
+		self.assertTrue( runner.getStdOut().endswith( ']\n123456789\n' ) )
+
+	def testStreamOutputKeepOutput( self ):
+		# output that is parsed later, for example by test analyzers, is not truncated:
+		runner, log = self._runStreamed( 'print( "".join( str( i % 10 ) for i in range( 1000 ) ) )', limit = 10, keepOutput = True )
+		self.assertEquals( runner.getStdOut(), log )
+		self.assertEquals( len( runner.getStdOut() ), 1001 )
+
 if __name__ == "__main__":
 	unittest.main()
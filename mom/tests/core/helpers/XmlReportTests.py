@@ -24,13 +24,16 @@ from core.actions.ShellCommandAction import ShellCommandAction
 from core.executomat.Step import Step
 from core.helpers.GlobalMApp import mApp
 from core.helpers.XmlReport import InstructionsXmlReport
-from core.helpers.XmlReportConverter import XmlReportConverter
+from core.helpers.XmlReportConverter import ReportFormat, XmlReportConverter
 from core.helpers.XmlUtils import xml_compare
 from core.loggers.ConsoleLogger import ConsoleLogger
 from core.plugins.helpers.XmlReportGenerator import XmlReportGenerator
 from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
 from mom.tests.helpers.TestUtils import replace_bound_method
+from io import BytesIO
 import os.path
+import sys
+import time
 import unittest
 
 try:
@@ -54,6 +57,19 @@ except ImportError:
 				except ImportError, e:
 					raise MomError( "Could not find a suitable XML module: {0}".format( e ) )
 
+class _ShellCommandPlugin( Plugin ):
+	'''Adds a shell command action to the build step.'''
+
+	def setup( self ):
+		action = ShellCommandAction( [ sys.executable, '-c', 'x = " " * 2 ** 24' ] )
+		self.getInstructions().getStep( 'build' ).addMainAction( action )
+
+class _SlowPreFlightCheckPlugin( Plugin ):
+	'''Takes some time in the pre-flight check.'''
+
+	def preFlightCheck( self ):
+		time.sleep( 0.05 )
+
 class XmlReportTests( MomBuildMockupTestCase ):
 
 	EXCEPTION_LOCATION = ".//exception"
@@ -132,6 +148,46 @@ class XmlReportTests( MomBuildMockupTestCase ):
 		self.assertNotEquals( doc.find( ".//{http://www.w3.org/1999/xhtml}table" ), None )
 		self.assertNotEquals( doc.find( ".//{http://www.w3.org/1999/xhtml}td" ), None )
 
+	def testResourceUsage( self ):
+		configuration = self.project.getChildren()[0].getChildren()[0]
+		configuration.addPlugin( _ShellCommandPlugin() )
+		self._executeBuild()
+		doc = etree.XML( self._getXmlReport().getReport() )
+		actions = [ action for action in doc.findall( './/action' ) if action.attrib.get( 'userTime' ) ]
+		self.assertTrue( actions, 'no action reports it\'s resource usage' )
+		for path in [ './/step', './/configuration', './build' ]:
+			elements = [ element for element in doc.findall( path ) if element.attrib.get( 'maxRss' ) ]
+			self.assertTrue( elements, 'no totals for {0}'.format( path ) )
+		build = doc.find( './build' )
+		# the totals of the build include all actions:
+		self.assertTrue( float( build.attrib[ 'userTime' ] ) >= max( [ float( action.attrib[ 'userTime' ] ) for action in actions ] ) )
+		self.assertEquals( int( build.attrib[ 'maxRss' ] ), max( [ int( action.attrib[ 'maxRss' ] ) for action in actions ] ) )
+
+		converter = XmlReportConverter( self._getXmlReport() )
+		self.assertTrue( 'Resources: CPU ' in converter.convertToText() )
+		self.assertTrue( 'peak RSS' in converter.convertToTextSummary() )
+		if converter.hasXsltSupport():
+			self.assertTrue( 'peak RSS' in converter.convertToHtml() )
+
+	def testPluginHookTimes( self ):
+		self.project.addPlugin( _SlowPreFlightCheckPlugin() )
+		self._executeBuild()
+		doc = etree.XML( self._getXmlReport().getReport() )
+		plugin = [ element for element in doc.findall( './/plugin' ) if element.attrib[ 'name' ] == '_SlowPreFlightCheckPlugin' ][0]
+		self.assertTrue( float( plugin.attrib[ 'hook-preFlightCheck' ] ) >= 0.05 )
+		self.assertTrue( 'hook-setup' in plugin.attrib )
+
+		converter = XmlReportConverter( self._getXmlReport() )
+		text = converter.convertToText()
+		self.assertTrue( 'Slowest plugin hooks:' in text )
+		# the slow hook is listed first:
+		section = text[ text.index( 'Slowest plugin hooks:' ): ].splitlines()
+		self.assertTrue( '_SlowPreFlightCheckPlugin.preFlightCheck (project XmlReportTestProject)' in section[1] )
+		if converter.hasXsltSupport():
+			html = converter.convertToHtml( summaryOnly = True )
+			self.assertTrue( 'Slowest plugin hooks:' in html )
+			self.assertTrue( '_SlowPreFlightCheckPlugin.preFlightCheck' in html )
+
 	def testConvertXmlReportToHtmlWithoutLxml( self ):
 		# write a new method implementation
 		def hasXsltSupport_new( self ):
@@ -158,6 +214,68 @@ class XmlReportTests( MomBuildMockupTestCase ):
 
 		self.assertTrue( len( text ) > 100 )
 
+	def _getStreamedReport( self ):
+		stream = BytesIO()
+		self._getXmlReport().writeReport( stream )
+		return stream.getvalue()
+
+	def testStreamedXmlReport( self ):
+		self.project.addPlugin( _ShellCommandPlugin() )
+		self._executeBuild()
+		streamed = etree.XML( self._getStreamedReport() )
+		self.assertTrue( xml_compare( etree.XML( self._getXmlReport().getReport() ), streamed ),
+			"Streamed report differs from report output" )
+		self._testBasicDocumentAttributes( streamed )
+
+	def testStreamedXmlReportOnException( self ):
+		self._executeBuild()
+
+		def createXmlNode_new( self, document, recursive = True ):
+			raise MomError( "Test Error" )
+
+		configuration = self.project.getChildren()[0].getChildren()[0]
+		replace_bound_method( configuration, configuration.createXmlNode, createXmlNode_new )
+		doc = etree.XML( self._getStreamedReport() )
+		self.assertNotEquals( doc.find( "./build/exception" ), None )
+		self.assertTrue( "Test Error" in doc.find( "./build/exception/description" ).text )
+		# the report still contains the instructions that were written before the exception:
+		self.assertNotEquals( doc.find( "./build/project" ), None )
+
+	def testReportCache( self ):
+		created = []
+		createReport = InstructionsXmlReport._createReport
+		def createReport_new( self ):
+			created.append( self )
+			return createReport( self )
+		InstructionsXmlReport._createReport = createReport_new
+		try:
+			for reportFormat in ( ReportFormat.XML, ReportFormat.TEXT, ReportFormat.HTML ):
+				self.build.addPlugin( XmlReportGenerator( reportFormat ) )
+			self._executeBuild()
+			# the report is generated once for all report generators:
+			self.assertEquals( len( created ), 1 )
+			# outside of the report and notify phases, the cache is not used:
+			self._getXmlReport().getReport()
+			self.assertEquals( len( created ), 2 )
+		finally:
+			InstructionsXmlReport._createReport = createReport
+
+	def testReportCacheInvalidation( self ):
+		self._executeBuild()
+		cache = mApp().getXmlReportCache()
+		cache.setEnabled( True )
+		try:
+			report = self._getXmlReport().getReport()
+			self.assertTrue( self._getXmlReport().getReport() is report )
+			tree = self._getXmlReport().getParsedReport( etree.XML )
+			self.assertTrue( self._getXmlReport().getParsedReport( etree.XML ) is tree )
+			# changes of the build are visible in the report:
+			mApp().registerException( ( MomError( "Test Error" ), [] ) )
+			self.assertTrue( "Test Error" in self._getXmlReport().getReport() )
+			self.assertFalse( self._getXmlReport().getParsedReport( etree.XML ) is tree )
+		finally:
+			cache.setEnabled( False )
+
 	def testXmlReportGenerator( self ):
 		generator = XmlReportGenerator()
 		self.build.addPlugin( generator )
@@ -0,0 +1,142 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko.boehm@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Plugin import Plugin
+from core.Settings import Settings
+from core.executomat.ParallelStepRunner import ParallelStepRunner
+from core.helpers.BackgroundWriter import open_background_writer
+from core.helpers.GlobalMApp import mApp
+from core.helpers.RotatingFile import RotatingFile
+from core.loggers.FileLogger import FileLogger
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+import glob
+import gzip
+import os
+import shutil
+import signal
+import tempfile
+import unittest
+
+class _TerminatePlugin( Plugin ):
+
+	def execute( self ):
+		os.kill( os.getpid(), signal.SIGTERM )
+
+class FileLoggerTests( MomBuildMockupTestCase ):
+
+	def setUp( self ):
+		MomBuildMockupTestCase.setUp( self )
+		self.logger = FileLogger()
+		self.build.addLogger( self.logger )
+		self.tempDir = tempfile.mkdtemp()
+		self.signalHandler = signal.getsignal( signal.SIGTERM )
+
+	def tearDown( self ):
+		signal.signal( signal.SIGTERM, self.signalHandler )
+		shutil.rmtree( self.tempDir )
+		MomBuildMockupTestCase.tearDown( self )
+
+	def _readLog( self ):
+		self.logger.flush()
+		with open( self.logger.getFilePath() ) as file:
+			return file.read()
+
+	def testLogFile( self ):
+		self.build.message( self.build, 'logged before the file is opened' )
+		self.assertEquals( self.build.buildAndReturn(), 0 )
+		log = self._readLog()
+		self.assertTrue( 'logged before the file is opened' in log )
+		self.assertTrue( 'Running phase' not in log )
+		self.build.message( self.build, 'logged after the build' )
+		self.assertTrue( self._readLog().endswith( 'logged after the build\n' ) )
+
+	def testParallelBuild( self ):
+		if not ParallelStepRunner.isSupported():
+			return
+		MomBuildMockupTestCase.setUp( self, useEnvironments = True )
+		self.logger = FileLogger()
+		self.build.addLogger( self.logger )
+		mApp().getSettings().set( Settings.BuildParallelJobs, 2 )
+		mApp().getSettings().set( Settings.ScriptLogLevel, 3 )
+		self.assertEquals( self.build.buildAndReturn(), 0 )
+		# the messages of the worker processes are written to the same file:
+		log = self._readLog()
+		for child in self.project.getChildren()[0].getChildren():
+			self.assertTrue( '[{0}: {1}] DEBUG: Executing step: build'.format( child.__class__.__name__, child.getName() ) in log )
+		self.assertTrue( 'started in worker process' in log )
+
+	def testRotation( self ):
+		filePath = os.path.join( self.tempDir, 'rotated.log' )
+		file = RotatingFile( filePath, 'w', maxBytes = 10, backupCount = 2 )
+		for text in [ '1234567890', 'abcdefghij', 'klmnopqrst', 'uvwxyz' ]:
+			file.write( text )
+		file.close()
+		self.assertEquals( open( filePath ).read(), 'uvwxyz' )
+		self.assertEquals( open( file.getSegmentPath( 1 ) ).read(), 'klmnopqrst' )
+		self.assertEquals( open( file.getSegmentPath( 2 ) ).read(), 'abcdefghij' )
+		self.assertFalse( os.path.exists( '{0}.3'.format( filePath ) ) )
+
+	def testCompressedRotation( self ):
+		filePath = os.path.join( self.tempDir, 'compressed.log' )
+		writer = open_background_writer( filePath, 'w', maxQueueSize = 2, maxBytes = 100, compress = True )
+		for index in range( 100 ):
+			writer.write( 'line {0}\n'.format( index ) )
+		writer.close()
+		segments = [ '{0}.{1}.gz'.format( filePath, index ) for index in range( 5, 0, -1 ) ]
+		segments = [ segment for segment in segments if os.path.exists( segment ) ]
+		self.assertTrue( segments )
+		text = ''.join( [ gzip.open( segment ).read() for segment in segments ] ) + open( filePath ).read()
+		self.assertTrue( text.endswith( 'line 98\nline 99\n' ) )
+		self.assertFalse( os.path.exists( '{0}.6.gz'.format( filePath ) ) )
+
+	def testWorkerWritesDuringRotation( self ):
+		if not ParallelStepRunner.isSupported():
+			return
+		filePath = os.path.join( self.tempDir, 'shared.log' )
+		file = RotatingFile( filePath, 'w', maxBytes = 100, backupCount = 1000, compress = True )
+		lines = 500
+		pid = os.fork()
+		if pid == 0:
+			try:
+				for index in range( lines ):
+					file.write( 'worker {0}\n'.format( index ) )
+			finally:
+				os._exit( 0 )
+		for index in range( lines ):
+			file.write( 'parent {0}\n'.format( index ) )
+		os.waitpid( pid, 0 )
+		file.close()
+		segments = glob.glob( '{0}.*.gz'.format( filePath ) )
+		self.assertTrue( segments )
+		text = ''.join( [ gzip.open( segment ).read() for segment in segments ] ) + open( filePath ).read()
+		# nothing the worker wrote is lost in a rotated segment:
+		for name in ( 'worker', 'parent' ):
+			self.assertEquals( text.count( name ), lines )
+
+	def testTerminatedBuild( self ):
+		signal.signal( signal.SIGTERM, signal.SIG_DFL )
+		self.project.addPlugin( _TerminatePlugin() )
+		# a terminated build exits through the regular error handling, the log is flushed in the shutDown phase:
+		self.assertEquals( self.build.buildAndReturn(), 128 + signal.SIGTERM )
+		self.assertEquals( self.build.getReturnCode(), 128 + signal.SIGTERM )
+		self.assertTrue( 'terminated by signal' in open( self.logger.getFilePath() ).read() )
+		self.assertEquals( signal.getsignal( signal.SIGTERM ), signal.SIG_DFL )
+
+if __name__ == "__main__":
+	unittest.main()
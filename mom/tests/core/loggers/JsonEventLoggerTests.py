@@ -0,0 +1,91 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Plugin import Plugin
+from core.Settings import Settings
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.executomat.ParallelStepRunner import ParallelStepRunner
+from core.helpers.GlobalMApp import mApp
+from core.loggers.JsonEventLogger import JsonEventLogger
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+import json
+import os
+import sys
+import unittest
+
+class _ExitPlugin( Plugin ):
+	'''Adds an action to the build step that exits with the given return code.'''
+
+	def __init__( self, returnCode ):
+		Plugin.__init__( self )
+		self.__returnCode = returnCode
+
+	def setup( self ):
+		command = 'import sys; sys.exit( {0} )'.format( self.__returnCode )
+		self.getInstructions().getStep( 'build' ).addMainAction( ShellCommandAction( [ sys.executable, '-c', command ] ) )
+
+class JsonEventLoggerTests( MomBuildMockupTestCase ):
+
+	def setUp( self ):
+		MomBuildMockupTestCase.setUp( self, useEnvironments = True )
+		self.logger = JsonEventLogger()
+		self.build.addLogger( self.logger )
+		self.configurations = self.project.getChildren()[0].getChildren()
+
+	def _readEvents( self ):
+		self.logger.flush()
+		with open( self.logger.getFilePath() ) as file:
+			return [ json.loads( line ) for line in file ]
+
+	def testEventStream( self ):
+		self.configurations[0].addPlugin( _ExitPlugin( 0 ) )
+		self.assertEquals( self.build.buildAndReturn(), 0 )
+		events = self._readEvents()
+		self.assertEquals( events[0][ 'event' ], 'log-start' )
+		times = [ event[ 'time' ] for event in events ]
+		self.assertEquals( times, sorted( times ) )
+		phases = [ event[ 'phase' ] for event in events if event[ 'event' ] == 'phase-start' and event[ 'object' ] == self.build.getName() ]
+		self.assertEquals( phases[:5], [ 'prepare', 'preFlightCheck', 'setup', 'execute', 'wrapup' ] )
+		ends = [ event for event in events if event[ 'event' ] == 'phase-end' and event[ 'phase' ] == 'execute' ]
+		self.assertTrue( ends and ends[0][ 'duration' ] >= 0 )
+		statuses = [ event[ 'status' ] for event in events if event[ 'event' ] == 'step-status'
+			and event[ 'object' ] == self.configurations[0].getName() and event[ 'step' ] == 'build' ]
+		self.assertEquals( statuses, [ 'started', 'finished' ] )
+		actionEnds = [ event for event in events if event[ 'event' ] == 'action-end' and 'sys.exit' in event[ 'action' ] ]
+		self.assertEquals( len( actionEnds ), 1 )
+		self.assertEquals( actionEnds[0][ 'returnCode' ], 0 )
+		# the hooks of the report phase are recorded, too:
+		hooks = [ event[ 'hook' ] for event in events if event[ 'event' ] == 'plugin-hook' and event[ 'object' ] == self.logger.getName() ]
+		self.assertTrue( 'setup' in hooks and 'report' in hooks and 'shutDown' in hooks, hooks )
+
+	def testParallelBuild( self ):
+		if not ParallelStepRunner.isSupported():
+			return
+		mApp().getSettings().set( Settings.BuildParallelJobs, 2 )
+		for configuration, returnCode in zip( self.configurations, [ 0, 1 ] ):
+			configuration.addPlugin( _ExitPlugin( returnCode ) )
+		self.build.buildAndReturn()
+		events = self._readEvents()
+		# the actions of the configurations are executed, and reported, in worker processes:
+		actionEnds = [ event for event in events if event[ 'event' ] == 'action-end' and 'sys.exit' in event[ 'action' ] ]
+		self.assertEquals( sorted( [ event[ 'returnCode' ] for event in actionEnds ] ), [ 0, 1 ] )
+		self.assertFalse( os.getpid() in [ event[ 'pid' ] for event in actionEnds ] )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,89 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko.boehm@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Settings import Settings
+from core.loggers.Logger import Logger
+from mom.tests.helpers.MomTestCase import MomTestCase
+import unittest
+
+class _RecordingLogger( Logger ):
+	'''Records the debug messages it receives, and writes debug messages up to the script log level.'''
+
+	def __init__( self ):
+		Logger.__init__( self, 'RecordingLogger' )
+		self.messages = []
+
+	def _logMessage( self, mapp, mobject, msg ):
+		self.messages.append( msg )
+
+	def _logDebug( self, mapp, mobject, msg ):
+		self.messages.append( msg )
+
+	def _logDebugN( self, mapp, mobject, level , msg ):
+		self.messages.append( msg )
+
+class LoggerTests( MomTestCase ):
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.logger = _RecordingLogger()
+		self.build.addLogger( self.logger )
+
+	def testDebugLevel( self ):
+		self.build.getSettings().set( Settings.ScriptLogLevel, 2 )
+		self.assertEquals( self.build.getDebugLevel(), 2 )
+		self.assertTrue( self.build.isDebugEnabled( 2 ) )
+		self.assertFalse( self.build.isDebugEnabled( 3 ) )
+		self.build.debugN( self.build, 2, 'written' )
+		self.build.debugN( self.build, 3, 'discarded' )
+		self.assertEquals( self.logger.messages, [ 'written' ] )
+		# changing the setting is noticed:
+		self.build.getSettings().set( Settings.ScriptLogLevel, 3 )
+		self.build.debugN( self.build, 3, 'written' )
+		self.assertEquals( self.logger.messages, [ 'written', 'written' ] )
+
+	def testLazyMessages( self ):
+		calls = []
+		def makeMessage():
+			calls.append( True )
+			return 'lazy'
+		self.build.getSettings().set( Settings.ScriptLogLevel, 0 )
+		self.build.debug( self.build, makeMessage )
+		self.build.debugN( self.build, 1, makeMessage )
+		self.assertEquals( calls, [] )
+		self.build.getSettings().set( Settings.ScriptLogLevel, 1 )
+		self.build.debugN( self.build, 1, makeMessage )
+		self.assertEquals( calls, [ True ] )
+		self.assertEquals( self.logger.messages, [ 'lazy' ] )
+
+	def testDuplicateMessages( self ):
+		self.build.message( self.build, 'first', 'a' )
+		self.build.message( self.build, 'first', 'a' )
+		self.build.message( self.build, 'first', 'b' )
+		self.assertEquals( self.logger.messages, [ 'first', 'first' ] )
+		# the cache is bounded, the least recently used messages are forgotten:
+		for index in range( Logger.DuplicateMessageCacheSize ):
+			self.build.message( self.build, 'message {0}'.format( index ), 'a' )
+		del self.logger.messages[:]
+		self.build.message( self.build, 'first', 'b' )
+		self.build.message( self.build, 'message {0}'.format( Logger.DuplicateMessageCacheSize - 1 ), 'a' )
+		self.assertEquals( self.logger.messages, [ 'first' ] )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,133 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import ConfigurationError
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.helpers.RunCommand import RunCommand
+from core.helpers.SafeDeleteTree import rmtree
+from core.helpers.XmlReport import InstructionsXmlReport
+from core.helpers.XmlReportConverter import XmlReportConverter
+from core.plugins.builders.MakeBasedBuilder import MakeBasedBuilder
+from core.plugins.testers.BuildProfileAnalyzer import BuildProfileAnalyzer, parse_ninja_log, target_kind
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+import os
+import sys
+import tempfile
+import unittest
+
+NINJA_LOG = '''# ninja log v5
+0\t1000\t0\tmain.o\t1a
+0\t500\t0\tutil.o\t2b
+1000\t1200\t0\tapp\t3c
+150\t1150\t0\tutil.o\t5e
+150\t1150\t0\tutil.d\t5e
+100\t2100\t0\tmain.o\t4d
+2100\t2600\t0\tlibfoo.so.1.2\t6f
+'''
+
+# the jobs finish in any order, libfoo.a is produced by two commands:
+LAUNCHER_LOG = '''# mom build time log v1
+1000100	1001100	0	util.o	1a
+1000000	1002000	0	main.o	2b
+1002000	1002100	0	libfoo.a	3c
+1002100	1002200	0	libfoo.a	4d
+'''
+
+class _NinjaLogBuilder( MakeBasedBuilder ):
+	'''A builder that writes a ninja log to the build directory instead of running make.'''
+
+	def preFlightCheck( self ):
+		pass
+
+	def setup( self ):
+		command = 'open( ".ninja_log", "w" ).write( {0} )'.format( repr( NINJA_LOG ) )
+		action = ShellCommandAction( [ sys.executable, '-c', command ] )
+		action.setWorkingDirectory( self._getBuildDir() )
+		self.getInstructions().getStep( 'build' ).addMainAction( action )
+
+class BuildProfileAnalyzerTests( MomBuildMockupTestCase ):
+
+	def testParseNinjaLog( self ):
+		# only the last build is reported, util.o and util.d are produced by the same command:
+		self.assertEquals( parse_ninja_log( NINJA_LOG ), [ ( 'util.o', 0.15, 1.15 ), ( 'main.o', 0.1, 2.1 ),
+			( 'libfoo.so.1.2', 2.1, 2.6 ) ] )
+
+	def testParseLauncherLog( self ):
+		targets = [ ( target, round( start, 3 ), round( end, 3 ) ) for target, start, end in parse_ninja_log( LAUNCHER_LOG ) ]
+		self.assertEquals( targets, [ ( 'util.o', 0.1, 1.1 ), ( 'main.o', 0.0, 2.0 ), ( 'libfoo.a', 2.0, 2.2 ) ] )
+
+	def testBuildTimeLauncher( self ):
+		# builds a CMake project with the variables the analyzer adds to the CMakeBuilder:
+		for tool in [ 'cmake', 'make', 'cc' ]:
+			try:
+				RunCommand( [ tool ] ).resolveCommand()
+			except ConfigurationError:
+				return # the tools are not installed
+		directory = tempfile.mkdtemp()
+		try:
+			sourceDir = os.path.join( directory, 'src' )
+			buildDir = os.path.join( directory, 'build' )
+			os.makedirs( sourceDir )
+			os.makedirs( buildDir )
+			sources = { 'CMakeLists.txt' : 'cmake_minimum_required( VERSION 3.5 )\nproject( demo C )\nadd_executable( app main.c )\n',
+				'main.c' : 'int main( void ) { return 0; }\n' }
+			for name, text in sources.items():
+				with open( os.path.join( sourceDir, name ), 'w' ) as file:
+					file.write( text )
+			analyzer = BuildProfileAnalyzer()
+			logFile = os.path.join( buildDir, analyzer.LauncherLogFile )
+			analyzer.getLogFilePath = lambda: logFile
+			variables = [ '-D{0}'.format( variable ) for variable in analyzer._getLauncherVariables() ]
+			for command in [ [ 'cmake' ] + variables + [ sourceDir ], [ 'make' ] ]:
+				runner = RunCommand( command )
+				runner.setWorkingDir( buildDir )
+				runner.run()
+				self.assertEquals( runner.getReturnCode(), 0, runner.getStdOut() )
+			with open( logFile ) as file:
+				targets = [ target for target, _, _ in parse_ninja_log( file.read() ) ]
+		finally:
+			rmtree( directory )
+		self.assertEquals( targets, [ 'CMakeFiles/app.dir/main.c.o', 'app' ] )
+
+	def testTargetKind( self ):
+		self.assertEquals( target_kind( 'src/main.o' ), 'compile' )
+		self.assertEquals( target_kind( 'main.obj' ), 'compile' )
+		self.assertEquals( target_kind( 'lib/libfoo.so.1.2' ), 'link' )
+		self.assertEquals( target_kind( 'bin/app' ), 'link' )
+		self.assertEquals( target_kind( 'moc_main.cpp' ), 'other' )
+
+	def testBuildProfile( self ):
+		MomBuildMockupTestCase.setUp( self, useEnvironments = True )
+		configuration = self.project.getChildren()[0].getChildren()[0]
+		analyzer = BuildProfileAnalyzer( slowestTargetsCount = 2 )
+		configuration.addPlugin( _NinjaLogBuilder() )
+		configuration.addPlugin( analyzer )
+		self.assertEquals( self.build.buildAndReturn(), 0 )
+		slowest = [ ( target, round( duration, 3 ) ) for target, duration in analyzer.getSlowestTargets() ]
+		self.assertEquals( slowest, [ ( 'main.o', 2.0 ), ( 'util.o', 1.0 ) ] )
+		totals = dict( [ ( kind, round( seconds, 3 ) ) for kind, seconds in analyzer.getTotalTimes().items() ] )
+		self.assertEquals( totals, { 'compile' : 3.0, 'link' : 0.5, 'other' : 0.0 } )
+		self.assertAlmostEquals( analyzer.getParallelism(), 3.5 / 2.5 )
+		converter = XmlReportConverter( InstructionsXmlReport( self.build ) )
+		self.assertTrue( 'main.o (compile): 2.0s' in converter.convertToText() )
+		if converter.hasXsltSupport():
+			self.assertTrue( 'parallelism 1.40' in converter.convertToHtml() )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,79 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Kevin Funk <kevin.funk@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from core.Plugin import Plugin
+from core.Settings import Settings
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.helpers.GlobalMApp import mApp
+from core.plugins.helpers.BuildTraceGenerator import BuildTraceGenerator
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+import json
+import os
+import sys
+import unittest
+
+class _ShellCommandPlugin( Plugin ):
+	'''Adds a shell command action to the build step.'''
+
+	def setup( self ):
+		action = ShellCommandAction( [ sys.executable, '-c', 'pass' ] )
+		self.getInstructions().getStep( 'build' ).addMainAction( action )
+
+class BuildTraceGeneratorTests( MomBuildMockupTestCase ):
+
+	def setUp( self ):
+		MomBuildMockupTestCase.setUp( self, useEnvironments = True )
+		self.generator = BuildTraceGenerator()
+		self.build.addPlugin( self.generator )
+		for configuration in self.project.getChildren()[0].getChildren():
+			configuration.addPlugin( _ShellCommandPlugin() )
+
+	def _executeBuild( self ):
+		mApp().getSettings().set( Settings.ScriptLogLevel, 5 )
+		self.assertEquals( self.build.buildAndReturn(), 0 )
+		self.assertTrue( os.path.isfile( self.generator.getTraceFile() ) )
+		with open( self.generator.getTraceFile() ) as f:
+			return json.load( f )[ 'traceEvents' ]
+
+	def testTraceEvents( self ):
+		events = self._executeBuild()
+		durations = [ event for event in events if event[ 'ph' ] == 'X' ]
+		self.assertEquals( set( [ event[ 'cat' ] for event in durations ] ), set( [ 'phase', 'plugin', 'step', 'action' ] ) )
+		for event in durations:
+			self.assertTrue( event[ 'ts' ] >= 0 and event[ 'dur' ] >= 0 )
+		names = [ event[ 'name' ] for event in durations ]
+		for name in [ 'setup', 'execute', 'build', '_ShellCommandPlugin.setup' ]:
+			self.assertTrue( name in names, '"{0}" is not in the trace'.format( name ) )
+		tracks = [ event[ 'args' ][ 'name' ] for event in events if event[ 'name' ] == 'thread_name' ]
+		self.assertTrue( 'configuration: Debug' in tracks and 'configuration: Release' in tracks )
+
+	def testNesting( self ):
+		events = [ event for event in self._executeBuild() if event[ 'ph' ] == 'X' ]
+		# the steps of a configuration are executed during the execute phase of the build:
+		phases = [ event for event in events if event[ 'name' ] == 'execute' and event[ 'cat' ] == 'phase' ]
+		execute = max( phases, key = lambda event: event[ 'dur' ] )
+		steps = [ event for event in events if event[ 'cat' ] == 'step' ]
+		self.assertTrue( steps )
+		for step in steps:
+			# allow for rounding to microseconds:
+			self.assertTrue( execute[ 'ts' ] <= step[ 'ts' ] + 1 )
+			self.assertTrue( step[ 'ts' ] + step[ 'dur' ] <= execute[ 'ts' ] + execute[ 'dur' ] + 2 )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,104 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Plugin import Plugin
+from core.Settings import Settings
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.helpers.GlobalMApp import mApp
+from core.helpers.SafeDeleteTree import rmtree
+from core.helpers.XmlReport import InstructionsXmlReport
+from core.helpers.XmlReportConverter import XmlReportConverter
+from core.plugins.helpers.TimingHistory import TimingHistory
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+import os
+import sys
+import tempfile
+import unittest
+
+class _SleepPlugin( Plugin ):
+	'''Adds an action to the build step that takes some time.'''
+
+	def __init__( self, seconds ):
+		Plugin.__init__( self )
+		self.__seconds = seconds
+
+	def setup( self ):
+		command = 'import time; time.sleep( {0} )'.format( self.__seconds )
+		self.getInstructions().getStep( 'build' ).addMainAction( ShellCommandAction( [ sys.executable, '-c', command ] ) )
+
+class TimingHistoryTests( MomBuildMockupTestCase ):
+
+	def setUp( self ):
+		MomBuildMockupTestCase.setUp( self, useEnvironments = True )
+		self.directory = tempfile.mkdtemp( prefix = 'mom-timing-history-' )
+		mApp().getSettings().set( Settings.TimingHistoryDatabase, os.path.join( self.directory, 'history.sqlite' ) )
+		mApp().getSettings().set( Settings.TimingHistoryRegressionMinimumSeconds, 0.1 )
+		self.history = TimingHistory()
+		self.build.addPlugin( self.history )
+		self.configuration = self.project.getChildren()[0].getChildren()[0]
+
+	def tearDown( self ):
+		MomBuildMockupTestCase.tearDown( self )
+		rmtree( self.directory )
+
+	def _saveBaseline( self, runs, duration ):
+		timings = [ ( 'step', TimingHistory._getInstructionsKey( self.configuration ), 'build', 'build', duration ) ]
+		connection = self.history.getConnection()
+		with connection:
+			for _ in range( runs ):
+				self.history.saveTimings( connection, 'm', None, True, timings )
+		connection.close()
+
+	def testRecordTimings( self ):
+		self.configuration.addPlugin( _SleepPlugin( 0 ) )
+		self.assertEquals( self.build.buildAndReturn(), 0 )
+		self.assertEquals( self.history.getBaselineRuns(), 0 )
+		connection = self.history.getConnection()
+		runs = connection.execute( 'SELECT build, buildtype, success FROM runs' ).fetchall()
+		self.assertEquals( runs, [ ( 'XmlReportTestBuild', 'm', 1 ) ] )
+		kinds = [ row[0] for row in connection.execute( 'SELECT DISTINCT kind FROM timings' ).fetchall() ]
+		self.assertEquals( set( kinds ), set( [ 'build', 'configuration', 'step', 'action' ] ) )
+		connection.close()
+
+	def testRegression( self ):
+		self._saveBaseline( 3, 0.01 )
+		self.configuration.addPlugin( _SleepPlugin( 0.3 ) )
+		self.assertEquals( self.build.buildAndReturn(), 0 )
+		self.assertEquals( self.history.getBaselineRuns(), 3 )
+		regressions = self.history.getRegressions()
+		self.assertEquals( len( regressions ), 1 )
+		instructions, stepName, duration, baseline = regressions[0]
+		self.assertEquals( ( instructions, stepName, baseline ), ( TimingHistory._getInstructionsKey( self.configuration ), 'build', 0.01 ) )
+		self.assertTrue( duration >= 0.3 )
+
+		converter = XmlReportConverter( InstructionsXmlReport( self.build ) )
+		self.assertTrue( 'Slower steps: "build" of ' in converter.convertToTextSummary() )
+		if converter.hasXsltSupport():
+			self.assertTrue( 'Steps slower than the baseline' in converter.convertToHtml( summaryOnly = True ) )
+			self.assertTrue( 'Step "build" of ' in converter.convertToHtml() )
+
+	def testNoRegression( self ):
+		self._saveBaseline( 3, 10.0 )
+		self.configuration.addPlugin( _SleepPlugin( 0 ) )
+		self.assertEquals( self.build.buildAndReturn(), 0 )
+		self.assertEquals( self.history.getRegressions(), [] )
+		self.assertFalse( 'Slower steps' in XmlReportConverter( InstructionsXmlReport( self.build ) ).convertToTextSummary() )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -39,18 +39,36 @@ from core.plugins.sourcecode.SCMSubversion import SCMSubversion
 from core.plugins.testers.CTest import CTest
 from mom.tests.buildcontrol.BuildScriptInterfaceTests import BuildScriptInterfaceTests
 from mom.tests.buildcontrol.BuildStatusPersistenceTests import BuildStatusPersistenceTests
+from mom.tests.buildcontrol.SimpleCiMetricsTests import SimpleCiMetricsTests
+from mom.tests.core.IncrementalBuildTests import IncrementalBuildTests
 from mom.tests.core.MApplicationTests import MApplicationTests
+from mom.tests.core.ParallelBuildTests import ParallelBuildTests
 from mom.tests.core.RunModeDescribeTests import RunModeDescribeTests
 from mom.tests.core.RunModePrintTests import RunModePrintTests
 from mom.tests.core.SettingsTests import SettingsTests
+from mom.tests.core.StepSchedulerTests import StepSchedulerTests
+from mom.tests.core.CriticalPathTests import CriticalPathTests
+from mom.tests.core.loggers.FileLoggerTests import FileLoggerTests
+from mom.tests.core.loggers.JsonEventLoggerTests import JsonEventLoggerTests
+from mom.tests.core.loggers.LoggerTests import LoggerTests
 from mom.tests.core.actions.FileSystemActionsTests import FileSystemActionsTests
 from mom.tests.core.environments.EnvironmentTests import EnvironmentTests
+from mom.tests.core.helpers.ActionCacheTests import ActionCacheTests
+from mom.tests.core.helpers.AsyncRunCommandTests import AsyncRunCommandTests
+from mom.tests.core.helpers.JobServerTests import JobServerTests
+from mom.tests.core.helpers.JobsCountTests import JobsCountTests
+from mom.tests.core.helpers.LogCompressionTests import LogCompressionTests
+from mom.tests.core.helpers.ProfilerTests import ProfilerTests
 from mom.tests.core.helpers.EnvironmentSaverTest import EnvironmentSaverTest
+from mom.tests.core.helpers.ExecutionContextTests import ExecutionContextTests
 from mom.tests.core.helpers.PathResolverTests import PathResolverTests
 from mom.tests.core.helpers.SettingResolverTests import SettingResolverTests
 from mom.tests.core.helpers.TemplateSupportTests import TemplateSupportTests
 from mom.tests.core.helpers.XmlReportTests import XmlReportTests
 from mom.tests.plugins.AnalyzerTests import AnalyzerTests
+from mom.tests.plugins.BuildTraceGeneratorTests import BuildTraceGeneratorTests
+from mom.tests.plugins.TimingHistoryTests import TimingHistoryTests
+from mom.tests.plugins.BuildProfileAnalyzerTests import BuildProfileAnalyzerTests
 from mom.tests.plugins.EmailReporterTest import EmailReporterTest
 from mom.tests.plugins.PreprocessorTests import PreprocessorTests
 from mom.tests.plugins.PyUnitTesterTests import PyUnitTesterTests
@@ -75,9 +93,13 @@ CLASSES = [
 
 	# others
 	AnalyzerTests,
+	BuildTraceGeneratorTests,
+	TimingHistoryTests,
+	BuildProfileAnalyzerTests,
 	EnvironmentTests,
 	BuildScriptInterfaceTests,
 	BuildStatusPersistenceTests,
+	SimpleCiMetricsTests,
 #	EmailerTest,
 	EmailReporterTest,
 	EnvironmentSaverTest,
@@ -96,7 +118,21 @@ CLASSES = [
 	TemplateSupportTests,
 	QTestTests,
 	SettingResolverTests,
-	MApplicationTests
+	MApplicationTests,
+	ParallelBuildTests,
+	StepSchedulerTests,
+	CriticalPathTests,
+	FileLoggerTests,
+	JsonEventLoggerTests,
+	LoggerTests,
+	ExecutionContextTests,
+	IncrementalBuildTests,
+	ActionCacheTests,
+	AsyncRunCommandTests,
+	JobServerTests,
+	JobsCountTests,
+	LogCompressionTests,
+	ProfilerTests
 ]
 
 DEPENDENCIES = [
@@ -0,0 +1,9 @@
+# This file is part of Make-O-Matic.
+#
+# Included into CMake projects (with CMAKE_PROJECT_INCLUDE, CMake 3.15 and later) by the BuildProfileAnalyzer, to record
+# the build time of every compiled object and linked target with build_time_launcher.py. Expects the variables
+# MOM_PYTHON (the Python interpreter), MOM_BUILD_TIME_LAUNCHER (the launcher script) and MOM_BUILD_TIME_LOG (the log file).
+
+set( _mom_launcher "\"${MOM_PYTHON}\" \"${MOM_BUILD_TIME_LAUNCHER}\" \"${MOM_BUILD_TIME_LOG}\"" )
+set_property( GLOBAL PROPERTY RULE_LAUNCH_COMPILE "${_mom_launcher} <OBJECT> --" )
+set_property( GLOBAL PROPERTY RULE_LAUNCH_LINK "${_mom_launcher} <TARGET> --" )
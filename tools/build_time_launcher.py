@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''build_time_launcher executes a compile or link command and appends it's start and end time to a build time log.
+It is used as the RULE_LAUNCH_COMPILE and RULE_LAUNCH_LINK launcher of CMake projects by the BuildProfileAnalyzer, see
+build_time_launcher.cmake. The log has the format of the .ninja_log file, with the times in milliseconds since the epoch.
+The launcher is executed for every compiler and linker call, so it does not import the make-o-matic modules.'''
+
+from __future__ import print_function
+import os
+import subprocess
+import sys
+import time
+import zlib
+
+LogHeader = '# mom build time log v1\n'
+
+def usage():
+	print( 'Usage: {0} LOG_FILE TARGET -- COMMAND [ARGUMENTS...]'.format( sys.argv[0] ), file = sys.stderr )
+
+def append_to_log( logFile, target, start, end, command ):
+	# the target is reported relative to the directory of the log file (the build directory):
+	target = os.path.relpath( os.path.abspath( target ), os.path.dirname( os.path.abspath( logFile ) ) )
+	line = '{0}\t{1}\t0\t{2}\t{3:x}\n'.format( int( start * 1000 ), int( end * 1000 ), target,
+		zlib.crc32( ' '.join( command ).encode( 'utf-8' ) ) & 0xffffffff )
+	# one write to a file opened for appending is atomic, the launchers of parallel jobs share the log:
+	fd = os.open( logFile, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644 )
+	try:
+		if os.fstat( fd ).st_size == 0:
+			line = LogHeader + line
+		os.write( fd, line.encode( 'utf-8' ) )
+	finally:
+		os.close( fd )
+
+def main( arguments = None ):
+	arguments = sys.argv[1:] if arguments is None else arguments
+	if len( arguments ) < 4 or arguments[2] != '--':
+		usage()
+		return 2
+	logFile, target, command = arguments[0], arguments[1], arguments[3:]
+	start = time.time()
+	try:
+		returnCode = subprocess.call( command )
+	except OSError as e:
+		print( 'Cannot execute {0}: {1}'.format( command[0], e ), file = sys.stderr )
+		return 127
+	try:
+		append_to_log( logFile, target, start, time.time(), command )
+	except ( IOError, OSError ) as e:
+		# a missing build time does not fail the build:
+		print( 'Cannot write the build time log "{0}": {1}'.format( logFile, e ), file = sys.stderr )
+	return returnCode
+
+if __name__ == "__main__":
+	sys.exit( main() )